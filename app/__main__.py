@@ -0,0 +1,61 @@
+"""命令行入口
+
+    python -m app ui           NiceGUI 界面 (默认，同 python -m app.main)
+    python -m app serve-feed   只提供 feed/WebSub 的轻量 HTTP 服务
+    python -m app worker       从共享队列领取抓取任务 (参数见 python -m app worker -h)
+    python -m app scheduler    只负责定时触发抓取
+    python -m app prefilter    训练 AI 本地预筛模型/查看节省的调用 (train|report)
+    python -m app backfill     重新分析缺少 AI 结果或分析失败的条目 (可中断，从检查点继续)
+    python -m app embeddings   重建文本向量、事件聚类与相关条目/查看向量存储 (rebuild|stats)
+
+每个命令只导入自己需要的模块，例如 serve-feed 不会加载 NiceGUI、DrissionPage、OpenAI 和 numpy。
+"""
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+COMMANDS = ('ui', 'serve-feed', 'worker', 'scheduler', 'prefilter', 'backfill', 'embeddings')
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog='python -m app', description='Smart Scraper RSS')
+    parser.add_argument('command', nargs='?', default='ui', choices=COMMANDS)
+    parser.add_argument('--host', help='serve-feed 监听地址 (默认 FEED_HOST)')
+    parser.add_argument('--port', type=int, help='serve-feed/ui 端口')
+    parser.add_argument('--no-show', action='store_true', help='ui 启动时不打开浏览器')
+    args, rest = parser.parse_known_args(argv)
+
+    load_dotenv()
+    if args.command == 'worker':
+        from app.worker import main as worker_main
+        return worker_main(rest)
+    if args.command == 'prefilter':
+        from app.ai.prefilter import main as prefilter_main
+        return prefilter_main(rest)
+    if args.command == 'backfill':
+        from app.services.ai_backfill import main as backfill_main
+        return backfill_main(rest)
+    if args.command == 'embeddings':
+        from app.services.embedding_service import main as embeddings_main
+        return embeddings_main(rest)
+    if rest:
+        parser.error(f"无法识别的参数: {' '.join(rest)}")
+
+    from app.core.log_buffer import configure_logging
+    configure_logging()
+    if args.command == 'serve-feed':
+        from app.headless import serve_feed
+        serve_feed(args.host, args.port)
+    elif args.command == 'scheduler':
+        from app.headless import run_scheduler
+        run_scheduler()
+    else:
+        from app.config import settings
+        if args.port:
+            settings.UI_PORT = args.port
+        from app import main as ui_main
+        ui_main.run(show=not args.no_show)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""AI 输入的 token 预算
+
+长文本 (尤其是视频字幕) 直接整段送入分析提示词会拖慢响应、增加费用，甚至超出上下文导致"分析失败"。
+analyze 之前先在本地估算 token 数，超出预算时按平台配置压缩：
+
+- truncate: 保留开头、结尾，以及中间关键词密度最高的句子 (不调用 API)
+- map_reduce: 按句子切块并发摘要，再把各块摘要合并后交给分析；
+  整个 map 阶段有总时限，超时或失败的块退回为该块的截断节选，保证延迟有上限
+
+配置见 settings.AI_BUDGET_*，按平台覆盖，例如::
+
+    AI_BUDGET_PLATFORMS='{"bilibili": {"mode": "map_reduce", "max_tokens": 4000}}'
+"""
+import logging
+import math
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ('none', 'truncate', 'map_reduce')
+
+# DeepSeek 文档给出的经验值：1 个中文字符约 0.6 token，1 个英文字符约 0.3 token
+CJK_TOKEN_RATIO = 0.6
+OTHER_TOKEN_RATIO = 0.3
+
+CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+SENTENCE_RE = re.compile(r'[^。！？!?；;\n]+(?:[。！？!?；;]+|\n+|$)|[。！？!?；;\n]+')
+WORD_RE = re.compile(r'[A-Za-z][A-Za-z0-9_\-]+|[\u4e00-\u9fff]{2,}')
+GAP = '……'
+
+@dataclass(frozen=True)
+class BudgetPolicy:
+    """单个平台的预算配置"""
+    mode: str = 'truncate'
+    max_tokens: int = 3000       # 送入分析提示词的正文上限
+    chunk_tokens: int = 2000     # map_reduce 每块大小
+    max_chunks: int = 8          # 块数上限，超出时加大块
+    summary_chars: int = 200     # 每块摘要的长度要求
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f'未知的预算模式: {self.mode} (可选 {", ".join(MODES)})')
+
+def policy_for(platform: Optional[str] = None) -> BudgetPolicy:
+    """全局配置叠加平台覆盖项"""
+    policy = BudgetPolicy(mode=settings.AI_BUDGET_MODE, max_tokens=settings.AI_BUDGET_MAX_TOKENS,
+                          chunk_tokens=settings.AI_CHUNK_TOKENS, max_chunks=settings.AI_MAX_CHUNKS)
+    overrides = settings.AI_BUDGET_PLATFORMS.get(platform or '')
+    return replace(policy, **overrides) if overrides else policy
+
+def estimate_tokens(text: str) -> int:
+    """本地估算 token 数 (不依赖分词器)"""
+    if not text:
+        return 0
+    cjk = len(CJK_RE.findall(text))
+    return math.ceil(cjk * CJK_TOKEN_RATIO + (len(text) - cjk) * OTHER_TOKEN_RATIO)
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in SENTENCE_RE.findall(text) if s.strip()]
+
+def _terms(sentence: str) -> List[str]:
+    """英文单词 + 中文二元组"""
+    terms = []
+    for word in WORD_RE.findall(sentence):
+        if word[0].isascii():
+            terms.append(word.lower())
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+def keyword_scores(sentences: List[str], top: int = 30) -> List[float]:
+    """
+    句子的关键词密度
+
+    以句子为文档计算 tf-idf 选出全文关键词，句子得分为其中关键词出现次数除以句子 token 数，
+    每句都出现的口头禅 idf 接近 0，不会被当成关键词
+    """
+    term_lists = [_terms(s) for s in sentences]
+    tf = Counter(t for terms in term_lists for t in terms)
+    df = Counter(t for terms in term_lists for t in set(terms))
+    n = len(sentences)
+    weights = {t: tf[t] * math.log(n / df[t]) for t in tf}
+    keywords = {t: w for t, w in sorted(weights.items(), key=lambda kv: -kv[1])[:top] if w > 0}
+    return [sum(keywords.get(t, 0) for t in terms) / max(estimate_tokens(s), 1)
+            for s, terms in zip(sentences, term_lists)]
+
+def smart_truncate(text: str, max_tokens: int) -> str:
+    """
+    截断到 max_tokens 以内：开头 40%、结尾 20%，其余预算按关键词密度挑选中间句子 (保持原顺序)，
+    不连续处以省略号连接
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = split_sentences(text)
+    costs = [estimate_tokens(s) for s in sentences]
+    # 整段没有断句 (或只有一句) 时按字符首尾截取
+    if len(sentences) < 3:
+        chars = max(int(len(text) * max_tokens / estimate_tokens(text)), 1)
+        head = chars * 2 // 3
+        return f'{text[:head]}{GAP}{text[len(text) - (chars - head):]}'
+
+    budget = max_tokens - estimate_tokens(GAP) * 2
+    chosen = set()
+
+    def take(indices, limit):
+        spent = 0
+        for i in indices:
+            if spent + costs[i] > limit:
+                break
+            chosen.add(i)
+            spent += costs[i]
+        return spent
+
+    spent = take(range(len(sentences)), budget * 0.4)
+    spent += take(range(len(sentences) - 1, -1, -1), budget * 0.2)
+    scores = keyword_scores(sentences)
+    middle = sorted((i for i in range(len(sentences)) if i not in chosen), key=lambda i: -scores[i])
+    for i in middle:
+        if spent + costs[i] <= budget:
+            chosen.add(i)
+            spent += costs[i]
+
+    parts, last = [], -1
+    for i in sorted(chosen):
+        if i != last + 1:
+            parts.append(GAP)
+        parts.append(sentences[i])
+        last = i
+    if last != len(sentences) - 1:
+        parts.append(GAP)
+    return ''.join(parts)
+
+def chunk_text(text: str, chunk_tokens: int) -> List[str]:
+    """按句子边界切块，每块不超过 chunk_tokens (单句超长时单独成块)"""
+    chunks, current, size = [], [], 0
+    for sentence in split_sentences(text):
+        cost = estimate_tokens(sentence)
+        if current and size + cost > chunk_tokens:
+            chunks.append(''.join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += cost
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+def map_reduce(text: str, summarize: Callable[[str, int], str], policy: BudgetPolicy,
+               timeout: Optional[float] = None, workers: Optional[int] = None) -> str:
+    """
+    分块并发摘要后合并
+
+    Args:
+        summarize: (块文本, 摘要字数) -> 摘要
+        timeout: map 阶段总时限 (秒)，超时未完成的块以截断节选代替
+    """
+    total = estimate_tokens(text)
+    chunk_tokens = max(policy.chunk_tokens, math.ceil(total / policy.max_chunks))
+    chunks = chunk_text(text, chunk_tokens)
+    while len(chunks) > policy.max_chunks:  # 按句子装箱会留空隙，块数可能略多
+        chunk_tokens = math.ceil(chunk_tokens * 1.1)
+        chunks = chunk_text(text, chunk_tokens)
+    share = max(policy.max_tokens // len(chunks), 1)
+    timeout = settings.AI_MAP_TIMEOUT if timeout is None else timeout
+
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=min(workers or settings.AI_MAP_WORKERS, len(chunks)),
+                                  thread_name_prefix='AIMap')
+    try:
+        futures = [executor.submit(summarize, chunk, policy.summary_chars) for chunk in chunks]
+        wait(futures, timeout=timeout)
+    finally:
+        # 不等待超时的调用，其结果直接丢弃
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    parts, fallbacks = [], 0
+    for i, (chunk, future) in enumerate(zip(chunks, futures), 1):
+        summary = None
+        if future.done() and not future.cancelled() and future.exception() is None:
+            summary = (future.result() or '').strip()
+        if not summary:
+            fallbacks += 1
+            summary = smart_truncate(chunk, share)
+        parts.append(f'【第{i}段】{summary}')
+    logger.info(f'分块摘要: {len(chunks)} 块, {fallbacks} 块退回截断, 用时 {time.monotonic() - started:.1f}s')
+    return smart_truncate('\n'.join(parts), policy.max_tokens)
+
+def fit_budget(text: str, platform: Optional[str] = None,
+               summarize: Optional[Callable[[str, int], str]] = None) -> str:
+    """
+    按平台预算压缩文本；未超预算时原样返回
+
+    Args:
+        summarize: map_reduce 模式使用的摘要函数；未提供时退回 truncate
+    """
+    policy = policy_for(platform)
+    if policy.mode == 'none' or estimate_tokens(text) <= policy.max_tokens:
+        return text
+    if policy.mode == 'map_reduce' and summarize is not None:
+        return map_reduce(text, summarize, policy)
+    return smart_truncate(text, policy.max_tokens)
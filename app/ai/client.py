@@ -1,6 +1,9 @@
 import os
+from typing import Optional
 from openai import OpenAI
-from app.ai.prompts import get_content_analysis_prompt, SYSTEM_PROMPT
+from app.ai.prompts import get_content_analysis_prompt, get_summary_prompt, SYSTEM_PROMPT
+from app.ai.budget import fit_budget
+from app.config import settings
 import json
 
 class AIProcessor:
@@ -11,20 +14,32 @@ class AIProcessor:
         
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://api.deepseek.com"
+            base_url="https://api.deepseek.com",
+            timeout=settings.AI_REQUEST_TIMEOUT
         )
     
-    def analyze(self, text: str) -> dict:
+    def summarize(self, text: str, max_length: int = 200) -> str:
+        """生成纯文本摘要 (长文本分块摘要时调用，失败时抛出异常)"""
+        response = self.client.chat.completions.create(
+            model="deepseek-chat",
+            messages=[{"role": "user", "content": get_summary_prompt(text, max_length)}],
+            temperature=0.3
+        )
+        return response.choices[0].message.content
+    
+    def analyze(self, text: str, platform: Optional[str] = None) -> dict:
         """
         分析文本内容
         
         Args:
-            text: 要分析的文本
+            text: 要分析的文本，超出 token 预算时先按平台配置截断或分块摘要
+            platform: 平台名称，用于选择预算配置 (settings.AI_BUDGET_PLATFORMS)
             
         Returns:
             分析结果字典，包含 summary, sentiment, keywords, is_ad, category
         """
         try:
+            text = fit_budget(text, platform, self.summarize)
             response = self.client.chat.completions.create(
                 model="deepseek-chat",
                 messages=[
@@ -0,0 +1,119 @@
+"""文本向量 (embedding) 后端
+
+由 settings.EMBEDDING_BACKEND 选择：
+- hashing: 字符 n-gram 特征哈希 (默认)，纯 numpy、无需下载模型；对转载、同一事件的多篇报道足够敏感，
+  但不理解同义改写
+- sentence-transformers: 本地 CPU 模型 (需安装 sentence-transformers)，EMBEDDING_MODEL 指定模型名
+- api: OpenAI 兼容的 /embeddings 接口，EMBEDDING_API_BASE/EMBEDDING_API_KEY/EMBEDDING_MODEL 指定
+
+所有后端返回 L2 归一化的 float32 矩阵，点积即余弦相似度。
+"""
+import re
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+BACKENDS = ('hashing', 'sentence-transformers', 'api')
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9_\-]+|[぀-ヿ㐀-䶿一-鿿豈-﫿]+')
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+class Embedder:
+    """向量后端基类"""
+    name = ''
+    dim = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """返回 (len(texts), dim) 的 float32 矩阵，每行已归一化"""
+        raise NotImplementedError
+
+class HashingEmbedder(Embedder):
+    """中文二元组/三元组 + 英文单词，带符号哈希到 dim 维，tf 取平方根"""
+    name = 'hashing'
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        grams = []
+        for token in TOKEN_RE.findall(text.lower()):
+            if token[0].isascii():
+                grams.append(token)
+                continue
+            grams.extend(token[i:i + 2] for i in range(len(token) - 1))
+            grams.extend(token[i:i + 3] for i in range(len(token) - 2))
+            if len(token) == 1:
+                grams.append(token)
+        return grams
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            for gram in self.features(text or ''):
+                rows.append(row)
+                hashes.append(zlib.crc32(gram.encode()))
+        if not hashes:
+            return np.zeros((len(texts), self.dim), dtype=np.float32)
+        hashes = np.array(hashes, dtype=np.uint32)
+        # 低位决定维度，最高位决定符号，减小哈希冲突带来的偏差
+        signs = np.where(hashes >> 31, -1.0, 1.0)
+        cells = np.array(rows, dtype=np.int64) * self.dim + (hashes % self.dim)
+        # 同一格内先按符号累加，再对绝对值开方 (次线性 tf)
+        counts = np.bincount(cells, weights=signs, minlength=len(texts) * self.dim)
+        vectors = (np.sign(counts) * np.sqrt(np.abs(counts))).reshape(len(texts), self.dim)
+        return normalize(vectors).astype(np.float32)
+
+class SentenceTransformerEmbedder(Embedder):
+    """sentence-transformers 本地模型 (首次使用时加载)"""
+    name = 'sentence-transformers'
+
+    def __init__(self, model: Optional[str] = None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError('EMBEDDING_BACKEND=sentence-transformers 需要先安装 sentence-transformers') from None
+        self.model_name = model or settings.EMBEDDING_MODEL or 'BAAI/bge-small-zh-v1.5'
+        self.model = SentenceTransformer(self.model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f'{SentenceTransformerEmbedder.name}:{self.model_name}'
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=32, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+class APIEmbedder(Embedder):
+    """OpenAI 兼容的 embeddings 接口；向量维度须与 EMBEDDING_DIM 一致"""
+    name = 'api'
+
+    def __init__(self):
+        from openai import OpenAI
+        if not settings.EMBEDDING_API_BASE or not settings.EMBEDDING_MODEL:
+            raise ValueError('EMBEDDING_BACKEND=api 需要配置 EMBEDDING_API_BASE 和 EMBEDDING_MODEL')
+        self.client = OpenAI(api_key=settings.EMBEDDING_API_KEY or 'none', base_url=settings.EMBEDDING_API_BASE,
+                             timeout=settings.AI_REQUEST_TIMEOUT)
+        self.dim = settings.EMBEDDING_DIM
+        self.name = f'{APIEmbedder.name}:{settings.EMBEDDING_MODEL}'
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embeddings.create(model=settings.EMBEDDING_MODEL, input=texts)
+        vectors = np.array([d.embedding for d in sorted(response.data, key=lambda d: d.index)], dtype=np.float32)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f'接口返回 {vectors.shape[1]} 维向量，与 EMBEDDING_DIM={self.dim} 不一致')
+        return normalize(vectors)
+
+def create_embedder(backend: Optional[str] = None) -> Embedder:
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == 'hashing':
+        return HashingEmbedder(settings.EMBEDDING_DIM)
+    if backend == 'sentence-transformers':
+        return SentenceTransformerEmbedder()
+    if backend == 'api':
+        return APIEmbedder()
+    raise ValueError(f'未知的向量后端: {backend} (可选 {", ".join(BACKENDS)})')
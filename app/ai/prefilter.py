@@ -0,0 +1,373 @@
+"""本地预筛 - 在调用 DeepSeek 之前廉价地判断条目是否值得分析
+
+每个新条目依次经过：
+1. 规则：空页面 ('无内容')、过短文本直接跳过
+2. 近似重复：与最近经 API 分析过的条目 SimHash 海明距离很小 (转载、重复抓取) 时复用其分析结果
+3. 线性模型：特征哈希 (中文二元组 + 英文单词 + 少量启发式特征) + 逻辑回归，
+   预测为低质量 (ai_score < PREFILTER_JUNK_SCORE) 的概率超过 PREFILTER_SKIP_PROB 时跳过
+
+模型用库中已有的 AI 评分训练，保存为 npz；训练命令写入新模型后，运行中的进程按 mtime 自动重新加载。
+条目的 ai_source 记录结果来源 (api/skip/reuse)，用于统计节省的调用比例::
+
+    python -m app prefilter train    # 重新训练
+    python -m app prefilter report   # 节省比例
+"""
+import argparse
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.database import crud
+
+logger = logging.getLogger(__name__)
+
+# 结果来源 (ScrapedItem.ai_source)
+API = 'api'
+SKIP = 'skip'
+REUSE = 'reuse'
+
+HASH_DIM = 2 ** 16
+EMPTY_CONTENT = ('', '无内容')
+AD_WORDS = ('广告', '推广', '优惠', '折扣', '领券', '下单', '私信', '加微', '微信', 'vx', '代购', '抽奖',
+            '转发', '关注', '链接', '福利', '免费领', '点击', '扫码', '团购', '秒杀', '限时')
+URL_RE = re.compile(r'https?://\S+')
+WORD_RE = re.compile(r'[a-z][a-z0-9_\-]+|[\u4e00-\u9fff]+')
+SIMHASH_STRIP_RE = re.compile(r'[\s\W_]+')
+
+# ===== 特征 =====
+
+def _tokens(text: str) -> List[str]:
+    tokens = []
+    for word in WORD_RE.findall(text.lower()):
+        if word[0].isascii():
+            tokens.append(word)
+        elif len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+def heuristic_features(title: str, content: str) -> List[float]:
+    """长度、链接、数字、重复字符、广告词等启发式特征 (大致缩放到 0~1)"""
+    text = f'{title}\n{content}'
+    length = max(len(content), 1)
+    digits = sum(c.isdigit() for c in content)
+    return [
+        math.log1p(len(content)) / 10,
+        math.log1p(len(title)) / 5,
+        min(len(URL_RE.findall(text)), 5) / 5,
+        digits / length,
+        1 - len(set(content)) / length if len(content) > 20 else 0.0,  # 重复字符越多越接近 1
+        min(sum(text.lower().count(w) for w in AD_WORDS), 10) / 10,
+        min(text.count('!') + text.count('！'), 10) / 10,
+        1.0 if content.strip() in EMPTY_CONTENT else 0.0,
+    ]
+
+HEURISTIC_COUNT = len(heuristic_features('', ''))
+
+def vectorize(title: str, content: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    稀疏特征向量
+
+    Returns:
+        (下标, 取值)；词项哈希到 [0, HASH_DIM)，标题与正文分开计数，取 log(1+tf) 后 L2 归一化；
+        启发式特征固定在 HASH_DIM 之后
+    """
+    counts = Counter(zlib.crc32(f't:{t}'.encode()) % HASH_DIM for t in _tokens(title))
+    counts.update(zlib.crc32(t.encode()) % HASH_DIM for t in _tokens(content))
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    norm = float(np.linalg.norm(values))
+    if norm:
+        values /= norm
+    indices = np.concatenate([indices, np.arange(HASH_DIM, HASH_DIM + HEURISTIC_COUNT)])
+    values = np.concatenate([values, np.array(heuristic_features(title, content), dtype=np.float32)])
+    return indices, values
+
+def simhash(text: str) -> Optional[int]:
+    """字符三元组的 64 位 SimHash；去掉空白标点后不足 20 字时返回 None (太短的文本不做近似匹配)"""
+    text = SIMHASH_STRIP_RE.sub('', text.lower())
+    if len(text) < 20:
+        return None
+    grams = {text[i:i + 3] for i in range(len(text) - 2)}
+    hashes = np.frombuffer(b''.join(hashlib.blake2b(g.encode(), digest_size=8).digest() for g in grams),
+                           dtype=np.uint64)
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(hashes), 64)
+    signature = np.packbits(bits.sum(axis=0) * 2 > len(hashes))
+    return int.from_bytes(signature.tobytes(), 'big')
+
+# ===== 逻辑回归 =====
+
+class LinearModel:
+    """稀疏输入的逻辑回归"""
+
+    def __init__(self, weights: np.ndarray, bias: float, samples: int = 0, trained_at: float = 0.0):
+        self.weights = weights
+        self.bias = bias
+        self.samples = samples
+        self.trained_at = trained_at
+
+    @staticmethod
+    def _stack(rows: Sequence[Tuple[np.ndarray, np.ndarray]]):
+        """拼接成 CSR 形式 (indices, values, 每个值所属的行)"""
+        lengths = np.array([len(i) for i, _ in rows])
+        indices = np.concatenate([i for i, _ in rows])
+        values = np.concatenate([v for _, v in rows]).astype(np.float64)
+        row_of = np.repeat(np.arange(len(rows)), lengths)
+        return indices, values, row_of
+
+    def decision(self, rows: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        indices, values, row_of = self._stack(rows)
+        return np.bincount(row_of, weights=self.weights[indices] * values, minlength=len(rows)) + self.bias
+
+    def predict(self, rows: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        """低质量概率"""
+        return 1 / (1 + np.exp(-self.decision(rows)))
+
+    @classmethod
+    def fit(cls, rows: Sequence[Tuple[np.ndarray, np.ndarray]], labels: Sequence[int],
+            epochs: int = 300, learning_rate: float = 1.0, l2: float = 1e-4) -> 'LinearModel':
+        """全量梯度下降 (Adagrad)，按类别频率加权以应对正负样本不均衡"""
+        y = np.asarray(labels, dtype=np.float64)
+        positives = y.sum()
+        sample_weight = np.where(y == 1, len(y) / (2 * max(positives, 1)), len(y) / (2 * max(len(y) - positives, 1)))
+        indices, values, row_of = cls._stack(rows)
+        dim = HASH_DIM + HEURISTIC_COUNT
+        model = cls(np.zeros(dim), 0.0, samples=len(y), trained_at=time.time())
+        g2, b2 = np.full(dim, 1e-8), 1e-8
+        for _ in range(epochs):
+            z = np.bincount(row_of, weights=model.weights[indices] * values, minlength=len(y)) + model.bias
+            error = (1 / (1 + np.exp(-z)) - y) * sample_weight / len(y)
+            grad = np.bincount(indices, weights=values * error[row_of], minlength=dim) + l2 * model.weights
+            grad_b = error.sum()
+            g2 += grad ** 2
+            b2 += grad_b ** 2
+            model.weights -= learning_rate * grad / np.sqrt(g2)
+            model.bias -= learning_rate * grad_b / math.sqrt(b2)
+        return model
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f'{path}.tmp.npz'
+        np.savez_compressed(tmp, weights=self.weights.astype(np.float32), bias=self.bias,
+                            samples=self.samples, trained_at=self.trained_at, hash_dim=HASH_DIM)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'LinearModel':
+        with np.load(path) as data:
+            if int(data['hash_dim']) != HASH_DIM or len(data['weights']) != HASH_DIM + HEURISTIC_COUNT:
+                raise ValueError('模型特征维度与当前版本不一致，请重新训练')
+            return cls(data['weights'].astype(np.float64), float(data['bias']),
+                       int(data['samples']), float(data['trained_at']))
+
+# ===== 预筛 =====
+
+@dataclass
+class Decision:
+    action: str                          # api/skip/reuse
+    reason: str
+    probability: Optional[float] = None  # 模型给出的低质量概率
+    analysis: Optional[Dict] = None      # skip/reuse 时直接使用的分析结果 (与 AIProcessor.analyze 格式相同)
+
+def skip_analysis(reason: str) -> Dict:
+    return {'summary': f'本地预筛跳过: {reason}', 'sentiment': 'Neutral', 'score': 0, 'risk_level': 'Unknown'}
+
+def is_labelled(analysis: Dict) -> bool:
+    """API 成功返回的分析结果 (失败时 risk_level 为 Unknown)"""
+    return analysis.get('risk_level', 'Unknown') != 'Unknown' and analysis.get('summary') != '分析失败'
+
+class Prefilter:
+    """本地预筛 - 单例模式；模型与近似重复索引在首次使用时加载"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Prefilter, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._model = None
+            cls._instance._model_mtime = None
+            cls._instance._signatures = None  # np.uint64 数组，与 _analyses 一一对应
+            cls._instance._analyses = []
+        return cls._instance
+
+    @property
+    def model(self) -> Optional[LinearModel]:
+        """当前模型；文件不存在或样本不足时为 None (只使用规则与近似重复)"""
+        path = settings.PREFILTER_MODEL_PATH
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            if mtime != self._model_mtime:
+                self._model_mtime = mtime
+                try:
+                    self._model = LinearModel.load(path)
+                    logger.info(f'已加载预筛模型 ({self._model.samples} 个样本)')
+                except Exception as e:
+                    logger.error(f'加载预筛模型失败: {e}')
+                    self._model = None
+            model = self._model
+        if model is None or model.samples < settings.PREFILTER_MIN_SAMPLES:
+            return None
+        return model
+
+    def _load_neighbors(self):
+        if self._signatures is not None:
+            return
+        signatures, analyses = [], []
+        for row in crud.get_analyzed_items(settings.PREFILTER_NEIGHBORS):
+            signature = simhash(f'{row.title}\n{row.content}')
+            if signature is not None:
+                signatures.append(signature)
+                analyses.append({'summary': row.ai_summary, 'sentiment': row.sentiment,
+                                 'score': row.ai_score, 'risk_level': row.risk_level})
+        self._signatures = np.array(signatures, dtype=np.uint64)
+        self._analyses = analyses
+
+    def find_neighbor(self, signature: int) -> Optional[Dict]:
+        with self._lock:
+            self._load_neighbors()
+            if not len(self._signatures):
+                return None
+            xor = self._signatures ^ np.uint64(signature)
+            distances = np.unpackbits(xor.view(np.uint8)).reshape(len(xor), 64).sum(axis=1)
+            best = int(distances.argmin())
+            if distances[best] > settings.PREFILTER_REUSE_DISTANCE:
+                return None
+            return dict(self._analyses[best])
+
+    def remember(self, title: str, content: str, analysis: Dict):
+        """记录一次 API 分析结果，供之后的近似重复条目复用"""
+        signature = simhash(f'{title}\n{content}')
+        if signature is None or not is_labelled(analysis):
+            return
+        with self._lock:
+            self._load_neighbors()
+            self._signatures = np.append(self._signatures, np.uint64(signature))[-settings.PREFILTER_NEIGHBORS:]
+            self._analyses = (self._analyses + [dict(analysis)])[-settings.PREFILTER_NEIGHBORS:]
+
+    def decide(self, title: str, content: str, has_transcript: bool = False) -> Decision:
+        """
+        判断是否需要调用 AI
+
+        Args:
+            has_transcript: 条目另有字幕 (正文为空也可能有价值，不按长度规则跳过)
+        """
+        content = content or ''
+        if not has_transcript:
+            if content.strip() in EMPTY_CONTENT:
+                return Decision(SKIP, '正文为空', analysis=skip_analysis('正文为空'))
+            if len(title.strip()) + len(content.strip()) < settings.PREFILTER_MIN_CHARS:
+                return Decision(SKIP, '文本过短', analysis=skip_analysis('文本过短'))
+
+        signature = simhash(f'{title}\n{content}')
+        if signature is not None:
+            analysis = self.find_neighbor(signature)
+            if analysis is not None:
+                return Decision(REUSE, '与已分析条目近似', analysis=analysis)
+
+        model = self.model
+        if model is None:
+            return Decision(API, '无可用模型')
+        probability = float(model.predict([vectorize(title, content)])[0])
+        if probability >= settings.PREFILTER_SKIP_PROB and not has_transcript:
+            reason = f'疑似低质量内容 (p={probability:.2f})'
+            return Decision(SKIP, reason, probability, skip_analysis(reason))
+        return Decision(API, '需要 AI 分析', probability)
+
+    def reset(self):
+        """丢弃已加载的模型与索引 (测试或切换数据库后使用)"""
+        with self._lock:
+            self._model = None
+            self._model_mtime = None
+            self._signatures = None
+            self._analyses = []
+
+# 全局实例
+prefilter = Prefilter()
+
+# ===== 训练与报告 =====
+
+def train_from_db(path: Optional[str] = None, limit: int = 50000, holdout: float = 0.2,
+                  seed: int = 0) -> Dict:
+    """
+    用库中 API 分析过的条目训练模型并保存
+
+    Returns:
+        训练统计：样本数、低质量样本数，以及留出集上按 PREFILTER_SKIP_PROB 跳过时的精确率/召回率
+    """
+    rows = crud.get_analyzed_items(limit)
+    features = [vectorize(r.title, r.content) for r in rows]
+    labels = np.array([1 if r.ai_score < settings.PREFILTER_JUNK_SCORE else 0 for r in rows])
+    stats = {'samples': len(rows), 'junk': int(labels.sum())}
+    if len(rows) < settings.PREFILTER_MIN_SAMPLES or stats['junk'] in (0, len(rows)):
+        stats['error'] = f'样本不足 (至少 {settings.PREFILTER_MIN_SAMPLES} 条，且需同时包含高/低质量条目)'
+        return stats
+
+    order = np.random.default_rng(seed).permutation(len(rows))
+    cut = int(len(rows) * holdout)
+    test, train = order[:cut], order[cut:]
+    if cut:
+        model = LinearModel.fit([features[i] for i in train], labels[train])
+        skipped = model.predict([features[i] for i in test]) >= settings.PREFILTER_SKIP_PROB
+        truth = labels[test] == 1
+        stats['holdout'] = int(cut)
+        stats['holdout_skip_rate'] = float(skipped.mean())
+        stats['precision'] = float(truth[skipped].mean()) if skipped.any() else None
+        stats['recall'] = float(skipped[truth].mean()) if truth.any() else None
+
+    model = LinearModel.fit(features, labels)
+    model.save(path or settings.PREFILTER_MODEL_PATH)
+    return stats
+
+def savings_report(days: Optional[int] = None) -> Dict:
+    """按结果来源统计条目数；节省比例 = (skip + reuse) / 经过预筛的条目数"""
+    counts = crud.get_ai_source_counts(days)
+    decided = sum(counts.get(k, 0) for k in (API, SKIP, REUSE))
+    saved = counts.get(SKIP, 0) + counts.get(REUSE, 0)
+    return {'counts': counts, 'decided': decided, 'saved': saved,
+            'saved_ratio': saved / decided if decided else 0.0}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app prefilter', description='本地预筛模型')
+    sub = parser.add_subparsers(dest='action', required=True)
+    train = sub.add_parser('train', help='用库中已有的 AI 评分重新训练')
+    train.add_argument('--limit', type=int, default=50000, help='最多使用最近多少条样本')
+    train.add_argument('--output', help='模型路径 (默认 PREFILTER_MODEL_PATH)')
+    report = sub.add_parser('report', help='统计预筛节省的 API 调用')
+    report.add_argument('--days', type=int, help='只统计最近 N 天')
+    args = parser.parse_args(argv)
+
+    from app.database import create_db_and_tables
+    create_db_and_tables()
+    if args.action == 'train':
+        stats = train_from_db(args.output, args.limit)
+        if 'error' in stats:
+            print(f"训练失败: {stats['error']} (当前 {stats['samples']} 条，低质量 {stats['junk']} 条)")
+            return 1
+        print(f"训练完成: {stats['samples']} 条样本，低质量 {stats['junk']} 条")
+        if stats.get('holdout'):
+            fmt = lambda v: '-' if v is None else f'{v:.1%}'
+            print(f"留出集 {stats['holdout']} 条: 跳过 {fmt(stats['holdout_skip_rate'])}，"
+                  f"精确率 {fmt(stats['precision'])}，召回率 {fmt(stats['recall'])}")
+        print(f"模型已保存到 {args.output or settings.PREFILTER_MODEL_PATH}")
+    else:
+        report = savings_report(args.days)
+        counts = report['counts']
+        print(f"API 分析 {counts.get(API, 0)}，预筛跳过 {counts.get(SKIP, 0)}，复用近似条目 {counts.get(REUSE, 0)}，"
+              f"预筛前的旧条目 {counts.get(None, 0)}")
+        print(f"节省 API 调用 {report['saved']}/{report['decided']} ({report['saved_ratio']:.1%})")
+    return 0
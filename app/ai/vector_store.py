@@ -0,0 +1,262 @@
+"""向量存储与检索
+
+VectorStore 把向量以 float16 写入内存映射文件，第 i 行就是条目 id=i 的向量 (id 自增且基本连续，
+直接寻址，无需额外的 id 映射)；全零行表示该条目没有向量。文件按行数翻倍扩容，
+10 万条 256 维约 50MB，常驻内存的只有操作系统的页缓存。
+rows 只随本进程的 put() 增长，文件只支持一个写入进程 (见 embedding_service)。
+
+检索全部向量化：
+- 暴力检索按块把 float16 转为 float32 做矩阵乘法，内存占用与块大小成正比
+- IVFIndex 用球面 k-means 把向量分为 √n 个簇，查询只扫描最近的 nprobe 个簇；
+  建索引之后新增的向量单独暴力扫描，增长过多时由调用方重建
+"""
+import json
+import logging
+import os
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 8192
+MIN_CAPACITY = 1024
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """分数最高的 k 个下标 (降序)"""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(scores.size)
+    return idx[np.argsort(-scores[idx], kind='stable')]
+
+class VectorStore:
+    """按条目 id 寻址的 float16 向量文件"""
+
+    def __init__(self, directory: str, dim: int, backend: str = ''):
+        self.directory = directory
+        self.dim = dim
+        self.backend = backend
+        self.path = os.path.join(directory, 'vectors.f16')
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self._lock = threading.RLock()
+        self._mm: Optional[np.memmap] = None
+        self.rows = 0   # 已写入的最大 id + 1
+        os.makedirs(directory, exist_ok=True)
+        self._load_meta()
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if meta and meta.get('dim') == self.dim and meta.get('backend') == self.backend:
+            self.rows = meta.get('rows', 0)
+            return
+        if meta or os.path.exists(self.path):
+            # 维度或后端变了，旧向量不可比较，需要重新生成
+            logger.warning(f'向量文件与当前后端 {self.backend}/{self.dim} 维不一致，已清空')
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.rows = 0
+        self._save_meta()
+
+    def _save_meta(self):
+        tmp = f'{self.meta_path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'backend': self.backend, 'dim': self.dim, 'rows': self.rows}, f)
+        os.replace(tmp, self.meta_path)
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._mm is None else self._mm.shape[0]
+
+    def _matrix(self, min_rows: int = 0) -> Optional[np.memmap]:
+        """打开 (必要时扩容) 内存映射；文件不存在且不需要写入时返回 None"""
+        if self._mm is not None and self._mm.shape[0] >= min_rows:
+            return self._mm
+        row_bytes = self.dim * 2
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        capacity = size // row_bytes
+        if capacity < min_rows:
+            capacity = max(MIN_CAPACITY, capacity)
+            while capacity < min_rows:
+                capacity *= 2
+            if self._mm is not None:
+                self._mm.flush()
+                self._mm = None
+            with open(self.path, 'ab') as f:
+                f.truncate(capacity * row_bytes)
+        if capacity == 0:
+            return None
+        self._mm = np.memmap(self.path, dtype=np.float16, mode='r+', shape=(capacity, self.dim))
+        return self._mm
+
+    def put(self, ids: Iterable[int], vectors: np.ndarray):
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if ids.size == 0:
+            return
+        with self._lock:
+            matrix = self._matrix(int(ids.max()) + 1)
+            matrix[ids] = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+            self.rows = max(self.rows, int(ids.max()) + 1)
+
+    def flush(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+            self._save_meta()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._mm = None
+
+    def get(self, ids: Iterable[int]) -> np.ndarray:
+        """取出向量 (float32)；超出范围或没有向量的行为全零"""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        out = np.zeros((ids.size, self.dim), dtype=np.float32)
+        with self._lock:
+            matrix = self._matrix()
+            if matrix is None:
+                return out
+            valid = (ids >= 0) & (ids < self.rows)
+            out[valid] = matrix[ids[valid]]
+        return out
+
+    def has(self, item_id: int) -> bool:
+        return bool(np.any(self.get([item_id])))
+
+    def iter_chunks(self, start: int = 0, stop: Optional[int] = None, chunk_rows: int = CHUNK_ROWS):
+        """按块产出 (起始 id, float32 矩阵)"""
+        with self._lock:
+            matrix = self._matrix()
+            stop = self.rows if stop is None else min(stop, self.rows)
+        if matrix is None:
+            return
+        for begin in range(max(start, 0), stop, chunk_rows):
+            yield begin, np.asarray(matrix[begin:min(begin + chunk_rows, stop)], dtype=np.float32)
+
+    def valid_ids(self) -> np.ndarray:
+        """有向量的条目 id"""
+        parts = [begin + np.flatnonzero(chunk.any(axis=1)) for begin, chunk in self.iter_chunks()]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def count(self) -> int:
+        return int(self.valid_ids().size)
+
+    def search(self, query: np.ndarray, k: int = 10, start: int = 0, stop: Optional[int] = None,
+               min_score: float = -1.0, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """暴力检索 id 在 [start, stop) 内的向量，返回 [(id, 余弦相似度)] 降序"""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        exclude = set(exclude)
+        want = k + len(exclude)
+        best_ids, best_scores = [], []
+        for begin, chunk in self.iter_chunks(start, stop):
+            scores = chunk @ query
+            # 全零行 (没有向量) 的分数恰为 0，不参与排序；真实向量恰好正交的概率可以忽略
+            scores[scores == 0] = -np.inf
+            idx = top_k(scores, want)
+            best_ids.append(idx + begin)
+            best_scores.append(scores[idx])
+        return merge_results(best_ids, best_scores, k, min_score, exclude)
+
+def merge_results(ids: List[np.ndarray], scores: List[np.ndarray], k: int, min_score: float,
+                  exclude: set) -> List[Tuple[int, float]]:
+    if not ids:
+        return []
+    ids, scores = np.concatenate(ids), np.concatenate(scores)
+    results = []
+    for i in top_k(scores, scores.size):
+        if scores[i] < min_score or not np.isfinite(scores[i]):
+            break
+        if int(ids[i]) in exclude:
+            continue
+        results.append((int(ids[i]), float(scores[i])))
+        if len(results) >= k:
+            break
+    return results
+
+class IVFIndex:
+    """倒排文件索引 (IVF-Flat)：只存簇中心和每个簇的 id 列表，向量仍从 VectorStore 读取"""
+
+    def __init__(self, store: VectorStore, nprobe: int = 8):
+        self.store = store
+        self.nprobe = nprobe
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self.size = 0                 # 建索引时的向量数
+        self.built_rows = 0           # 建索引时的 store.rows，此后的 id 暴力扫描
+        self._extra: List[int] = []   # 建索引后更新过的旧 id
+
+    def build(self, nlist: Optional[int] = None, sample: int = 50000, iterations: int = 10, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        ids = self.store.valid_ids()
+        self.built_rows = self.store.rows
+        self._extra = []
+        self.size = int(ids.size)
+        if ids.size == 0:
+            self.centroids, self.lists = None, []
+            return
+        nlist = min(nlist or max(1, int(np.sqrt(ids.size))), ids.size)
+        train = self.store.get(np.sort(rng.choice(ids, min(sample, ids.size), replace=False)))
+        centroids = train[rng.choice(len(train), nlist, replace=False)]
+        for _ in range(iterations):
+            assign = self._nearest(train, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, train)
+            empty = np.bincount(assign, minlength=nlist) == 0
+            # 空簇重新取随机样本作为中心，避免簇数塌缩
+            sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+        self.centroids = centroids.astype(np.float32)
+
+        assign = np.empty(ids.size, dtype=np.int64)
+        for begin in range(0, ids.size, CHUNK_ROWS):
+            part = ids[begin:begin + CHUNK_ROWS]
+            assign[begin:begin + CHUNK_ROWS] = self._nearest(self.store.get(part), self.centroids)
+        order = np.argsort(assign, kind='stable')
+        bounds = np.cumsum(np.bincount(assign, minlength=nlist))
+        self.lists = np.split(ids[order], bounds[:-1])
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ centroids.T, axis=1)
+
+    @property
+    def ready(self) -> bool:
+        return self.centroids is not None
+
+    def mark_updated(self, item_id: int):
+        """建索引后改写了已有 id 的向量：该 id 改为暴力扫描"""
+        if item_id < self.built_rows:
+            self._extra.append(item_id)
+
+    def stale_ratio(self) -> float:
+        """建索引后新增的行数占比"""
+        return (self.store.rows - self.built_rows + len(self._extra)) / max(self.size, 1)
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None, min_score: float = -1.0,
+               exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        query = np.asarray(query, dtype=np.float32).reshape(self.store.dim)
+        exclude = set(exclude)
+        ids, scores = [], []
+        if self.ready:
+            probes = top_k(self.centroids @ query, nprobe or self.nprobe)
+            candidates = np.concatenate([self.lists[p] for p in probes] + [np.asarray(self._extra, dtype=np.int64)])
+            if candidates.size:
+                candidates = np.unique(candidates)
+                s = self.store.get(candidates) @ query
+                idx = top_k(s, k + len(exclude))
+                ids.append(candidates[idx])
+                scores.append(s[idx])
+        tail = self.store.search(query, k + len(exclude), start=self.built_rows)
+        if tail:
+            ids.append(np.array([i for i, _ in tail], dtype=np.int64))
+            scores.append(np.array([s for _, s in tail], dtype=np.float32))
+        return merge_results(ids, scores, k, min_score, exclude)
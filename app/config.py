@@ -1,6 +1,6 @@
 """全局配置管理"""
 import os
-from typing import Optional
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -13,20 +13,136 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = "sqlite:///data/database.db"
+    CONTENT_INLINE_LIMIT: int = 2000  # 超过该长度的正文移入 ItemContent，主表只留预览
+    CONTENT_COMPRESSION: str = "zlib"  # none/zlib/zstd (zstd 需安装 zstandard)
     
     # AI API 配置
     DEEPSEEK_API_KEY: Optional[str] = None
     DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
     DEEPSEEK_MODEL: str = "deepseek-chat"
+    AI_REQUEST_TIMEOUT: float = 60.0  # 单次 API 调用超时 (秒)
+    AI_BUDGET_MODE: str = "truncate"  # 长文本处理: none/truncate/map_reduce (见 app/ai/budget.py)
+    AI_BUDGET_MAX_TOKENS: int = 3000  # 送入分析提示词的正文 token 上限 (本地估算)
+    AI_CHUNK_TOKENS: int = 2000  # map_reduce 每块 token 数
+    AI_MAX_CHUNKS: int = 8  # map_reduce 块数上限，超出时加大块
+    AI_MAP_WORKERS: int = 4  # map_reduce 并发摘要数
+    AI_MAP_TIMEOUT: float = 30.0  # map 阶段总时限 (秒)，未完成的块以截断节选代替
+    AI_BUDGET_PLATFORMS: Dict[str, dict] = {}  # 按平台覆盖，例如 {"bilibili": {"mode": "map_reduce", "max_tokens": 4000}}
+    
+    # AI 本地预筛 (见 app/ai/prefilter.py，训练: python -m app prefilter train)
+    PREFILTER_ENABLED: bool = True
+    PREFILTER_MODEL_PATH: str = "./data/prefilter.npz"
+    PREFILTER_MIN_SAMPLES: int = 200  # 训练样本少于该数时不使用模型，只按规则与近似重复判断
+    PREFILTER_JUNK_SCORE: int = 40  # ai_score 低于该值视为低质量 (与评分标准中的"垃圾内容"一致)
+    PREFILTER_SKIP_PROB: float = 0.9  # 模型预测低质量概率不低于该值时跳过 AI
+    PREFILTER_MIN_CHARS: int = 10  # 标题加正文少于该字数时跳过
+    PREFILTER_REUSE_DISTANCE: int = 3  # SimHash 海明距离不超过该值时复用已分析条目的结果
+    PREFILTER_NEIGHBORS: int = 2000  # 参与近似重复查找的最近条目数
+    
+    # AI 回填 (见 app/services/ai_backfill.py: python -m app backfill)
+    AI_BACKFILL_CHECKPOINT: str = "./data/ai_backfill.json"
+    AI_BACKFILL_BATCH_SIZE: int = 50
+    AI_BACKFILL_WORKERS: int = 2
+    AI_BACKFILL_RATE: float = 30.0  # 每分钟最多调用次数
+    AI_BACKFILL_YIELD_INTERVAL: float = 5.0  # 抓取任务有积压时的等待间隔 (秒)
+    
+    # 文本向量、事件聚类与相关条目 (见 app/services/embedding_service.py，重建: python -m app embeddings rebuild)
+    EMBEDDING_ENABLED: bool = True
+    EMBEDDING_BACKEND: str = "hashing"  # hashing: 本地特征哈希；sentence-transformers: 本地 CPU 模型；api: OpenAI 兼容接口
+    EMBEDDING_MODEL: Optional[str] = None  # sentence-transformers 模型名或 API 模型名
+    EMBEDDING_API_BASE: Optional[str] = None
+    EMBEDDING_API_KEY: Optional[str] = None
+    EMBEDDING_DIM: int = 256  # hashing/api 后端的向量维度
+    EMBEDDING_DIR: str = "./data/embeddings"
+    EMBEDDING_TEXT_CHARS: int = 1000  # 参与向量化的正文长度 (标题与 AI 摘要之外)
+    EMBEDDING_IVF_MIN_VECTORS: int = 50000  # 向量数达到该值后用 IVF 索引检索相关条目，以下暴力检索
+    EMBEDDING_IVF_NPROBE: int = 8
+    EMBEDDING_CLUSTER_THRESHOLD: float = 0.6  # 余弦相似度不低于该值视为同一事件 (更换后端时需调整)
+    EMBEDDING_CLUSTER_HOURS: int = 72  # 只与该时间窗口内的条目聚类
+    EMBEDDING_RELATED_K: int = 3  # feed 中展示的相关条目数
+    EMBEDDING_RELATED_MIN: float = 0.3  # 相关条目的最低相似度
     
     # 爬虫配置
     BROWSER_HEADLESS: bool = False
     BROWSER_USER_DATA_PATH: str = "./data/browser_profile"
     DEFAULT_SCRAPE_FREQUENCY: int = 60  # 分钟
     PROXY_SERVER: Optional[str] = None  # 代理服务器地址，例如 "http://127.0.0.1:7890"
+    CHANGE_DETECTION_ENABLED: bool = True  # 抓取前探测页面是否有新内容，未变化则跳过
+    CHANGE_PROBE_TIMEOUT: int = 5  # HTTP 探测请求超时 (秒)
+    EXTRACTION_SPEC_DIR: Optional[str] = None  # 自定义抽取规则目录，同名文件覆盖 app/scraper/specs 中的内置规则
+    
+    # 浏览器内存管理 (见 app/scraper/governor.py)
+    BROWSER_GOVERNOR_ENABLED: bool = True
+    BROWSER_SAMPLE_INTERVAL: float = 30.0  # 采样间隔 (秒)
+    BROWSER_RECYCLE_RSS_MB: int = 1536  # 浏览器进程树内存超过该值时回收 (重启)
+    BROWSER_RECYCLE_PAGES: int = 500  # 启动后打开的标签页数达到该值时回收，0 为不限
+    BROWSER_RECYCLE_DRAIN_TIMEOUT: float = 120.0  # 回收前等待进行中的抓取结束的最长时间 (秒)
+    BROWSER_CLEAR_INTERVAL: float = 3600.0  # 清理缓存与 Service Worker 的间隔 (秒)，0 为不清理
+    BROWSER_RSS_LOG: str = "./data/browser_rss.csv"  # 内存曲线 (CSV)，留空不记录
+    
+    # 本地任务队列的任务日志 (见 app/core/task_journal.py)：崩溃/重启后恢复未完成的任务
+    TASK_JOURNAL_ENABLED: bool = True
+    TASK_JOURNAL_PATH: str = "./data/task_journal.jsonl"
+    TASK_JOURNAL_FSYNC: bool = True  # 每批写入后 fsync (组提交，开销由同批任务分摊)
+    TASK_JOURNAL_MAX_BYTES: int = 4 * 1024 * 1024  # 超过后压缩为只含未完成任务
+    TASK_JOURNAL_MAX_ATTEMPTS: int = 3  # 执行中崩溃超过该次数的任务不再恢复
+    
+    # 退出流程 (见 app/core/lifecycle.py)
+    SHUTDOWN_TIMEOUT: float = 30.0  # 关闭全部组件的总预算 (秒)，应小于进程管理器的强制结束时间
+    SHUTDOWN_DRAIN_TIMEOUT: float = 20.0  # 其中用于执行完排队中任务的最长时间，剩余任务留在任务日志中
+    
+    # 任务看门狗 (见 app/core/watchdog.py)：超时后关闭任务的标签页 -> 重启浏览器 -> 放弃线程并补上槽位
+    WATCHDOG_ENABLED: bool = True
+    TASK_TIMEOUT: int = 600  # 单个任务的墙钟预算 (秒)，包括抓取与 AI 分析
+    WATCHDOG_GRACE: int = 30  # 每一级处理后等待任务返回的时间 (秒)
+    WATCHDOG_INTERVAL: float = 5.0  # 检查间隔 (秒)
+    
+    # 自动扩缩容 (见 app/core/autoscaler.py)：按积压、CPU/内存、浏览器内存与任务耗时调整并发
+    AUTOSCALE_ENABLED: bool = True
+    AUTOSCALE_MIN_WORKERS: int = 1
+    AUTOSCALE_MAX_WORKERS: int = 0  # 0 表示取 CPU 核数
+    AUTOSCALE_INTERVAL: float = 10.0  # 采样间隔 (秒)，每次最多增减一个线程
+    AUTOSCALE_CPU_TARGET: float = 70.0  # CPU 低于该值才扩容 (%)
+    AUTOSCALE_CPU_HIGH: float = 90.0  # CPU 高于该值时缩容 (%)
+    AUTOSCALE_MIN_FREE_MEM: float = 0.15  # 整机可用内存低于该比例时缩容，标签页并发也按此留出余量
+    AUTOSCALE_BROWSER_MAX_MB: int = 2048  # 浏览器进程树内存上限
+    AUTOSCALE_TAB_MB: int = 300  # 尚无浏览器读数时估计的单个标签页内存
+    AUTOSCALE_LATENCY_HIGH: float = 300.0  # 任务平均耗时超过该值 (秒) 时视为互相拖慢而缩容
+    
+    # 共享任务队列 (分布式 worker，见 app/worker.py)
+    QUEUE_BACKEND: str = "local"  # local: 进程内 TaskQueue；sqlite/redis: 由独立 worker 进程领取执行
+    QUEUE_URL: Optional[str] = None  # sqlite 默认使用主库，也可指定 sqlite:///data/queue.db；redis 例如 redis://127.0.0.1:6379/0
+    QUEUE_VISIBILITY_TIMEOUT: int = 300  # 租约时长 (秒)，worker 失联超过该时间后任务重新可见
+    QUEUE_HEARTBEAT_INTERVAL: int = 60  # worker 续约间隔 (秒)
+    QUEUE_MAX_ATTEMPTS: int = 3  # 超过后任务标记为 dead
+    QUEUE_RETRY_DELAY: int = 60  # 失败后重新可见的延迟 (秒)，按尝试次数递增
+    WORKER_CONCURRENCY: int = 2  # 每个进程同时执行的任务数 (共用一个浏览器)；启用自动扩缩容时为初始值
+    WORKER_POLL_INTERVAL: float = 2.0  # 队列为空时的轮询间隔 (秒)
+    SCHEDULER_SYNC_INTERVAL: int = 1  # 独立调度进程从数据库同步数据源任务的间隔 (分钟)
+    ITEM_POLL_INTERVAL: float = 5.0  # UI 节点 (及负责推送的 feed 服务) 轮询其它进程写入的新条目并发布事件 (秒)
+    
+    # 图片缓存 (feed 中的缩略图，见 app/services/image_pipeline.py)
+    IMAGE_PIPELINE_ENABLED: bool = True
+    IMAGE_CACHE_DIR: str = "./data/images"
+    IMAGE_CACHE_MAX_MB: int = 500  # 磁盘预算，超出后按最近访问时间淘汰
+    IMAGE_MAX_PER_ITEM: int = 3  # 每个条目最多缓存的图片数
+    IMAGE_THUMB_SIZE: int = 640  # 缩略图长边像素 (只缩小不放大)
+    IMAGE_WEBP_QUALITY: int = 75
+    IMAGE_DEDUP_DISTANCE: int = 4  # 感知哈希海明距离不超过该值视为同一张图
+    IMAGE_FETCH_WORKERS: int = 4
+    IMAGE_FETCH_TIMEOUT: int = 10  # 秒
+    IMAGE_MAX_BYTES: int = 10 * 1024 * 1024  # 原图大小上限
+    
+    # 字幕 (见 app/services/subtitle_service.py)
+    SUBTITLE_FETCH_WORKERS: int = 2
+    SUBTITLE_CONNECT_TIMEOUT: float = 5.0  # 秒
+    SUBTITLE_READ_TIMEOUT: float = 15.0  # 秒
+    SUBTITLE_WAIT_TIMEOUT: float = 10.0  # AI 分析等待字幕下载的最长时间 (秒)，超时则只分析正文
+    SUBTITLE_AI_CHARS: int = 3000  # 提供给 AI 的字幕节选长度 (首尾保留)
     
     # UI 配置
     UI_PORT: int = 8081
+    UI_RUN_SCHEDULER: bool = True  # 由独立调度进程 (python -m app scheduler) 负责定时抓取时设为 False
     UI_NATIVE_MODE: bool = False  # Web 模式，避免需要 pywebview
     UI_WINDOW_SIZE: tuple = (1200, 800)
     
@@ -35,6 +151,18 @@ class Settings(BaseSettings):
     RSS_FEED_LINK: str = "http://localhost:8080"
     RSS_FEED_DESCRIPTION: str = "智能内容聚合 RSS"
     RSS_MAX_ITEMS: int = 50
+    PUBLIC_BASE_URL: Optional[str] = None  # 对外访问地址 (feed self/hub 链接与缩略图地址)，默认 http://localhost:UI_PORT
+    FEED_HOST: str = "127.0.0.1"  # 独立 feed 服务 (python -m app serve-feed) 监听地址
+    FEED_PORT: int = 8082
+    FEED_COLLAPSE_CLUSTERS: bool = True  # feed 中同一事件只保留最新的一条，其余出现在"相关内容"中
+    
+    # WebSub 配置
+    WEBSUB_ENABLED: bool = True
+    WEBSUB_PUSH_ROLE: str = "ui"  # 负责推送的进程: ui / serve-feed (只能有一个，否则订阅者会收到重复推送)
+    WEBSUB_LEASE_SECONDS: int = 10 * 24 * 3600  # 订阅者未指定时的默认租期
+    WEBSUB_MAX_LEASE_SECONDS: int = 30 * 24 * 3600
+    WEBSUB_BATCH_DELAY: float = 2.0  # 合并该时间窗口内的新条目后一次推送 (秒)
+    WEBSUB_TIMEOUT: int = 10  # 验证/推送请求超时 (秒)
     
     # 使用新版配置写法
     model_config = SettingsConfigDict(
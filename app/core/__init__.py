@@ -1,5 +1,32 @@
 # Core package
-from app.core.scheduler import scheduler_manager, SchedulerManager
-from app.core.task_queue import task_queue, TaskQueue
+# 子模块和全局实例按需导入 (PEP 562)：只用事件总线的进程 (feed 服务、worker) 不会加载 APScheduler
+import importlib
 
-__all__ = ['scheduler_manager', 'SchedulerManager', 'task_queue', 'TaskQueue']
+_EXPORTS = {
+    'scheduler_manager': 'app.core.scheduler',
+    'SchedulerManager': 'app.core.scheduler',
+    'task_queue': 'app.core.task_queue',
+    'TaskQueue': 'app.core.task_queue',
+    'event_bus': 'app.core.events',
+    'EventBus': 'app.core.events',
+    'ITEM_CREATED': 'app.core.events',
+    'lifecycle': 'app.core.lifecycle',
+    'Lifecycle': 'app.core.lifecycle',
+    'autoscaler': 'app.core.autoscaler',
+    'Autoscaler': 'app.core.autoscaler',
+    'watchdog': 'app.core.watchdog',
+    'Watchdog': 'app.core.watchdog',
+    'TaskTimeout': 'app.core.watchdog',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
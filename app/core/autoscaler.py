@@ -0,0 +1,220 @@
+"""自动扩缩容 - 按队列积压、主机 CPU/内存、浏览器内存与任务耗时调整工作线程数与标签页并发数
+
+每 AUTOSCALE_INTERVAL 秒采样一次并调用 plan()，每次最多增减一个工作线程：
+- 缩容：可用内存低于 AUTOSCALE_MIN_FREE_MEM、浏览器内存超过 AUTOSCALE_BROWSER_MAX_MB、
+  CPU 高于 AUTOSCALE_CPU_HIGH，或任务平均耗时超过 AUTOSCALE_LATENCY_HIGH (并发过高导致互相拖慢)；
+  队列为空且有两个以上线程空闲时也逐步缩容
+- 扩容：有积压、线程全忙，且 CPU 低于 AUTOSCALE_CPU_TARGET、耗时正常
+- 标签页并发 (tab_slots) 不超过工作线程数，并按浏览器每个标签页的平均内存与剩余可用内存限制
+
+工作线程数变化后清空 pool 的耗时窗口，平均耗时只统计新并发下完成的任务，
+否则缩容前的慢任务会让每次采样都判定为耗时过高、一路缩到下限。
+
+工作线程数在 [AUTOSCALE_MIN_WORKERS, AUTOSCALE_MAX_WORKERS] 之间 (上限为 0 时取 CPU 核数)。
+未启用时固定为 WORKER_CONCURRENCY。
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.core import sysmetrics
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+class ResizableSemaphore:
+    """容量可在运行中调整的信号量；缩小容量时已占用的名额照常释放，新的申请等到低于容量后才通过"""
+
+    def __init__(self, limit: int):
+        self._cond = threading.Condition()
+        self.limit = max(1, limit)
+        self.in_use = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_use < self.limit, timeout):
+                return False
+            self.in_use += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    def resize(self, limit: int):
+        with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+# 同时打开浏览器标签页的抓取数 (所有平台共享；各平台另有 max_concurrency 限制)
+tab_slots = ResizableSemaphore(settings.WORKER_CONCURRENCY)
+
+@dataclass
+class Sample:
+    """一次采样"""
+    depth: int = 0                        # 排队中的任务数
+    busy: int = 0                         # 执行中的任务数
+    workers: int = 0                      # 当前工作线程数
+    latency: Optional[float] = None       # 最近任务的平均耗时 (秒)
+    cpu: Optional[float] = None           # 整机 CPU 使用率 (%)
+    mem_total: Optional[int] = None       # 整机内存 (字节)
+    mem_available: Optional[int] = None
+    rss: Optional[int] = None             # 本进程常驻内存
+    browser_rss: Optional[int] = None     # 浏览器进程树常驻内存
+    tabs: int = 0                         # 占用中的标签页名额
+
+    @property
+    def mem_free(self) -> Optional[float]:
+        if not self.mem_total or self.mem_available is None:
+            return None
+        return self.mem_available / self.mem_total
+
+def max_workers() -> int:
+    return settings.AUTOSCALE_MAX_WORKERS or os.cpu_count() or 1
+
+def plan(workers: int, sample: Sample, low: int, high: int) -> Tuple[int, str]:
+    """
+    根据一次采样给出新的工作线程数
+
+    Returns:
+        (目标线程数, 原因)
+    """
+    mem_free = sample.mem_free
+    if mem_free is not None and mem_free < settings.AUTOSCALE_MIN_FREE_MEM:
+        target, reason = workers - 1, f"可用内存仅 {mem_free:.0%}"
+    elif sample.browser_rss and sample.browser_rss > settings.AUTOSCALE_BROWSER_MAX_MB * MB:
+        target, reason = workers - 1, f"浏览器内存 {sample.browser_rss / MB:.0f} MB"
+    elif sample.cpu is not None and sample.cpu > settings.AUTOSCALE_CPU_HIGH:
+        target, reason = workers - 1, f"CPU {sample.cpu:.0f}%"
+    elif sample.latency is not None and sample.latency > settings.AUTOSCALE_LATENCY_HIGH:
+        target, reason = workers - 1, f"任务平均耗时 {sample.latency:.0f} 秒"
+    elif sample.depth > 0 and sample.busy >= workers:
+        if sample.cpu is not None and sample.cpu >= settings.AUTOSCALE_CPU_TARGET:
+            target, reason = workers, f"积压 {sample.depth}，CPU {sample.cpu:.0f}% 已接近上限"
+        else:
+            target, reason = workers + 1, f"积压 {sample.depth}"
+    elif sample.depth == 0 and sample.busy < workers - 1:
+        target, reason = workers - 1, "空闲"
+    else:
+        target, reason = workers, "稳定"
+    return min(max(target, low), high), reason
+
+def plan_tabs(workers: int, sample: Sample) -> int:
+    """标签页并发：不超过工作线程数，且按每个标签页的平均内存留出 AUTOSCALE_MIN_FREE_MEM 的余量"""
+    tabs = workers
+    if sample.browser_rss and sample.tabs:
+        per_tab = sample.browser_rss / sample.tabs
+    else:
+        per_tab = settings.AUTOSCALE_TAB_MB * MB
+    if sample.mem_total and sample.mem_available is not None:
+        room = sample.mem_available - settings.AUTOSCALE_MIN_FREE_MEM * sample.mem_total
+        tabs = min(tabs, sample.tabs + int(room // per_tab))
+    if sample.browser_rss is not None:
+        tabs = min(tabs, int(settings.AUTOSCALE_BROWSER_MAX_MB * MB // per_tab))
+    return max(1, tabs)
+
+def browser_rss() -> Optional[int]:
+    """本进程启动的浏览器进程树的常驻内存 (未启动浏览器时为 None)"""
+    browser = sys.modules.get('app.scraper.browser')
+    instance = browser.BrowserManager._instance if browser else None
+    pid = instance.process_id() if instance is not None else None
+    return sysmetrics.tree_rss(pid) if pid else None
+
+class Autoscaler:
+    """自动扩缩容 - 单例模式；start(pool) 后在后台线程中定期调整 pool (TaskQueue 或 Worker)"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Autoscaler, cls).__new__(cls)
+            cls._instance.pool = None
+            cls._instance.target = settings.WORKER_CONCURRENCY
+            cls._instance.reason = "未启动"
+            cls._instance.last: Optional[Sample] = None
+            cls._instance.history = deque(maxlen=60)  # 最近的调整记录
+            cls._instance._cpu = None
+            cls._instance._thread = None
+            cls._instance._stop = threading.Event()
+        return cls._instance
+
+    def initial(self) -> int:
+        """启动时的工作线程数"""
+        if not settings.AUTOSCALE_ENABLED:
+            return settings.WORKER_CONCURRENCY
+        return min(max(settings.WORKER_CONCURRENCY, settings.AUTOSCALE_MIN_WORKERS), max_workers())
+
+    def start(self, pool):
+        """开始调整 pool 的并发数 (pool 需提供 resize(n)、load() 与 reset_latency())"""
+        self.pool = pool
+        self.target = pool.load()['workers'] or self.initial()
+        tab_slots.resize(self.target)
+        if not settings.AUTOSCALE_ENABLED:
+            self.reason = "固定"
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._cpu = sysmetrics.CpuSampler()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="Autoscaler")
+        self._thread.start()
+        logger.info(f"自动扩缩容已启动: {settings.AUTOSCALE_MIN_WORKERS}-{max_workers()} 个工作线程")
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(settings.AUTOSCALE_INTERVAL):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"自动扩缩容采样失败: {e}")
+
+    def sample(self) -> Sample:
+        load = self.pool.load()
+        host = sysmetrics.read_host()
+        return Sample(depth=load['depth'], busy=load['busy'], workers=load['workers'], latency=load['latency'],
+                      cpu=self._cpu.sample() if self._cpu else None, mem_total=host['mem_total'],
+                      mem_available=host['mem_available'], rss=host['rss'], browser_rss=browser_rss(),
+                      tabs=tab_slots.in_use)
+
+    def tick(self, sample: Optional[Sample] = None) -> int:
+        """采样并调整一次，返回新的工作线程数"""
+        sample = sample or self.sample()
+        target, reason = plan(self.target, sample, settings.AUTOSCALE_MIN_WORKERS, max_workers())
+        tabs = plan_tabs(target, sample)
+        if target != self.target or tabs != tab_slots.limit:
+            logger.info(f"自动扩缩容: 工作线程 {self.target} -> {target}，标签页 {tab_slots.limit} -> {tabs} ({reason})")
+            self.history.append({'time': time.time(), 'workers': target, 'tabs': tabs, 'reason': reason})
+        self.pool.resize(target)
+        if target != self.target:
+            self.pool.reset_latency()
+        tab_slots.resize(tabs)
+        self.target, self.reason, self.last = target, reason, sample
+        return target
+
+    def status(self) -> Dict[str, Any]:
+        """设置页展示用的当前状态"""
+        sample = asdict(self.last) if self.last else {}
+        return {'enabled': settings.AUTOSCALE_ENABLED, 'workers': self.target, 'tabs': tab_slots.limit,
+                'min': settings.AUTOSCALE_MIN_WORKERS, 'max': max_workers(), 'reason': self.reason, **sample}
+
+# 全局实例
+autoscaler = Autoscaler()
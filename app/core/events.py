@@ -0,0 +1,117 @@
+"""进程内事件总线 - 入库等事件的发布/订阅"""
+import queue
+import threading
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 事件主题
+ITEM_CREATED = "item.created"
+
+Handler = Callable[[Any], None]
+
+class EventBus:
+    """
+    事件总线 - 单例模式
+
+    publish() 在发布者线程中同步调用所有订阅者，订阅者应当只做入队等轻量操作；
+    单个订阅者抛出的异常只记录日志，不影响其他订阅者和发布者。
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EventBus, cls).__new__(cls)
+            cls._instance._handlers = defaultdict(list)
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def subscribe(self, topic: str, handler: Handler) -> Callable[[], None]:
+        """
+        订阅主题
+
+        Returns:
+            取消订阅的函数
+        """
+        with self._lock:
+            self._handlers[topic].append(handler)
+        return lambda: self.unsubscribe(topic, handler)
+
+    def unsubscribe(self, topic: str, handler: Handler):
+        """取消订阅 (未订阅时忽略)"""
+        with self._lock:
+            if handler in self._handlers.get(topic, []):
+                self._handlers[topic].remove(handler)
+
+    def subscribe_queue(self, topic: str, maxsize: int = 100) -> Tuple[queue.Queue, Callable[[], None]]:
+        """
+        以队列方式订阅，供界面定时器等在自己的线程中消费
+
+        队列满时丢弃最旧的事件，慢消费者不会阻塞发布者。
+
+        Returns:
+            (事件队列, 取消订阅的函数)
+        """
+        events: queue.Queue = queue.Queue(maxsize)
+
+        def enqueue(payload):
+            while True:
+                try:
+                    events.put_nowait(payload)
+                    return
+                except queue.Full:
+                    try:
+                        events.get_nowait()
+                    except queue.Empty:
+                        pass
+
+        return events, self.subscribe(topic, enqueue)
+
+    def publish(self, topic: str, payload: Any = None) -> int:
+        """
+        发布事件
+
+        Returns:
+            收到事件的订阅者数量
+        """
+        with self._lock:
+            handlers = list(self._handlers.get(topic, []))
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"事件处理失败 [{topic}]: {e}")
+        return len(handlers)
+
+    def subscriber_count(self, topic: str) -> int:
+        """获取主题的订阅者数量"""
+        with self._lock:
+            return len(self._handlers.get(topic, []))
+
+def item_payload(item) -> Dict[str, Any]:
+    """把 ScrapedItem 转为 ITEM_CREATED 事件载荷 (只含列表展示所需字段，不含正文)"""
+    return {
+        'id': item.id,
+        'source_id': item.source_id,
+        'title': item.title,
+        'url': item.url,
+        'sentiment': item.sentiment,
+        'ai_score': item.ai_score,
+        'risk_level': item.risk_level,
+        'created_at': item.created_at,
+    }
+
+def drain(events: queue.Queue, limit: int = 100) -> List[Any]:
+    """非阻塞地取出队列中的事件"""
+    payloads = []
+    while len(payloads) < limit:
+        try:
+            payloads.append(events.get_nowait())
+        except queue.Empty:
+            break
+    return payloads
+
+# 全局事件总线实例
+event_bus = EventBus()
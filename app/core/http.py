@@ -0,0 +1,24 @@
+"""共享 HTTP 连接池 - 图片、字幕等后台下载复用 TCP/TLS 连接"""
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BROWSER_UA = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0 Safari/537.36')
+
+def pooled_session(pool_size: int, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    创建带连接池的 Session
+
+    Args:
+        pool_size: 每个主机保持的最大连接数，通常等于使用它的线程数
+        headers: 默认请求头，未指定 User-Agent 时使用浏览器 UA
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': BROWSER_UA})
+    session.headers.update(headers or {})
+    return session
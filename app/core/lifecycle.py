@@ -0,0 +1,179 @@
+"""进程生命周期 - 退出时按顺序关闭各组件，滚动重启不丢任务、不遗留 Chromium 进程
+
+关闭分为几个阶段，同一阶段按注册顺序执行：
+1. INTAKE      停止接收新工作：调度器不再触发抓取，停止轮询新条目与自动扩缩容
+2. DRAIN       在 SHUTDOWN_DRAIN_TIMEOUT 内执行完排队中的任务，剩余任务留在任务日志中
+3. BACKGROUND  等待 WebSub 推送、图片、字幕、向量等后台线程池，并停止 AI 回填
+4. RESOURCES   关闭浏览器标签页与 Chromium 进程
+5. FLUSH       刷新日志处理器
+
+整个关闭过程共享 SHUTDOWN_TIMEOUT 的预算，每一步拿到剩余时间 (至少 MIN_STEP_TIMEOUT 秒)。
+某一步失败只记录日志，不影响后续步骤。内置步骤只处理本进程已经导入的模块，
+不会为了关闭而加载 (或启动) 从未使用过的组件。
+"""
+import logging
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTAKE = 10
+DRAIN = 20
+BACKGROUND = 30
+RESOURCES = 40
+FLUSH = 50
+
+MIN_STEP_TIMEOUT = 1.0
+
+class ShutdownStep(NamedTuple):
+    name: str
+    func: Callable[[float], object]  # 参数为本步骤可用的秒数
+    phase: int
+
+def _loaded(module: str):
+    """已导入的模块 (未导入时返回 None)"""
+    return sys.modules.get(module)
+
+# ===== 内置步骤 =====
+
+def _stop_scheduler(timeout: float):
+    scheduler = _loaded('app.core.scheduler')
+    if scheduler:
+        # 不等待正在执行的定时任务：它们只是把抓取加入队列，由 DRAIN 阶段处理
+        scheduler.scheduler_manager.shutdown(wait=False)
+
+def _stop_item_watcher(timeout: float):
+    watcher = _loaded('app.services.item_watcher')
+    if watcher:
+        watcher.item_watcher.stop(timeout)
+
+def _stop_autoscaler(timeout: float):
+    autoscaler = _loaded('app.core.autoscaler')
+    if autoscaler:
+        autoscaler.autoscaler.stop(timeout)
+
+def _drain_task_queue(timeout: float):
+    module = _loaded('app.core.task_queue')
+    if module:
+        return module.task_queue.stop(min(timeout, settings.SHUTDOWN_DRAIN_TIMEOUT))
+
+def _stop_websub(timeout: float):
+    websub = _loaded('app.rss.websub')
+    if websub:
+        return websub.websub_hub.stop(timeout)
+
+def _stop_background_pools(timeout: float):
+    deadline = time.monotonic() + timeout
+    finished = True
+    for module, name in (('app.services.image_pipeline', 'image_pipeline'),
+                         ('app.services.subtitle_service', 'subtitle_service'),
+                         ('app.services.embedding_service', 'embedding_service')):
+        loaded = _loaded(module)
+        if loaded:
+            finished &= getattr(loaded, name).shutdown(max(0.0, deadline - time.monotonic()))
+    return finished
+
+def _stop_ai_backfill(timeout: float):
+    backfill = _loaded('app.services.ai_backfill')
+    if backfill:
+        backfill.ai_backfill.stop(timeout)
+
+def _close_browser(timeout: float):
+    governor = _loaded('app.scraper.governor')
+    if governor:
+        governor.browser_governor.stop(timeout)
+    browser = _loaded('app.scraper.browser')
+    if browser:
+        return browser.BrowserManager.shutdown(timeout)
+
+def _flush_logs(timeout: float):
+    for handler in logging.getLogger().handlers:
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+class Lifecycle:
+    """关闭流程管理器 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Lifecycle, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance.steps: List[ShutdownStep] = []
+            cls._instance.stopped = False
+            cls._instance._register_defaults()
+        return cls._instance
+
+    def _register_defaults(self):
+        self.register('scheduler', _stop_scheduler, INTAKE)
+        self.register('item_watcher', _stop_item_watcher, INTAKE)
+        self.register('autoscaler', _stop_autoscaler, INTAKE)
+        self.register('task_queue', _drain_task_queue, DRAIN)
+        self.register('websub', _stop_websub, BACKGROUND)
+        self.register('background_pools', _stop_background_pools, BACKGROUND)
+        self.register('ai_backfill', _stop_ai_backfill, BACKGROUND)
+        self.register('browser', _close_browser, RESOURCES)
+        self.register('logs', _flush_logs, FLUSH)
+
+    def register(self, name: str, func: Callable[[float], object], phase: int = BACKGROUND):
+        """
+        注册关闭步骤 (同名步骤会被替换)
+
+        Args:
+            name: 步骤名 (用于日志)
+            func: 接收可用秒数的关闭函数
+            phase: 所属阶段 (INTAKE/DRAIN/BACKGROUND/RESOURCES/FLUSH)
+        """
+        with self._lock:
+            self.steps = [step for step in self.steps if step.name != name]
+            self.steps.append(ShutdownStep(name, func, phase))
+
+    def shutdown(self, timeout: Optional[float] = None) -> Dict[str, object]:
+        """
+        按阶段执行全部关闭步骤 (重复调用时只执行一次)
+
+        Args:
+            timeout: 总预算秒数，默认 SHUTDOWN_TIMEOUT
+
+        Returns:
+            步骤名 -> 返回值 (失败的步骤为异常对象)
+        """
+        with self._lock:
+            if self.stopped:
+                return {}
+            self.stopped = True
+            # sorted 是稳定排序，同一阶段保持注册顺序
+            steps = sorted(self.steps, key=lambda step: step.phase)
+        timeout = settings.SHUTDOWN_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        logger.info(f"开始关闭 (预算 {timeout:.0f} 秒)")
+        results: Dict[str, object] = {}
+        for step in steps:
+            budget = max(MIN_STEP_TIMEOUT, deadline - time.monotonic())
+            start = time.monotonic()
+            try:
+                results[step.name] = step.func(budget)
+            except Exception as e:
+                results[step.name] = e
+                logger.error(f"关闭 {step.name} 失败: {e}")
+                continue
+            elapsed = time.monotonic() - start
+            if elapsed >= 0.1:
+                logger.info(f"已关闭 {step.name} ({elapsed:.1f} 秒)")
+        logger.info("关闭完成")
+        _flush_logs(0)
+        return results
+
+    def reset(self):
+        """恢复到未关闭状态 (测试中使用)"""
+        with self._lock:
+            self.stopped = False
+
+# 全局实例
+lifecycle = Lifecycle()
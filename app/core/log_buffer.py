@@ -0,0 +1,106 @@
+"""日志环形缓冲区 - 把 logging 输出提供给界面的实时日志查看器"""
+import logging
+from typing import List, NamedTuple, Optional, Tuple
+
+class LogEntry(NamedTuple):
+    seq: int
+    created: float
+    level: str
+    levelno: int
+    source: str
+    thread: str
+    message: str
+
+class LogRingBuffer:
+    """
+    固定容量的环形缓冲区
+
+    每条日志带单调递增的序号，写入 slots[seq % capacity]。
+    读取方不加锁：按序号向后读，槽位中的序号与期望不一致即说明
+    已被覆盖 (读得太慢) 或尚未写完，因此读取永远不会阻塞写入。
+    写入由 logging.Handler 自身的锁串行化。
+    """
+
+    def __init__(self, capacity: int = 2000):
+        self.capacity = capacity
+        self._slots: List[Optional[LogEntry]] = [None] * capacity
+        self.last_seq = 0
+
+    def append(self, created: float, level: str, levelno: int, source: str, thread: str, message: str):
+        seq = self.last_seq + 1
+        self._slots[seq % self.capacity] = LogEntry(seq, created, level, levelno, source, thread, message)
+        self.last_seq = seq
+
+    def read_since(self, after_seq: int, limit: Optional[int] = None) -> Tuple[List[LogEntry], int, int]:
+        """
+        读取 after_seq 之后的日志
+
+        Args:
+            after_seq: 上次读到的序号
+            limit: 最多返回的条数；积压超过时只返回最新的 limit 条
+
+        Returns:
+            (日志列表, 新的读取位置, 被跳过/覆盖的条数)
+        """
+        head = self.last_seq
+        start = after_seq + 1
+        oldest = head - self.capacity + 1
+        dropped = 0
+        if start < oldest:
+            dropped += oldest - start
+            start = oldest
+        if limit is not None and head - start + 1 > limit:
+            dropped += head - start + 1 - limit
+            start = head - limit + 1
+
+        entries = []
+        position = max(after_seq, start - 1)
+        for seq in range(start, head + 1):
+            entry = self._slots[seq % self.capacity]
+            if entry is None or entry.seq < seq:
+                break  # 尚未写入
+            position = seq
+            if entry.seq > seq:
+                dropped += 1  # 读取过程中被覆盖
+                continue
+            entries.append(entry)
+        return entries, position, dropped
+
+class RingBufferHandler(logging.Handler):
+    """把日志记录写入 LogRingBuffer 的 logging.Handler"""
+
+    def __init__(self, buffer: LogRingBuffer, level: int = logging.INFO):
+        super().__init__(level)
+        self.buffer = buffer
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = record.getMessage()
+            if record.exc_info:
+                formatter = self.formatter or logging.Formatter()
+                message += '\n' + formatter.formatException(record.exc_info)
+            self.buffer.append(record.created, record.levelname, record.levelno,
+                               record.name, record.threadName, message)
+        except Exception:
+            self.handleError(record)
+
+# 全局缓冲区实例
+log_buffer = LogRingBuffer()
+
+def install_log_handler(level: int = logging.INFO) -> RingBufferHandler:
+    """在 root logger 上挂载缓冲区 Handler (重复调用只挂载一次)"""
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, RingBufferHandler) and handler.buffer is log_buffer:
+            return handler
+    handler = RingBufferHandler(log_buffer, level)
+    root.addHandler(handler)
+    return handler
+
+def configure_logging(level: int = logging.INFO):
+    """各入口 (UI/feed 服务/worker/调度进程) 共用的控制台日志格式"""
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
+        datefmt='%H:%M:%S'
+    )
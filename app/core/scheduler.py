@@ -1,23 +1,32 @@
 """定时任务调度器 - 使用 APScheduler 实现自动抓取"""
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
 
 class SchedulerManager:
-    """调度器管理器 - 单例模式"""
+    """调度器管理器 - 单例模式 (首次添加任务时才启动调度线程)"""
     _instance = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SchedulerManager, cls).__new__(cls)
             cls._instance.scheduler = BackgroundScheduler()
-            cls._instance.scheduler.start()
-            logger.info("调度器已启动")
         return cls._instance
     
+    @property
+    def running(self) -> bool:
+        return self.scheduler.running
+    
+    def start(self):
+        """启动调度线程 (已启动时忽略)"""
+        if not self.scheduler.running:
+            self.scheduler.start()
+            logger.info("调度器已启动")
+    
     def add_job(self, job_id: str, func, minutes: int, **kwargs):
         """
         添加定时任务
@@ -28,6 +37,7 @@ class SchedulerManager:
             minutes: 执行间隔（分钟）
             **kwargs: 传递给函数的参数
         """
+        self.start()
         try:
             # 如果任务已存在，先移除
             if self.scheduler.get_job(job_id):
@@ -47,6 +57,41 @@ class SchedulerManager:
             logger.error(f"添加任务失败: {job_id}, 错误: {e}")
             return False
     
+    def add_jobs(self, jobs: List[Dict[str, Any]], stagger: bool = True) -> int:
+        """
+        批量添加定时任务
+        
+        stagger=True 时按顺序把首次执行时间均匀错开到各自的间隔内
+        (第 i 个任务延后 i/n 个间隔)，避免大量任务同时触发。
+        
+        Args:
+            jobs: 任务列表，每项包含 job_id/func/minutes，可选 kwargs
+            stagger: 是否错开首次执行时间
+        
+        Returns:
+            成功添加的任务数
+        """
+        self.start()
+        now = datetime.now()
+        total = len(jobs)
+        added = 0
+        for index, job in enumerate(jobs):
+            minutes = job['minutes']
+            start_date = now + timedelta(minutes=minutes * index / total) if stagger else None
+            try:
+                self.scheduler.add_job(
+                    func=job['func'],
+                    trigger=IntervalTrigger(minutes=minutes, start_date=start_date),
+                    id=job['job_id'],
+                    kwargs=job.get('kwargs', {}),
+                    replace_existing=True
+                )
+                added += 1
+            except Exception as e:
+                logger.error(f"添加任务失败: {job['job_id']}, 错误: {e}")
+        logger.info(f"批量添加定时任务: {added}/{total}" + (" (错开首次执行)" if stagger else ""))
+        return added
+    
     def remove_job(self, job_id: str):
         """移除定时任务"""
         try:
@@ -61,9 +106,16 @@ class SchedulerManager:
         """获取所有任务"""
         return self.scheduler.get_jobs()
     
-    def shutdown(self):
-        """关闭调度器"""
-        self.scheduler.shutdown()
+    def shutdown(self, wait: bool = True):
+        """
+        关闭调度器
+
+        Args:
+            wait: 是否等待正在执行的定时任务结束 (进程退出时传 False，避免被长任务拖住)
+        """
+        if not self.scheduler.running:
+            return
+        self.scheduler.shutdown(wait=wait)
         logger.info("调度器已关闭")
 
 # 全局调度器实例
@@ -0,0 +1,134 @@
+"""主机与进程资源读数 - 优先读取 /proc (Linux)，否则使用 psutil (可选依赖)；都不可用时返回 None
+
+只做读数，不做决策：自动扩缩容 (app/core/autoscaler.py) 据此调整并发数。
+"""
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def _psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
+def cpu_times() -> Optional[Tuple[float, float]]:
+    """整机累计 CPU 时间 (忙碌, 总计)，单位不限 (只用于求差)"""
+    try:
+        with open('/proc/stat') as f:
+            values = [int(v) for v in f.readline().split()[1:9]]
+        idle = values[3] + values[4]  # idle + iowait
+        total = sum(values)
+        return float(total - idle), float(total)
+    except (OSError, ValueError, IndexError):
+        pass
+    psutil = _psutil()
+    if psutil is None:
+        return None
+    times = psutil.cpu_times()
+    total = sum(times)
+    return total - times.idle - getattr(times, 'iowait', 0.0), total
+
+class CpuSampler:
+    """两次 sample() 之间的整机 CPU 使用率 (%)"""
+
+    def __init__(self):
+        self._last = cpu_times()
+
+    def sample(self) -> Optional[float]:
+        current = cpu_times()
+        last, self._last = self._last, current
+        if current is None or last is None or current[1] <= last[1]:
+            return None
+        return 100.0 * (current[0] - last[0]) / (current[1] - last[1])
+
+def memory() -> Optional[Tuple[int, int]]:
+    """整机内存 (总量, 可用量)，字节"""
+    try:
+        values: Dict[str, int] = {}
+        with open('/proc/meminfo') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('MemTotal', 'MemAvailable'):
+                    values[key] = int(rest.split()[0]) * 1024
+        return values['MemTotal'], values['MemAvailable']
+    except (OSError, ValueError, KeyError):
+        pass
+    psutil = _psutil()
+    if psutil is None:
+        return None
+    vm = psutil.virtual_memory()
+    return vm.total, vm.available
+
+def process_rss(pid: int) -> Optional[int]:
+    """进程常驻内存 (字节)；进程不存在时返回 None"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    psutil = _psutil()
+    if psutil is None:
+        return None
+    try:
+        return psutil.Process(pid).memory_info().rss
+    except psutil.Error:
+        return None
+
+def _parent_map() -> Optional[Dict[int, int]]:
+    """pid -> ppid (读取全部 /proc/<pid>/stat)"""
+    if not os.path.isdir('/proc/self'):
+        return None
+    parents = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # 第二个字段 (进程名) 可能含空格与括号，从最后一个 ')' 之后解析
+                fields = f.read().rpartition(')')[2].split()
+            parents[int(name)] = int(fields[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    return parents
+
+def descendants(pid: int) -> List[int]:
+    """进程的全部子孙进程"""
+    parents = _parent_map()
+    if parents is None:
+        psutil = _psutil()
+        if psutil is None:
+            return []
+        try:
+            return [p.pid for p in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    children: Dict[int, List[int]] = {}
+    for child, parent in parents.items():
+        children.setdefault(parent, []).append(child)
+    result, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            result.append(child)
+            stack.append(child)
+    return result
+
+def tree_rss(pid: int) -> Optional[int]:
+    """进程及其全部子孙进程的常驻内存之和 (Chromium 的渲染/GPU 进程都是浏览器主进程的子进程)"""
+    root = process_rss(pid)
+    if root is None:
+        return None
+    return root + sum(process_rss(child) or 0 for child in descendants(pid))
+
+def read_host() -> Dict[str, Optional[float]]:
+    """当前进程与整机内存的快照 (字节)"""
+    mem = memory()
+    return {
+        'time': time.time(),
+        'rss': process_rss(os.getpid()),
+        'mem_total': mem[0] if mem else None,
+        'mem_available': mem[1] if mem else None,
+    }
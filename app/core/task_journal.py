@@ -0,0 +1,257 @@
+"""任务日志 (write-ahead journal) - 本地 TaskQueue 的任务在进程崩溃/重启后不丢失
+
+追加写入的 JSON Lines 文件，每行一个事件：
+    {"e": "enqueued", "id": ..., "task": "模块:函数", "args": [...], "kwargs": {...}, "attempt": 1}
+    {"e": "started", "id": ...}
+    {"e": "done", "id": ...}
+    {"e": "failed", "id": ..., "error": ...}
+
+写入由后台线程组提交 (group commit)：调用方只把事件放入缓冲区，写线程把 fsync 期间积累的
+所有事件一次写入并 fsync，单个任务的开销远小于一次 fsync。崩溃最多丢失最后一批尚未落盘的事件。
+
+启动时 open() 读取日志，找出已入队但未完成/失败的任务 (执行中崩溃的任务计一次尝试，
+超过 TASK_JOURNAL_MAX_ATTEMPTS 次的视为会导致崩溃的任务而放弃)，按任务内容去重后返回，
+并把日志压缩为只包含这些任务的新文件。运行中文件超过 TASK_JOURNAL_MAX_BYTES 时同样压缩。
+"""
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENQUEUED = 'enqueued'
+STARTED = 'started'
+DONE = 'done'
+FAILED = 'failed'
+
+def task_name(func: Callable) -> Optional[str]:
+    """可在重启后重新导入的函数名 (模块:限定名)；lambda/闭包等返回 None"""
+    module = getattr(func, '__module__', None)
+    qualname = getattr(func, '__qualname__', None)
+    if not module or not qualname or '<' in qualname:
+        return None
+    return f'{module}:{qualname}'
+
+def resolve_task(name: str) -> Callable:
+    """按 task_name 的结果导入函数；找不到时抛出 ImportError/AttributeError"""
+    module, _, qualname = name.partition(':')
+    target = importlib.import_module(module)
+    for part in qualname.split('.'):
+        target = getattr(target, part)
+    return target
+
+def task_key(name: str, args: tuple, kwargs: dict) -> Optional[str]:
+    """任务内容的去重键；参数无法序列化为 JSON 时返回 None (不记录日志)"""
+    try:
+        return json.dumps([name, list(args), kwargs], ensure_ascii=False, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+def _read(path: str) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+    """读取日志，返回 (未完成任务 id -> enqueued 记录, 已开始执行的任务 id)；文件不存在时为空"""
+    records: Dict[str, Dict[str, Any]] = {}
+    started = set()
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时 (或另一进程正在) 写了一半的最后一行
+                task_id = event.get('id')
+                if event.get('e') == ENQUEUED:
+                    records[task_id] = event
+                elif event.get('e') == STARTED:
+                    started.add(task_id)
+                elif event.get('e') in (DONE, FAILED):
+                    records.pop(task_id, None)
+    except FileNotFoundError:
+        pass
+    return records, started
+
+def unfinished_count(path: str, max_age: Optional[float] = None) -> int:
+    """
+    从其他进程 (如 python -m app backfill) 读取日志中排队或执行中的任务数
+
+    运行中的队列每个任务都会写入 started/done，文件超过 max_age 秒未修改时
+    视为写入日志的进程已不在运行，返回 0 (这些任务在它下次启动时才会恢复)。
+    """
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+            return 0
+    except OSError:
+        return 0
+    return len(_read(path)[0])
+
+class TaskJournal:
+    """追加写入、组提交的任务日志"""
+
+    def __init__(self, path: str, fsync: bool = True, max_bytes: int = 4 * 1024 * 1024, max_attempts: int = 3):
+        self.path = path
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._buffer: List[str] = []
+        self._seq = 0            # 已提交到缓冲区的事件数
+        self._durable = 0        # 已落盘的事件数
+        self._unfinished: Dict[str, str] = {}  # 未完成任务 id -> enqueued (与 started) 行，压缩时重写
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = True
+        self.batches = 0         # 写入批次数 (即 fsync 次数)
+
+    # ===== 启动与恢复 =====
+
+    def open(self) -> List[Dict[str, Any]]:
+        """
+        读取已有日志并压缩，启动写线程
+
+        Returns:
+            需要重新执行的任务 (enqueued 记录，attempt 已更新)，按入队顺序
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        pending = self._recover()
+        self._compact(pending)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer, daemon=True, name='TaskJournal')
+        self._thread.start()
+        return pending
+
+    def _recover(self) -> List[Dict[str, Any]]:
+        records, started = _read(self.path)
+        pending, seen = [], set()
+        for task_id, record in records.items():
+            if task_id in started:
+                record['attempt'] = record.get('attempt', 1) + 1
+            key = task_key(record.get('task', ''), tuple(record.get('args', ())), record.get('kwargs', {}))
+            if key in seen:
+                continue
+            if record.get('attempt', 1) > self.max_attempts:
+                logger.warning(f"任务 {record.get('task')} 已在执行中中断 {self.max_attempts} 次，不再恢复")
+                continue
+            seen.add(key)
+            pending.append(record)
+        return pending
+
+    def _compact(self, records: List[Dict[str, Any]]):
+        """把日志重写为只包含给定任务的 enqueued 记录 (临时文件 + 原子替换)"""
+        lines = {r['id']: json.dumps(r, ensure_ascii=False) + '\n' for r in records}
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(lines.values())
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._unfinished = lines
+
+    # ===== 写入 =====
+
+    def enqueued(self, task_id: str, name: str, args: tuple, kwargs: dict, attempt: int = 1) -> int:
+        record = {'e': ENQUEUED, 'id': task_id, 'task': name, 'args': list(args), 'kwargs': kwargs,
+                  'attempt': attempt, 't': round(time.time(), 3)}
+        return self._append(record, unfinished=True)
+
+    def started(self, task_id: str) -> int:
+        return self._append({'e': STARTED, 'id': task_id})
+
+    def done(self, task_id: str) -> int:
+        return self._append({'e': DONE, 'id': task_id})
+
+    def failed(self, task_id: str, error: str) -> int:
+        return self._append({'e': FAILED, 'id': task_id, 'error': error[:500]})
+
+    def _append(self, record: Dict[str, Any], unfinished: bool = False) -> int:
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._cond:
+            if self._closed:
+                return self._seq
+            if unfinished:
+                self._unfinished[record['id']] = line
+            elif record['e'] == STARTED and record['id'] in self._unfinished:
+                self._unfinished[record['id']] += line
+            elif record['e'] in (DONE, FAILED):
+                self._unfinished.pop(record['id'], None)
+            self._buffer.append(line)
+            self._seq += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的事件全部落盘"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._seq
+            while self._durable < target and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return self._durable >= target
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """落盘剩余事件并停止写线程"""
+        self.flush(timeout)
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._unfinished)
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer and self._closed:
+                    return
+                batch, self._buffer = self._buffer, []
+                seq = self._seq
+            try:
+                self._write(batch)
+            except OSError as e:
+                logger.error(f'任务日志写入失败: {e}')
+            with self._cond:
+                self._durable = seq
+                self.batches += 1
+                self._cond.notify_all()
+                compact = self.max_bytes and self._file is not None and self._file.tell() > self.max_bytes
+            if compact:
+                self._rewrite()
+
+    def _write(self, batch: List[str]):
+        self._file.write(''.join(batch))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _rewrite(self):
+        """运行中压缩：只保留未完成任务的事件"""
+        with self._cond:
+            # 持锁期间缓冲区不会被写出，重写后继续追加到新文件
+            lines = list(self._unfinished.values())
+            tmp = f'{self.path}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        logger.info(f'任务日志已压缩，保留 {len(lines)} 个未完成任务')
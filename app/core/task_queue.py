@@ -1,12 +1,36 @@
-"""任务队列 - 生产者-消费者模式处理抓取任务"""
+"""任务队列 - 生产者-消费者模式处理抓取任务
+
+启用任务日志 (TASK_JOURNAL_ENABLED) 时，可按"模块:函数 + JSON 参数"重新构造的任务会记录入队/开始/完成/失败事件，
+进程崩溃或重启后由 start() 重新入队未完成的任务 (见 app/core/task_journal.py)。
+
+每个任务在看门狗 (app/core/watchdog.py) 监控下执行，超过 TASK_TIMEOUT 时回收其浏览器标签页；
+仍无法返回的线程被放弃，另起工作线程补上槽位。记录在日志中的任务超时后重新入队，
+累计 TASK_JOURNAL_MAX_ATTEMPTS 次后记为失败 (与共享队列的重试行为一致)。
+
+工作线程数可在运行中通过 resize() 调整 (自动扩缩容见 app/core/autoscaler.py)：
+多出的线程在当前任务结束后退出。
+
+stop(timeout) 先停止接收 (之后加入的任务只写入日志)，在期限内处理完排队中的任务；
+超时后不再领取新任务，剩余任务留在日志中，下次启动时恢复。
+"""
 import queue
 import threading
 import logging
-from typing import Callable, Any
+import time
+import uuid
+from collections import deque
+from typing import Callable, Any, Dict, Optional
 from datetime import datetime
 
+from app.config import settings
+from app.core.task_journal import TaskJournal, task_name, task_key, resolve_task
+from app.core.watchdog import watchdog, WatchedTask, TaskTimeout
+
 logger = logging.getLogger(__name__)
 
+GET_TIMEOUT = 0.5  # 工作线程等待新任务的轮询间隔 (秒)，也是停止时空闲线程的最长退出延迟
+LATENCY_WINDOW = 20  # 统计最近多少个任务的耗时
+
 class TaskQueue:
     """任务队列管理器 - 单例模式"""
     _instance = None
@@ -17,6 +41,17 @@ class TaskQueue:
             cls._instance.queue = queue.Queue()
             cls._instance.workers = []
             cls._instance.running = False
+            cls._instance.journal = None
+            cls._instance._lock = threading.Lock()
+            cls._instance._queued_keys: Dict[str, str] = {}  # 排队中 (尚未开始) 的任务内容 -> 任务 id
+            cls._instance._attempts: Dict[str, int] = {}     # 未结束的任务 id -> 第几次执行
+            cls._instance._draining = threading.Event()  # 停止接收，队列空后工作线程退出
+            cls._instance._halt = threading.Event()      # 排空期限已到，工作线程不再领取任务
+            cls._instance._abandoned = set()  # 被看门狗放弃的工作线程，任务返回后直接退出
+            cls._instance.target = 0      # 期望的工作线程数
+            cls._instance._spawned = 0    # 已创建的线程数 (用于命名)
+            cls._instance._active = 0     # 正在执行任务的线程数
+            cls._instance._durations = deque(maxlen=LATENCY_WINDOW)
         return cls._instance
     
     def start(self, num_workers: int = 2):
@@ -31,58 +66,299 @@ class TaskQueue:
             return
         
         self.running = True
-        for i in range(num_workers):
-            worker = threading.Thread(target=self._worker, daemon=True, name=f"Worker-{i+1}")
-            worker.start()
-            self.workers.append(worker)
+        # 新的事件对象：上次停止时仍在执行任务的旧线程结束后照旧退出，不会混入这一批
+        self._draining = threading.Event()
+        self._halt = threading.Event()
+        self.workers = []
+        if settings.TASK_JOURNAL_ENABLED and self.journal is None:
+            self._open_journal()
+        self.resize(num_workers)
         
         logger.info(f"任务队列已启动，工作线程数: {num_workers}")
     
-    def _worker(self):
-        """工作线程 - 从队列中取任务并执行"""
-        while self.running:
+    def _spawn_worker(self, name: Optional[str] = None) -> threading.Thread:
+        self._spawned += 1
+        worker = threading.Thread(target=self._worker, args=(self._draining, self._halt), daemon=True,
+                                  name=name or f"Worker-{self._spawned}")
+        worker.start()
+        self.workers.append(worker)
+        return worker
+    
+    def resize(self, num_workers: int):
+        """
+        调整工作线程数：不足时立即补齐，多出的线程在当前任务结束后 (或空闲时) 退出
+        
+        Args:
+            num_workers: 期望的工作线程数 (至少 1)
+        """
+        num_workers = max(1, num_workers)
+        with self._lock:
+            if num_workers != self.target and self.target:
+                logger.info(f"工作线程数调整: {self.target} -> {num_workers}")
+            self.target = num_workers
+            if not self.running:
+                return
+            while len(self.workers) < self.target:
+                self._spawn_worker()
+    
+    def _retire(self) -> bool:
+        """线程数多于目标时，让当前线程退出"""
+        if len(self.workers) <= self.target:
+            return False
+        with self._lock:
+            current = threading.current_thread()
+            if len(self.workers) > self.target and current in self.workers:
+                self.workers.remove(current)
+                return True
+        return False
+    
+    def load(self) -> Dict[str, Any]:
+        """扩缩容依据：排队数、执行中的任务数、最近任务的平均耗时 (秒)、当前线程数"""
+        durations = list(self._durations)
+        return {
+            'depth': self.queue.qsize(),
+            'busy': self._active,
+            'latency': sum(durations) / len(durations) if durations else None,
+            'workers': len(self.workers),
+        }
+
+    def reset_latency(self):
+        """清空耗时窗口：线程数调整后只按新并发下完成的任务判断，旧的平均值不会反复触发缩容"""
+        self._durations.clear()
+    
+    def _open_journal(self):
+        """打开任务日志并重新入队上次未完成的任务"""
+        journal = TaskJournal(settings.TASK_JOURNAL_PATH, fsync=settings.TASK_JOURNAL_FSYNC,
+                              max_bytes=settings.TASK_JOURNAL_MAX_BYTES,
+                              max_attempts=settings.TASK_JOURNAL_MAX_ATTEMPTS)
+        try:
+            records = journal.open()
+        except OSError as e:
+            logger.error(f"任务日志无法打开，本次运行不记录: {e}")
+            return
+        self.journal = journal
+        replayed = 0
+        for record in records:
+            try:
+                func = resolve_task(record['task'])
+            except (ImportError, AttributeError) as e:
+                logger.warning(f"无法恢复任务 {record['task']}: {e}")
+                journal.failed(record['id'], f'无法导入: {e}')
+                continue
+            args, kwargs = tuple(record.get('args', ())), record.get('kwargs', {})
+            with self._lock:
+                self._queued_keys[task_key(record['task'], args, kwargs)] = record['id']
+                self._attempts[record['id']] = record.get('attempt', 1)
+            self.queue.put((record['id'], func, args, kwargs))
+            replayed += 1
+        if replayed:
+            logger.info(f"已从任务日志恢复 {replayed} 个未完成的任务")
+    
+    def _worker(self, draining: threading.Event, halt: threading.Event):
+        """工作线程 - 从队列中取任务并执行；draining 后队列为空即退出，halt 后不再领取任务"""
+        while not halt.is_set():
             try:
-                # 从队列获取任务，超时1秒
-                task_func, args, kwargs = self.queue.get(timeout=1)
+                task_id, task_func, args, kwargs = self.queue.get(timeout=GET_TIMEOUT)
                 
                 logger.info(f"[{threading.current_thread().name}] 开始执行任务")
+                self._mark_started(task_id, task_func, args, kwargs)
+                started = time.monotonic()
+                with self._lock:
+                    self._active += 1
                 
                 try:
-                    # 执行任务
-                    task_func(*args, **kwargs)
+                    # 执行任务 (超时由看门狗回收)
+                    entry = (task_id, task_func, args, kwargs)
+                    with watchdog.guard(getattr(task_func, '__name__', 'task'),
+                                        on_abandon=lambda task, entry=entry: self._abandon(entry, task)):
+                        task_func(*args, **kwargs)
                     logger.info(f"[{threading.current_thread().name}] 任务执行成功")
+                    self._finish(task_id)
+                except TaskTimeout as e:
+                    logger.error(f"[{threading.current_thread().name}] 任务超时: {e}")
+                    self._retry(entry, str(e))
                 except Exception as e:
                     logger.error(f"[{threading.current_thread().name}] 任务执行失败: {e}")
+                    self._finish(task_id, str(e))
                 finally:
+                    with self._lock:
+                        self._active -= 1
+                    self._durations.append(time.monotonic() - started)
                     self.queue.task_done()
+                if threading.current_thread() in self._abandoned:
+                    # 已有替补线程接手，卡住的任务终于返回后本线程退出
+                    self._abandoned.discard(threading.current_thread())
+                    break
+                if self._retire():
+                    break
                     
             except queue.Empty:
+                if draining.is_set() or self._retire():
+                    break
                 continue
             except Exception as e:
                 logger.error(f"工作线程错误: {e}")
     
-    def add_task(self, func: Callable, *args, **kwargs):
+    def _finish(self, task_id: Optional[str], error: Optional[str] = None) -> bool:
+        """记录任务结束 (error 为 None 表示成功)；同一任务只记录一次，已记录过时返回 False"""
+        if not task_id or not self.journal:
+            return False
+        with self._lock:
+            if self._attempts.pop(task_id, None) is None:
+                return False
+        if error is None:
+            self.journal.done(task_id)
+        else:
+            self.journal.failed(task_id, error)
+        return True
+
+    def _retry(self, entry: tuple, reason: str):
+        """
+        超时的任务以新 id 重新入队 (attempt + 1)，累计 TASK_JOURNAL_MAX_ATTEMPTS 次后记为失败
+
+        被看门狗放弃的任务在放弃时处理，卡住的线程之后返回时不再重复处理。
+        正在停止时只写入日志，下次启动时执行；相同内容的任务已在排队时不再重复加入。
+        """
+        task_id, func, args, kwargs = entry
+        if not task_id or not self.journal:
+            return
+        name = task_name(func)
+        key = task_key(name, args, kwargs)
+        retry_id = None
+        with self._lock:
+            attempt = self._attempts.pop(task_id, None)
+            if attempt is None:
+                return
+            if attempt < settings.TASK_JOURNAL_MAX_ATTEMPTS and key not in self._queued_keys:
+                retry_id = uuid.uuid4().hex
+                if not self._draining.is_set():
+                    self._queued_keys[key] = retry_id
+                    self._attempts[retry_id] = attempt + 1
+        if retry_id:
+            # 先写入新任务再记录失败，两者之间崩溃时任务不会丢失
+            self.journal.enqueued(retry_id, name, args, kwargs, attempt=attempt + 1)
+        self.journal.failed(task_id, reason)
+        if retry_id is None:
+            logger.warning(f"任务 {name} 已执行 {attempt} 次仍超时，不再重试")
+        elif not self._draining.is_set():
+            self.queue.put((retry_id, func, args, kwargs))
+            logger.info(f"任务 {name} 超时，已重新入队 (第 {attempt + 1} 次执行)")
+
+    def _abandon(self, entry: tuple, task: WatchedTask):
+        """看门狗放弃卡住的任务：重新入队或记录失败，另起工作线程补上执行槽位"""
+        self._retry(entry, task.reason)
+        with self._lock:
+            if task.thread not in self.workers:
+                return
+            self.workers.remove(task.thread)
+            self._abandoned.add(task.thread)
+            if self.running and not self._halt.is_set() and len(self.workers) < self.target:
+                replacement = self._spawn_worker(f"{task.thread.name}+")
+                logger.warning(f"工作线程 {task.thread.name} 卡住，已由 {replacement.name} 接替")
+    
+    def _mark_started(self, task_id: Optional[str], func: Callable, args: tuple, kwargs: dict):
+        """任务开始执行：不再参与去重 (执行期间允许再次入队)，记录 started 事件"""
+        if not task_id:
+            return
+        key = task_key(task_name(func), args, kwargs)
+        with self._lock:
+            if self._queued_keys.get(key) == task_id:
+                del self._queued_keys[key]
+        if self.journal:
+            self.journal.started(task_id)
+    
+    def add_task(self, func: Callable, *args, **kwargs) -> Optional[str]:
         """
         添加任务到队列
         
+        可记录到任务日志的任务 (模块级函数 + 可 JSON 序列化的参数) 若已有相同内容的任务在排队，则不重复加入。
+        
         Args:
             func: 要执行的函数
             *args: 位置参数
             **kwargs: 关键字参数
+        
+        Returns:
+            任务 id；不记录日志的任务为空字符串，因重复或正在停止而跳过时为 None
         """
-        self.queue.put((func, args, kwargs))
+        name = task_name(func) if self.journal else None
+        key = task_key(name, args, kwargs) if name else None
+        task_id = ''
+        if self._draining.is_set():
+            # 正在停止：不再执行新任务，可记录的任务写入日志留待下次启动
+            if not key:
+                logger.warning(f"任务队列正在停止，丢弃任务: {getattr(func, '__name__', func)}")
+                return None
+            task_id = uuid.uuid4().hex
+            self.journal.enqueued(task_id, name, args, kwargs)
+            logger.info(f"任务队列正在停止，任务已写入日志，下次启动时执行: {name}")
+            return task_id
+        if key:
+            with self._lock:
+                if key in self._queued_keys:
+                    logger.info(f"相同任务已在队列中，跳过: {name}")
+                    return None
+                task_id = uuid.uuid4().hex
+                self._queued_keys[key] = task_id
+                self._attempts[task_id] = 1
+            self.journal.enqueued(task_id, name, args, kwargs)
+        self.queue.put((task_id, func, args, kwargs))
         logger.info(f"任务已加入队列，当前队列长度: {self.queue.qsize()}")
+        return task_id
     
     def get_queue_size(self):
         """获取队列长度"""
         return self.queue.qsize()
     
-    def stop(self):
-        """停止任务队列"""
+    def pending(self) -> int:
+        """排队中与执行中的任务数 (低优先级的后台作业据此让路)"""
+        return self.queue.unfinished_tasks
+    
+    def stop(self, timeout: Optional[float] = None) -> int:
+        """
+        停止任务队列：不再接收新任务，在 timeout 秒内处理完排队中的任务
+        
+        超时后工作线程不再领取任务；执行中的任务无法中断，会在后台 (daemon 线程) 继续到结束。
+        未完成的任务保留在任务日志中，下次 start() 时恢复。
+        
+        Returns:
+            未处理完的任务数 (排队中 + 仍在执行)
+        """
+        if not self.running:
+            return 0
+        self._draining.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            workers = list(self.workers)
+        for worker in workers:
+            worker.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._halt.set()
+        for worker in workers:
+            # 期限已到：空闲线程在一次 get 超时内退出
+            worker.join(GET_TIMEOUT * 2)
+        busy = sum(worker.is_alive() for worker in workers)
+        left = 0
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.queue.task_done()
+            left += 1
+        with self._lock:
+            self._queued_keys.clear()
+            self._attempts.clear()
+        if self.journal:
+            self.journal.close()
+            self.journal = None
         self.running = False
-        # 等待所有任务完成
-        self.queue.join()
-        logger.info("任务队列已停止")
+        self.workers = []
+        if left or busy:
+            logger.warning(f"任务队列已停止: {left} 个排队中的任务与 {busy} 个执行中的任务未完成，"
+                           f"已记录的任务将在下次启动时恢复")
+        else:
+            logger.info("任务队列已停止")
+        return left + busy
 
 # 全局任务队列实例
 task_queue = TaskQueue()
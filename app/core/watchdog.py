@@ -0,0 +1,184 @@
+"""任务看门狗 - 给每个任务一个墙钟预算，超时后逐级回收卡住的浏览器操作
+
+Python 线程无法被强制结束，因此把任务打开的浏览器标签页作为可回收的单元：
+BrowserManager.get_new_tab() 把标签页登记到当前线程的任务上，任务超时后看门狗依次：
+1. 关闭该任务的标签页 —— 阻塞在页面加载、监听或元素操作上的调用随连接断开而抛出异常
+2. 宽限期 (WATCHDOG_GRACE) 后仍未返回且打开过标签页：经内存管理回收浏览器 (暂停新的抓取，
+   最多等待一个宽限期让其他抓取结束，再以同一用户数据目录重新启动)
+3. 再过一个宽限期仍未返回：放弃该线程，调用方的 on_abandon 另起线程补上执行槽位并记录失败
+
+超时原因记录在任务上；任务返回时 guard() 抛出 TaskTimeout，由任务队列写入任务日志或共享队列。
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 超时后的处理阶段
+RUNNING = 0
+TABS_CLOSED = 1
+BROWSER_RESTARTED = 2
+ABANDONED = 3
+
+class TaskTimeout(Exception):
+    """任务超过墙钟预算"""
+
+class WatchedTask:
+    """看门狗登记的一个执行中任务"""
+
+    def __init__(self, name: str, timeout: float, on_abandon: Optional[Callable[['WatchedTask'], None]] = None):
+        self.name = name
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.thread = threading.current_thread()
+        self.tabs: List[Any] = []
+        self.stage = RUNNING
+        self.reason: Optional[str] = None
+        self.on_abandon = on_abandon
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def abandoned(self) -> bool:
+        return self.stage == ABANDONED
+
+class Watchdog:
+    """任务看门狗 - 单例模式；首个任务登记时启动检查线程"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Watchdog, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._tasks: Dict[int, WatchedTask] = {}  # 线程 id -> 任务
+            cls._instance._thread = None
+            cls._instance.events = deque(maxlen=50)  # 最近的超时处理记录
+            cls._instance.counters = {'timeouts': 0, 'tabs_closed': 0, 'browser_restarts': 0, 'abandoned': 0}
+        return cls._instance
+
+    @contextmanager
+    def guard(self, name: str, timeout: Optional[float] = None,
+              on_abandon: Optional[Callable[[WatchedTask], None]] = None) -> Iterator[Optional[WatchedTask]]:
+        """
+        在看门狗监控下执行一段任务代码 (同一线程内嵌套时沿用外层的预算)
+
+        Args:
+            name: 任务名 (用于日志)
+            timeout: 墙钟预算秒数，默认 TASK_TIMEOUT；不大于 0 时不监控
+            on_abandon: 任务被放弃时在看门狗线程中调用，参数为该任务
+
+        Raises:
+            TaskTimeout: 任务超时 (即使任务代码自己吞掉了标签页关闭引发的异常)
+        """
+        timeout = settings.TASK_TIMEOUT if timeout is None else timeout
+        ident = threading.get_ident()
+        if not settings.WATCHDOG_ENABLED or timeout <= 0 or ident in self._tasks:
+            yield self._tasks.get(ident)
+            return
+        task = WatchedTask(name, timeout, on_abandon)
+        with self._lock:
+            self._tasks[ident] = task
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name='Watchdog')
+                self._thread.start()
+        try:
+            yield task
+        except Exception as e:
+            if task.reason is None:
+                raise
+            raise TaskTimeout(task.reason) from e
+        finally:
+            with self._lock:
+                if self._tasks.get(ident) is task:
+                    del self._tasks[ident]
+        if task.reason is not None:
+            raise TaskTimeout(task.reason)
+
+    def current(self) -> Optional[WatchedTask]:
+        """当前线程正在执行的任务"""
+        return self._tasks.get(threading.get_ident())
+
+    def attach_tab(self, tab):
+        """把标签页登记到当前线程的任务上 (不在任务中时忽略)"""
+        task = self.current()
+        if task is not None:
+            task.tabs.append(tab)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = [{'name': t.name, 'elapsed': round(t.elapsed, 1), 'stage': t.stage} for t in self._tasks.values()]
+        return {**self.counters, 'running': running, 'recent': list(self.events)}
+
+    # ===== 检查 =====
+
+    def _run(self):
+        while True:
+            time.sleep(settings.WATCHDOG_INTERVAL)
+            self.check()
+
+    def check(self, now: Optional[float] = None):
+        """处理所有已超时的任务 (检查线程定期调用)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            overdue = [task for task in self._tasks.values() if task.stage < ABANDONED and now >= task.deadline]
+        for task in overdue:
+            try:
+                self._escalate(task, now)
+            except Exception as e:
+                logger.error(f"看门狗处理超时任务 {task.name} 失败: {e}")
+
+    def _escalate(self, task: WatchedTask, now: float):
+        task.stage += 1
+        task.deadline = now + settings.WATCHDOG_GRACE
+        if task.stage == TABS_CLOSED:
+            task.reason = f"超过 {task.timeout:g} 秒未完成"
+            self.counters['timeouts'] += 1
+            closed = self._close_tabs(task)
+            self.counters['tabs_closed'] += closed
+            action = f"关闭 {closed} 个标签页"
+        elif task.stage == BROWSER_RESTARTED:
+            if task.tabs and self._restart_browser(task):
+                task.reason += "，关闭标签页后仍未返回，已重启浏览器"
+                self.counters['browser_restarts'] += 1
+                action = "重启浏览器"
+            else:
+                action = "等待"  # 没有浏览器操作可回收
+        else:
+            task.reason += f"，{settings.WATCHDOG_GRACE * 2:g} 秒宽限期后仍未返回，已放弃"
+            self.counters['abandoned'] += 1
+            action = "放弃线程"
+            if task.on_abandon is not None:
+                task.on_abandon(task)
+        logger.warning(f"⏱️ 任务超时 [{task.thread.name}] {task.name}: 已运行 {task.elapsed:.0f} 秒，{action}")
+        self.events.append({'name': task.name, 'thread': task.thread.name, 'action': action,
+                            'elapsed': round(task.elapsed, 1), 'reason': task.reason, 'at': time.time()})
+
+    @staticmethod
+    def _close_tabs(task: WatchedTask) -> int:
+        closed = 0
+        for tab in task.tabs:
+            try:
+                tab.close()
+                closed += 1
+            except Exception:
+                pass  # 标签页已关闭或浏览器已断开
+        return closed
+
+    @staticmethod
+    def _restart_browser(task: WatchedTask) -> bool:
+        # 不直接 BrowserManager.restart()：那会打断其他正在进行的抓取
+        from app.scraper.governor import browser_governor
+        return browser_governor.recycle(f"任务 {task.name} 超时", exclude=task.thread,
+                                        drain_timeout=settings.WATCHDOG_GRACE)
+
+# 全局实例
+watchdog = Watchdog()
@@ -0,0 +1,333 @@
+"""共享任务队列 - 多个 worker 进程 (可跨机器) 通过租约领取抓取任务
+
+后端：
+- sqlite: QueueTask 表，默认与主库同一文件，可用 QUEUE_URL 指向单独的库
+- redis: 任意兼容 Redis 协议的服务 (redis-server/KeyDB/Dragonfly 等)，需安装 redis 包
+
+领取任务时写入租约 (随机 token + 过期时间)，worker 执行期间定期 heartbeat 续约；
+worker 崩溃或失联时租约过期，任务重新可见并被其它 worker 领取。
+complete/fail/heartbeat 都校验 token，租约被收回后旧 worker 的提交会被忽略。
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlmodel import Session, create_engine, select, func, or_, and_, update, delete
+
+from app.config import settings
+from app.database.models import QueueTask
+
+try:
+    import redis
+except ImportError:  # 可选依赖，只有 QUEUE_BACKEND=redis 时需要
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('local', 'sqlite', 'redis')
+
+# 任务名 (处理函数见 app/worker.py 的 TASKS)
+SCRAPE_TASK = 'scrape_source'
+
+class Lease(NamedTuple):
+    task_id: str
+    name: str
+    payload: Dict[str, Any]
+    token: str
+    attempts: int  # 含本次在内的领取次数
+
+class WorkQueue(ABC):
+    """共享队列接口"""
+
+    def __init__(self, max_attempts: Optional[int] = None, retry_delay: Optional[int] = None):
+        self.max_attempts = max_attempts or settings.QUEUE_MAX_ATTEMPTS
+        self.retry_delay = settings.QUEUE_RETRY_DELAY if retry_delay is None else retry_delay
+
+    @abstractmethod
+    def enqueue(self, name: str, payload: Optional[Dict[str, Any]] = None,
+                dedupe_key: Optional[str] = None) -> Optional[str]:
+        """加入任务；dedupe_key 相同的任务尚未完成时不重复加入并返回 None"""
+
+    @abstractmethod
+    def lease(self, owner: str, visibility_timeout: int) -> Optional[Lease]:
+        """领取一个可见任务，没有任务时返回 None"""
+
+    @abstractmethod
+    def heartbeat(self, lease: Lease, visibility_timeout: int) -> bool:
+        """续约；租约已被收回时返回 False"""
+
+    @abstractmethod
+    def complete(self, lease: Lease) -> bool:
+        """任务完成并移出队列"""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str) -> bool:
+        """
+        任务失败：未超过最大次数时延迟后重新可见，否则标记为 dead
+
+        Returns:
+            是否会重试
+        """
+
+    @abstractmethod
+    def size(self) -> int:
+        """未完成 (等待中 + 执行中) 的任务数"""
+
+class SQLiteWorkQueue(WorkQueue):
+    """SQLite 后端：领取时先查候选再带条件 UPDATE，rowcount 为 1 才算抢到 (多进程乐观并发)"""
+
+    LEASE_RETRIES = 5
+
+    def __init__(self, engine=None, **kwargs):
+        super().__init__(**kwargs)
+        if engine is None:
+            from app.database.engine import engine
+        self.engine = engine
+        QueueTask.__table__.create(self.engine, checkfirst=True)
+
+    def enqueue(self, name, payload=None, dedupe_key=None):
+        with Session(self.engine) as session:
+            if dedupe_key:
+                statement = select(QueueTask.id).where(
+                    QueueTask.dedupe_key == dedupe_key, QueueTask.status.in_(('pending', 'leased'))
+                )
+                if session.exec(statement).first() is not None:
+                    return None
+            task = QueueTask(name=name, payload=json.dumps(payload or {}, ensure_ascii=False), dedupe_key=dedupe_key)
+            session.add(task)
+            session.commit()
+            return str(task.id)
+
+    @staticmethod
+    def _visible(now: datetime):
+        return or_(
+            and_(QueueTask.status == 'pending', QueueTask.available_at <= now),
+            and_(QueueTask.status == 'leased', QueueTask.lease_expires < now),
+        )
+
+    def lease(self, owner, visibility_timeout):
+        with Session(self.engine) as session:
+            now = datetime.now()
+            # 多次租约过期 (worker 反复崩溃) 的任务不再重试
+            session.execute(
+                update(QueueTask)
+                .where(QueueTask.status == 'leased', QueueTask.lease_expires < now,
+                       QueueTask.attempts >= self.max_attempts)
+                .values(status='dead', lease_token=None, last_error='租约多次过期')
+            )
+            session.commit()
+
+            for _ in range(self.LEASE_RETRIES):
+                candidate = session.exec(
+                    select(QueueTask.id).where(self._visible(now)).order_by(QueueTask.id).limit(1)
+                ).first()
+                if candidate is None:
+                    return None
+                token = uuid.uuid4().hex
+                result = session.execute(
+                    update(QueueTask)
+                    .where(QueueTask.id == candidate, self._visible(now))
+                    .values(status='leased', lease_token=token, lease_owner=owner,
+                            lease_expires=now + timedelta(seconds=visibility_timeout),
+                            attempts=QueueTask.attempts + 1)
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    task = session.get(QueueTask, candidate)
+                    return Lease(str(task.id), task.name, json.loads(task.payload), token, task.attempts)
+                # 被其它 worker 抢先，换下一个候选
+        return None
+
+    def _update_leased(self, lease: Lease, **values) -> bool:
+        with Session(self.engine) as session:
+            result = session.execute(
+                update(QueueTask)
+                .where(QueueTask.id == int(lease.task_id), QueueTask.lease_token == lease.token,
+                       QueueTask.status == 'leased')
+                .values(**values)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def heartbeat(self, lease, visibility_timeout):
+        return self._update_leased(lease, lease_expires=datetime.now() + timedelta(seconds=visibility_timeout))
+
+    def complete(self, lease):
+        with Session(self.engine) as session:
+            result = session.execute(
+                delete(QueueTask).where(QueueTask.id == int(lease.task_id), QueueTask.lease_token == lease.token)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def fail(self, lease, error):
+        if lease.attempts >= self.max_attempts:
+            self._update_leased(lease, status='dead', lease_token=None, last_error=error)
+            return False
+        available_at = datetime.now() + timedelta(seconds=self.retry_delay * lease.attempts)
+        return self._update_leased(lease, status='pending', lease_token=None, lease_owner=None,
+                                   lease_expires=None, available_at=available_at, last_error=error)
+
+    def size(self):
+        with Session(self.engine) as session:
+            statement = select(func.count(QueueTask.id)).where(QueueTask.status.in_(('pending', 'leased')))
+            return session.exec(statement).one()
+
+# Redis 后端的原子操作 (Lua)。键：pending 列表、leased 有序集合 (score 为租约到期时间)、
+# dead 列表、dedupe 集合、每个任务一个 hash
+REDIS_LEASE = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    local task = ARGV[5] .. id
+    if tonumber(redis.call('HGET', task, 'attempts') or '0') >= tonumber(ARGV[4]) then
+        redis.call('HSET', task, 'token', '', 'last_error', 'lease expired too many times')
+        redis.call('RPUSH', KEYS[3], id)
+        redis.call('SREM', KEYS[4], redis.call('HGET', task, 'dedupe_key') or '')
+    else
+        -- 清空 token：放回队列后旧持有者的续约/提交不再生效
+        redis.call('HSET', task, 'token', '')
+        redis.call('LPUSH', KEYS[1], id)
+    end
+end
+local id = redis.call('LPOP', KEYS[1])
+if not id then
+    return false
+end
+local task = ARGV[5] .. id
+redis.call('HSET', task, 'token', ARGV[3])
+local attempts = redis.call('HINCRBY', task, 'attempts', 1)
+redis.call('ZADD', KEYS[2], ARGV[2], id)
+return {id, redis.call('HGET', task, 'name'), redis.call('HGET', task, 'payload'), attempts}
+"""
+
+REDIS_HEARTBEAT = """
+if redis.call('HGET', KEYS[2], 'token') ~= ARGV[1] or ARGV[1] == '' then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[2], ARGV[3])
+return 1
+"""
+
+REDIS_COMPLETE = """
+if redis.call('HGET', KEYS[2], 'token') ~= ARGV[1] or ARGV[1] == '' then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[2])
+redis.call('SREM', KEYS[3], redis.call('HGET', KEYS[2], 'dedupe_key') or '')
+redis.call('DEL', KEYS[2])
+return 1
+"""
+
+# 重试不另设延迟队列：清空 token 后把 leased 中的到期时间设为重试时间，到期后由 REDIS_LEASE 放回
+REDIS_FAIL = """
+if redis.call('HGET', KEYS[2], 'token') ~= ARGV[1] or ARGV[1] == '' then
+    return 0
+end
+redis.call('HSET', KEYS[2], 'token', '', 'last_error', ARGV[3])
+if ARGV[5] == '1' then
+    redis.call('ZREM', KEYS[1], ARGV[2])
+    redis.call('RPUSH', KEYS[3], ARGV[2])
+    redis.call('SREM', KEYS[4], redis.call('HGET', KEYS[2], 'dedupe_key') or '')
+else
+    redis.call('ZADD', KEYS[1], ARGV[4], ARGV[2])
+end
+return 1
+"""
+
+class RedisWorkQueue(WorkQueue):
+    """Redis 协议后端：领取/续约/完成/失败均为 Lua 脚本，单条命令内原子执行"""
+
+    def __init__(self, url: str, prefix: str = 'smart_scraper:queue', client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            if redis is None:
+                raise RuntimeError('QUEUE_BACKEND=redis 需要安装 redis 包: pip install redis')
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.pending_key = f'{prefix}:pending'
+        self.leased_key = f'{prefix}:leased'
+        self.dead_key = f'{prefix}:dead'
+        self.dedupe_key = f'{prefix}:dedupe'
+        self.task_prefix = f'{prefix}:task:'
+        self._lease = client.register_script(REDIS_LEASE)
+        self._heartbeat = client.register_script(REDIS_HEARTBEAT)
+        self._complete = client.register_script(REDIS_COMPLETE)
+        self._fail = client.register_script(REDIS_FAIL)
+
+    def enqueue(self, name, payload=None, dedupe_key=None):
+        if dedupe_key and not self.client.sadd(self.dedupe_key, dedupe_key):
+            return None
+        task_id = str(self.client.incr(f'{self.prefix}:seq'))
+        pipe = self.client.pipeline()
+        pipe.hset(self.task_prefix + task_id, mapping={
+            'name': name, 'payload': json.dumps(payload or {}, ensure_ascii=False),
+            'dedupe_key': dedupe_key or '', 'attempts': 0, 'token': '',
+        })
+        pipe.rpush(self.pending_key, task_id)
+        pipe.execute()
+        return task_id
+
+    def lease(self, owner, visibility_timeout):
+        now = time.time()
+        token = uuid.uuid4().hex
+        result = self._lease(
+            keys=[self.pending_key, self.leased_key, self.dead_key, self.dedupe_key],
+            args=[now, now + visibility_timeout, token, self.max_attempts, self.task_prefix],
+        )
+        if not result:
+            return None
+        task_id, name, payload, attempts = result
+        return Lease(task_id, name, json.loads(payload), token, int(attempts))
+
+    def heartbeat(self, lease, visibility_timeout):
+        return bool(self._heartbeat(
+            keys=[self.leased_key, self.task_prefix + lease.task_id],
+            args=[lease.token, time.time() + visibility_timeout, lease.task_id],
+        ))
+
+    def complete(self, lease):
+        return bool(self._complete(
+            keys=[self.leased_key, self.task_prefix + lease.task_id, self.dedupe_key],
+            args=[lease.token, lease.task_id],
+        ))
+
+    def fail(self, lease, error):
+        dead = lease.attempts >= self.max_attempts
+        self._fail(
+            keys=[self.leased_key, self.task_prefix + lease.task_id, self.dead_key, self.dedupe_key],
+            args=[lease.token, lease.task_id, error, time.time() + self.retry_delay * lease.attempts,
+                  '1' if dead else '0'],
+        )
+        return not dead
+
+    def size(self):
+        return self.client.llen(self.pending_key) + self.client.zcard(self.leased_key)
+
+def create_work_queue(backend: Optional[str] = None, url: Optional[str] = None) -> WorkQueue:
+    """按配置创建共享队列"""
+    backend = backend or settings.QUEUE_BACKEND
+    url = url or settings.QUEUE_URL
+    if backend == 'redis':
+        return RedisWorkQueue(url or 'redis://127.0.0.1:6379/0')
+    if backend == 'sqlite':
+        engine = create_engine(url, connect_args={"check_same_thread": False}) if url else None
+        return SQLiteWorkQueue(engine)
+    raise ValueError(f'不支持的共享队列后端: {backend} (可选: sqlite, redis)')
+
+_shared_queue: Optional[WorkQueue] = None
+_shared_lock = threading.Lock()
+
+def shared_queue() -> WorkQueue:
+    """进程内共用的共享队列实例 (首次使用时按配置创建)"""
+    global _shared_queue
+    with _shared_lock:
+        if _shared_queue is None:
+            _shared_queue = create_work_queue()
+        return _shared_queue
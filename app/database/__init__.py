@@ -1,5 +1,5 @@
 # Database package
 from app.database.engine import engine, create_db_and_tables, get_session
-from app.database.models import Source, ScrapedItem
+from app.database.models import Source, ScrapedItem, ItemContent, WebSubSubscription, SourceCheck, QueueTask, ImageAsset, Transcript
 
-__all__ = ['engine', 'create_db_and_tables', 'get_session', 'Source', 'ScrapedItem']
+__all__ = ['engine', 'create_db_and_tables', 'get_session', 'Source', 'ScrapedItem', 'ItemContent', 'WebSubSubscription', 'SourceCheck', 'QueueTask', 'ImageAsset', 'Transcript']
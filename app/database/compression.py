@@ -0,0 +1,45 @@
+"""长文本压缩编解码 - zlib 为内置默认，zstd 需要安装 zstandard"""
+import zlib
+from typing import Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选依赖
+    zstandard = None
+
+CODEC_NONE = 'none'
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+
+def available_codec(codec: str) -> str:
+    """返回实际可用的编码 (未安装 zstandard 时 zstd 降级为 zlib)"""
+    if codec == CODEC_ZSTD and zstandard is None:
+        return CODEC_ZLIB
+    if codec not in (CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD):
+        raise ValueError(f"Unknown codec: {codec}")
+    return codec
+
+def compress_text(text: str, codec: str = CODEC_ZLIB) -> Tuple[str, bytes]:
+    """
+    压缩文本
+
+    Returns:
+        (实际使用的编码, 压缩后的字节)
+    """
+    codec = available_codec(codec)
+    raw = text.encode('utf-8')
+    if codec == CODEC_ZSTD:
+        return codec, zstandard.ZstdCompressor(level=3).compress(raw)
+    if codec == CODEC_ZLIB:
+        return codec, zlib.compress(raw, 6)
+    return codec, raw
+
+def decompress_text(codec: str, data: bytes) -> str:
+    """按编码解压为文本"""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data).decode('utf-8')
+    return data.decode('utf-8')
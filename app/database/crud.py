@@ -1,9 +1,19 @@
 """CRUD operations for database models"""
-from typing import List, Optional
-from sqlmodel import Session, select
-from app.database.models import Source, ScrapedItem
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Tuple, Iterator
+from sqlmodel import Session, select, func, or_, tuple_, case
+from sqlalchemy import String, text
+from sqlalchemy.orm import defer
+from app.config import settings
+from app.database.models import Source, ScrapedItem, ItemContent, WebSubSubscription, SourceCheck, ImageAsset, Transcript
 from app.database.engine import engine
-from datetime import datetime
+from app.database.compression import compress_text, decompress_text
+from app.database import search
+from app.rss.render import ENTRY_TEMPLATE_VERSION, AI_FIELDS, apply_entry_html
+from datetime import datetime, date, timedelta
 
 # Source CRUD
 
@@ -14,8 +24,40 @@ def create_source(name: str, url: str, platform: str, frequency: int = 60) -> So
         session.add(source)
         session.commit()
         session.refresh(source)
+        invalidate_stats_cache()
         return source
 
+def bulk_create_sources(sources: List[Dict[str, Any]]) -> Tuple[List[Source], int]:
+    """
+    在一个事务中批量创建数据源
+
+    URL 已存在 (库中或本批次内重复) 的条目跳过。
+
+    Args:
+        sources: 每项包含 name/url/platform，可选 frequency/is_active
+
+    Returns:
+        (新建的数据源列表, 跳过的条数)
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        existing = set()
+        urls = [s['url'] for s in sources]
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            existing.update(session.exec(select(Source.url).where(Source.url.in_(chunk))).all())
+
+        created = []
+        for data in sources:
+            if data['url'] in existing:
+                continue
+            existing.add(data['url'])
+            created.append(Source(**data))
+        session.add_all(created)
+        session.commit()
+    if created:
+        invalidate_stats_cache()
+    return created, len(sources) - len(created)
+
 def get_sources(active_only: bool = False) -> List[Source]:
     """获取所有数据源"""
     with Session(engine) as session:
@@ -24,6 +66,67 @@ def get_sources(active_only: bool = False) -> List[Source]:
             statement = statement.where(Source.is_active == True)
         return list(session.exec(statement).all())
 
+# 表格可排序列 (键集分页按 (排序列, id) 定位)
+SOURCE_SORT_COLUMNS = {
+    'id': Source.id,
+    'name': Source.name,
+    'platform': Source.platform,
+    'frequency': Source.frequency,
+    'status_label': Source.is_active,
+    'last_scraped': func.coalesce(Source.last_scraped, '', type_=String),
+}
+
+def _source_filter(statement, search: Optional[str]):
+    if search:
+        pattern = f"%{search}%"
+        statement = statement.where(or_(
+            Source.name.like(pattern), Source.url.like(pattern), Source.platform.like(pattern)
+        ))
+    return statement
+
+def get_sources_page(
+    limit: int = 50,
+    after: Optional[tuple] = None,
+    sort_by: str = 'id',
+    descending: bool = False,
+    search: Optional[str] = None
+) -> Tuple[List[Source], Optional[tuple]]:
+    """
+    键集分页获取数据源
+
+    Args:
+        limit: 每页条数
+        after: 上一页返回的游标 (排序值, id)，None 表示第一页
+        sort_by: 排序列，见 SOURCE_SORT_COLUMNS
+        descending: 是否倒序
+        search: 按名称/URL/平台模糊过滤
+
+    Returns:
+        (数据源列表, 下一页游标；没有更多数据时为 None)
+    """
+    sort_key = SOURCE_SORT_COLUMNS.get(sort_by, Source.id)
+    with Session(engine) as session:
+        statement = _source_filter(select(Source, sort_key), search)
+        if after is not None:
+            position = tuple_(sort_key, Source.id)
+            statement = statement.where(position < tuple_(*after) if descending else position > tuple_(*after))
+        if descending:
+            statement = statement.order_by(sort_key.desc(), Source.id.desc())
+        else:
+            statement = statement.order_by(sort_key, Source.id)
+        rows = session.exec(statement.limit(limit)).all()
+
+    sources = [source for source, _ in rows]
+    if len(rows) < limit:
+        return sources, None
+    last_source, last_key = rows[-1]
+    return sources, (last_key, last_source.id)
+
+def count_sources(search: Optional[str] = None) -> int:
+    """统计数据源数量 (与 get_sources_page 使用相同过滤条件)"""
+    with Session(engine) as session:
+        return session.exec(_source_filter(select(func.count(Source.id)), search)).one()
+
 def update_source_last_scraped(source_id: int):
     """更新源的最后抓取时间"""
     with Session(engine) as session:
@@ -38,33 +141,607 @@ def delete_source(source_id: int):
     with Session(engine) as session:
         source = session.get(Source, source_id)
         if source:
+            check = session.get(SourceCheck, source_id)
+            if check:
+                session.delete(check)
             session.delete(source)
             session.commit()
+            invalidate_stats_cache()
+
+# Source change detection
+
+# record_source_check 允许更新的状态字段
+SOURCE_CHECK_FIELDS = ('etag', 'last_modified', 'fingerprint', 'last_seen_url', 'http_probe')
+
+def get_source_check(source_id: int) -> SourceCheck:
+    """获取数据源的变更探测状态，尚无记录时返回空状态 (未入库)"""
+    with Session(engine) as session:
+        return session.get(SourceCheck, source_id) or SourceCheck(source_id=source_id)
+
+def get_source_checks(source_ids: List[int]) -> Dict[int, SourceCheck]:
+    """批量获取变更探测状态 (表格展示跳过率用)"""
+    if not source_ids:
+        return {}
+    with Session(engine) as session:
+        statement = select(SourceCheck).where(SourceCheck.source_id.in_(source_ids))
+        return {check.source_id: check for check in session.exec(statement)}
+
+def record_source_check(source_id: int, skipped: bool, **fields) -> SourceCheck:
+    """
+    记录一次变更探测结果
+
+    Args:
+        skipped: 本次是否因内容未变化而跳过抓取
+        **fields: 需要更新的探测状态 (etag/last_modified/fingerprint/last_seen_url/http_probe)
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        check = session.get(SourceCheck, source_id) or SourceCheck(source_id=source_id)
+        for key, value in fields.items():
+            if key not in SOURCE_CHECK_FIELDS:
+                raise ValueError(f"不支持的探测字段: {key}")
+            setattr(check, key, value)
+        check.runs += 1
+        check.skips += int(skipped)
+        check.last_checked = datetime.now()
+        session.add(check)
+        session.commit()
+        return check
+
 
 # ScrapedItem CRUD
 
+# 列表/表格使用的轻量投影列
+ITEM_SUMMARY_COLUMNS = (
+    ScrapedItem.id,
+    ScrapedItem.source_id,
+    ScrapedItem.title,
+    ScrapedItem.url,
+    ScrapedItem.ai_score,
+    ScrapedItem.sentiment,
+    ScrapedItem.risk_level,
+    ScrapedItem.created_at,
+)
+
+@contextmanager
+def _item_write_session() -> Iterator[Session]:
+    """
+    先取得写锁再读取的会话 (BEGIN IMMEDIATE)
+
+    feed_html 由整行渲染：AI 分析、缩略图、相关内容在不同线程/进程中各自更新一列并重新渲染，
+    若先读后写，后提交的一方会用旧快照覆盖另一方刚渲染进去的内容。读-渲染-写在同一个写事务中完成即可串行化。
+    """
+    with Session(engine) as session:
+        session.execute(text('BEGIN IMMEDIATE'))
+        yield session
+
 def create_scraped_item(item: ScrapedItem) -> ScrapedItem:
-    """创建新的抓取项"""
+    """创建新的抓取项 (预渲染 feed HTML；长正文压缩后存入 ItemContent，主表只保留预览)"""
+    apply_entry_html(item)
     with Session(engine) as session:
+        full_content = item.content or ''
+        limit = settings.CONTENT_INLINE_LIMIT
+        if len(full_content) > limit:
+            item.content = full_content[:limit]
         session.add(item)
+        if len(full_content) > limit:
+            session.flush()  # 获取 item.id
+            codec, data = compress_text(full_content, settings.CONTENT_COMPRESSION)
+            session.add(ItemContent(item_id=item.id, codec=codec, size=len(full_content), data=data))
         session.commit()
         session.refresh(item)
+        _record_item_in_stats(item)
         return item
 
-def get_scraped_items(limit: int = 100) -> List[ScrapedItem]:
-    """获取抓取项列表"""
+def update_item_analysis(item_id: int, **fields) -> Optional[ScrapedItem]:
+    """
+    更新条目的 AI 字段 (ai_summary/sentiment/ai_score/risk_level，以及结果来源 ai_source)
+
+    只有字段值实际变化时才重新渲染 feed_html 并写库。
+    """
+    unknown = set(fields) - set(AI_FIELDS) - {'ai_source'}
+    if unknown:
+        raise ValueError(f"不是 AI 字段: {', '.join(sorted(unknown))}")
+    with _item_write_session() as session:
+        item = session.get(ScrapedItem, item_id)
+        if not item:
+            return None
+        changed = {k: v for k, v in fields.items() if getattr(item, k) != v}
+        if not changed:
+            return item
+        for key, value in changed.items():
+            setattr(item, key, value)
+        apply_entry_html(item)
+        session.add(item)
+        session.commit()
+        session.refresh(item)
+    if 'sentiment' in changed or 'risk_level' in changed:
+        invalidate_stats_cache()
+    return item
+
+def set_item_thumbnails(item_id: int, digests: List[str]) -> Optional[ScrapedItem]:
+    """保存条目的本地缩略图并重新渲染 feed_html"""
+    with _item_write_session() as session:
+        item = session.get(ScrapedItem, item_id)
+        if not item:
+            return None
+        thumbnails = ','.join(digests)
+        if item.thumbnails != thumbnails:
+            item.thumbnails = thumbnails
+            apply_entry_html(item)
+            session.add(item)
+            session.commit()
+            session.refresh(item)
+        return item
+
+def set_item_related(item_id: int, related: List[Dict[str, Any]]) -> Optional[ScrapedItem]:
+    """保存条目的相关内容 ([{"id", "title", "url"}]) 并重新渲染 feed_html"""
+    with _item_write_session() as session:
+        item = session.get(ScrapedItem, item_id)
+        if not item:
+            return None
+        value = json.dumps(related, ensure_ascii=False) if related else ''
+        if item.related != value:
+            item.related = value
+            apply_entry_html(item)
+            session.add(item)
+            session.commit()
+            session.refresh(item)
+        return item
+
+def join_cluster(item_id: int, neighbor_id: int) -> Optional[int]:
+    """
+    把条目并入相似条目所在的事件
+
+    邻居尚未归入任何事件时以它的 id 作为事件 id (事件 id 即最早条目的 id)。
+
+    Returns:
+        事件 id；任一条目不存在时返回 None
+    """
+    with Session(engine) as session:
+        item = session.get(ScrapedItem, item_id)
+        neighbor = session.get(ScrapedItem, neighbor_id)
+        if not item or not neighbor:
+            return None
+        cluster_id = neighbor.cluster_id or neighbor.id
+        neighbor.cluster_id = cluster_id
+        item.cluster_id = cluster_id
+        session.add(neighbor)
+        session.add(item)
+        session.commit()
+        return cluster_id
+
+def get_scraped_items(limit: int = 100, with_content: bool = True) -> List[ScrapedItem]:
+    """
+    获取抓取项列表
+
+    Args:
+        limit: 最大条数
+        with_content: False 时不加载 content/images，访问这两个字段会报错
+    """
     with Session(engine) as session:
         statement = select(ScrapedItem).order_by(ScrapedItem.created_at.desc()).limit(limit)
+        if not with_content:
+            statement = statement.options(defer(ScrapedItem.content, raiseload=True), defer(ScrapedItem.images, raiseload=True))
         return list(session.exec(statement).all())
 
-def get_items_by_source(source_id: int) -> List[ScrapedItem]:
+def get_items_by_source(source_id: int, with_content: bool = True) -> List[ScrapedItem]:
     """获取指定源的所有抓取项"""
     with Session(engine) as session:
         statement = select(ScrapedItem).where(ScrapedItem.source_id == source_id)
+        if not with_content:
+            statement = statement.options(defer(ScrapedItem.content, raiseload=True), defer(ScrapedItem.images, raiseload=True))
+        return list(session.exec(statement).all())
+
+def get_item_summaries(limit: int = 100, source_id: Optional[int] = None) -> list:
+    """
+    获取条目摘要行 (只查询 ITEM_SUMMARY_COLUMNS，供列表/表格展示)
+
+    Returns:
+        Row 列表，可按属性访问 (row.title, row.created_at ...)
+    """
+    with Session(engine) as session:
+        statement = select(*ITEM_SUMMARY_COLUMNS).order_by(ScrapedItem.created_at.desc()).limit(limit)
+        if source_id is not None:
+            statement = statement.where(ScrapedItem.source_id == source_id)
         return list(session.exec(statement).all())
 
+def get_items_after(item_id: int, limit: int = 100) -> list:
+    """按 id 升序获取 id 大于 item_id 的条目摘要行 (轮询其它进程写入的新条目)"""
+    with Session(engine) as session:
+        statement = select(*ITEM_SUMMARY_COLUMNS).where(ScrapedItem.id > item_id).order_by(ScrapedItem.id).limit(limit)
+        return list(session.exec(statement).all())
+
+def get_max_item_id() -> int:
+    """当前最大条目 id，没有条目时为 0"""
+    with Session(engine) as session:
+        return session.exec(select(func.max(ScrapedItem.id))).one() or 0
+
+def get_item_content(item_id: int) -> Optional[str]:
+    """获取条目完整正文 (优先读取 ItemContent 中的压缩全文)"""
+    with Session(engine) as session:
+        stored = session.get(ItemContent, item_id)
+        if stored:
+            return decompress_text(stored.codec, stored.data)
+        return session.exec(select(ScrapedItem.content).where(ScrapedItem.id == item_id)).first()
+
 def item_exists(url: str) -> bool:
     """检查 URL 是否已存在"""
     with Session(engine) as session:
-        statement = select(ScrapedItem).where(ScrapedItem.url == url)
+        statement = select(ScrapedItem.id).where(ScrapedItem.url == url)
         return session.exec(statement).first() is not None
+
+# AI 预筛 (见 app/ai/prefilter.py)
+
+def get_analyzed_items(limit: int = 1000) -> list:
+    """
+    最近经 API 成功分析的条目 (预筛的训练样本与近似重复候选)
+
+    Returns:
+        Row 列表 (title, content, ai_summary, sentiment, ai_score, risk_level)；content 为主表中的预览
+    """
+    with Session(engine) as session:
+        statement = (
+            select(ScrapedItem.title, ScrapedItem.content, ScrapedItem.ai_summary, ScrapedItem.sentiment,
+                   ScrapedItem.ai_score, ScrapedItem.risk_level)
+            # 分析失败/未配置 Key 时 risk_level 保持 Unknown，不是有效标注
+            .where(ScrapedItem.risk_level != 'Unknown')
+            .where(or_(ScrapedItem.ai_source == None, ScrapedItem.ai_source == 'api'))
+            .order_by(ScrapedItem.id.desc())
+            .limit(limit)
+        )
+        return list(session.exec(statement).all())
+
+# 文本向量 (见 app/services/embedding_service.py)
+
+def get_items_for_embedding(after_id: int = 0, limit: int = 500) -> list:
+    """
+    按 id 升序 (keyset 分页) 获取向量化所需的字段
+
+    Returns:
+        Row 列表 (id, title, ai_summary, content, cluster_id)；content 为主表中的预览
+    """
+    with Session(engine) as session:
+        statement = (
+            select(ScrapedItem.id, ScrapedItem.title, ScrapedItem.ai_summary, ScrapedItem.content,
+                   ScrapedItem.cluster_id)
+            .where(ScrapedItem.id > after_id)
+            .order_by(ScrapedItem.id)
+            .limit(limit)
+        )
+        return list(session.exec(statement).all())
+
+def get_first_item_id_since(since: datetime) -> int:
+    """created_at 不早于 since 的最小条目 id (没有时返回最大 id + 1)；条目 id 随入库时间递增"""
+    with Session(engine) as session:
+        first = session.exec(select(func.min(ScrapedItem.id)).where(ScrapedItem.created_at >= since)).one()
+        if first is not None:
+            return first
+        return (session.exec(select(func.max(ScrapedItem.id))).one() or 0) + 1
+
+def get_item_links(item_ids: List[int], min_score: int = 60, filter_high_risk: bool = True) -> list:
+    """
+    按给定顺序返回会出现在 feed 中的条目 (评分/风险过滤与 iter_feed_rows 一致)
+
+    Returns:
+        Row 列表 (id, title, url, cluster_id)
+    """
+    if not item_ids:
+        return []
+    with Session(engine) as session:
+        statement = (
+            select(ScrapedItem.id, ScrapedItem.title, ScrapedItem.url, ScrapedItem.cluster_id)
+            .where(ScrapedItem.id.in_(item_ids))
+            .where(ScrapedItem.ai_score >= min_score)
+        )
+        if filter_high_risk:
+            statement = statement.where(ScrapedItem.risk_level != "High")
+        rows = {row.id: row for row in session.exec(statement).all()}
+    return [rows[i] for i in item_ids if i in rows]
+
+# 未配置 Key 或调用失败时写入的摘要，这些条目 ai_score 为 0，会被 feed 过滤
+AI_FAILED_SUMMARIES = ('未配置 AI Key', '分析失败', 'AI 服务暂时不可用')
+
+def get_items_needing_analysis(after_id: int = 0, limit: int = 50, max_id: Optional[int] = None) -> list:
+    """
+    按 id 升序 (keyset 分页) 获取缺少 AI 结果或分析失败的条目
+
+    Returns:
+        Row 列表 (id, title, transcript_key, platform)；正文用 get_item_content 读取全文
+    """
+    with Session(engine) as session:
+        statement = (
+            select(ScrapedItem.id, ScrapedItem.title, ScrapedItem.transcript_key, Source.platform)
+            .join(Source, Source.id == ScrapedItem.source_id)
+            .where(ScrapedItem.id > after_id)
+            .where(or_(ScrapedItem.ai_summary == None, ScrapedItem.ai_summary.in_(AI_FAILED_SUMMARIES)))
+            .order_by(ScrapedItem.id)
+            .limit(limit)
+        )
+        if max_id is not None:
+            statement = statement.where(ScrapedItem.id <= max_id)
+        return list(session.exec(statement).all())
+
+def get_ai_source_counts(days: Optional[int] = None) -> Dict[Optional[str], int]:
+    """按 ai_source 统计条目数，days 指定时只统计最近 N 天创建的条目"""
+    with Session(engine) as session:
+        statement = select(ScrapedItem.ai_source, func.count(ScrapedItem.id)).group_by(ScrapedItem.ai_source)
+        if days:
+            statement = statement.where(ScrapedItem.created_at >= datetime.now() - timedelta(days=days))
+        return {source: count for source, count in session.exec(statement).all()}
+
+# Feed
+
+# feed 序列化所需的列；预渲染 HTML 为当前模板版本时不读取正文
+FEED_COLUMNS = (
+    ScrapedItem.id,
+    ScrapedItem.title,
+    ScrapedItem.url,
+    case((ScrapedItem.feed_html_version == ENTRY_TEMPLATE_VERSION, None), else_=ScrapedItem.content).label('content'),
+    ScrapedItem.ai_summary,
+    ScrapedItem.ai_score,
+    ScrapedItem.risk_level,
+    ScrapedItem.sentiment,
+    ScrapedItem.publish_date,
+    ScrapedItem.created_at,
+    ScrapedItem.thumbnails,
+    ScrapedItem.related,
+    ScrapedItem.cluster_id,
+    ScrapedItem.feed_html,
+    ScrapedItem.feed_html_version,
+)
+FEED_FETCH_SIZE = 200
+FEED_COLLAPSE_SCAN = 10  # 折叠同一事件时最多扫描 limit 的该倍数行
+
+def iter_feed_rows(limit: int = 50, query: Optional[str] = None, min_score: int = 60,
+                   filter_high_risk: bool = True, item_ids: Optional[List[int]] = None,
+                   collapse: bool = False) -> Iterator[Any]:
+    """
+    逐批从数据库游标读取 feed 条目 (最新在前)
+
+    评分/风险过滤在 SQL 中完成；生成器耗尽或关闭时释放连接。
+
+    Args:
+        query: 关键词，只返回全文检索命中的条目
+        item_ids: 只在这些条目中选取 (WebSub 增量推送)
+        collapse: 同一事件 (cluster_id) 只保留最新的一条
+    """
+    statement = select(*FEED_COLUMNS).where(ScrapedItem.ai_score >= min_score)
+    if filter_high_risk:
+        statement = statement.where(ScrapedItem.risk_level != "High")
+    if query:
+        statement = statement.where(search.match_condition(query))
+    if item_ids is not None:
+        statement = statement.where(ScrapedItem.id.in_(item_ids))
+    statement = statement.order_by(ScrapedItem.created_at.desc())
+    statement = statement.limit(limit * FEED_COLLAPSE_SCAN if collapse else limit)
+    with engine.connect() as conn:
+        rows = conn.execution_options(yield_per=FEED_FETCH_SIZE).execute(statement)
+        if not collapse:
+            yield from rows
+            return
+        seen = set()
+        count = 0
+        for row in rows:
+            if row.cluster_id is not None:
+                if row.cluster_id in seen:
+                    continue
+                seen.add(row.cluster_id)
+            yield row
+            count += 1
+            if count >= limit:
+                break
+
+# Search
+
+def search_items(query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+    """全文搜索 (bm25 排序，返回带高亮片段的命中列表)"""
+    return search.search_items(engine, query, limit=limit, offset=offset)
+
+def search_scraped_items(query: str, limit: int = 50) -> List[ScrapedItem]:
+    """获取匹配关键词的最新条目"""
+    return search.search_scraped_items(engine, query, limit=limit)
+
+# Stats
+
+STATS_TTL_SECONDS = 300  # 缓存过期后重新聚合一次，纠正删除等操作带来的偏差
+STATS_DAYS = 7
+
+_stats_lock = threading.Lock()
+_stats_cache: Dict[str, Any] = {'value': None, 'expires': 0.0}
+
+def _compute_item_stats(days: int = STATS_DAYS) -> Dict[str, Any]:
+    """使用 COUNT/GROUP BY 聚合统计，不加载任何 ScrapedItem 行"""
+    with Session(engine) as session:
+        total_items = session.exec(select(func.count(ScrapedItem.id))).one()
+        total_sources = session.exec(select(func.count(Source.id))).one()
+        active_sources = session.exec(
+            select(func.count(Source.id)).where(Source.is_active == True)
+        ).one()
+
+        by_source = {}
+        rows = session.exec(
+            select(Source.id, Source.name, Source.platform, func.count(ScrapedItem.id))
+            .outerjoin(ScrapedItem, ScrapedItem.source_id == Source.id)
+            .group_by(Source.id)
+        ).all()
+        for source_id, name, platform, count in rows:
+            by_source[source_id] = {'name': name, 'platform': platform, 'count': count}
+
+        by_platform: Dict[str, int] = {}
+        for info in by_source.values():
+            by_platform[info['platform']] = by_platform.get(info['platform'], 0) + info['count']
+
+        since = datetime.combine(date.today() - timedelta(days=days - 1), datetime.min.time())
+        day_col = func.date(ScrapedItem.created_at)
+        rows = session.exec(
+            select(day_col, func.count(ScrapedItem.id))
+            .where(ScrapedItem.created_at >= since)
+            .group_by(day_col)
+        ).all()
+        by_day = {str(day): count for day, count in rows}
+
+        rows = session.exec(
+            select(ScrapedItem.sentiment, func.count(ScrapedItem.id)).group_by(ScrapedItem.sentiment)
+        ).all()
+        by_sentiment = {(sentiment or 'Unknown'): count for sentiment, count in rows}
+
+        rows = session.exec(
+            select(ScrapedItem.risk_level, func.count(ScrapedItem.id)).group_by(ScrapedItem.risk_level)
+        ).all()
+        by_risk = {(risk or 'Unknown'): count for risk, count in rows}
+
+    return {
+        'total_items': total_items,
+        'today_items': by_day.get(date.today().isoformat(), 0),
+        'total_sources': total_sources,
+        'active_sources': active_sources,
+        'by_source': by_source,
+        'by_platform': by_platform,
+        'by_day': by_day,
+        'by_sentiment': by_sentiment,
+        'by_risk': by_risk,
+    }
+
+def get_item_stats(use_cache: bool = True) -> Dict[str, Any]:
+    """
+    获取抓取统计 (总数、今日、按源/平台/日期/情感/风险分组)
+
+    结果带 TTL 缓存，新条目入库时在缓存上增量累加，
+    因此页面渲染耗时与表大小无关。
+    """
+    with _stats_lock:
+        cached = _stats_cache['value']
+        if use_cache and cached is not None and time.monotonic() < _stats_cache['expires']:
+            return _copy_stats(cached)
+
+    stats = _compute_item_stats()
+    with _stats_lock:
+        _stats_cache['value'] = stats
+        _stats_cache['expires'] = time.monotonic() + STATS_TTL_SECONDS
+        return _copy_stats(stats)
+
+def invalidate_stats_cache():
+    """丢弃统计缓存 (删除源等无法增量维护的操作后调用)"""
+    with _stats_lock:
+        _stats_cache['value'] = None
+        _stats_cache['expires'] = 0.0
+
+def _copy_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    copied = {k: (dict(v) if isinstance(v, dict) else v) for k, v in stats.items()}
+    copied['by_source'] = {k: dict(v) for k, v in stats['by_source'].items()}
+    return copied
+
+def _record_item_in_stats(item: ScrapedItem):
+    """新条目入库后增量更新缓存中的计数器"""
+    with _stats_lock:
+        stats = _stats_cache['value']
+        if stats is None:
+            return
+
+        # 新出现的源无法得知平台，交给下次聚合处理
+        source_info = stats['by_source'].get(item.source_id)
+        if source_info is None:
+            _stats_cache['value'] = None
+            return
+
+        stats['total_items'] += 1
+        source_info['count'] += 1
+        platform = source_info['platform']
+        stats['by_platform'][platform] = stats['by_platform'].get(platform, 0) + 1
+
+        day = item.created_at.date().isoformat()
+        stats['by_day'][day] = stats['by_day'].get(day, 0) + 1
+        if day == date.today().isoformat():
+            stats['today_items'] += 1
+
+        sentiment = item.sentiment or 'Unknown'
+        stats['by_sentiment'][sentiment] = stats['by_sentiment'].get(sentiment, 0) + 1
+        risk = item.risk_level or 'Unknown'
+        stats['by_risk'][risk] = stats['by_risk'].get(risk, 0) + 1
+
+# WebSub subscriptions
+
+def save_websub_subscription(topic: str, callback: str, lease_seconds: int,
+                             secret: Optional[str] = None) -> WebSubSubscription:
+    """创建或续期订阅 (同一 topic + callback 只保留一条)"""
+    with Session(engine) as session:
+        statement = select(WebSubSubscription).where(
+            WebSubSubscription.topic == topic, WebSubSubscription.callback == callback
+        )
+        subscription = session.exec(statement).first() or WebSubSubscription(
+            topic=topic, callback=callback, expires_at=datetime.now()
+        )
+        subscription.secret = secret
+        subscription.lease_seconds = lease_seconds
+        subscription.expires_at = datetime.now() + timedelta(seconds=lease_seconds)
+        session.add(subscription)
+        session.commit()
+        session.refresh(subscription)
+        return subscription
+
+def delete_websub_subscription(topic: str, callback: str) -> bool:
+    """删除订阅"""
+    with Session(engine) as session:
+        statement = select(WebSubSubscription).where(
+            WebSubSubscription.topic == topic, WebSubSubscription.callback == callback
+        )
+        subscription = session.exec(statement).first()
+        if not subscription:
+            return False
+        session.delete(subscription)
+        session.commit()
+        return True
+
+def get_websub_subscriptions(topic: Optional[str] = None) -> List[WebSubSubscription]:
+    """获取未过期的订阅，同时清理已过期的订阅"""
+    now = datetime.now()
+    with Session(engine) as session:
+        for expired in session.exec(select(WebSubSubscription).where(WebSubSubscription.expires_at <= now)):
+            session.delete(expired)
+        session.commit()
+        statement = select(WebSubSubscription)
+        if topic is not None:
+            statement = statement.where(WebSubSubscription.topic == topic)
+        return list(session.exec(statement).all())
+
+# Image assets
+
+def save_image_asset(asset: ImageAsset) -> ImageAsset:
+    """保存缩略图记录；摘要已存在时返回已有记录"""
+    with Session(engine) as session:
+        existing = session.get(ImageAsset, asset.digest)
+        if existing:
+            return existing
+        session.add(asset)
+        session.commit()
+        session.refresh(asset)
+        return asset
+
+def get_image_asset(digest: str) -> Optional[ImageAsset]:
+    with Session(engine) as session:
+        return session.get(ImageAsset, digest)
+
+def get_image_dhashes() -> List[Tuple[str, str]]:
+    """所有缩略图的 (摘要, 感知哈希)，用于建立近似去重索引"""
+    with Session(engine) as session:
+        return list(session.exec(select(ImageAsset.digest, ImageAsset.dhash)).all())
+
+# Transcripts
+
+def save_transcript(key: str, url: str, text: str, lang: Optional[str] = None) -> Transcript:
+    """压缩保存字幕文本 (已存在时覆盖)"""
+    codec, data = compress_text(text, settings.CONTENT_COMPRESSION)
+    with Session(engine) as session:
+        transcript = session.get(Transcript, key) or Transcript(key=key, url=url, data=b'')
+        transcript.url, transcript.lang = url, lang
+        transcript.codec, transcript.size, transcript.data = codec, len(text), data
+        session.add(transcript)
+        session.commit()
+        session.refresh(transcript)
+        return transcript
+
+def get_transcript(key: str) -> Optional[str]:
+    """读取并解压字幕文本，不存在时返回 None"""
+    with Session(engine) as session:
+        transcript = session.get(Transcript, key)
+        return decompress_text(transcript.codec, transcript.data) if transcript else None
@@ -1,5 +1,6 @@
 from sqlmodel import SQLModel, create_engine, Session
 from app.database.models import Source, ScrapedItem
+from app.database.search import create_search_index, drop_search_index
 
 sqlite_file_name = "data/database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
@@ -10,11 +11,14 @@ engine = create_engine(sqlite_url, connect_args=connect_args)
 def create_db_and_tables():
     """创建数据库表"""
     SQLModel.metadata.create_all(engine)
+    create_search_index(engine)
 
 def rebuild_database():
     """重建数据库（删除所有表并重新创建）"""
+    drop_search_index(engine)
     SQLModel.metadata.drop_all(engine)
     SQLModel.metadata.create_all(engine)
+    create_search_index(engine)
 
 def get_session():
     """获取数据库会话"""
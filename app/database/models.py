@@ -18,19 +18,94 @@ class Source(SQLModel, table=True):
 class ScrapedItem(SQLModel, table=True):
     """抓取内容模型 - 存储爬取结果"""
     id: Optional[int] = Field(default=None, primary_key=True)
-    source_id: int = Field(foreign_key="source.id")
+    source_id: int = Field(foreign_key="source.id", index=True)
     title: str
     url: str = Field(unique=True)
     content: str
     images: str = ""  # JSON string: 图片 URL 列表
     publish_date: datetime = Field(default_factory=datetime.now)  # 发布时间 (RSS 必需)
-    created_at: datetime = Field(default_factory=datetime.now)  # 创建时间
+    created_at: datetime = Field(default_factory=datetime.now, index=True)  # 创建时间
     
     # AI 增强字段
     ai_summary: Optional[str] = None
     sentiment: Optional[str] = None
     ai_score: int = Field(default=0)  # 内容评分 (0-100)
     risk_level: str = Field(default="Unknown")  # 风险等级 (High/Medium/Low)
+    ai_source: Optional[str] = None  # 分析结果来源: api/skip/reuse (见 app/ai/prefilter.py)，预筛上线前的条目为空
+    
+    thumbnails: str = ""  # 本地缩略图摘要，逗号分隔 (见 app/services/image_pipeline.py)
+    transcript_key: Optional[str] = None  # 字幕/转写文本 Transcript.key (见 app/services/subtitle_service.py)
+    cluster_id: Optional[int] = Field(default=None, index=True)  # 同一事件的条目共用首个条目的 id (见 app/services/embedding_service.py)
+    related: str = ""  # JSON: 相关条目 [{"id", "title", "url"}]，渲染到 feed_html
+    
+    # 预渲染的 feed 条目 HTML (见 app/rss/render.py)
+    feed_html: Optional[str] = None
+    feed_html_version: int = Field(default=0)
     
     # 关系
     source: Source = Relationship(back_populates="items")
+
+class ItemContent(SQLModel, table=True):
+    """长正文存储 - 与 ScrapedItem 一对一，ScrapedItem.content 仅保留预览"""
+    item_id: int = Field(foreign_key="scrapeditem.id", primary_key=True)
+    codec: str = "zlib"  # none/zlib/zstd
+    size: int = 0  # 原文字符数
+    data: bytes
+
+class Transcript(SQLModel, table=True):
+    """视频字幕/转写文本 - 按稳定键 (如 bilibili:<cid>) 缓存，压缩存储，不并入条目正文"""
+    key: str = Field(primary_key=True)
+    url: str  # 字幕文件地址
+    lang: Optional[str] = None
+    codec: str = "zlib"  # none/zlib/zstd
+    size: int = 0  # 原文字符数
+    data: bytes
+    created_at: datetime = Field(default_factory=datetime.now)
+
+class ImageAsset(SQLModel, table=True):
+    """本地缓存的缩略图 - 以 WebP 内容的 SHA-1 寻址；文件被 LRU 淘汰后可按原地址重新生成"""
+    digest: str = Field(primary_key=True)
+    dhash: str = Field(index=True)  # 64 位差值感知哈希 (16 位十六进制)，用于近似去重
+    url: str  # 原图地址
+    referer: Optional[str] = None  # 拉取原图时使用的 Referer (图床防盗链)
+    width: int = 0
+    height: int = 0
+    size: int = 0  # 缩略图字节数
+    created_at: datetime = Field(default_factory=datetime.now)
+
+class WebSubSubscription(SQLModel, table=True):
+    """WebSub 订阅 - 订阅者回调地址与其订阅的 feed (topic)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str = Field(index=True)
+    callback: str
+    secret: Optional[str] = None  # 用于 X-Hub-Signature 的 HMAC 密钥
+    lease_seconds: int = 0
+    expires_at: datetime = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.now)
+
+class SourceCheck(SQLModel, table=True):
+    """数据源变更探测状态 - 上次的 HTTP 校验值/列表指纹/最新条目，以及探测与跳过次数"""
+    source_id: int = Field(foreign_key="source.id", primary_key=True)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fingerprint: Optional[str] = None  # 列表区域条目链接的摘要
+    last_seen_url: Optional[str] = None  # 上次抓到的最新条目 URL
+    http_probe: bool = True  # 服务端既无校验头也无可用指纹时关闭 HTTP 探测
+    runs: int = Field(default=0)
+    skips: int = Field(default=0)
+    last_checked: Optional[datetime] = None
+
+class QueueTask(SQLModel, table=True):
+    """共享任务队列 (SQLite 后端) - worker 进程通过租约领取任务，见 app/core/work_queue.py"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str  # 任务名，见 app/worker.py 的 TASKS
+    payload: str = "{}"  # JSON 参数
+    dedupe_key: Optional[str] = Field(default=None, index=True)  # 同一 key 同时只保留一个未完成任务
+    status: str = Field(default="pending", index=True)  # pending/leased/dead
+    attempts: int = Field(default=0)
+    available_at: datetime = Field(default_factory=datetime.now, index=True)  # 失败重试的最早时间
+    lease_token: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[datetime] = Field(default=None, index=True)
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
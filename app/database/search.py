@@ -0,0 +1,279 @@
+"""全文检索 - SQLite FTS5 索引 (中文按二元组切分)
+
+scrapeditem_fts 是一张无内容 (contentless) FTS5 表，只保存倒排索引，
+由触发器与 scrapeditem、itemcontent 同步：长正文压缩存入 itemcontent 后主表只保留预览，
+content 列索引的是 fts_decompress() 解压出的完整正文。unicode61 分词器会把整段中文当作一个词，
+因此写入前用 fts_segment() 把连续的中日文字符切成重叠二元组：
+"原神启动" -> "原神 神启 启动 动"。查询时同样切分并作为短语匹配，
+等价于子串匹配；单字查询走前缀匹配。
+
+已知局限：
+- bm25 只在最新的 RANK_WINDOW 条匹配中排序，常见词更早的命中不会出现在结果里 (加词缩小范围即可找到)
+- 百万级条目时常见词的一次搜索约需 0.1-0.3 秒 (主要是定位窗口下界与计算 bm25)，未达到数十毫秒
+- 命中只在完整正文中时，结果摘要片段取自正文预览或 AI 摘要，可能不含关键词
+"""
+import html
+import logging
+import re
+import sqlite3
+from typing import List, Dict, Any, Optional
+from sqlalchemy import event, false, literal_column, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from app.database.compression import decompress_text
+from app.database.models import ScrapedItem
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "scrapeditem_fts"
+
+# 中日文字符 (CJK 统一汉字、扩展 A、兼容汉字、假名)
+CJK_RUN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+QUERY_TERM = re.compile(r'"([^"]+)"|(\S+)')
+
+# bm25 列权重: title, content, ai_summary
+BM25_WEIGHTS = (10.0, 1.0, 3.0)
+# 只在最新的 N 条匹配中按相关度排序，避免常见词对全表计算 bm25 (更早的命中不会出现在结果中)
+RANK_WINDOW = 5000
+SNIPPET_RADIUS = 40
+
+def _bigrams(run: str, trailing_unigram: bool) -> str:
+    if len(run) == 1:
+        return run
+    tokens = [run[i:i + 2] for i in range(len(run) - 1)]
+    if trailing_unigram:
+        # 末字单独成词，保证单字前缀查询能命中词尾
+        tokens.append(run[-1])
+    return ' '.join(tokens)
+
+def segment_text(value: Optional[str], for_query: bool = False) -> Optional[str]:
+    """把文本中的中日文连续字符切分为以空格分隔的二元组"""
+    if value is None:
+        return None
+    return CJK_RUN.sub(lambda m: f' {_bigrams(m.group(), not for_query)} ', value)
+
+def register_functions(connection: sqlite3.Connection):
+    """注册触发器依赖的 fts_segment() / fts_decompress()"""
+    connection.create_function("fts_segment", 1, segment_text, deterministic=True)
+    connection.create_function("fts_decompress", 2, decompress_text, deterministic=True)
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    """每个 SQLite 连接都需要注册"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        register_functions(dbapi_connection)
+
+def _full_content(row: str) -> str:
+    """条目完整正文：有 itemcontent 时解压，否则为主表正文"""
+    return (f"COALESCE((SELECT fts_decompress(c.codec, c.data) FROM itemcontent c WHERE c.item_id = {row}.id), "
+            f"{row}.content)")
+
+def _index_row(values: str) -> str:
+    return f"INSERT INTO {FTS_TABLE} (rowid, title, content, ai_summary) {values};"
+
+def _unindex_row(values: str) -> str:
+    return f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, content, ai_summary) {values};"
+
+# 标记当前版本 (索引完整正文) 的触发器；旧版本只有 scrapeditem 上的三个触发器
+FULL_TEXT_TRIGGER = f"{FTS_TABLE}_ci"
+LEGACY_TRIGGERS = (f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au")
+
+FTS_SETUP_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, ai_summary, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON scrapeditem BEGIN
+        {_index_row(f"VALUES (new.id, fts_segment(new.title), fts_segment({_full_content('new')}), fts_segment(new.ai_summary))")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON scrapeditem BEGIN
+        {_unindex_row(f"VALUES ('delete', old.id, fts_segment(old.title), fts_segment({_full_content('old')}), fts_segment(old.ai_summary))")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content, ai_summary ON scrapeditem BEGIN
+        {_unindex_row(f"VALUES ('delete', old.id, fts_segment(old.title), fts_segment({_full_content('old')}), fts_segment(old.ai_summary))")}
+        {_index_row(f"VALUES (new.id, fts_segment(new.title), fts_segment({_full_content('new')}), fts_segment(new.ai_summary))")}
+    END""",
+    # 长正文移入 itemcontent 后，content 列从预览换成完整正文 (条目已删除时 SELECT 为空，不做任何事)
+    f"""CREATE TRIGGER IF NOT EXISTS {FULL_TEXT_TRIGGER} AFTER INSERT ON itemcontent BEGIN
+        {_unindex_row("SELECT 'delete', s.id, fts_segment(s.title), fts_segment(s.content), fts_segment(s.ai_summary) FROM scrapeditem s WHERE s.id = new.item_id")}
+        {_index_row("SELECT s.id, fts_segment(s.title), fts_segment(fts_decompress(new.codec, new.data)), fts_segment(s.ai_summary) FROM scrapeditem s WHERE s.id = new.item_id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_cd AFTER DELETE ON itemcontent BEGIN
+        {_unindex_row("SELECT 'delete', s.id, fts_segment(s.title), fts_segment(fts_decompress(old.codec, old.data)), fts_segment(s.ai_summary) FROM scrapeditem s WHERE s.id = old.item_id")}
+        {_index_row("SELECT s.id, fts_segment(s.title), fts_segment(s.content), fts_segment(s.ai_summary) FROM scrapeditem s WHERE s.id = old.item_id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_cu AFTER UPDATE OF codec, data ON itemcontent BEGIN
+        {_unindex_row("SELECT 'delete', s.id, fts_segment(s.title), fts_segment(fts_decompress(old.codec, old.data)), fts_segment(s.ai_summary) FROM scrapeditem s WHERE s.id = old.item_id")}
+        {_index_row("SELECT s.id, fts_segment(s.title), fts_segment(fts_decompress(new.codec, new.data)), fts_segment(s.ai_summary) FROM scrapeditem s WHERE s.id = new.item_id")}
+    END""",
+]
+
+def create_search_index(engine):
+    """
+    创建 FTS5 表与同步触发器；首次创建时为已有数据建立索引
+
+    旧版本的索引只包含主表中的正文预览，检测到时删除后按完整正文重建 (条目很多时需要一些时间)。
+    """
+    with engine.begin() as conn:
+        names = {row[0] for row in conn.execute(
+            text("SELECT name FROM sqlite_master WHERE name IN (:table, :trigger)"),
+            {"table": FTS_TABLE, "trigger": FULL_TEXT_TRIGGER}
+        )}
+        if FTS_TABLE in names and FULL_TEXT_TRIGGER not in names:
+            logger.info("全文索引只包含正文预览，按完整正文重建")
+            for trigger in LEGACY_TRIGGERS:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            conn.execute(text(f"DROP TABLE {FTS_TABLE}"))
+        for statement in FTS_SETUP_SQL:
+            conn.execute(text(statement))
+        if FULL_TEXT_TRIGGER not in names:
+            conn.execute(text(_index_row(
+                f"SELECT s.id, fts_segment(s.title), fts_segment({_full_content('s')}), fts_segment(s.ai_summary) "
+                "FROM scrapeditem s"
+            )))
+
+def drop_search_index(engine):
+    """删除 FTS5 表 (重建数据库时使用，触发器随 scrapeditem/itemcontent 一并删除)"""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+def _query_terms(query: str) -> List[str]:
+    return [quoted or bare for quoted, bare in QUERY_TERM.findall(query or '')]
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    把用户输入转换为 FTS5 MATCH 表达式
+
+    空格分隔的词之间为 AND 关系，每个词内部按短语匹配。
+    """
+    clauses = []
+    for term in _query_terms(query):
+        segmented = segment_text(term, for_query=True)
+        # 去掉 unicode61 会当作分隔符的字符
+        tokens = [t for t in re.split(r'[\W_]+', segmented) if t]
+        if not tokens:
+            continue
+        if len(tokens) == 1 and len(tokens[0]) == 1 and CJK_RUN.fullmatch(tokens[0]):
+            clauses.append(f'"{tokens[0]}"*')
+        else:
+            clauses.append('"' + ' '.join(tokens) + '"')
+    return ' AND '.join(clauses) if clauses else None
+
+def highlight(value: Optional[str], terms: List[str], radius: Optional[int] = None) -> str:
+    """
+    生成带 <mark> 高亮的 HTML 片段
+
+    Args:
+        value: 原文
+        terms: 查询词
+        radius: 截取命中位置前后的字符数，None 表示不截取
+    """
+    if not value:
+        return ''
+    terms = [t for t in terms if t]
+    if not terms:
+        return html.escape(value[:radius * 2] if radius else value)
+    pattern = re.compile('|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+
+    prefix = suffix = ''
+    if radius is not None:
+        match = pattern.search(value)
+        start = max(0, match.start() - radius) if match else 0
+        end = min(len(value), (match.end() if match else 0) + radius)
+        prefix = '…' if start > 0 else ''
+        suffix = '…' if end < len(value) else ''
+        value = value[start:end]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(value):
+        parts.append(html.escape(value[last:match.start()]))
+        parts.append(f'<mark>{html.escape(match.group())}</mark>')
+        last = match.end()
+    parts.append(html.escape(value[last:]))
+    return prefix + ''.join(parts) + suffix
+
+def search_items(engine, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    全文搜索，按 bm25 相关度排序
+
+    只对最新的 RANK_WINDOW 条匹配排序，更早的命中不会返回 (见模块说明中的已知局限)。
+
+    Returns:
+        命中列表，每项包含 id/title/url/created_at/rank 以及高亮后的 title_html/snippet
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+    terms = _query_terms(query)
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    statement = text(f"""
+        SELECT s.id, s.title, s.url, s.content, s.ai_summary, s.ai_score, s.created_at, f.rank
+        FROM (
+            SELECT rowid, bm25({FTS_TABLE}, {weights}) AS rank
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH :match AND rowid >= :floor
+            ORDER BY rank
+            LIMIT :limit OFFSET :offset
+        ) AS f JOIN scrapeditem s ON s.id = f.rowid
+        ORDER BY f.rank
+    """)
+    with engine.connect() as conn:
+        # 匹配数超过 RANK_WINDOW 时，以第 N 新的匹配 rowid 为下界，rowid 约束由 FTS5 下推
+        floor = conn.execute(text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+            "ORDER BY rowid DESC LIMIT 1 OFFSET :window"
+        ), {"match": match, "window": RANK_WINDOW - 1}).scalar() or 0
+        rows = conn.execute(
+            statement, {"match": match, "floor": floor, "limit": limit, "offset": offset}
+        ).mappings().all()
+
+    hits = []
+    for row in rows:
+        body = row['content'] or ''
+        if row['ai_summary'] and not any(t.lower() in body.lower() for t in terms):
+            body = row['ai_summary']
+        hits.append({
+            'id': row['id'],
+            'title': row['title'],
+            'url': row['url'],
+            'ai_score': row['ai_score'],
+            'created_at': row['created_at'],
+            'rank': row['rank'],
+            'title_html': highlight(row['title'], terms),
+            'snippet': highlight(body, terms, radius=SNIPPET_RADIUS),
+        })
+    return hits
+
+def match_item_ids(engine, query: str, limit: int = 50) -> List[int]:
+    """按关键词获取最新匹配条目的 ID (rowid 倒序)"""
+    match = build_match_query(query)
+    if not match:
+        return []
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match ORDER BY rowid DESC LIMIT :limit"
+        ), {"match": match, "limit": limit})]
+
+def match_condition(query: str):
+    """
+    关键词过滤条件 (ScrapedItem.id IN 全文命中)
+
+    与评分/风险等条件组合后再排序和截断，命中条目先被过滤掉时不会占用 limit。
+    没有有效关键词时返回恒假条件。
+    """
+    match = build_match_query(query)
+    if not match:
+        return false()
+    matched = select(literal_column('rowid')).select_from(text(FTS_TABLE)).where(
+        text(f"{FTS_TABLE} MATCH :match").bindparams(match=match)
+    )
+    return ScrapedItem.id.in_(matched)
+
+def search_scraped_items(engine, query: str, limit: int = 50) -> List[ScrapedItem]:
+    """按关键词获取最新的匹配条目 (供关键词 RSS 使用)"""
+    ids = match_item_ids(engine, query, limit)
+    if not ids:
+        return []
+    with Session(engine) as session:
+        items = session.exec(select(ScrapedItem).where(ScrapedItem.id.in_(ids))).all()
+    return sorted(items, key=lambda item: item.created_at, reverse=True)
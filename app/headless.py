@@ -0,0 +1,82 @@
+"""无界面服务入口 - 独立的 feed 服务与调度进程 (不加载 NiceGUI)
+
+- serve-feed: 只提供 /feed.xml /feed.atom /feed.json 与 WebSub hub
+- scheduler: 只负责定时触发抓取；QUEUE_BACKEND=local 时在本进程执行，否则写入共享队列交给 worker
+
+两者都通过 `python -m app <命令>` 启动，见 app/__main__.py。
+
+各角色的后台任务只在一个进程中运行：
+- 新条目事件与向量：UI 节点 (item_watcher 轮询数据库，不论条目由哪个进程写入)；调度进程与 worker 只入库
+- WebSub 推送：WEBSUB_PUSH_ROLE 指定的进程 (默认 ui)；两个进程都接受订阅请求，订阅保存在数据库
+"""
+import logging
+import signal
+import threading
+from contextlib import asynccontextmanager
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SYNC_JOB_ID = 'sync_source_jobs'
+
+def wait_for_exit():
+    """阻塞直到收到 SIGINT/SIGTERM"""
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    stop.wait()
+
+def create_feed_app():
+    """只包含 feed 与 WebSub 路由的 FastAPI 应用"""
+    from fastapi import FastAPI
+    from app.core.lifecycle import lifecycle
+    from app.database import create_db_and_tables
+    from app.rss.routes import router as rss_router
+    from app.rss.websub import websub_hub
+    from app.services.item_watcher import item_watcher
+
+    @asynccontextmanager
+    async def lifespan(app):
+        create_db_and_tables()
+        if settings.WEBSUB_ENABLED and settings.WEBSUB_PUSH_ROLE == 'serve-feed':
+            websub_hub.start()
+            # 条目由其它进程写入，轮询后发布事件触发 WebSub 推送 (向量仍由 UI 节点生成)
+            item_watcher.start()
+        yield
+        lifecycle.shutdown()
+
+    app = FastAPI(title=f"{settings.APP_NAME} feed", version=settings.APP_VERSION,
+                  docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan)
+    app.include_router(rss_router)
+    return app
+
+def serve_feed(host: str = None, port: int = None):
+    import uvicorn
+    uvicorn.run(create_feed_app(), host=host or settings.FEED_HOST, port=port or settings.FEED_PORT,
+                log_level='info')
+
+def sync_jobs():
+    """从数据库同步数据源任务"""
+    from app.database.crud import get_sources
+    from app.services.source_io import sync_source_jobs
+    added, removed = sync_source_jobs(get_sources())
+    if added or removed:
+        logger.info(f"数据源任务已同步: 新增/更新 {added}，移除 {removed}")
+
+def run_scheduler():
+    """独立调度进程：注册数据源任务并定期与数据库同步，直到收到退出信号"""
+    from app.core import scheduler_manager, task_queue, lifecycle, autoscaler
+    from app.database import create_db_and_tables
+
+    create_db_and_tables()
+    if settings.QUEUE_BACKEND == 'local':
+        task_queue.start(num_workers=autoscaler.initial())
+        autoscaler.start(task_queue)
+    sync_jobs()
+    scheduler_manager.add_job(SYNC_JOB_ID, sync_jobs, minutes=settings.SCHEDULER_SYNC_INTERVAL)
+    logger.info(f"调度进程已启动 (队列后端: {settings.QUEUE_BACKEND})")
+
+    wait_for_exit()
+    lifecycle.shutdown()
+    logger.info("调度进程已退出")
@@ -7,81 +7,73 @@ import logging
 load_dotenv()  # 确保所有环境变量被正确加载
 
 from app.database import create_db_and_tables
-from app.core import scheduler_manager, task_queue
+from app.core import scheduler_manager, task_queue, lifecycle, autoscaler
+from app.core.log_buffer import install_log_handler, configure_logging
 from app.config import settings
 from app.database.crud import get_sources
-from app.services.scraper_service import scrape_source_async
+from app.services.source_io import schedule_sources
+from app.rss.routes import router as rss_router
+from app.rss.websub import websub_hub
+from app.services.item_watcher import item_watcher
 
 # 配置日志格式
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
+configure_logging()
+# 日志同时写入环形缓冲区，供设置页实时日志查看器读取
+install_log_handler()
 logger = logging.getLogger(__name__)
 
-# 初始化数据库
-create_db_and_tables()
-
 def init_app():
     """应用启动时的初始化逻辑"""
-    # 1. 启动任务队列
-    if not task_queue.running:
-        task_queue.start(num_workers=2)
+    # 0. 初始化数据库 (在启动钩子中执行，导入本模块不做任何 IO)
+    create_db_and_tables()
+
+    # 1. 启动任务队列；共享队列模式下抓取由独立 worker 执行
+    if settings.QUEUE_BACKEND == 'local' and not task_queue.running:
+        task_queue.start(num_workers=autoscaler.initial())
+        # 运行中按积压与资源读数调整工作线程数与标签页并发
+        autoscaler.start(task_queue)
+    # 条目可能由本进程、独立调度进程或 worker 写入，统一轮询后发布事件；
+    # 本进程是向量文件唯一的写入方 (见 app/services/item_watcher.py)
+    item_watcher.start(embed=True)
     
     # 2. 初始化调度器
     # 先清除所有现有任务，防止热重载导致的重复
+    # 定时抓取交给独立调度进程时 (UI_RUN_SCHEDULER=False) 不注册任务，调度器也不会启动
     existing_jobs = scheduler_manager.get_jobs()
-    if not existing_jobs:
-        sources = get_sources(active_only=True)
-        count = 0
-        for source in sources:
-            job_id = f"scrape_source_{source.id}"
-            # 检查是否已存在，避免重复添加
-            if not scheduler_manager.scheduler.get_job(job_id):
-                scheduler_manager.add_job(
-                    job_id=job_id,
-                    func=scrape_source_async,
-                    minutes=source.frequency,
-                    source_id=source.id
-                )
-                count += 1
+    if settings.UI_RUN_SCHEDULER and not existing_jobs:
+        # 批量注册并错开首次执行时间，避免所有源同时触发
+        count = schedule_sources(get_sources(active_only=True))
         logger.info(f"🚀 系统启动完成，已加载 {count} 个定时抓取任务")
+    
+    # 3. 启动 WebSub 推送 (订阅入库事件)；交给 feed 服务推送时不启动，避免订阅者收到两次
+    if settings.WEBSUB_ENABLED and settings.WEBSUB_PUSH_ROLE == 'ui':
+        websub_hub.start()
 
 # 使用 NiceGUI 的生命周期钩子
 app.on_startup(init_app)
+# 退出时停止接收、排空任务队列并关闭浏览器 (见 app/core/lifecycle.py)
+app.on_shutdown(lifecycle.shutdown)
+
+# feed (RSS/Atom/JSON Feed) 与 WebSub hub 端点
+app.include_router(rss_router)
 
 # 导入页面（会注册路由）
-from app.ui.pages import dashboard, sources, settings_page
+from app.ui.pages import dashboard, sources, settings_page, search_page
 
 @ui.page('/')
 def index():
     """首页 - 重定向到 dashboard"""
     ui.navigate.to('/dashboard')
 
-# RSS Feed 端点
-@ui.page('/feed.xml')
-def feed():
-    """RSS feed 端点"""
-    from app.database.crud import get_scraped_items
-    from app.rss.feed_gen import RSSGenerator
-    
-    items = get_scraped_items(limit=settings.RSS_MAX_ITEMS)
-    
-    rss = RSSGenerator(
-        title=settings.RSS_FEED_TITLE,
-        link=settings.RSS_FEED_LINK,
-        description=settings.RSS_FEED_DESCRIPTION
-    )
-    rss.add_items(items)
-    
-    return rss.generate_rss(), {'Content-Type': 'application/rss+xml; charset=utf-8'}
-
-if __name__ in {"__main__", "__mp_main__"}:
+def run(show: bool = True):
+    """启动 UI (python -m app.main 或 python -m app ui)"""
     ui.run(
         port=settings.UI_PORT,
         title=settings.APP_NAME,
         reload=False, # 生产环境建议关闭 reload
-        show=True,
+        show=show,
         favicon='🚀'
     )
+
+if __name__ in {"__main__", "__mp_main__"}:
+    run()
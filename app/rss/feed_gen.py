@@ -1,17 +1,54 @@
 from feedgen.feed import FeedGenerator
+from feedgen.ext.base import BaseExtension
+from lxml import etree
 from app.database.models import ScrapedItem
-from typing import List
-from datetime import timezone, timedelta
+from app.rss.render import entry_html
+from app.rss.stream import ATOM_NS, FEED_TZ
+from typing import List, Optional
+
+DEFAULT_MIN_SCORE = 60
+
+class WebSubExtension(BaseExtension):
+    """feedgen 扩展 - RSS 中输出 <atom:link rel="hub"> (feedgen 只输出 rel="self")"""
+
+    def __init__(self):
+        self.__hub = None
+
+    def extend_ns(self):
+        return {'atom': ATOM_NS}
+
+    def hub(self, href: Optional[str] = None) -> Optional[str]:
+        if href is not None:
+            self.__hub = href
+        return self.__hub
+
+    def extend_rss(self, rss_feed):
+        if self.__hub:
+            channel = rss_feed[0]
+            etree.SubElement(channel, f'{{{ATOM_NS}}}link', href=self.__hub, rel='hub')
+        return rss_feed
 
 class RSSGenerator:
-    def __init__(self, title: str = "Smart Scraper RSS", link: str = "http://localhost:8080", description: str = "智能内容聚合 RSS"):
+    def __init__(self, title: str = "Smart Scraper RSS", link: str = "http://localhost:8080", description: str = "智能内容聚合 RSS",
+                 self_link: Optional[str] = None, hub: Optional[str] = None):
+        """
+        Args:
+            self_link: feed 自身地址 (WebSub topic)
+            hub: WebSub hub 地址，设置后阅读器可订阅推送而不必轮询
+        """
         self.fg = FeedGenerator()
         self.fg.title(title)
+        # feedgen 以最后一个 link 作为 RSS <link>，alternate 必须最后添加
+        if self_link:
+            self.fg.link(href=self_link, rel='self')
         self.fg.link(href=link, rel='alternate')
+        if hub:
+            self.fg.register_extension('websub', WebSubExtension, atom=False, rss=True)
+            self.fg.websub.hub(hub)
         self.fg.description(description)
         self.fg.language('zh-CN')
 
-    def add_items(self, items: List[ScrapedItem], min_score: int = 60, filter_high_risk: bool = True):
+    def add_items(self, items: List[ScrapedItem], min_score: int = DEFAULT_MIN_SCORE, filter_high_risk: bool = True):
         """
         添加抓取的条目到 RSS feed
         
@@ -20,9 +57,6 @@ class RSSGenerator:
             min_score: 最低 AI 评分要求 (默认 60)
             filter_high_risk: 是否过滤高风险内容 (默认 True)
         """
-        # 定义时区 (假设为 UTC+8)
-        tz_cn = timezone(timedelta(hours=8))
-        
         for item in items:
             # --- 智能过滤逻辑 ---
             # 1. 评分过滤
@@ -40,28 +74,16 @@ class RSSGenerator:
             # 处理发布时间，确保带有时区
             pub_date = item.publish_date
             if pub_date.tzinfo is None:
-                pub_date = pub_date.replace(tzinfo=tz_cn)
+                pub_date = pub_date.replace(tzinfo=FEED_TZ)
             fe.pubDate(pub_date)
             fe.guid(item.url, permalink=True)
             
-            # 构建描述，包含 AI 摘要和原始内容
-            description = ""
-            if item.ai_summary:
-                description += f"<h3>🤖 AI 摘要</h3><p>{item.ai_summary}</p>"
-            
-            # 添加评分和风险展示
-            description += f"""
-            <div style="background-color: #f0f0f0; padding: 10px; border-radius: 5px; margin: 10px 0;">
-                <p><strong>📊 AI 评分:</strong> {item.ai_score}</p>
-                <p><strong>⚠️ 风险等级:</strong> {item.risk_level}</p>
-                <p><strong>😊 情感倾向:</strong> {item.sentiment or '未知'}</p>
-            </div>
-            <hr>
-            """
-            
-            description += f"<h3>原始内容</h3><p>{item.content[:500]}...</p>"
-            
-            fe.description(description)
+            fe.description(entry_html(item))
+
+    @property
+    def entry_count(self) -> int:
+        """通过过滤后写入 feed 的条目数"""
+        return len(self.fg.entry())
 
     def generate_rss(self) -> str:
         """生成 RSS XML 字符串"""
@@ -0,0 +1,85 @@
+"""feed 条目 HTML 渲染 - 入库/AI 分析时预先渲染并存入 ScrapedItem.feed_html
+
+feed 端点直接拼接预渲染片段；修改模板时递增 ENTRY_TEMPLATE_VERSION，
+版本不一致的条目在输出时临时渲染，并由 scripts/migrate_db.py 分批回填。
+"""
+import html
+import json
+
+from app.config import settings
+
+# 模板版本，修改 render_entry_html 的输出时必须递增
+# v2: 缩略图改为相对地址存储 (v1 写入了渲染时的 PUBLIC_BASE_URL)
+ENTRY_TEMPLATE_VERSION = 2
+
+# 参与渲染的 AI 字段，这些字段变化时需要重新渲染
+AI_FIELDS = ('ai_summary', 'sentiment', 'ai_score', 'risk_level')
+
+def base_url() -> str:
+    """对外访问地址 (不含末尾斜杠)"""
+    return (settings.PUBLIC_BASE_URL or f'http://localhost:{settings.UI_PORT}').rstrip('/')
+
+IMAGE_PATH = '/img/'
+IMAGE_SRC = f'<img src="{IMAGE_PATH}'
+
+def image_url(digest: str) -> str:
+    """
+    本地缩略图地址 (阅读器无法直接加载防盗链图床，统一经 /img 路由输出)
+
+    预渲染的 feed_html 中只保存相对地址，输出时由 entry_html 补全为当前的 base_url()，
+    修改 PUBLIC_BASE_URL 后无需重新渲染。
+    """
+    return f'{IMAGE_PATH}{digest}'
+
+def absolutize_images(fragment: str) -> str:
+    """把片段中的缩略图相对地址补全为绝对地址 (阅读器不以 feed 地址解析相对链接)"""
+    if IMAGE_SRC not in fragment:
+        return fragment
+    return fragment.replace(IMAGE_SRC, f'<img src="{base_url()}{IMAGE_PATH}')
+
+def related_items(item) -> list:
+    """解析 ScrapedItem.related (JSON 列表)"""
+    try:
+        return json.loads(getattr(item, 'related', '') or '[]')
+    except ValueError:
+        return []
+
+def render_entry_html(item) -> str:
+    """构建条目描述 HTML，包含 AI 摘要、缩略图、评分/风险展示、原始内容和相关内容"""
+    description = ""
+    if item.ai_summary:
+        description += f"<h3>🤖 AI 摘要</h3><p>{item.ai_summary}</p>"
+
+    digests = [d for d in (getattr(item, 'thumbnails', '') or '').split(',') if d]
+    for digest in digests:
+        description += f'<p><img src="{image_url(digest)}" loading="lazy"></p>'
+
+    # 添加评分和风险展示
+    description += f"""
+    <div style="background-color: #f0f0f0; padding: 10px; border-radius: 5px; margin: 10px 0;">
+        <p><strong>📊 AI 评分:</strong> {item.ai_score}</p>
+        <p><strong>⚠️ 风险等级:</strong> {item.risk_level}</p>
+        <p><strong>😊 情感倾向:</strong> {item.sentiment or '未知'}</p>
+    </div>
+    <hr>
+    """
+
+    description += f"<h3>原始内容</h3><p>{(item.content or '')[:500]}...</p>"
+
+    related = related_items(item)
+    if related:
+        links = ''.join(f'<li><a href="{html.escape(r["url"])}">{html.escape(r["title"])}</a></li>' for r in related)
+        description += f"<h3>🔗 相关内容</h3><ul>{links}</ul>"
+    return description
+
+def entry_html(row) -> str:
+    """取预渲染的条目 HTML (缺失或模板版本过期时现场渲染)，缩略图地址补全为绝对地址"""
+    if row.feed_html is not None and row.feed_html_version == ENTRY_TEMPLATE_VERSION:
+        return absolutize_images(row.feed_html)
+    return absolutize_images(render_entry_html(row))
+
+def apply_entry_html(item):
+    """渲染并写入 item.feed_html / feed_html_version"""
+    item.feed_html = render_entry_html(item)
+    item.feed_html_version = ENTRY_TEMPLATE_VERSION
+    return item
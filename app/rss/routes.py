@@ -0,0 +1,60 @@
+"""RSS 相关的 HTTP 端点 (FastAPI 路由，挂载到 NiceGUI 的 app 上)"""
+from typing import Optional
+from urllib.parse import parse_qsl
+from fastapi import APIRouter, Request
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from app.config import settings
+from app.database.crud import iter_feed_rows
+from app.rss.stream import FEED_PATHS, CONTENT_TYPES, SERIALIZERS, negotiate_encoding, encode_stream
+from app.rss.websub import websub_hub, HUB_PATH, topic_url, feed_meta, link_header
+from app.services.image_pipeline import image_pipeline
+
+router = APIRouter()
+
+def feed_response(request: Request, path: str, q: Optional[str]) -> StreamingResponse:
+    """从数据库游标流式输出 feed，按 Accept-Encoding 压缩"""
+    feed_format = FEED_PATHS[path]
+    topic = topic_url(q, path)
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+
+    rows = iter_feed_rows(limit=settings.RSS_MAX_ITEMS, query=q, collapse=settings.FEED_COLLAPSE_CLUSTERS)
+    body = encode_stream(SERIALIZERS[feed_format](rows, feed_meta(topic, q)), encoding)
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    if settings.WEBSUB_ENABLED:
+        headers['Link'] = link_header(topic)
+    return StreamingResponse(body, media_type=CONTENT_TYPES[feed_format], headers=headers)
+
+@router.get('/feed.xml')
+def rss_feed(request: Request, q: Optional[str] = None):
+    """RSS 2.0 (?q=关键词 生成关键词订阅)"""
+    return feed_response(request, '/feed.xml', q)
+
+@router.get('/feed.atom')
+def atom_feed(request: Request, q: Optional[str] = None):
+    """Atom 1.0"""
+    return feed_response(request, '/feed.atom', q)
+
+@router.get('/feed.json')
+def json_feed(request: Request, q: Optional[str] = None):
+    """JSON Feed 1.1"""
+    return feed_response(request, '/feed.json', q)
+
+@router.post(HUB_PATH)
+async def websub_subscribe(request: Request):
+    """WebSub 订阅/退订 (application/x-www-form-urlencoded)"""
+    body = (await request.body()).decode('utf-8', 'replace')
+    params = dict(parse_qsl(body, keep_blank_values=True))
+    status, message = websub_hub.handle_request(params)
+    return PlainTextResponse(message, status_code=status)
+
+@router.get('/img/{digest}')
+def cached_image(digest: str):
+    """本地缩略图 (内容寻址，可长期缓存)"""
+    path = image_pipeline.lookup(digest)
+    if path is None:
+        return PlainTextResponse('Not Found', status_code=404)
+    return FileResponse(path, media_type='image/webp',
+                        headers={'Cache-Control': 'public, max-age=31536000, immutable'})
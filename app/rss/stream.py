@@ -0,0 +1,210 @@
+"""流式 feed 序列化 - RSS 2.0 / Atom / JSON Feed 1.1
+
+与 RSSGenerator (feedgen) 不同，这里不构建对象树也不做格式化缩进：
+条目从数据库游标逐行读出后直接写成字符串片段 (描述取预渲染的 feed_html)，交给 encode_stream()
+按协商好的 Content-Encoding 压缩并合并成块输出。内存占用与条目数无关。
+"""
+import json
+import zlib
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from app.rss.render import entry_html
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供 gzip
+    brotli = None
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+# 库中时间为本地时间 (假设为 UTC+8)
+FEED_TZ = timezone(timedelta(hours=8))
+
+FORMAT_RSS = 'rss'
+FORMAT_ATOM = 'atom'
+FORMAT_JSON = 'json'
+
+FEED_PATHS = {
+    '/feed.xml': FORMAT_RSS,
+    '/feed.atom': FORMAT_ATOM,
+    '/feed.json': FORMAT_JSON,
+}
+CONTENT_TYPES = {
+    FORMAT_RSS: 'application/rss+xml; charset=utf-8',
+    FORMAT_ATOM: 'application/atom+xml; charset=utf-8',
+    FORMAT_JSON: 'application/feed+json; charset=utf-8',
+}
+
+JSON_FEED_VERSION = 'https://jsonfeed.org/version/1.1'
+CHUNK_SIZE = 16 * 1024  # 输出块大小 (压缩前)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # 动态内容：兼顾压缩率与 CPU
+
+class FeedMeta(NamedTuple):
+    """feed 头部信息"""
+    title: str
+    link: str  # 网站主页
+    description: str
+    self_link: str  # feed 自身地址 (WebSub topic)
+    hub: Optional[str] = None
+    language: str = 'zh-CN'
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=FEED_TZ)
+
+def _rfc3339(value: datetime) -> str:
+    return _aware(value).isoformat(timespec='seconds')
+
+def _atom_link(rel: str, href: Optional[str]) -> str:
+    return f'<atom:link rel="{rel}" href={quoteattr(href)}/>' if href else ''
+
+def stream_rss(rows: Iterable, meta: FeedMeta) -> Iterator[str]:
+    """RSS 2.0"""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<rss version="2.0" xmlns:atom="{ATOM_NS}"><channel>'
+        f'<title>{escape(meta.title)}</title>'
+        f'<link>{escape(meta.link)}</link>'
+        f'<description>{escape(meta.description)}</description>'
+        f'<language>{meta.language}</language>'
+        f'<lastBuildDate>{format_datetime(datetime.now(FEED_TZ))}</lastBuildDate>'
+        + _atom_link('self', meta.self_link) + _atom_link('hub', meta.hub)
+    )
+    for row in rows:
+        yield (
+            '<item>'
+            f'<title>{escape(row.title)}</title>'
+            f'<link>{escape(row.url)}</link>'
+            f'<description>{escape(entry_html(row))}</description>'
+            f'<guid isPermaLink="true">{escape(row.url)}</guid>'
+            f'<pubDate>{format_datetime(_aware(row.publish_date))}</pubDate>'
+            '</item>'
+        )
+    yield '</channel></rss>'
+
+def stream_atom(rows: Iterable, meta: FeedMeta) -> Iterator[str]:
+    """Atom 1.0 (feed 级 <updated> 取最新条目的入库时间)"""
+    rows = iter(rows)
+    first = next(rows, None)
+    updated = first.created_at if first is not None else datetime.now(FEED_TZ)
+    hub = f'<link rel="hub" href={quoteattr(meta.hub)}/>' if meta.hub else ''
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<feed xmlns="{ATOM_NS}" xml:lang="{meta.language}">'
+        f'<id>{escape(meta.self_link)}</id>'
+        f'<title>{escape(meta.title)}</title>'
+        f'<subtitle>{escape(meta.description)}</subtitle>'
+        f'<updated>{_rfc3339(updated)}</updated>'
+        f'<author><name>{escape(meta.title)}</name></author>'
+        f'<link rel="alternate" href={quoteattr(meta.link)}/>'
+        f'<link rel="self" href={quoteattr(meta.self_link)}/>'
+        + hub
+    )
+    for row in chain([first], rows) if first is not None else ():
+        yield (
+            '<entry>'
+            f'<id>{escape(row.url)}</id>'
+            f'<title>{escape(row.title)}</title>'
+            f'<link rel="alternate" href={quoteattr(row.url)}/>'
+            f'<published>{_rfc3339(row.publish_date)}</published>'
+            f'<updated>{_rfc3339(row.created_at)}</updated>'
+            f'<content type="html">{escape(entry_html(row))}</content>'
+            '</entry>'
+        )
+    yield '</feed>'
+
+def stream_json_feed(rows: Iterable, meta: FeedMeta) -> Iterator[str]:
+    """JSON Feed 1.1 (AI 字段放在 _smart_scraper 扩展对象中)"""
+    head = {
+        'version': JSON_FEED_VERSION,
+        'title': meta.title,
+        'home_page_url': meta.link,
+        'feed_url': meta.self_link,
+        'description': meta.description,
+        'language': meta.language,
+    }
+    if meta.hub:
+        head['hubs'] = [{'type': 'WebSub', 'url': meta.hub}]
+    yield json.dumps(head, ensure_ascii=False)[:-1] + ', "items": ['
+    separator = ''
+    for row in rows:
+        item = {
+            'id': row.url,
+            'url': row.url,
+            'title': row.title,
+            'content_html': entry_html(row),
+            'date_published': _rfc3339(row.publish_date),
+            '_smart_scraper': {'ai_score': row.ai_score, 'risk_level': row.risk_level, 'sentiment': row.sentiment},
+        }
+        if row.ai_summary:
+            item['summary'] = row.ai_summary
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ', '
+    yield ']}'
+
+SERIALIZERS: Dict[str, Callable[[Iterable, FeedMeta], Iterator[str]]] = {
+    FORMAT_RSS: stream_rss,
+    FORMAT_ATOM: stream_atom,
+    FORMAT_JSON: stream_json_feed,
+}
+
+def supported_encodings() -> list:
+    """服务端支持的压缩方式 (按优先级)"""
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """
+    根据 Accept-Encoding 选择压缩方式
+
+    取 q 值最高的可用编码，q 相同时按 supported_encodings() 的顺序；
+    没有可用编码时返回 identity。
+    """
+    weights: Dict[str, float] = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+
+    best, best_q = 'identity', 0.0
+    for coding in supported_encodings():
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def encode_stream(chunks: Iterable[str], encoding: str = 'identity', chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """把字符串片段编码、压缩并合并为约 chunk_size 字节的块"""
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip 头
+        compress, finish = compressor.compress, compressor.flush
+    elif encoding == 'br' and brotli is not None:
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compress, finish = (lambda data: data), (lambda: b'')
+
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            out = compress(b''.join(buffer))
+            buffer, size = [], 0
+            if out:
+                yield out
+    out = compress(b''.join(buffer)) + finish()
+    if out:
+        yield out
@@ -0,0 +1,275 @@
+"""WebSub (PubSubHubbub) hub - 新条目入库后向订阅者推送增量 feed
+
+订阅流程 (W3C WebSub):
+1. 订阅者 POST hub.mode/hub.topic/hub.callback[/hub.lease_seconds/hub.secret] 到 HUB_PATH，hub 立即返回 202
+2. hub 异步 GET callback?hub.mode=...&hub.challenge=...，订阅者原样返回 challenge 即确认意图
+3. 新条目入库时 (ITEM_CREATED 事件)，hub 合并一个短时间窗口内的条目，
+   为每个订阅的 topic 生成只含新条目的 feed 并 POST 到 callback；
+   设置了 secret 时附带 X-Hub-Signature: sha256=HMAC(secret, body)
+"""
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from app.config import settings
+from app.core.events import event_bus, ITEM_CREATED
+from app.database import crud
+from app.rss.render import base_url
+from app.rss.stream import FEED_PATHS, CONTENT_TYPES, SERIALIZERS, FeedMeta, encode_stream
+
+logger = logging.getLogger(__name__)
+
+HUB_PATH = '/websub'
+FEED_PATH = '/feed.xml'  # 默认 topic，/feed.atom、/feed.json 同样可订阅
+SIGNATURE_ALGORITHM = 'sha256'
+
+def hub_url() -> str:
+    return base_url() + HUB_PATH
+
+def topic_url(query: Optional[str] = None, path: str = FEED_PATH) -> str:
+    """feed 的 topic 地址 (query 为关键词订阅)"""
+    url = base_url() + path
+    return f'{url}?{urlencode({"q": query})}' if query else url
+
+def topic_query(topic: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    解析 topic
+
+    Returns:
+        (feed 格式，非本站 feed 时为 None, 关键词)
+    """
+    parts = urlsplit(topic)
+    origin = f'{parts.scheme}://{parts.netloc}'
+    if origin != base_url() or parts.path not in FEED_PATHS:
+        return None, None
+    query = (parse_qs(parts.query).get('q') or [None])[0]
+    return FEED_PATHS[parts.path], query
+
+def feed_meta(topic: str, query: Optional[str] = None) -> FeedMeta:
+    """feed 头部信息 (feed 端点与增量推送共用)"""
+    return FeedMeta(
+        title=f"{settings.RSS_FEED_TITLE} - {query}" if query else settings.RSS_FEED_TITLE,
+        link=settings.RSS_FEED_LINK,
+        description=settings.RSS_FEED_DESCRIPTION,
+        self_link=topic,
+        hub=hub_url() if settings.WEBSUB_ENABLED else None,
+    )
+
+def sign(secret: str, body: bytes) -> str:
+    """X-Hub-Signature 头的值"""
+    digest = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return f'{SIGNATURE_ALGORITHM}={digest}'
+
+def link_header(topic: str) -> str:
+    """feed 响应/推送请求的 Link 头"""
+    return f'<{hub_url()}>; rel="hub", <{topic}>; rel="self"'
+
+class WebSubHub:
+    """
+    WebSub hub - 单例模式
+
+    订阅保存在数据库 (WebSubSubscription)；验证与推送在线程池中执行，
+    不占用 Web 请求或抓取工作线程。
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(WebSubHub, cls).__new__(cls)
+            cls._instance.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='WebSub')
+            cls._instance.started = False
+            cls._instance._lock = threading.Lock()
+            cls._instance._pending_ids = set()
+            cls._instance._timer = None
+            cls._instance._futures = set()
+            cls._instance._unsubscribe = None
+        return cls._instance
+
+    def start(self):
+        """订阅入库事件，开始推送"""
+        if self.started:
+            return
+        self._unsubscribe = event_bus.subscribe(ITEM_CREATED, self._on_item_created)
+        self.started = True
+        logger.info(f"WebSub hub 已启动: {hub_url()}")
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """
+        停止接收事件并推送剩余条目
+
+        Args:
+            timeout: 等待推送完成的最长秒数 (None 为一直等待)
+
+        Returns:
+            推送是否全部完成
+        """
+        if not self.started:
+            return True
+        self._unsubscribe()
+        self.started = False
+        self.flush()
+        return self.join(timeout)
+
+    # ===== 订阅 =====
+
+    def handle_request(self, params: Dict[str, str]) -> Tuple[int, str]:
+        """
+        处理订阅/退订请求 (表单参数)
+
+        Returns:
+            (HTTP 状态码, 响应正文)；参数合法时返回 202 并异步验证
+        """
+        mode = params.get('hub.mode')
+        topic = params.get('hub.topic', '')
+        callback = params.get('hub.callback', '')
+        if mode not in ('subscribe', 'unsubscribe'):
+            return 400, 'hub.mode must be subscribe or unsubscribe'
+        if topic_query(topic)[0] is None:
+            return 400, f'unknown hub.topic: {topic}'
+        if urlsplit(callback).scheme not in ('http', 'https'):
+            return 400, 'hub.callback must be an http(s) URL'
+
+        try:
+            lease_seconds = int(params.get('hub.lease_seconds') or settings.WEBSUB_LEASE_SECONDS)
+        except ValueError:
+            return 400, 'hub.lease_seconds must be an integer'
+        lease_seconds = max(1, min(lease_seconds, settings.WEBSUB_MAX_LEASE_SECONDS))
+        secret = params.get('hub.secret') or None
+        if secret and len(secret.encode('utf-8')) >= 200:
+            return 400, 'hub.secret must be less than 200 bytes'
+
+        self._submit(self.verify_intent, mode, topic, callback, lease_seconds, secret)
+        return 202, 'Accepted'
+
+    def verify_intent(self, mode: str, topic: str, callback: str,
+                      lease_seconds: int, secret: Optional[str] = None) -> bool:
+        """向订阅者确认意图，成功后保存/删除订阅"""
+        challenge = secrets.token_urlsafe(16)
+        query = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': challenge}
+        if mode == 'subscribe':
+            query['hub.lease_seconds'] = lease_seconds
+        separator = '&' if urlsplit(callback).query else '?'
+        try:
+            with urllib.request.urlopen(callback + separator + urlencode(query), timeout=settings.WEBSUB_TIMEOUT) as response:
+                confirmed = response.read().decode('utf-8', 'replace').strip() == challenge
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"WebSub 验证失败 {callback}: {e}")
+            return False
+
+        if not confirmed:
+            logger.warning(f"WebSub 验证未通过 (challenge 不匹配): {callback}")
+            return False
+        if mode == 'subscribe':
+            crud.save_websub_subscription(topic, callback, lease_seconds, secret)
+            logger.info(f"WebSub 新订阅: {callback} -> {topic} ({lease_seconds}s)")
+        else:
+            crud.delete_websub_subscription(topic, callback)
+            logger.info(f"WebSub 退订: {callback} -> {topic}")
+        return True
+
+    # ===== 推送 =====
+
+    def _on_item_created(self, payload: Dict):
+        """ITEM_CREATED 事件处理：只记录 ID，窗口结束后批量推送"""
+        with self._lock:
+            self._pending_ids.add(payload['id'])
+            if self._timer is None:
+                self._timer = threading.Timer(settings.WEBSUB_BATCH_DELAY, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """
+        立即推送待发送的新条目
+
+        Returns:
+            提交的推送请求数
+        """
+        with self._lock:
+            item_ids, self._pending_ids = list(self._pending_ids), set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not item_ids:
+            return 0
+
+        subscriptions = crud.get_websub_subscriptions()
+        if not subscriptions:
+            return 0
+
+        bodies: Dict[str, Optional[bytes]] = {}
+        sent = 0
+        for subscription in subscriptions:
+            if subscription.topic not in bodies:
+                bodies[subscription.topic] = self.render_delta(subscription.topic, item_ids)
+            body = bodies[subscription.topic]
+            if body is None:
+                continue
+            self._submit(self.deliver, subscription.topic, subscription.callback, subscription.secret, body)
+            sent += 1
+        return sent
+
+    def render_delta(self, topic: str, item_ids: list) -> Optional[bytes]:
+        """生成只含新条目的 feed；经过 feed 过滤后没有条目时返回 None"""
+        feed_format, query = topic_query(topic)
+        rows = list(crud.iter_feed_rows(limit=len(item_ids), query=query, item_ids=item_ids))
+        if not rows:
+            return None
+        return b''.join(encode_stream(SERIALIZERS[feed_format](rows, feed_meta(topic, query))))
+
+    def deliver(self, topic: str, callback: str, secret: Optional[str], body: bytes) -> bool:
+        """向单个订阅者 POST 内容；订阅者返回 410 Gone 时删除订阅"""
+        headers = {
+            'Content-Type': CONTENT_TYPES[topic_query(topic)[0]],
+            'Link': link_header(topic),
+        }
+        if secret:
+            headers['X-Hub-Signature'] = sign(secret, body)
+        request = urllib.request.Request(callback, data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=settings.WEBSUB_TIMEOUT):
+                return True
+        except urllib.error.HTTPError as e:
+            if e.code == 410:
+                crud.delete_websub_subscription(topic, callback)
+                logger.info(f"WebSub 订阅者已退出 (410)，删除订阅: {callback}")
+            else:
+                logger.warning(f"WebSub 推送失败 {callback}: HTTP {e.code}")
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"WebSub 推送失败 {callback}: {e}")
+        return False
+
+    # ===== 线程池 =====
+
+    def _submit(self, func, *args) -> Future:
+        future = self.executor.submit(func, *args)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard_future)
+        return future
+
+    def _discard_future(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待进行中的验证/推送完成
+
+        Returns:
+            是否全部完成
+        """
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+# 全局 hub 实例
+websub_hub = WebSubHub()
@@ -1,7 +1,8 @@
-from DrissionPage import ChromiumPage, ChromiumOptions
 import os
 import threading
+import weakref
 from app.config import settings
+from app.core.watchdog import watchdog
 
 class BrowserManager:
     _instance = None
@@ -12,6 +13,8 @@ class BrowserManager:
             if cls._instance is None:
                 cls._instance = super(BrowserManager, cls).__new__(cls)
                 cls._instance.page = None # 先占位
+                cls._instance.tabs = weakref.WeakSet()  # 已打开且尚未回收的标签页，关闭时逐个关掉
+                cls._instance.pages_opened = 0  # 本次启动后打开的标签页数 (达到上限时由内存管理回收浏览器)
                 cls._instance._init_page()
             return cls._instance
 
@@ -21,6 +24,9 @@ class BrowserManager:
             return
 
         try:
+            # DrissionPage 按需导入：只有真正打开浏览器的进程才加载
+            from DrissionPage import ChromiumPage, ChromiumOptions
+
             co = ChromiumOptions()
             # Use absolute path for user data to avoid issues
             user_data_path = os.path.abspath(settings.BROWSER_USER_DATA_PATH)
@@ -38,7 +44,11 @@ class BrowserManager:
                 co.set_argument(f'--proxy-server={settings.PROXY_SERVER}')
                 
             self.page = ChromiumPage(addr_or_opts=co)
+            self.pages_opened = 0
             print("✅ BrowserManager: Browser instance initialized.")
+            # 采样浏览器内存，超过阈值时回收 (见 app/scraper/governor.py)
+            from app.scraper.governor import browser_governor
+            browser_governor.start()
             
         except Exception as e:
             print(f"❌ BrowserManager: Failed to initialize browser: {e}")
@@ -50,9 +60,77 @@ class BrowserManager:
         """获取一个新的标签页用于抓取任务"""
         if self.page is None:
             # 尝试重新初始化 (自我恢复)
-            self._init_page()
+            self.ensure_page()
             
-        if self.page:
-            return self.page.new_tab()
+        page = self.page  # 内存管理可能同时回收浏览器
+        if page:
+            tab = page.new_tab()
+            self.tabs.add(tab)
+            self.pages_opened += 1
+            # 任务超时时由看门狗关闭该任务打开的标签页
+            watchdog.attach_tab(tab)
+            return tab
         else:
             raise RuntimeError("Browser instance is not available.")
+
+    def ensure_page(self):
+        """浏览器未运行时重新启动；并发调用只启动一次，避免多个 Chromium 争用同一用户数据目录"""
+        if self.page is None:
+            with self._lock:
+                if self.page is None:
+                    self._init_page()
+
+    def process_id(self):
+        """浏览器主进程 pid (未启动或无法获取时为 None)；渲染、GPU 等进程都是它的子进程"""
+        page = self.page
+        if page is None:
+            return None
+        browser = getattr(page, 'browser', None)  # DrissionPage 4.x
+        return getattr(browser, 'process_id', None) or getattr(page, 'process_id', None)
+
+    def restart(self, timeout: float = 5.0) -> bool:
+        """
+        退出当前浏览器进程 (由内存管理在暂停并等待租约后调用，见 BrowserGovernor.recycle)
+
+        所有标签页随之失效，ensure_page() 以同一用户数据目录重新启动浏览器，登录状态保留。
+
+        Returns:
+            是否有浏览器被退出
+        """
+        with self._lock:
+            page, self.page = self.page, None
+            self.tabs = weakref.WeakSet()
+        if page is None:
+            return False
+        try:
+            page.quit(timeout=timeout, force=True)
+        except Exception as e:
+            print(f"❌ BrowserManager: Failed to quit browser: {e}")
+        print("♻️ BrowserManager: Browser restarted, will relaunch on next tab.")
+        return True
+
+    @classmethod
+    def shutdown(cls, timeout: float = 5.0) -> bool:
+        """
+        关闭所有标签页并退出浏览器进程 (进程退出时调用，避免遗留 Chromium 进程)
+
+        未启动过浏览器时不做任何事 (不会为了关闭而先启动)。
+
+        Returns:
+            是否关闭了浏览器
+        """
+        with cls._lock:
+            instance, cls._instance = cls._instance, None
+        if instance is None or instance.page is None:
+            return False
+        for tab in list(instance.tabs):
+            try:
+                tab.close()
+            except Exception:
+                pass  # 标签页可能已被抓取任务关闭或浏览器已断开
+        try:
+            instance.page.quit(timeout=timeout, force=True)
+        finally:
+            instance.page = None
+        print("✅ BrowserManager: Browser closed.")
+        return True
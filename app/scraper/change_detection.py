@@ -0,0 +1,111 @@
+"""数据源变更探测 - 在启动浏览器之前/交互之前判断页面是否有新内容
+
+按代价从低到高依次尝试：
+1. 已抓到的条目就是源本身 (详情页类数据源)，再抓只会命中重复检查
+2. HTTP 条件请求：If-None-Match / If-Modified-Since 返回 304，或校验头与上次一致
+3. 列表区域指纹：响应 HTML 中条目链接 (策略的 ITEM_LINK_PATTERN) 的摘要与上次一致
+4. 浏览器内单次 JS 求值读取第一张卡片链接 (策略的 FIRST_CARD_JS)，与上次抓到的条目相同则中止
+"""
+import hashlib
+import logging
+import re
+from typing import Callable, NamedTuple, Optional
+
+import requests
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+UNCHANGED = 'unchanged'
+CHANGED = 'changed'
+UNKNOWN = 'unknown'  # 服务端既无校验头也无可用指纹，HTTP 探测对该源无效
+FAILED = 'failed'  # 请求失败/非 200，本次无法判断
+
+PROBE_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8',
+}
+# 指纹只取列表前若干条链接，避免页面底部推荐位的抖动
+FINGERPRINT_LINKS = 20
+
+class ProbeResult(NamedTuple):
+    status: str  # UNCHANGED / CHANGED / UNKNOWN / FAILED
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+class SourceUnchanged(Exception):
+    """抓取过程中确认页面没有新内容 (由策略抛出，调用方记为跳过)"""
+
+class ChangeCheck:
+    """单次抓取的变更探测上下文，由调用方传给策略的 scrape()"""
+
+    def __init__(self, last_seen_url: Optional[str] = None,
+                 is_known: Optional[Callable[[str], bool]] = None):
+        self.last_seen_url = last_seen_url
+        self.is_known = is_known  # 判断条目是否已入库 (例如 crud.item_exists)
+        self.first_card_link: Optional[str] = None
+
+    def is_unchanged(self, link: Optional[str]) -> bool:
+        if not link:
+            return False
+        return link == self.last_seen_url or bool(self.is_known and self.is_known(link))
+
+def fingerprint_links(html: str, pattern: Optional[re.Pattern]) -> Optional[str]:
+    """按出现顺序取前 FINGERPRINT_LINKS 条去重后的条目链接，返回其摘要；找不到链接时返回 None"""
+    if pattern is None:
+        return None
+    links = []
+    for match in pattern.finditer(html):
+        link = match.group(0)
+        if link not in links:
+            links.append(link)
+            if len(links) >= FINGERPRINT_LINKS:
+                break
+    if not links:
+        return None  # 前端渲染的空壳页面，交给浏览器探测
+    return hashlib.sha1('\n'.join(links).encode('utf-8')).hexdigest()
+
+def http_probe(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+               fingerprint: Optional[str] = None, link_pattern: Optional[re.Pattern] = None,
+               timeout: Optional[float] = None) -> ProbeResult:
+    """
+    HTTP 条件请求探测
+
+    Returns:
+        ProbeResult；CHANGED/UNCHANGED 时带回本次的校验值和指纹
+    """
+    headers = dict(PROBE_HEADERS)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout or settings.CHANGE_PROBE_TIMEOUT)
+    except requests.RequestException as e:
+        logger.debug(f"变更探测请求失败 {url}: {e}")
+        return ProbeResult(FAILED, etag, last_modified, fingerprint)
+
+    if response.status_code == 304:
+        return ProbeResult(UNCHANGED, etag, last_modified, fingerprint)
+    if response.status_code != 200:
+        return ProbeResult(FAILED, etag, last_modified, fingerprint)
+
+    new_etag = response.headers.get('ETag')
+    new_modified = response.headers.get('Last-Modified')
+    new_fingerprint = fingerprint_links(response.text, link_pattern)
+    if link_pattern is not None and new_fingerprint is None:
+        # 列表由前端渲染，校验头只反映空壳页面，不能说明内容是否变化
+        return ProbeResult(UNKNOWN)
+
+    if new_fingerprint:
+        # 列表链接直接反映内容，优先于校验头
+        unchanged = new_fingerprint == fingerprint
+    elif new_etag or new_modified:
+        # 部分服务端忽略条件请求头，仍返回 200，这里再比对一次
+        unchanged = bool((new_etag and new_etag == etag) or (new_modified and new_modified == last_modified))
+    else:
+        return ProbeResult(UNKNOWN)
+    return ProbeResult(UNCHANGED if unchanged else CHANGED, new_etag, new_modified, new_fingerprint)
@@ -0,0 +1,293 @@
+"""声明式抽取规则 - 每个平台一份 JSON，编译为一次 JS 批量求值
+
+规则文件放在 app/scraper/specs/<platform>.json (可用 EXTRACTION_SPEC_DIR 指定目录覆盖同名规则)::
+
+    {
+      "platform": "xiaoheihe",
+      "wait": {"selector": "h1.title", "timeout": 10},
+      "fields": {
+        "title":   {"selectors": ["h1.title"], "default": "无标题"},
+        "images":  {"selectors": [".article-content img"], "attr": ["data-original", "src"],
+                    "type": "list", "limit": 3},
+        "publish_date": {"selectors": [".time"], "type": "date", "formats": ["%m/%d %H:%M"]}
+      }
+    }
+
+字段选项：
+- selectors: CSS 选择器 (或 "xpath:..." )，按顺序回退，取第一个有值的
+- attr: 取值来源，"text" (默认)、"html" 或属性名；为列表时依次回退
+- type: text (默认) / list (收集所有匹配元素) / date (用 app.scraper.utils.dates 解析)
+- regex: 对取到的值做匹配，有分组取第一组，否则取整体；不匹配视为无值
+- limit: list 最多条数；text 最大长度 (超出截断并加 "...")
+- fallback: 本字段无值时使用的另一字段名 (取该字段的原始值，再按本字段规则处理)；
+  也可写成 {"field": "content", "limit": 20}，limit 只作用于回退值
+- default: 最终仍无值时的默认值
+
+带 "strategy" 段的规则文件 (domain/label/能力标记，同 register_strategy) 无需编写 Python 即注册为新平台，
+使用通用流程 SpecScraper 抓取。规则文件修改后按 mtime 自动重新编译，编译失败时保留旧版本。
+"""
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.scraper.utils.dates import parse_date
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_SPEC_DIR = Path(__file__).parent / 'specs'
+FIELD_TYPES = ('text', 'list', 'date')
+FIELD_KEYS = {'selectors', 'attr', 'type', 'regex', 'limit', 'formats', 'fallback', 'default'}
+
+# 单次 run_js 完成所有字段的选择器回退与取值；FIELDS 由编译时注入
+EXTRACT_JS = """
+const FIELDS = %s;
+const query = (sel, all) => {
+    if (sel.startsWith('xpath:')) {
+        const r = document.evaluate(sel.slice(6), document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < r.snapshotLength && (all || i < 1); i++) nodes.push(r.snapshotItem(i));
+        return nodes;
+    }
+    if (sel.startsWith('css:')) sel = sel.slice(4);
+    return all ? Array.from(document.querySelectorAll(sel)) : [document.querySelector(sel)].filter(Boolean);
+};
+const pick = (el, attrs) => {
+    for (const a of attrs) {
+        const v = a === 'text' ? el.innerText : a === 'html' ? el.innerHTML : el.getAttribute(a);
+        if (v && v.trim()) return v.trim();
+    }
+    return null;
+};
+const out = {};
+for (const [name, f] of Object.entries(FIELDS)) {
+    let value = f.all ? [] : null;
+    for (const sel of f.selectors) {
+        let nodes;
+        try { nodes = query(sel, f.all); } catch (e) { continue; }
+        for (const el of nodes) {
+            const v = pick(el, f.attrs);
+            if (v === null) continue;
+            if (!f.all) { value = v; break; }
+            value.push(v);
+        }
+        if (f.all ? value.length : value !== null) break;
+    }
+    out[name] = value;
+}
+return out;
+"""
+
+class SpecError(ValueError):
+    """规则文件不合法"""
+
+@dataclass(frozen=True)
+class FieldPlan:
+    name: str
+    selectors: Tuple[str, ...]
+    attrs: Tuple[str, ...] = ('text',)
+    type: str = 'text'
+    regex: Optional[re.Pattern] = None
+    limit: Optional[int] = None
+    formats: Tuple[str, ...] = ()
+    fallback: Optional[str] = None
+    fallback_limit: Optional[int] = None
+    default: Any = None
+
+    def convert(self, raw: Any, now: Optional[datetime] = None) -> Any:
+        """把 JS 返回的原始值转换为最终值；无值返回 None"""
+        if self.type == 'list':
+            values = [v for v in (self._match(v) for v in raw or []) if v]
+            # 去重并保持顺序
+            values = list(dict.fromkeys(values))
+            return values[:self.limit] if self.limit else values
+        value = self._match(raw)
+        if not value:
+            return None
+        if self.type == 'date':
+            return parse_date(value, self.formats, now)
+        if self.limit and len(value) > self.limit:
+            return value[:self.limit] + '...'
+        return value
+
+    def _match(self, value: Optional[str]) -> Optional[str]:
+        if value is None or self.regex is None:
+            return value
+        match = self.regex.search(value)
+        if not match:
+            return None
+        return match.group(1) if self.regex.groups else match.group()
+
+@dataclass(frozen=True)
+class ExtractionPlan:
+    """编译后的抽取计划"""
+    platform: str
+    fields: Tuple[FieldPlan, ...]
+    script: str
+    wait_selector: Optional[str] = None
+    wait_timeout: float = 10
+    strategy: Optional[Dict[str, Any]] = None
+
+    def wait(self, page):
+        """等待关键元素出现，超时后继续抽取"""
+        if not self.wait_selector:
+            return
+        selector = self.wait_selector
+        if not selector.startswith(('css:', 'xpath:')):
+            selector = f'css:{selector}'
+        try:
+            page.wait.ele_displayed(selector, timeout=self.wait_timeout)
+        except Exception:
+            logger.info(f'[{self.platform}] 等待 {self.wait_selector} 超时，继续抽取')
+
+    def run(self, page) -> Dict[str, Any]:
+        """在页面上执行一次批量抽取"""
+        return self.parse(page.run_js(self.script) or {})
+
+    def parse(self, raw: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+        result = {}
+        for field in self.fields:
+            value = field.convert(raw.get(field.name), now)
+            if value is None and field.fallback:
+                fallback = replace(field, limit=field.fallback_limit or field.limit)
+                value = fallback.convert(raw.get(field.fallback), now)
+            result[field.name] = value if value is not None else field.default
+        return result
+
+def _as_tuple(value, name: str) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not value or not all(isinstance(v, str) and v for v in value):
+        raise SpecError(f'{name} 必须是非空字符串或字符串列表')
+    return tuple(value)
+
+def _check_limit(limit, where: str) -> Optional[int]:
+    if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+        raise SpecError(f'{where} limit 必须是正整数')
+    return limit
+
+def compile_spec(spec: Dict[str, Any]) -> ExtractionPlan:
+    """校验规则并编译为抽取计划"""
+    platform = spec.get('platform')
+    if not isinstance(platform, str) or not platform:
+        raise SpecError('缺少 platform')
+    raw_fields = spec.get('fields')
+    if not isinstance(raw_fields, dict) or not raw_fields:
+        raise SpecError(f'[{platform}] 缺少 fields')
+
+    fields = []
+    for name, options in raw_fields.items():
+        where = f'[{platform}] 字段 {name}'
+        if not isinstance(options, dict):
+            raise SpecError(f'{where} 必须是对象')
+        unknown = set(options) - FIELD_KEYS
+        if unknown:
+            raise SpecError(f'{where} 未知选项: {", ".join(sorted(unknown))}')
+        field_type = options.get('type', 'text')
+        if field_type not in FIELD_TYPES:
+            raise SpecError(f'{where} type 只能是 {"/".join(FIELD_TYPES)}')
+        limit = _check_limit(options.get('limit'), where)
+        fallback, fallback_limit = options.get('fallback'), None
+        if isinstance(fallback, dict):
+            fallback, fallback_limit = fallback.get('field'), _check_limit(fallback.get('limit'), where)
+        if fallback is not None and fallback not in raw_fields:
+            raise SpecError(f'{where} fallback 字段不存在: {fallback}')
+        try:
+            regex = re.compile(options['regex']) if options.get('regex') else None
+        except re.error as e:
+            raise SpecError(f'{where} regex 无效: {e}') from None
+        fields.append(FieldPlan(
+            name=name,
+            selectors=_as_tuple(options.get('selectors'), f'{where} selectors'),
+            attrs=_as_tuple(options.get('attr', 'text'), f'{where} attr'),
+            type=field_type,
+            regex=regex,
+            limit=limit,
+            formats=tuple(options.get('formats', ())),
+            fallback=fallback,
+            fallback_limit=fallback_limit,
+            default=options.get('default'),
+        ))
+
+    wait = spec.get('wait') or {}
+    if isinstance(wait, str):
+        wait = {'selector': wait}
+    js_fields = {f.name: {'selectors': f.selectors, 'attrs': f.attrs, 'all': f.type == 'list'} for f in fields}
+    return ExtractionPlan(
+        platform=platform,
+        fields=tuple(fields),
+        script=EXTRACT_JS % json.dumps(js_fields, ensure_ascii=False),
+        wait_selector=wait.get('selector'),
+        wait_timeout=wait.get('timeout', 10),
+        strategy=spec.get('strategy'),
+    )
+
+class SpecStore:
+    """规则文件加载与热更新 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SpecStore, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._plans = {}  # platform -> (path, mtime_ns, plan)
+        return cls._instance
+
+    def spec_dirs(self) -> List[Path]:
+        """查找顺序：用户目录优先于内置目录"""
+        dirs = [Path(settings.EXTRACTION_SPEC_DIR)] if settings.EXTRACTION_SPEC_DIR else []
+        return dirs + [BUILTIN_SPEC_DIR]
+
+    def find(self, platform: str) -> Optional[Path]:
+        for directory in self.spec_dirs():
+            path = directory / f'{platform}.json'
+            if path.is_file():
+                return path
+        return None
+
+    def platforms(self) -> List[str]:
+        names = set()
+        for directory in self.spec_dirs():
+            if directory.is_dir():
+                names.update(p.stem for p in directory.glob('*.json'))
+        return sorted(names)
+
+    def get(self, platform: str) -> ExtractionPlan:
+        """
+        获取平台的抽取计划；文件 mtime 变化时重新编译
+
+        Raises:
+            SpecError: 没有规则文件，或首次编译即失败
+        """
+        path = self.find(platform)
+        if path is None:
+            raise SpecError(f'没有平台 {platform} 的抽取规则')
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._plans.get(platform)
+            if cached and cached[:2] == (path, mtime):
+                return cached[2]
+            try:
+                with open(path, encoding='utf-8') as f:
+                    plan = compile_spec(json.load(f))
+                if plan.platform != platform:
+                    raise SpecError(f'文件名与 platform 不一致: {plan.platform}')
+            except (OSError, ValueError) as e:
+                if cached is None:
+                    raise SpecError(f'{path}: {e}') from None
+                # 编辑中的文件可能暂时不完整，继续使用上一个可用版本
+                logger.error(f'抽取规则 {path} 重新加载失败，继续使用旧版本: {e}')
+                self._plans[platform] = (path, mtime, cached[2])
+                return cached[2]
+            if cached is not None:
+                logger.info(f'抽取规则已重新加载: {path}')
+            self._plans[platform] = (path, mtime, plan)
+            return plan
+
+spec_store = SpecStore()
@@ -0,0 +1,242 @@
+"""浏览器内存管理 - 定期采样 Chromium 进程树内存，超过阈值或打开页面过多时回收浏览器
+
+长时间运行的 Chromium 渲染进程会持续泄漏内存。浏览器启动后后台线程每 BROWSER_SAMPLE_INTERVAL 秒：
+1. 采样浏览器主进程及其子进程 (渲染、GPU 等) 的常驻内存，追加到 BROWSER_RSS_LOG (CSV，用于调整阈值)
+2. 内存超过 BROWSER_RECYCLE_RSS_MB 或启动后打开的标签页超过 BROWSER_RECYCLE_PAGES 时回收浏览器：
+   暂停发放租约 -> 等待进行中的抓取归还租约 (最多 BROWSER_RECYCLE_DRAIN_TIMEOUT 秒) ->
+   退出浏览器并以同一用户数据目录重新启动 (登录状态保留) -> 恢复发放租约
+3. 每 BROWSER_CLEAR_INTERVAL 秒清理 HTTP 缓存，以及各平台站点的 Service Worker 与 Cache Storage (保留 Cookie)
+
+抓取在 lease() 中进行 (见 scraper_service.scrape_source)，回收期间新的抓取等待新浏览器就绪。
+看门狗升级到重启浏览器时同样经 recycle() 进行，只是不等待卡住的那个任务自己的租约。
+"""
+import csv
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.core import sysmetrics
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+CSV_FIELDS = ['time', 'rss_mb', 'pages', 'leases', 'event']
+
+def _manager():
+    """已启动的 BrowserManager 实例 (不会为采样而启动浏览器)"""
+    browser = sys.modules.get('app.scraper.browser')
+    instance = browser.BrowserManager._instance if browser else None
+    if instance is None or instance.page is None:
+        return None
+    return instance
+
+def platform_origins() -> List[str]:
+    """各平台站点的 origin (清理 Service Worker 与 Cache Storage 用)"""
+    from app.scraper.registry import strategy_registry
+    origins = []
+    for info in strategy_registry.infos():
+        if info.domain:
+            origins += [f'https://{info.domain}', f'https://www.{info.domain}']
+    return origins
+
+class BrowserGovernor:
+    """浏览器内存管理 - 单例模式；浏览器首次启动时开始采样"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(BrowserGovernor, cls).__new__(cls)
+            cls._instance._cond = threading.Condition()
+            cls._instance.leases = 0         # 进行中的抓取数
+            cls._instance._holders: Dict[int, int] = {}  # 线程 ident -> 持有的租约数
+            cls._instance._recycle_lock = threading.Lock()
+            cls._instance.paused = False     # 回收中，暂停发放租约
+            cls._instance.recycles = 0
+            cls._instance.last_rss: Optional[int] = None
+            cls._instance.last_clear = time.monotonic()
+            cls._instance._thread = None
+            cls._instance._stop = threading.Event()
+        return cls._instance
+
+    # ===== 租约 =====
+
+    @contextmanager
+    def lease(self):
+        """占用浏览器进行一次抓取；回收期间等待新浏览器就绪"""
+        ident = threading.get_ident()
+        with self._cond:
+            self._cond.wait_for(lambda: not self.paused)
+            self.leases += 1
+            self._holders[ident] = self._holders.get(ident, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.leases -= 1
+                self._holders[ident] -= 1
+                if not self._holders[ident]:
+                    del self._holders[ident]
+                self._cond.notify_all()
+
+    # ===== 采样线程 =====
+
+    def start(self):
+        """启动采样线程 (未启用或已启动时忽略)"""
+        if not settings.BROWSER_GOVERNOR_ENABLED:
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self.last_clear = time.monotonic()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="BrowserGovernor")
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(settings.BROWSER_SAMPLE_INTERVAL):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"浏览器内存采样失败: {e}")
+
+    def check(self) -> Optional[str]:
+        """
+        采样一次并按需回收或清理
+
+        Returns:
+            执行的动作 ('recycle'/'clear')，无动作时为 None
+        """
+        manager = _manager()
+        if manager is None:
+            return None
+        rss = self.sample(manager)
+        if rss is not None and rss > settings.BROWSER_RECYCLE_RSS_MB * MB:
+            self.recycle(f"内存 {rss / MB:.0f} MB 超过 {settings.BROWSER_RECYCLE_RSS_MB} MB")
+            return 'recycle'
+        if settings.BROWSER_RECYCLE_PAGES and manager.pages_opened >= settings.BROWSER_RECYCLE_PAGES:
+            self.recycle(f"已打开 {manager.pages_opened} 个页面")
+            return 'recycle'
+        if settings.BROWSER_CLEAR_INTERVAL and time.monotonic() - self.last_clear >= settings.BROWSER_CLEAR_INTERVAL:
+            self.clear_caches()
+            return 'clear'
+        return None
+
+    def sample(self, manager=None, event: str = 'sample') -> Optional[int]:
+        """读取浏览器进程树内存并写入 CSV"""
+        manager = manager or _manager()
+        pid = manager.process_id() if manager is not None else None
+        rss = sysmetrics.tree_rss(pid) if pid else None
+        self.last_rss = rss
+        self._log(rss, manager.pages_opened if manager is not None else 0, event)
+        return rss
+
+    def _log(self, rss: Optional[int], pages: int, event: str):
+        path = settings.BROWSER_RSS_LOG
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            new = not os.path.exists(path)
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if new:
+                    writer.writerow(CSV_FIELDS)
+                writer.writerow([time.strftime('%Y-%m-%d %H:%M:%S'),
+                                 '' if rss is None else round(rss / MB, 1), pages, self.leases, event])
+        except OSError as e:
+            logger.warning(f"浏览器内存记录写入失败: {e}")
+
+    # ===== 回收与清理 =====
+
+    def recycle(self, reason: str, exclude: Optional[threading.Thread] = None,
+                drain_timeout: Optional[float] = None) -> bool:
+        """
+        暂停租约、等待进行中的抓取结束后重启浏览器 (同一用户数据目录)
+
+        等待超过 drain_timeout (默认 BROWSER_RECYCLE_DRAIN_TIMEOUT) 仍未归还的租约不再等待，
+        其标签页随旧浏览器关闭。同时发起的回收依次执行，等待期间已有回收完成时直接返回。
+
+        Args:
+            reason: 回收原因 (用于日志)
+            exclude: 不等待其租约的线程 (看门狗传入卡住的任务线程)
+            drain_timeout: 等待租约归还的秒数
+
+        Returns:
+            是否完成了重启
+        """
+        recycles = self.recycles
+        with self._recycle_lock:
+            if self.recycles != recycles:
+                return True
+            return self._recycle(reason, exclude, drain_timeout)
+
+    def _recycle(self, reason: str, exclude: Optional[threading.Thread], drain_timeout: Optional[float]) -> bool:
+        manager = _manager()
+        if manager is None:
+            return False
+        logger.info(f"♻️ 回收浏览器: {reason}")
+        if drain_timeout is None:
+            drain_timeout = settings.BROWSER_RECYCLE_DRAIN_TIMEOUT
+        excluded = exclude.ident if exclude is not None else None
+        with self._cond:
+            self.paused = True
+            drained = self._cond.wait_for(
+                lambda: self.leases - self._holders.get(excluded, 0) == 0, drain_timeout)
+        if not drained:
+            logger.warning(f"等待 {drain_timeout:g} 秒后仍有 {self.leases} 个抓取未结束，强制回收")
+        try:
+            before = self.last_rss
+            manager.restart()
+            manager.ensure_page()
+            self.recycles += 1
+            self.last_clear = time.monotonic()
+            after = self.sample(manager, event='recycle')
+            if before is not None and after is not None:
+                logger.info(f"浏览器已重启: {before / MB:.0f} MB -> {after / MB:.0f} MB")
+            return True
+        except Exception as e:
+            logger.error(f"浏览器重启失败，下次取标签页时重试: {e}")
+            return False
+        finally:
+            with self._cond:
+                self.paused = False
+                self._cond.notify_all()
+
+    def clear_caches(self) -> bool:
+        """清理 HTTP 缓存与各平台站点的 Service Worker / Cache Storage (不影响 Cookie 与登录状态)"""
+        manager = _manager()
+        if manager is None:
+            return False
+        self.last_clear = time.monotonic()
+        page = manager.page
+        try:
+            page.run_cdp('Network.clearBrowserCache')
+            for origin in platform_origins():
+                page.run_cdp('Storage.clearDataForOrigin', origin=origin,
+                             storageTypes='service_workers,cache_storage')
+        except Exception as e:
+            logger.warning(f"清理浏览器缓存失败: {e}")
+            return False
+        self.sample(manager, event='clear')
+        logger.info("已清理浏览器缓存与 Service Worker")
+        return True
+
+    def status(self) -> dict:
+        manager = _manager()
+        return {'rss_mb': None if self.last_rss is None else round(self.last_rss / MB, 1),
+                'pages': manager.pages_opened if manager is not None else 0,
+                'leases': self.leases, 'recycles': self.recycles}
+
+# 全局实例
+browser_governor = BrowserGovernor()
@@ -0,0 +1,185 @@
+"""抓取策略注册表
+
+策略类用 @register_strategy 声明平台、域名和能力，注册表负责：
+- 按平台查找并缓存策略实例 (策略本身无状态，每次抓取的状态通过 ChangeCheck 传入)
+- 为界面、导入校验提供平台列表和按域名推断平台
+- 按 max_concurrency 为每个平台提供信号量，限制同时占用浏览器标签页的抓取数
+
+不需要定制流程的平台也可以只写抽取规则文件，见 app/scraper/extraction.py。
+
+内置策略在首次查询时导入；第三方策略通过 entry point 组 `smart_scraper.strategies` 注册，
+值指向策略类或包含 @register_strategy 的模块，例如::
+
+    [project.entry-points."smart_scraper.strategies"]
+    weibo = "my_plugin.weibo:WeiboScraper"
+"""
+import importlib
+import logging
+import threading
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import TYPE_CHECKING, Dict, List, Optional, Type
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from app.scraper.strategies.base import BaseScraper
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'smart_scraper.strategies'
+
+# 内置策略模块，导入时通过装饰器完成注册
+BUILTIN_MODULES = (
+    'app.scraper.strategies.bilibili',
+    'app.scraper.strategies.xiaohongshu',
+    'app.scraper.strategies.xiaoheihe',
+    'app.scraper.strategies.coolapk',
+)
+
+@dataclass(frozen=True)
+class StrategyInfo:
+    """策略元数据"""
+    platform: str
+    cls: Type['BaseScraper']
+    domain: str                     # 用于按 URL 推断平台
+    label: str = ''                 # 界面显示名称
+    http_fast_path: bool = False    # 列表页可用纯 HTTP 探测是否变化 (需配合 ITEM_LINK_PATTERN)
+    list_pages: bool = False        # 支持列表页 (否则数据源即单个详情页)
+    max_concurrency: int = 1        # 同一平台同时进行的抓取数上限
+    needs_login: bool = False       # 需要在浏览器中手动登录
+
+    def matches(self, url: str) -> bool:
+        host = (urlsplit(url).hostname or '').lower()
+        return host == self.domain or host.endswith('.' + self.domain)
+
+class StrategyRegistry:
+    """策略注册表 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(StrategyRegistry, cls).__new__(cls)
+            cls._instance._lock = threading.RLock()
+            cls._instance._infos = {}
+            cls._instance._instances = {}
+            cls._instance._semaphores = {}
+            cls._instance._loaded = False
+        return cls._instance
+
+    def register(self, info: StrategyInfo):
+        """注册策略；同一平台重复注册时以后者为准"""
+        if info.max_concurrency < 1:
+            raise ValueError(f'max_concurrency 必须 >= 1: {info.platform}')
+        with self._lock:
+            if info.platform in self._infos and self._infos[info.platform].cls is not info.cls:
+                logger.warning(f'策略 {info.platform} 被 {info.cls.__module__}.{info.cls.__name__} 覆盖')
+            self._infos[info.platform] = info
+            self._instances.pop(info.platform, None)
+            self._semaphores.pop(info.platform, None)
+
+    def unregister(self, platform: str):
+        with self._lock:
+            self._infos.pop(platform, None)
+            self._instances.pop(platform, None)
+            self._semaphores.pop(platform, None)
+
+    def load(self):
+        """导入内置策略、发现 entry point 插件和规则文件平台 (只执行一次)"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for module in BUILTIN_MODULES:
+                importlib.import_module(module)
+            for ep in entry_points(group=ENTRY_POINT_GROUP):
+                try:
+                    target = ep.load()
+                except Exception as e:
+                    logger.error(f'加载策略插件 {ep.name} ({ep.value}) 失败: {e}')
+                    continue
+                # 指向未使用装饰器的策略类时，以 entry point 名称作为平台注册
+                if isinstance(target, type) and not any(i.cls is target for i in self._infos.values()):
+                    self.register(StrategyInfo(platform=ep.name, cls=target,
+                                               domain=getattr(target, 'DOMAIN', '') or ep.name))
+            self._load_spec_strategies()
+            self._loaded = True
+
+    def _load_spec_strategies(self):
+        """带 strategy 段的抽取规则文件注册为通用 SpecScraper 平台"""
+        from app.scraper.extraction import spec_store
+        from app.scraper.strategies.spec import SpecScraper
+
+        for platform in spec_store.platforms():
+            if platform in self._infos:
+                continue
+            try:
+                options = spec_store.get(platform).strategy
+                if options:
+                    cls = type(f'{platform.title()}SpecScraper', (SpecScraper,), {'__module__': SpecScraper.__module__})
+                    register_strategy(platform, **options)(cls)
+            except (TypeError, ValueError) as e:
+                logger.error(f'规则文件策略 {platform} 注册失败: {e}')
+
+    def infos(self) -> List[StrategyInfo]:
+        self.load()
+        return list(self._infos.values())
+
+    def platforms(self) -> List[str]:
+        return [info.platform for info in self.infos()]
+
+    def info(self, platform: str) -> StrategyInfo:
+        self.load()
+        try:
+            return self._infos[platform]
+        except KeyError:
+            raise ValueError(f'未知的平台类型: {platform}') from None
+
+    def get(self, platform: str) -> 'BaseScraper':
+        """获取平台的策略实例 (缓存复用)"""
+        info = self.info(platform)
+        with self._lock:
+            scraper = self._instances.get(platform)
+            if scraper is None:
+                scraper = self._instances[platform] = info.cls()
+            return scraper
+
+    def semaphore(self, platform: str) -> threading.BoundedSemaphore:
+        """平台的并发信号量，容量为 max_concurrency"""
+        info = self.info(platform)
+        with self._lock:
+            semaphore = self._semaphores.get(platform)
+            if semaphore is None:
+                semaphore = self._semaphores[platform] = threading.BoundedSemaphore(info.max_concurrency)
+            return semaphore
+
+    def detect_platform(self, url: str) -> Optional[str]:
+        """根据 URL 域名推断平台"""
+        for info in self.infos():
+            if info.domain and info.matches(url):
+                return info.platform
+        return None
+
+    def labels(self) -> Dict[str, str]:
+        """{平台: 显示名称}，供界面下拉框使用"""
+        return {info.platform: info.label or info.platform for info in self.infos()}
+
+strategy_registry = StrategyRegistry()
+
+def register_strategy(platform: str, domain: str, label: str = '', http_fast_path: bool = False,
+                      list_pages: bool = False, max_concurrency: int = 1, needs_login: bool = False):
+    """
+    策略类装饰器
+
+    Example:
+        @register_strategy('bilibili', 'bilibili.com', label='哔哩哔哩', list_pages=True)
+        class BilibiliScraper(BaseScraper): ...
+    """
+    def decorator(cls):
+        info = StrategyInfo(platform=platform, cls=cls, domain=domain, label=label,
+                            http_fast_path=http_fast_path, list_pages=list_pages,
+                            max_concurrency=max_concurrency, needs_login=needs_login)
+        strategy_registry.register(info)
+        cls.platform = platform
+        return cls
+    return decorator
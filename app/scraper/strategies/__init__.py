@@ -1,7 +1,23 @@
-from .base import BaseScraper
-from .bilibili import BilibiliScraper
-from .xiaohongshu import XiaohongshuScraper
-from .xiaoheihe import XiaoheiheScraper
-from .coolapk import CoolAPKScraper
+# 各策略按需导入 (PEP 562)；平台查找请使用 app.scraper.registry.strategy_registry
+import importlib
 
-__all__ = ['BaseScraper', 'BilibiliScraper', 'XiaohongshuScraper', 'XiaoheiheScraper', 'CoolAPKScraper']
+_EXPORTS = {
+    'BaseScraper': '.base',
+    'SpecScraper': '.spec',
+    'BilibiliScraper': '.bilibili',
+    'XiaohongshuScraper': '.xiaohongshu',
+    'XiaoheiheScraper': '.xiaoheihe',
+    'CoolAPKScraper': '.coolapk',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
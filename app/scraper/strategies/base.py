@@ -1,17 +1,67 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from app.database.models import ScrapedItem
+from app.scraper.change_detection import ChangeCheck, SourceUnchanged
+from app.scraper.extraction import spec_store
 from app.scraper.utils.captcha import captcha_solver
-from DrissionPage.items import ChromiumElement
+import re
 import time
 import random
 
+if TYPE_CHECKING:
+    from DrissionPage.items import ChromiumElement
+
 
 class BaseScraper(ABC):
+    # 由 @register_strategy 设置；实例会被注册表缓存复用，子类不要在实例上保存单次抓取的状态
+    platform: str = ''
+    # 列表页条目链接的正则，用于 HTTP 探测时计算列表区域指纹；None 表示不做指纹
+    ITEM_LINK_PATTERN: Optional[re.Pattern] = None
+    # 读取列表页第一张卡片链接的 JS (函数体)，None 表示不支持浏览器内探测
+    FIRST_CARD_JS: Optional[str] = None
+
     @abstractmethod
-    def scrape(self, url: str) -> ScrapedItem:
+    def scrape(self, url: str, check: Optional[ChangeCheck] = None) -> ScrapedItem:
         pass
 
-    def handle_captcha(self, page, slider_ele: ChromiumElement, bg_ele: ChromiumElement = None):
+    def extract(self, page) -> Dict[str, Any]:
+        """按平台抽取规则 (app/scraper/specs/<platform>.json) 等待并一次性提取所有字段"""
+        plan = spec_store.get(self.platform)
+        plan.wait(page)
+        return plan.run(page)
+
+    def build_item(self, url: str, data: Dict[str, Any]) -> ScrapedItem:
+        """由抽取结果构造条目；未解析出发布时间时使用当前时间"""
+        return ScrapedItem(
+            url=url,
+            title=data.get('title') or '无标题',
+            content=data.get('content') or '',
+            images=','.join(data.get('images') or []),
+            publish_date=data.get('publish_date') or datetime.now(),
+            source_id=None
+        )
+
+    def check_first_card(self, page, check: Optional[ChangeCheck]) -> Optional[str]:
+        """
+        单次 JS 求值读取第一张卡片链接，记录到 check.first_card_link
+
+        Raises:
+            SourceUnchanged: 第一张卡片就是上次抓到的/已入库的条目
+        """
+        if check is None or not self.FIRST_CARD_JS:
+            return None
+        try:
+            link = page.run_js(self.FIRST_CARD_JS)
+        except Exception as e:
+            print(f"First card probe failed: {e}")
+            return None
+        check.first_card_link = link or None
+        if check.is_unchanged(link):
+            raise SourceUnchanged(link)
+        return link
+
+    def handle_captcha(self, page, slider_ele: 'ChromiumElement', bg_ele: 'ChromiumElement' = None):
         """
         处理滑块验证码
         
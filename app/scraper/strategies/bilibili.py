@@ -1,15 +1,31 @@
+from typing import Optional
 from app.scraper.strategies.base import BaseScraper
+from app.scraper.registry import register_strategy
+from app.scraper.change_detection import ChangeCheck
 from app.database.models import ScrapedItem
 from app.scraper.browser import BrowserManager
+from app.services.subtitle_service import subtitle_service, SubtitleRef
+from urllib.parse import parse_qs, urlsplit
 import time
-from datetime import datetime
 import re
 
+@register_strategy('bilibili', 'bilibili.com', label='哔哩哔哩', http_fast_path=True,
+                   list_pages=True, max_concurrency=2)
 class BilibiliScraper(BaseScraper):
-    def scrape(self, url: str) -> ScrapedItem:
+    ITEM_LINK_PATTERN = re.compile(r'(?:https?:)?//www\.bilibili\.com/video/(?:BV\w{10}|av\d+)')
+    FIRST_CARD_JS = """
+        if (document.querySelector('h1.video-title')) return null;
+        const card = document.querySelector('.video-card, .bili-video-card, .rank-item, .small-item');
+        if (!card) return null;
+        const link = card.querySelector('a[href*="/video/"]') || card.closest('a[href*="/video/"]');
+        return link ? link.href : null;
+    """
+
+    def scrape(self, url: str, check: Optional[ChangeCheck] = None) -> ScrapedItem:
         """抓取 Bilibili 页面 (支持视频详情页和列表页自动跳转)"""
         browser = BrowserManager()
         page = browser.get_new_tab()
+        subtitle = None
         
         try:
             # 开启数据包监听 (为了获取字幕)
@@ -17,6 +33,9 @@ class BilibiliScraper(BaseScraper):
             
             print(f"Navigating to: {url}")
             page.get(url)
+
+            # 列表页第一张卡片与上次相同则直接结束，省去交互和跳转
+            self.check_first_card(page, check)
             
             # === 新增：列表页自动跳转逻辑 ===
             # 如果是热门、排行榜、频道页，通常包含视频卡片
@@ -55,74 +74,39 @@ class BilibiliScraper(BaseScraper):
             # 2. 模拟人类交互
             self.simulate_interaction(page)
 
-            # 3. 智能等待标题
-            try:
-                page.wait.ele_displayed('css:h1.video-title', timeout=8)
-            except:
-                pass # 超时继续尝试提取
-            
-            # 提取标题
-            title_element = page.ele('css:h1.video-title')
-            title = title_element.text if title_element else '无标题'
-            
-            # 提取内容（简介）
-            content_element = page.ele('css:.desc-info') or page.ele('css:#v_desc')
-            content = content_element.text if content_element else ''
-            
-            # --- 字幕提取逻辑 (保持不变) ---
-            subtitle_text = ""
-            try:
-                res = page.listen.wait(timeout=3)
-                if res:
-                    json_data = res.response.body
-                    if isinstance(json_data, dict) and 'data' in json_data:
-                        subtitles = json_data['data'].get('subtitle', {}).get('subtitles', [])
-                        if subtitles:
-                            sub_url = subtitles[0].get('url')
-                            if sub_url:
-                                if sub_url.startswith('//'): sub_url = 'https:' + sub_url
-                                import requests
-                                sub_resp = requests.get(sub_url)
-                                if sub_resp.status_code == 200:
-                                    body = sub_resp.json().get('body', [])
-                                    subtitle_text = "\n".join([i.get('content', '') for i in body])
-            except Exception as e:
-                print(f"Subtitle extraction warning: {e}")
-            
-            if subtitle_text:
-                content += f"\n\n=== 视频字幕 ===\n{subtitle_text}"
-            
-            # 提取封面
-            images = []
-            # B站封面通常在 meta 标签或 window.__INITIAL_STATE__ 中，这里尝试简单的 DOM 获取
-            # 很多时候封面是背景图，较难获取，这里尝试获取 og:image
-            try:
-                meta_img = page.ele('xpath://meta[@property="og:image"]')
-                if meta_img:
-                    images.append(meta_img.attr('content'))
-            except:
-                pass
-            
-            # 提取时间
-            publish_date = datetime.now()
-            try:
-                date_ele = page.ele('css:.pubdate-ip') or page.ele('css:.video-data')
-                if date_ele:
-                    date_text = date_ele.text
-                    match = re.search(r'\d{4}-\d{2}-\d{2}', date_text)
-                    if match:
-                        publish_date = datetime.strptime(match.group(), '%Y-%m-%d')
-            except:
-                pass
+            # 3. 等待标题并按规则提取 (specs/bilibili.json)
+            item = self.build_item(url, self.extract(page))  # url 为跳转后的视频地址，而不是列表地址
 
-            return ScrapedItem(
-                url=url, # 这里返回的是最终跳转后的视频 URL，而不是列表 URL
-                title=title,
-                content=content,
-                images=','.join(images),
-                publish_date=publish_date,
-                source_id=None
-            )
+            # 4. 只记下字幕地址，下载放到标签页关闭之后
+            subtitle = self.find_subtitle(page)
+            if subtitle:
+                item.transcript_key = subtitle.key
+            return item
         finally:
             page.listen.stop()
             page.close()
+            if subtitle:
+                subtitle_service.request(subtitle)
+
+    def find_subtitle(self, page) -> Optional[SubtitleRef]:
+        """从监听到的 player/v2 响应中取第一条字幕，以 cid 作为缓存键"""
+        try:
+            res = page.listen.wait(timeout=3)
+            if not res:
+                return None
+            json_data = res.response.body
+            if not isinstance(json_data, dict) or not isinstance(json_data.get('data'), dict):
+                return None
+            data = json_data['data']
+            subtitles = (data.get('subtitle') or {}).get('subtitles') or []
+            sub_url = subtitles[0].get('subtitle_url') or subtitles[0].get('url') if subtitles else None
+            if not sub_url:
+                return None
+            if sub_url.startswith('//'):
+                sub_url = 'https:' + sub_url
+            cid = data.get('cid') or parse_qs(urlsplit(res.url).query).get('cid', [None])[0]
+            key = f'bilibili:{cid}' if cid else f'bilibili:{urlsplit(sub_url).path}'
+            return SubtitleRef(key=key, url=sub_url, lang=subtitles[0].get('lan'))
+        except Exception as e:
+            print(f"Subtitle extraction warning: {e}")
+            return None
@@ -0,0 +1,21 @@
+"""通用规则驱动策略：打开页面 -> 模拟阅读 -> 按抽取规则提取"""
+from typing import Optional
+from app.scraper.strategies.base import BaseScraper
+from app.scraper.change_detection import ChangeCheck
+from app.database.models import ScrapedItem
+from app.scraper.browser import BrowserManager
+
+class SpecScraper(BaseScraper):
+    def scrape(self, url: str, check: Optional[ChangeCheck] = None) -> ScrapedItem:
+        browser = BrowserManager()
+        page = browser.get_new_tab()
+
+        try:
+            page.get(url)
+
+            # 模拟阅读
+            self.simulate_interaction(page)
+
+            return self.build_item(url, self.extract(page))
+        finally:
+            page.close()
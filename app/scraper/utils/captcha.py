@@ -1,7 +1,6 @@
 """滑块验证码求解工具 - 使用 Bezier 曲线模拟人类滑动行为"""
 import time
 import random
-import numpy as np
 from typing import List, Tuple
 
 class CaptchaSolver:
@@ -57,6 +56,8 @@ class CaptchaSolver:
         Returns:
             (x, y) 坐标点列表
         """
+        import numpy as np  # 按需导入，只有遇到验证码时才加载 numpy
+
         # 三阶 Bezier 曲线的四个控制点
         p0 = np.array([0, 0])
         p1 = np.array([distance * 0.3, random.randint(-10, 10)])
@@ -150,6 +151,7 @@ class CaptchaSolver:
         """
         try:
             import cv2
+            import numpy as np
             
             # 字节流转 numpy 数组
             bg_arr = np.frombuffer(bg_bytes, np.uint8)
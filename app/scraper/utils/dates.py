@@ -0,0 +1,98 @@
+"""发布时间解析 - 绝对日期与 "1小时前"、"昨天 12:30" 等相对时间"""
+import re
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+# 常见绝对日期格式，按从具体到粗略排列
+DEFAULT_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d',
+    '%Y年%m月%d日 %H:%M',
+    '%Y年%m月%d日',
+)
+
+UNIT_SECONDS = {
+    '秒': 1, 'second': 1,
+    '分钟': 60, '分': 60, 'minute': 60,
+    '小时': 3600, '时': 3600, 'hour': 3600,
+    '天': 86400, '日': 86400, 'day': 86400,
+    '周': 7 * 86400, '星期': 7 * 86400, 'week': 7 * 86400,
+    '个月': 30 * 86400, '月': 30 * 86400, 'month': 30 * 86400,
+    '年': 365 * 86400, 'year': 365 * 86400,
+}
+
+RELATIVE_RE = re.compile(
+    r'(\d+)\s*(秒|分钟|分|小时|时|天|日|周|星期|个月|月|年|second|minute|hour|day|week|month|year)s?\s*(?:前|ago)', re.I)
+DAY_WORD_RE = re.compile(r'(刚刚|just now|今天|today|昨天|yesterday|前天)\s*(?:(\d{1,2}):(\d{2}))?', re.I)
+DAY_OFFSETS = {'今天': 0, 'today': 0, '昨天': 1, 'yesterday': 1, '前天': 2}
+# 按顺序尝试的绝对日期片段：(正则, 是否带年份)
+DATE_RES = (
+    (re.compile(r'(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})日?(?:\s*(\d{1,2}):(\d{2})(?::(\d{2}))?)?'), True),
+    (re.compile(r'(?<!\d)(\d{1,2})[-/月](\d{1,2})日?(?:\s*(\d{1,2}):(\d{2}))?(?!\d)'), False),
+)
+
+def parse_relative(text: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """解析 "3分钟前"、"2 hours ago"、"昨天 12:30"、"刚刚"；无法识别返回 None"""
+    now = now or datetime.now()
+    match = RELATIVE_RE.search(text)
+    if match:
+        return now - timedelta(seconds=int(match.group(1)) * UNIT_SECONDS[match.group(2).lower()])
+    match = DAY_WORD_RE.search(text)
+    if match:
+        word = match.group(1).lower()
+        if word in ('刚刚', 'just now'):
+            return now
+        day = now - timedelta(days=DAY_OFFSETS[word])
+        if match.group(2):
+            return day.replace(hour=int(match.group(2)), minute=int(match.group(3)), second=0, microsecond=0)
+        return day.replace(hour=0, minute=0, second=0, microsecond=0)
+    return None
+
+def parse_date(text: Optional[str], formats: Iterable[str] = (), now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    从页面文本中解析发布时间
+
+    依次尝试：指定的 strptime 格式 (整段匹配)、相对时间、文本中的绝对日期片段。
+    缺少年份的 "11-20" 补当前年份，若因此落在未来则视为去年。
+
+    Args:
+        text: 时间文本，允许带 "发布于"、"编辑于" 等前后缀
+        formats: 额外的 strptime 格式，优先于内置规则
+        now: 基准时间 (测试用)
+
+    Returns:
+        解析结果，无法识别时返回 None
+    """
+    if not text:
+        return None
+    text = ' '.join(text.split())
+    now = now or datetime.now()
+
+    for fmt in (*formats, *DEFAULT_FORMATS):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+
+    relative = parse_relative(text, now)
+    if relative is not None:
+        return relative
+
+    for pattern, has_year in DATE_RES:
+        match = pattern.search(text)
+        if not match:
+            continue
+        parts = [int(p) if p else 0 for p in match.groups()]
+        if not has_year:
+            parts.insert(0, now.year)
+        try:
+            value = datetime(*parts[:6])
+        except ValueError:
+            continue
+        if not has_year and value > now:
+            value = value.replace(year=now.year - 1)
+        return value
+    return None
@@ -0,0 +1,259 @@
+"""AI 字段回填 - 重新分析缺少 AI 结果或分析失败的条目
+
+未配置 Key 时入库的条目 (ai_summary='未配置 AI Key') 以及调用失败的条目 ('分析失败'/'AI 服务暂时不可用')
+ai_score 为 0，会一直被 feed 过滤。回填作业：
+
+- 按 id 升序 keyset 分页选取这些条目，只处理开始时已存在的条目 (max_id)
+- 每批在线程池中并发分析 (经过本地预筛，复用 scraper_service.analyze_item)，API 调用受速率限制
+- 每批完成后把进度原子写入检查点文件，崩溃或中断后从上一批之后继续；
+  中断的那一批会整批重做，已成功的条目不再满足筛选条件，重做只涉及仍失败的条目
+- 低优先级：抓取任务队列 (本地 TaskQueue 或共享队列) 有积压时暂停，不与实时抓取争抢；
+  以独立进程运行且使用本地队列时，从界面进程的任务日志 (TASK_JOURNAL_PATH) 读取积压，
+  任务日志关闭时无法得知积压，不会让路
+
+用法: python -m app backfill [--restart] [--batch-size 50] [--workers 2] [--rate 30]
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+from app.database import crud
+from app.database.models import ScrapedItem
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Checkpoint:
+    """回填进度 (JSON 文件)"""
+    last_id: int = 0          # 已完成批次中的最大条目 id
+    max_id: int = 0           # 本轮开始时的最大条目 id，之后入库的条目不在本轮范围内
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: str) -> 'Checkpoint':
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            logger.warning(f'回填检查点无法读取，从头开始: {e}')
+            return cls()
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(asdict(self), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+class RateLimiter:
+    """按固定间隔放行的速率限制 (多线程共享)"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self, stop: threading.Event) -> bool:
+        """等待下一个调用时间；等待期间被停止时返回 False"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        return not stop.wait(slot - now) if slot > now else not stop.is_set()
+
+def live_backlog() -> int:
+    """实时抓取任务的积压数"""
+    if settings.QUEUE_BACKEND == 'local':
+        from app.core import task_queue
+        if task_queue.workers:
+            return task_queue.pending()
+        # 独立进程 (python -m app backfill)：本进程的队列为空，抓取在界面进程中进行
+        if settings.TASK_JOURNAL_ENABLED:
+            from app.core.task_journal import unfinished_count
+            max_age = settings.TASK_TIMEOUT + 2 * settings.WATCHDOG_GRACE if settings.TASK_TIMEOUT else None
+            return unfinished_count(settings.TASK_JOURNAL_PATH, max_age)
+        return 0
+    from app.core.work_queue import shared_queue
+    return shared_queue().size()
+
+class AIBackfill:
+    """AI 回填作业 - 单例模式；同一时间只运行一轮"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AIBackfill, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._stop = threading.Event()
+            cls._instance._thread = None
+            cls._instance._running = False
+            cls._instance.checkpoint = None
+        return cls._instance
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self, **kwargs) -> bool:
+        """在后台线程中运行；已在运行时返回 False"""
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run_thread, kwargs=kwargs, daemon=True, name='AIBackfill')
+            self._thread.start()
+            return True
+
+    def _run_thread(self, **kwargs):
+        try:
+            self._run(**kwargs)
+        except Exception as e:
+            logger.error(f'AI 回填异常退出: {e}')
+        finally:
+            self._running = False
+
+    def run(self, **kwargs) -> Checkpoint:
+        """在当前线程中运行到完成或被 stop() 中断"""
+        with self._lock:
+            if self._running:
+                raise RuntimeError('AI 回填已在运行')
+            self._running = True
+            self._stop.clear()
+        try:
+            return self._run(**kwargs)
+        finally:
+            self._running = False
+
+    def stop(self, timeout: Optional[float] = None):
+        """请求停止：正在进行的调用完成后退出，未完成的批次不推进检查点"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def status(self) -> dict:
+        checkpoint = self.checkpoint or Checkpoint.load(settings.AI_BACKFILL_CHECKPOINT)
+        return {'running': self._running, **asdict(checkpoint)}
+
+    def _run(self, restart: bool = False, batch_size: Optional[int] = None, workers: Optional[int] = None,
+             rate: Optional[float] = None, yield_to_live: bool = True) -> Checkpoint:
+        if not os.getenv('DEEPSEEK_API_KEY'):
+            raise ValueError('未配置 DEEPSEEK_API_KEY，无法回填')
+        path = settings.AI_BACKFILL_CHECKPOINT
+        batch_size = batch_size or settings.AI_BACKFILL_BATCH_SIZE
+        workers = workers or settings.AI_BACKFILL_WORKERS
+        limiter = RateLimiter(settings.AI_BACKFILL_RATE if rate is None else rate)
+
+        checkpoint = Checkpoint.load(path)
+        if restart or checkpoint.finished_at:
+            checkpoint = Checkpoint()
+        if not checkpoint.started_at:
+            checkpoint.max_id = crud.get_max_item_id()
+            checkpoint.started_at = datetime.now().isoformat(timespec='seconds')
+            checkpoint.save(path)
+            logger.info(f'AI 回填开始: 条目 id <= {checkpoint.max_id}')
+        else:
+            logger.info(f'AI 回填从检查点继续: id > {checkpoint.last_id} (已处理 {checkpoint.processed})')
+        self.checkpoint = checkpoint
+
+        def analyze(row) -> Optional[bool]:
+            if yield_to_live and not self._wait_for_idle():
+                return None
+            if not limiter.acquire(self._stop):
+                return None
+            return self._analyze_row(row)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='Backfill') as executor:
+            while not self._stop.is_set():
+                rows = crud.get_items_needing_analysis(checkpoint.last_id, batch_size, checkpoint.max_id)
+                if not rows:
+                    checkpoint.finished_at = datetime.now().isoformat(timespec='seconds')
+                    checkpoint.save(path)
+                    logger.info(f'AI 回填完成: 成功 {checkpoint.succeeded}，失败 {checkpoint.failed}')
+                    break
+                results = list(executor.map(analyze, rows))
+                if None in results:
+                    break  # 被中断：本批不推进，下次整批重做
+                checkpoint.last_id = rows[-1].id
+                checkpoint.processed += len(results)
+                checkpoint.succeeded += sum(results)
+                checkpoint.failed += len(results) - sum(results)
+                checkpoint.save(path)
+                logger.info(f'AI 回填进度: id {checkpoint.last_id}/{checkpoint.max_id}，'
+                            f'成功 {checkpoint.succeeded}，失败 {checkpoint.failed}')
+        return checkpoint
+
+    def _wait_for_idle(self) -> bool:
+        """实时抓取有积压时等待；被停止时返回 False"""
+        waited = False
+        while live_backlog() > 0:
+            if not waited:
+                logger.info('抓取任务有积压，AI 回填暂停让路')
+                waited = True
+            if self._stop.wait(settings.AI_BACKFILL_YIELD_INTERVAL):
+                return False
+        return not self._stop.is_set()
+
+    def _analyze_row(self, row) -> bool:
+        """分析一个条目并写回；仍然失败时不写库"""
+        from app.services.scraper_service import analyze_item
+        item = ScrapedItem(title=row.title, url='', content=crud.get_item_content(row.id) or '',
+                           transcript_key=row.transcript_key)
+        try:
+            analyze_item(item, row.platform)
+        except Exception as e:
+            logger.warning(f'AI 回填失败 [条目ID={row.id}]: {e}')
+            return False
+        if item.ai_summary in crud.AI_FAILED_SUMMARIES:
+            return False
+        crud.update_item_analysis(row.id, ai_summary=item.ai_summary, sentiment=item.sentiment,
+                                  ai_score=item.ai_score, risk_level=item.risk_level, ai_source=item.ai_source)
+        return True
+
+# 全局实例
+ai_backfill = AIBackfill()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app backfill', description='重新分析缺少 AI 结果或分析失败的条目')
+    parser.add_argument('--restart', action='store_true', help='忽略检查点，从头开始')
+    parser.add_argument('--batch-size', type=int, help='每批条目数 (默认 AI_BACKFILL_BATCH_SIZE)')
+    parser.add_argument('--workers', type=int, help='并发分析数 (默认 AI_BACKFILL_WORKERS)')
+    parser.add_argument('--rate', type=float, help='每分钟最多调用次数 (默认 AI_BACKFILL_RATE)')
+    parser.add_argument('--no-yield', action='store_true', help='不为抓取任务让路 (单独运行时使用)')
+    args = parser.parse_args(argv)
+
+    from app.core.log_buffer import configure_logging
+    from app.database import create_db_and_tables
+    configure_logging()
+    create_db_and_tables()
+    if not args.no_yield and settings.QUEUE_BACKEND == 'local' and not settings.TASK_JOURNAL_ENABLED:
+        logger.warning('本地队列未启用任务日志 (TASK_JOURNAL_ENABLED)，无法得知界面进程的抓取积压，回填不会让路')
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: ai_backfill.stop())
+    try:
+        checkpoint = ai_backfill.run(restart=args.restart, batch_size=args.batch_size, workers=args.workers,
+                                     rate=args.rate, yield_to_live=not args.no_yield)
+    except ValueError as e:
+        print(e)
+        return 1
+    state = '完成' if checkpoint.finished_at else '已中断，再次运行将从检查点继续'
+    print(f'{state}: 处理 {checkpoint.processed}，成功 {checkpoint.succeeded}，失败 {checkpoint.failed}')
+    return 0
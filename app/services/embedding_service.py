@@ -0,0 +1,282 @@
+"""文本向量、事件聚类与相关条目
+
+同一热点常被多个源转载，URL 去重无法识别。条目入库后在单线程中依次处理 (聚类依赖入库顺序)：
+1. 标题 + AI 摘要 + 正文前 EMBEDDING_TEXT_CHARS 字向量化，写入 VectorStore 的第 id 行
+2. 在最近 EMBEDDING_CLUSTER_HOURS 小时入库的条目中 (id 连续区间，暴力检索) 找最相似的一条，
+   相似度不低于 EMBEDDING_CLUSTER_THRESHOLD 时并入其事件 (cluster_id)；feed 中同一事件只保留最新一条
+3. 在全部向量中检索 EMBEDDING_RELATED_K 条相关条目 (向量数达到 EMBEDDING_IVF_MIN_VECTORS 后改用 IVF 索引)，
+   写入 ScrapedItem.related 并重新渲染 feed_html
+
+向量文件只有一个写入进程：UI 节点 (item_watcher 轮询新条目后提交，不论条目由哪个进程入库)。
+
+向量后端见 app/ai/embeddings.py，存储与检索见 app/ai/vector_store.py，均按需导入 (依赖 numpy)。
+
+用法: python -m app embeddings rebuild [--related 500] | stats
+"""
+import argparse
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.database import crud
+
+logger = logging.getLogger(__name__)
+
+IVF_REBUILD_RATIO = 0.2  # 建索引后新增向量超过该比例时重建
+RELATED_OVERFETCH = 4    # 相关条目要经过 feed 过滤，多取几倍候选
+
+def embedding_text(title: str, ai_summary: Optional[str], content: Optional[str]) -> str:
+    """参与向量化的文本；分析失败的占位摘要不计入"""
+    parts = [title or '']
+    if ai_summary and ai_summary not in crud.AI_FAILED_SUMMARIES:
+        parts.append(ai_summary)
+    parts.append((content or '')[:settings.EMBEDDING_TEXT_CHARS])
+    return '\n'.join(parts)
+
+class EmbeddingService:
+    """向量服务 - 单例模式；后端、向量文件与线程在首次使用时创建"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EmbeddingService, cls).__new__(cls)
+            cls._instance._lock = threading.RLock()
+            cls._instance._embedder = None
+            cls._instance._store = None
+            cls._instance._ivf = None
+            cls._instance._executor = None
+            cls._instance._futures = set()
+        return cls._instance
+
+    @property
+    def embedder(self):
+        with self._lock:
+            if self._embedder is None:
+                from app.ai.embeddings import create_embedder
+                self._embedder = create_embedder()
+            return self._embedder
+
+    @property
+    def store(self):
+        with self._lock:
+            if self._store is None:
+                from app.ai.vector_store import VectorStore
+                self._store = VectorStore(settings.EMBEDDING_DIR, self.embedder.dim, self.embedder.name)
+            return self._store
+
+    def reset(self):
+        """关闭向量文件并丢弃后端与索引 (配置变化后或测试中使用)"""
+        self.join()
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+            self._embedder = self._store = self._ivf = None
+
+    def submit(self, item) -> Optional[Future]:
+        """为新入库的条目排队生成向量、聚类和相关条目 (未启用时返回 None)"""
+        if not settings.EMBEDDING_ENABLED:
+            return None
+        text = embedding_text(item.title, item.ai_summary, item.content)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='Embedding')
+            future = self._executor.submit(self._process_safely, item.id, text)
+            self._futures.add(future)
+        future.add_done_callback(self._discard_future)
+        return future
+
+    def _process_safely(self, item_id: int, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.process_item(item_id, text)
+        except ImportError as e:
+            logger.warning(f'向量服务需要 numpy: {e}')
+        except Exception as e:
+            logger.warning(f'向量处理失败 [条目ID={item_id}]: {e}')
+        return None
+
+    def process_item(self, item_id: int, text: str, cluster: bool = True, related: bool = True) -> Dict[str, Any]:
+        """
+        向量化单个条目并写入存储，再聚类和更新相关条目
+
+        Returns:
+            {'cluster_id': 事件 id 或 None, 'related': 相关条目列表}
+        """
+        vector = self.embedder.embed([text])[0]
+        result: Dict[str, Any] = {'cluster_id': None, 'related': []}
+        if not vector.any():
+            return result
+        self.store.put([item_id], vector[None, :])
+        self.store.flush()
+        if cluster:
+            result['cluster_id'] = self.assign_cluster(item_id, vector)
+        if related:
+            result['related'] = self.find_related(item_id, vector)
+            crud.set_item_related(item_id, result['related'])
+        return result
+
+    def assign_cluster(self, item_id: int, vector) -> Optional[int]:
+        """与时间窗口内更早入库的条目比较，足够相似时并入同一事件"""
+        since = datetime.now() - timedelta(hours=settings.EMBEDDING_CLUSTER_HOURS)
+        start = crud.get_first_item_id_since(since)
+        hits = self.store.search(vector, 1, start=start, stop=item_id,
+                                 min_score=settings.EMBEDDING_CLUSTER_THRESHOLD)
+        if not hits:
+            return None
+        return crud.join_cluster(item_id, hits[0][0])
+
+    def find_related(self, item_id: int, vector) -> List[Dict[str, Any]]:
+        """最相似且会出现在 feed 中的条目 [{'id', 'title', 'url'}]，同一 URL/标题只保留一条"""
+        k = settings.EMBEDDING_RELATED_K
+        if k <= 0:
+            return []
+        hits = self.search(vector, k * RELATED_OVERFETCH, min_score=settings.EMBEDDING_RELATED_MIN,
+                           exclude=[item_id])
+        related, seen = [], set()
+        for row in crud.get_item_links([i for i, _ in hits]):
+            if row.url in seen or row.title in seen:
+                continue
+            seen.update((row.url, row.title))
+            related.append({'id': row.id, 'title': row.title, 'url': row.url})
+            if len(related) >= k:
+                break
+        return related
+
+    def search(self, vector, k: int = 10, min_score: float = -1.0, exclude=()) -> list:
+        """在全部向量中检索 [(id, 相似度)]；向量较多时使用 IVF 索引"""
+        index = self._index()
+        if index is None:
+            return self.store.search(vector, k, min_score=min_score, exclude=exclude)
+        return index.search(vector, k, min_score=min_score, exclude=exclude)
+
+    def search_text(self, text: str, k: int = 10) -> list:
+        return self.search(self.embedder.embed([text])[0], k)
+
+    def _index(self):
+        store = self.store
+        if store.rows < settings.EMBEDDING_IVF_MIN_VECTORS:
+            return None
+        with self._lock:
+            if self._ivf is None or self._ivf.stale_ratio() > IVF_REBUILD_RATIO:
+                from app.ai.vector_store import IVFIndex
+                ivf = IVFIndex(store, nprobe=settings.EMBEDDING_IVF_NPROBE)
+                ivf.build()
+                logger.info(f'IVF 索引已重建: {ivf.size} 个向量，{len(ivf.lists)} 个簇')
+                self._ivf = ivf
+            return self._ivf
+
+    def rebuild(self, batch_size: int = 256, related_recent: int = 500, cluster: bool = True) -> Dict[str, int]:
+        """
+        为全部条目重新生成向量 (更换后端或首次启用时)，再为尚未归入事件的条目聚类、
+        为最近 related_recent 个条目更新相关内容
+
+        Returns:
+            {'embedded', 'clustered', 'related'}
+        """
+        self.join()
+        stats = {'embedded': 0, 'clustered': 0, 'related': 0}
+        unclustered: List[int] = []
+        last_id = 0
+        while True:
+            rows = crud.get_items_for_embedding(last_id, batch_size)
+            if not rows:
+                break
+            vectors = self.embedder.embed([embedding_text(r.title, r.ai_summary, r.content) for r in rows])
+            present = vectors.any(axis=1)
+            self.store.put([r.id for r in rows], vectors)
+            unclustered.extend(r.id for r, ok in zip(rows, present) if ok and r.cluster_id is None)
+            stats['embedded'] += int(present.sum())
+            last_id = rows[-1].id
+        self.store.flush()
+        with self._lock:
+            self._ivf = None
+
+        if cluster:
+            for item_id in unclustered:
+                if self.assign_cluster(item_id, self.store.get([item_id])[0]) is not None:
+                    stats['clustered'] += 1
+        if related_recent > 0:
+            max_id = crud.get_max_item_id()
+            for item_id in range(max(1, max_id - related_recent + 1), max_id + 1):
+                vector = self.store.get([item_id])[0]
+                if vector.any():
+                    crud.set_item_related(item_id, self.find_related(item_id, vector))
+                    stats['related'] += 1
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        store = self.store
+        size = os.path.getsize(store.path) if os.path.exists(store.path) else 0
+        return {
+            'backend': store.backend,
+            'dim': store.dim,
+            'vectors': store.count(),
+            'file_mb': round(size / 1024 / 1024, 1),
+            'ivf': store.rows >= settings.EMBEDDING_IVF_MIN_VECTORS,
+        }
+
+    def _discard_future(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待排队中的条目处理完成
+
+        Returns:
+            是否全部完成
+        """
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待排队中的条目 (最多 timeout 秒)，然后关闭线程池并落盘向量文件
+
+        未处理的条目可在之后用 `python -m app embeddings rebuild` 补齐。
+
+        Returns:
+            是否全部完成
+        """
+        finished = self.join(timeout)
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._store is not None:
+                self._store.flush()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return finished
+
+# 全局实例
+embedding_service = EmbeddingService()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app embeddings', description='文本向量、事件聚类与相关条目')
+    parser.add_argument('action', choices=('rebuild', 'stats'))
+    parser.add_argument('--batch-size', type=int, default=256, help='每批向量化的条目数')
+    parser.add_argument('--related', type=int, default=500, help='rebuild 时为最近 N 个条目更新相关内容')
+    parser.add_argument('--no-cluster', action='store_true', help='rebuild 时不聚类')
+    args = parser.parse_args(argv)
+
+    from app.core.log_buffer import configure_logging
+    from app.database import create_db_and_tables
+    configure_logging()
+    create_db_and_tables()
+    try:
+        if args.action == 'rebuild':
+            stats = embedding_service.rebuild(args.batch_size, args.related, cluster=not args.no_cluster)
+            print(f"向量化 {stats['embedded']} 个条目，新归入事件 {stats['clustered']} 个，"
+                  f"更新相关内容 {stats['related']} 个")
+        stats = embedding_service.stats()
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"后端 {stats['backend']} ({stats['dim']} 维)，向量 {stats['vectors']} 个，"
+          f"文件 {stats['file_mb']} MB，{'IVF 索引' if stats['ivf'] else '暴力检索'}")
+    embedding_service.reset()
+    return 0
@@ -0,0 +1,407 @@
+"""图片管线 - 为新条目生成本地 WebP 缩略图，feed 通过 /img/<digest> 引用
+
+图床普遍有防盗链，阅读器直接加载原图经常失败。条目入库后在线程池中异步处理：
+1. 取 ScrapedItem.images 的前 IMAGE_MAX_PER_ITEM 个地址，用共享连接池的 Session 拉取，Referer 为条目页面
+2. 解码并计算 64 位 dHash；与本条目已选图片重复的丢弃，与缓存中已有图片重复的直接复用其缩略图
+3. 缩放为长边 IMAGE_THUMB_SIZE 的 WebP，以内容 SHA-1 为名写入 ImageCache (超出磁盘预算按 LRU 淘汰)
+4. 保存 ImageAsset，把摘要写入 ScrapedItem.thumbnails 并重新渲染 feed_html
+
+/img/<digest> 的文件已被淘汰时，按 ImageAsset 中记录的原地址重新生成。
+解码/缩放/编码使用 OpenCV，按需导入。
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import requests
+
+from app.config import settings
+from app.core.http import pooled_session
+from app.database import crud
+from app.database.models import ImageAsset
+
+logger = logging.getLogger(__name__)
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{40}$')
+FETCH_HEADERS = {'Accept': 'image/avif,image/webp,image/*,*/*;q=0.8'}
+CHUNK_SIZE = 64 * 1024
+
+def image_urls(images: Optional[str], limit: int) -> List[str]:
+    """解析 ScrapedItem.images (逗号分隔或 JSON 列表)，返回前 limit 个 http(s) 地址"""
+    if not images:
+        return []
+    images = images.strip()
+    if images.startswith('['):
+        try:
+            candidates = [str(u) for u in json.loads(images)]
+        except ValueError:
+            candidates = []
+    else:
+        candidates = images.split(',')
+    urls = []
+    for url in candidates:
+        url = url.strip()
+        if url.startswith('//'):
+            url = 'https:' + url
+        if url.startswith(('http://', 'https://')) and url not in urls:
+            urls.append(url)
+    return urls[:limit]
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+# ===== 图像处理 (OpenCV) =====
+
+def decode_image(data: bytes):
+    """解码为 BGR 数组；无法识别的格式抛出 ValueError"""
+    import cv2
+    import numpy as np
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError('无法解码的图片')
+    return image
+
+def dhash(image) -> int:
+    """
+    64 位差值哈希：灰度缩放到 9x8，比较水平相邻像素
+
+    对缩放、重新压缩、轻微调色不敏感，用于识别不同尺寸/画质的同一张图。
+    """
+    import cv2
+    import numpy as np
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = np.packbits((small[:, 1:] > small[:, :-1]).flatten())
+    return int.from_bytes(bits.tobytes(), 'big')
+
+def make_thumbnail(image, size: int, quality: int) -> Tuple[bytes, int, int]:
+    """
+    缩放 (只缩小) 并编码为 WebP
+
+    Returns:
+        (WebP 数据, 宽, 高)
+    """
+    import cv2
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    if scale < 1:
+        width, height = max(1, round(width * scale)), max(1, round(height * scale))
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode('.webp', image, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    if not ok:
+        raise ValueError('WebP 编码失败')
+    return buffer.tobytes(), width, height
+
+# ===== 缓存 =====
+
+class ImageCache:
+    """
+    内容寻址的缩略图目录 <root>/<digest 前两位>/<digest>.webp
+
+    以文件 mtime 作为最近访问时间，总大小超过 max_bytes 时从最久未访问的文件开始删除，
+    直到降到预算的 90%。
+    """
+    SUFFIX = '.webp'
+    TOUCH_INTERVAL = 3600  # 访问时最多每小时更新一次 mtime，避免每次请求都写元数据
+    LOW_WATERMARK = 0.9
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f'{digest}{self.SUFFIX}'
+
+    def get(self, digest: str) -> Optional[Path]:
+        """命中时刷新访问时间并返回路径"""
+        path = self.path(digest)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        if time.time() - mtime > self.TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    def put(self, digest: str, data: bytes) -> Path:
+        """写入缩略图 (临时文件 + 原子替换)；必要时淘汰旧文件"""
+        path = self.path(digest)
+        if path.exists():
+            os.utime(path)
+            return path
+        with self._lock:
+            self._total_locked()  # 写入前完成首次扫描，避免新文件被重复计入
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data)
+            total = self._total
+        if total > self.max_bytes:
+            self.evict(keep=digest)
+        return path
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._total_locked()
+
+    def _total_locked(self) -> int:
+        if self._total is None:
+            self._total = sum(size for _, size, _ in self._scan())
+        return self._total
+
+    def _scan(self) -> List[Tuple[float, int, Path]]:
+        files = []
+        if not self.root.is_dir():
+            return files
+        for directory in os.scandir(self.root):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                if entry.name.endswith(self.SUFFIX):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        return files
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        按最近访问时间淘汰，直到总大小降到预算的 LOW_WATERMARK
+
+        Returns:
+            删除的文件数
+        """
+        with self._lock:
+            files = sorted(self._scan())
+            total = sum(size for _, size, _ in files)
+            target = self.max_bytes * self.LOW_WATERMARK
+            removed = 0
+            for _, size, path in files:
+                if total <= target:
+                    break
+                if keep and path.name.startswith(keep):
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._total = total
+        if removed:
+            logger.info(f'图片缓存淘汰 {removed} 个文件，当前 {total / 1024 / 1024:.1f} MB')
+        return removed
+
+class DhashIndex:
+    """缓存中所有缩略图的感知哈希，用 numpy 批量异或 + popcount 查找近似重复"""
+
+    def __init__(self, entries: List[Tuple[str, int]] = ()):
+        self._lock = threading.Lock()
+        self._digests = [digest for digest, _ in entries]
+        self._values = [value for _, value in entries]
+        self._array = None
+
+    def __len__(self):
+        return len(self._digests)
+
+    def add(self, digest: str, value: int):
+        with self._lock:
+            self._digests.append(digest)
+            self._values.append(value)
+            self._array = None
+
+    def find(self, value: int, max_distance: int) -> Optional[str]:
+        """返回海明距离最近且不超过 max_distance 的摘要"""
+        import numpy as np
+        with self._lock:
+            if not self._digests:
+                return None
+            if self._array is None:
+                self._array = np.array(self._values, dtype=np.uint64)
+            xor = self._array ^ np.uint64(value)
+            distances = np.unpackbits(xor.view(np.uint8)).reshape(len(xor), 64).sum(axis=1)
+            best = int(distances.argmin())
+            return self._digests[best] if distances[best] <= max_distance else None
+
+# ===== 管线 =====
+
+class ImagePipeline:
+    """图片管线 - 单例模式；缓存、连接池与线程池在首次使用时创建"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ImagePipeline, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._cache = None
+            cls._instance._session = None
+            cls._instance._executor = None
+            cls._instance._index = None
+            cls._instance._futures = set()
+        return cls._instance
+
+    @property
+    def cache(self) -> ImageCache:
+        with self._lock:
+            if self._cache is None:
+                self._cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_MB * 1024 * 1024)
+            return self._cache
+
+    @property
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = pooled_session(settings.IMAGE_FETCH_WORKERS, FETCH_HEADERS)
+            return self._session
+
+    @property
+    def index(self) -> DhashIndex:
+        with self._lock:
+            if self._index is None:
+                self._index = DhashIndex([(digest, int(value, 16)) for digest, value in crud.get_image_dhashes()])
+            return self._index
+
+    def submit(self, item) -> Optional[Future]:
+        """为新入库的条目排队生成缩略图 (未启用或没有图片时返回 None)"""
+        if not settings.IMAGE_PIPELINE_ENABLED:
+            return None
+        urls = image_urls(item.images, settings.IMAGE_MAX_PER_ITEM)
+        if not urls:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=settings.IMAGE_FETCH_WORKERS,
+                                                    thread_name_prefix='ImagePipeline')
+            future = self._executor.submit(self.process_item, item.id, item.url, urls)
+            self._futures.add(future)
+        future.add_done_callback(self._discard_future)
+        return future
+
+    def process_item(self, item_id: int, referer: str, urls: List[str]) -> List[str]:
+        """依次处理条目的图片，保存缩略图摘要；单张失败不影响其它图片"""
+        digests: List[str] = []
+        seen: List[int] = []
+        for url in urls:
+            try:
+                digest = self.cache_image(url, referer, seen)
+            except ImportError as e:
+                logger.warning(f'图片管线需要 opencv-python: {e}')
+                break
+            except Exception as e:
+                logger.warning(f'图片处理失败 {url}: {e}')
+                continue
+            if digest and digest not in digests:
+                digests.append(digest)
+        if digests:
+            crud.set_item_thumbnails(item_id, digests)
+        return digests
+
+    def cache_image(self, url: str, referer: Optional[str], seen: Optional[List[int]] = None) -> Optional[str]:
+        """
+        拉取并缓存单张图片
+
+        Args:
+            seen: 本条目已选图片的 dHash，与其重复时返回 None
+
+        Returns:
+            缩略图摘要；与缓存中已有图片近似时返回已有摘要
+        """
+        image = decode_image(self.fetch(url, referer))
+        value = dhash(image)
+        distance = settings.IMAGE_DEDUP_DISTANCE
+        if seen is not None:
+            if any(hamming(value, other) <= distance for other in seen):
+                return None
+            seen.append(value)
+
+        existing = self.index.find(value, distance)
+        if existing and self.cache.get(existing):
+            return existing
+
+        data, width, height = make_thumbnail(image, settings.IMAGE_THUMB_SIZE, settings.IMAGE_WEBP_QUALITY)
+        digest = hashlib.sha1(data).hexdigest()
+        self.cache.put(digest, data)
+        crud.save_image_asset(ImageAsset(digest=digest, dhash=f'{value:016x}', url=url, referer=referer,
+                                         width=width, height=height, size=len(data)))
+        self.index.add(digest, value)
+        return digest
+
+    def fetch(self, url: str, referer: Optional[str]) -> bytes:
+        """通过共享连接池拉取原图，超过 IMAGE_MAX_BYTES 时中止"""
+        headers = {'Referer': referer} if referer else {}
+        with self.session.get(url, headers=headers, timeout=settings.IMAGE_FETCH_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            chunks, size = [], 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.IMAGE_MAX_BYTES:
+                    raise ValueError(f'图片超过 {settings.IMAGE_MAX_BYTES} 字节')
+                chunks.append(chunk)
+        return b''.join(chunks)
+
+    def lookup(self, digest: str) -> Optional[Path]:
+        """
+        /img 路由：返回缩略图文件路径
+
+        文件已被淘汰时按原地址重新生成，并仍以请求的摘要保存 (feed 中的地址保持有效)。
+        """
+        if not DIGEST_RE.match(digest):
+            return None
+        path = self.cache.get(digest)
+        if path is not None:
+            return path
+        asset = crud.get_image_asset(digest)
+        if asset is None:
+            return None
+        try:
+            image = decode_image(self.fetch(asset.url, asset.referer))
+            data, _, _ = make_thumbnail(image, settings.IMAGE_THUMB_SIZE, settings.IMAGE_WEBP_QUALITY)
+        except Exception as e:
+            logger.warning(f'重新生成缩略图失败 {asset.url}: {e}')
+            return None
+        return self.cache.put(digest, data)
+
+    def _discard_future(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待进行中的图片任务完成
+
+        Returns:
+            是否全部完成
+        """
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待进行中的图片任务 (最多 timeout 秒)，然后关闭线程池并取消尚未开始的任务
+
+        Returns:
+            是否全部完成
+        """
+        finished = self.join(timeout)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return finished
+
+# 全局实例
+image_pipeline = ImagePipeline()
@@ -0,0 +1,96 @@
+"""新条目轮询 - 把任意进程写入的条目转为本进程的 ITEM_CREATED 事件
+
+条目可能由 UI 节点、独立调度进程 (本地队列) 或 worker (共享队列) 入库，事件总线是进程内的；
+这里按 id 轮询数据库，为新条目发布事件，仪表盘实时刷新和 WebSub 推送不关心条目由谁写入。
+
+- UI 节点始终运行 (start(embed=True))，并且是唯一的向量写入方：persist_item 不生成向量
+- WEBSUB_PUSH_ROLE=serve-feed 时 feed 服务也运行一份 (不生成向量)，只用于推送
+
+本进程入库时 persist_item 调用 wake() 立即轮询，不必等待下一个间隔；
+事件只由轮询发布一次，不会与 persist_item 重复。
+"""
+import logging
+import threading
+from typing import Optional
+
+from app.config import settings
+from app.core import event_bus, ITEM_CREATED
+from app.core.events import item_payload
+from app.database.crud import get_items_after, get_items_for_embedding, get_max_item_id
+from app.services.embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+POLL_BATCH = 100
+
+class ItemWatcher:
+    """新条目轮询器 - 单例模式"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ItemWatcher, cls).__new__(cls)
+            cls._instance.last_id = 0
+            cls._instance.embed = False  # 是否为新条目生成向量 (只在 UI 节点开启)
+            cls._instance._stop = threading.Event()
+            cls._instance._wake = threading.Event()
+            cls._instance._thread = None
+        return cls._instance
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None, embed: bool = False):
+        """从当前最大 id 开始轮询 (启动前已有的条目不补发)"""
+        if self.running:
+            return
+        self.embed = embed
+        self.last_id = get_max_item_id()
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval or settings.ITEM_POLL_INTERVAL,),
+                                        daemon=True, name="ItemWatcher")
+        self._thread.start()
+        logger.info(f"新条目轮询已启动 (从 #{self.last_id} 开始)")
+
+    def wake(self):
+        """本进程写入了新条目，立即轮询"""
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def poll(self) -> int:
+        """发布 last_id 之后的新条目，返回发布数量"""
+        published = 0
+        while True:
+            after_id = self.last_id
+            rows = get_items_after(after_id, limit=POLL_BATCH)
+            for row in rows:
+                event_bus.publish(ITEM_CREATED, item_payload(row))
+                self.last_id = row.id
+            if rows and self.embed:
+                for row in get_items_for_embedding(after_id, len(rows)):
+                    embedding_service.submit(row)
+            published += len(rows)
+            if len(rows) < POLL_BATCH:
+                return published
+
+    def _run(self, interval: float):
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"轮询新条目失败: {e}")
+
+# 全局实例
+item_watcher = ItemWatcher()
@@ -1,12 +1,29 @@
 import logging
 import os
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 from sqlmodel import Session, select
+from app.config import settings
 from app.database import engine
-from app.database.models import Source, ScrapedItem
-from app.database.crud import update_source_last_scraped
-from app.scraper.strategies import BilibiliScraper, XiaohongshuScraper, XiaoheiheScraper, CoolAPKScraper
-from app.ai.client import AIProcessor
-from app.core import task_queue
+from app.database.models import Source, ScrapedItem, SourceCheck
+from app.database.crud import (
+    update_source_last_scraped, create_scraped_item, item_exists,
+    get_source_check, record_source_check
+)
+from app.scraper.change_detection import (
+    ChangeCheck, SourceUnchanged, http_probe, UNCHANGED, CHANGED, UNKNOWN
+)
+from app.scraper.registry import strategy_registry  # 策略在首次查询时才导入
+from app.core import task_queue, event_bus, ITEM_CREATED
+from app.core.autoscaler import tab_slots
+from app.scraper.governor import browser_governor
+from app.core.events import item_payload
+from app.core.work_queue import SCRAPE_TASK, shared_queue
+from app.services.image_pipeline import image_pipeline
+from app.services.item_watcher import item_watcher
+from app.services.subtitle_service import subtitle_service
+
+if TYPE_CHECKING:
+    from app.scraper.strategies import BaseScraper
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -23,46 +40,54 @@ def scrape_source(source_id: int):
         # 因为 ScrapedItem 存的是具体的帖子/视频 URL，而 source.url 是列表页/主页 URL
         
         # 选择爬虫
-        if source.platform == 'bilibili':
-            scraper = BilibiliScraper()
-        elif source.platform == 'xiaohongshu':
-            scraper = XiaohongshuScraper()
-        elif source.platform == 'xiaoheihe':
-            scraper = XiaoheiheScraper()
-        elif source.platform == 'coolapk':
-            scraper = CoolAPKScraper()
-        else:
-            logger.error(f'未知的平台类型: {source.platform}')
+        try:
+            scraper = strategy_registry.get(source.platform)
+        except ValueError as e:
+            logger.error(str(e))
             return
+
+        check = None
+        updates = {}
+        if settings.CHANGE_DETECTION_ENABLED:
+            state = get_source_check(source_id)
+            reason, updates = probe_source(source, scraper, state)
+            if reason:
+                skip_source(source_id, reason)
+                return
+            check = ChangeCheck(state.last_seen_url, is_known=item_exists)
         
         try:
-            item = scraper.scrape(source.url)
+            try:
+                # 同一平台的并发抓取数受策略的 max_concurrency 限制，所有平台的标签页总数受自动扩缩容限制；
+                # 租约让浏览器回收等待进行中的抓取结束
+                with strategy_registry.semaphore(source.platform), tab_slots, browser_governor.lease():
+                    item = scraper.scrape(source.url, check)
+            except SourceUnchanged as e:
+                skip_source(source_id, f'第一条未变化 ({e})')
+                return
             item.source_id = source_id
             
             # === 关键修复：入库前检查 item.url 是否已存在 ===
             # 1. 检查无效标题
             if item.title == '无标题':
                 logger.warning(f'⚠️ 抓取失败 (无标题), 跳过入库: {item.url}')
+                record_source_check(source_id, skipped=False)
                 return
 
-            statement = select(ScrapedItem).where(ScrapedItem.url == item.url)
+            statement = select(ScrapedItem.id).where(ScrapedItem.url == item.url)
             existing_item = session.exec(statement).first()
             
-            if existing_item:
+            if existing_item is not None:
                 logger.info(f'⏭️ 内容已存在，跳过入库: {item.title} ({item.url})')
                 # 即使跳过入库，也更新一下源的最后抓取时间
                 update_source_last_scraped(source_id)
+                save_probe_state(source_id, check, updates, item)
                 return
 
             # AI 分析
             if os.getenv("DEEPSEEK_API_KEY"):
                 try:
-                    ai = AIProcessor()
-                    analysis = ai.analyze(item.content)
-                    item.ai_summary = analysis.get('summary', '分析失败')
-                    item.sentiment = analysis.get('sentiment', 'Neutral')
-                    item.ai_score = analysis.get('score', 0)
-                    item.risk_level = analysis.get('risk_level', 'Unknown')
+                    analyze_item(item, source.platform)
                 except Exception as e:
                     logger.error(f'AI 分析异常: {e}')
                     item.ai_summary = 'AI 服务暂时不可用'
@@ -71,27 +96,119 @@ def scrape_source(source_id: int):
                 logger.warning(f'⚠️ 未配置 DEEPSEEK_API_KEY，跳过 AI 分析')
                 item.ai_summary = '未配置 AI Key'
             
-            session.add(item)
-            update_source_last_scraped(source_id)
-            session.commit()
+            persist_item(item)
+            save_probe_state(source_id, check, updates, item)
             
             logger.info(f'✅ 抓取并入库成功: {item.title}')
             
         except Exception as e:
             # 捕获所有异常，防止 crash 导致调度器挂掉
             logger.error(f'❌ 抓取流程异常 [源ID={source_id}]: {str(e)}')
+            if check is not None:
+                record_source_check(source_id, skipped=False)
+
+def analyze_item(item: ScrapedItem, platform: Optional[str] = None):
+    """填充条目的 AI 字段；本地预筛判定为低质量或与已分析条目近似时不调用 API"""
+    decision = None
+    if settings.PREFILTER_ENABLED:
+        from app.ai.prefilter import prefilter  # numpy 按需导入
+        decision = prefilter.decide(item.title, item.content, has_transcript=bool(item.transcript_key))
+
+    if decision is not None and decision.analysis is not None:
+        logger.info(f'🧹 本地预筛 ({decision.action}): {decision.reason} - {item.title}')
+        analysis = decision.analysis
+        item.ai_source = decision.action
+    else:
+        from app.ai.client import AIProcessor  # openai 客户端较重，按需导入
+        text = item.content
+        transcript = subtitle_service.ai_view(item.transcript_key)
+        if transcript:
+            text = f"{text}\n\n=== 视频字幕 (节选) ===\n{transcript}"
+        analysis = AIProcessor().analyze(text, platform)
+        item.ai_source = 'api'
+        if decision is not None:
+            prefilter.remember(item.title, item.content, analysis)
+
+    item.ai_summary = analysis.get('summary', '分析失败')
+    item.sentiment = analysis.get('sentiment', 'Neutral')
+    item.ai_score = analysis.get('score', 0)
+    item.risk_level = analysis.get('risk_level', 'Unknown')
+
+def probe_source(source: Source, scraper: 'BaseScraper', state: SourceCheck) -> Tuple[Optional[str], Dict]:
+    """
+    抓取前的廉价探测
+
+    Returns:
+        (跳过原因, 抓取成功后需保存的探测状态)；跳过原因为 None 表示需要完整抓取
+    """
+    if state.last_seen_url and state.last_seen_url == source.url and item_exists(source.url):
+        # 详情页类数据源：条目就是源本身，已入库后再抓只会命中重复检查
+        return '条目已入库', {}
+    if not state.http_probe or not strategy_registry.info(source.platform).http_fast_path:
+        return None, {}
+
+    probe = http_probe(source.url, state.etag, state.last_modified, state.fingerprint,
+                       link_pattern=scraper.ITEM_LINK_PATTERN)
+    if probe.status == UNCHANGED:
+        return 'HTTP 探测未变化', {}
+    if probe.status == CHANGED:
+        return None, {'etag': probe.etag, 'last_modified': probe.last_modified, 'fingerprint': probe.fingerprint}
+    if probe.status == UNKNOWN:
+        # 该源不提供校验头且列表由前端渲染，之后只用浏览器内探测
+        return None, {'http_probe': False}
+    return None, {}
+
+def save_probe_state(source_id: int, check: Optional[ChangeCheck], updates: Dict, item: ScrapedItem):
+    """条目入库 (或确认已存在) 后才保存探测状态，入库失败时下次仍会完整抓取"""
+    if check is None:
+        return
+    updates['last_seen_url'] = check.first_card_link or item.url
+    record_source_check(source_id, skipped=False, **updates)
+
+def skip_source(source_id: int, reason: str):
+    """记录一次因内容未变化的跳过"""
+    check = record_source_check(source_id, skipped=True)
+    update_source_last_scraped(source_id)
+    logger.info(f'⏭️ 源未变化，跳过抓取 [源ID={source_id}]: {reason} (跳过率 {check.skips}/{check.runs})')
+
+def persist_item(item: ScrapedItem) -> ScrapedItem:
+    """入库并排队生成缩略图
+
+    ITEM_CREATED 事件与向量由 item_watcher 轮询数据库后统一处理 (见 app/services/item_watcher.py)：
+    本进程运行着轮询器时 (UI 节点) 唤醒它立即发布；否则 (调度进程、worker) 只在本进程内发布事件，
+    由 UI 节点轮询到后再处理，向量文件因此只有一个写入方。
+    """
+    item = create_scraped_item(item)
+    update_source_last_scraped(item.source_id)
+    if item_watcher.running:
+        item_watcher.wake()
+    else:
+        event_bus.publish(ITEM_CREATED, item_payload(item))
+    # 缩略图在后台生成，完成后更新 feed_html
+    image_pipeline.submit(item)
+    return item
 
 def scrape_source_async(source_id: int):
-    """异步抓取源（供调度器调用）"""
-    task_queue.add_task(scrape_source, source_id)
+    """异步抓取源（供调度器调用）；配置了共享队列时交给独立 worker 进程执行"""
+    if settings.QUEUE_BACKEND == 'local':
+        task_queue.add_task(scrape_source, source_id)
+        return
+    # 同一个源尚未被执行的任务只保留一个，避免 worker 跟不上时堆积
+    task_id = shared_queue().enqueue(SCRAPE_TASK, {'source_id': source_id},
+                                     dedupe_key=f'{SCRAPE_TASK}:{source_id}')
+    if task_id is None:
+        logger.info(f'源 {source_id} 已有待执行的抓取任务，跳过')
 
 def open_login_browser():
     """打开浏览器进行手动登录"""
     from app.scraper.browser import BrowserManager
     try:
         browser = BrowserManager()
-        tab = browser.get_new_tab()
-        tab.get('https://www.xiaohongshu.com')
+        # 为每个需要登录的平台打开一个标签页
+        for info in strategy_registry.infos():
+            if info.needs_login:
+                tab = browser.get_new_tab()
+                tab.get(f'https://www.{info.domain}')
         logger.info("Browser opened for login.")
     except Exception as e:
         logger.error(f"Failed to open login browser: {e}")
@@ -0,0 +1,225 @@
+"""数据源导入/导出 - OPML / CSV / JSON
+
+导入时先完整解析并校验，再通过 bulk_create_sources 在一个事务中写入，
+最后批量注册定时任务并错开首次执行时间。
+"""
+import csv
+import io
+import json
+import logging
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config import settings
+from app.core import scheduler_manager
+from app.database.crud import bulk_create_sources, get_sources
+from app.database.models import Source
+from app.scraper.registry import strategy_registry
+from app.services.scraper_service import scrape_source_async
+
+logger = logging.getLogger(__name__)
+
+FORMAT_OPML = 'opml'
+FORMAT_CSV = 'csv'
+FORMAT_JSON = 'json'
+FORMATS = (FORMAT_OPML, FORMAT_CSV, FORMAT_JSON)
+
+MEDIA_TYPES = {
+    FORMAT_OPML: 'text/x-opml; charset=utf-8',
+    FORMAT_CSV: 'text/csv; charset=utf-8',
+    FORMAT_JSON: 'application/json; charset=utf-8',
+}
+EXTENSIONS = {'.opml': FORMAT_OPML, '.xml': FORMAT_OPML, '.csv': FORMAT_CSV, '.json': FORMAT_JSON}
+
+CSV_FIELDS = ['name', 'url', 'platform', 'frequency', 'is_active']
+
+MIN_FREQUENCY = 1
+MAX_FREQUENCY = 1440
+JOB_PREFIX = 'scrape_source_'
+
+class ImportResult(NamedTuple):
+    created: int
+    skipped: int
+    errors: List[str]
+
+def detect_format(filename: Optional[str], data: bytes) -> str:
+    """按扩展名判断格式，无法判断时按内容猜测"""
+    name = (filename or '').lower()
+    for extension, fmt in EXTENSIONS.items():
+        if name.endswith(extension):
+            return fmt
+    head = data.lstrip()[:100]
+    if head.startswith(b'<'):
+        return FORMAT_OPML
+    if head[:1] in (b'[', b'{'):
+        return FORMAT_JSON
+    return FORMAT_CSV
+
+def detect_platform(url: str) -> Optional[str]:
+    """根据 URL 域名推断平台 (平台与域名来自策略注册表)"""
+    return strategy_registry.detect_platform(url)
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ('0', 'false', 'no', 'off', 'paused')
+
+def normalize_source(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    校验并补全一条导入记录
+
+    Raises:
+        ValueError: URL/平台/频率不合法
+    """
+    if not isinstance(raw, dict):
+        raise ValueError(f'无效的记录: {raw!r}')
+    url = str(raw.get('url') or '').strip()
+    if urlsplit(url).scheme not in ('http', 'https'):
+        raise ValueError(f'无效的 URL: {url!r}')
+
+    platform = str(raw.get('platform') or '').strip().lower() or detect_platform(url)
+    if platform not in strategy_registry.platforms():
+        raise ValueError(f'不支持的平台: {platform or "未知"} ({url})')
+
+    frequency = raw.get('frequency')
+    try:
+        frequency = int(frequency) if frequency not in (None, '') else settings.DEFAULT_SCRAPE_FREQUENCY
+    except (TypeError, ValueError):
+        raise ValueError(f'无效的抓取频率: {frequency!r} ({url})')
+    frequency = max(MIN_FREQUENCY, min(frequency, MAX_FREQUENCY))
+
+    is_active = raw.get('is_active')
+    return {
+        'name': str(raw.get('name') or '').strip() or urlsplit(url).hostname,
+        'url': url,
+        'platform': platform,
+        'frequency': frequency,
+        'is_active': True if is_active in (None, '') else _parse_bool(is_active),
+    }
+
+def _read_opml(text: str) -> List[Dict[str, Any]]:
+    root = ET.fromstring(text)
+    records = []
+    for outline in root.iter('outline'):
+        url = outline.get('htmlUrl') or outline.get('xmlUrl') or outline.get('url')
+        if not url:
+            continue  # 分类节点
+        records.append({
+            'name': outline.get('title') or outline.get('text'),
+            'url': url,
+            'platform': outline.get('platform'),
+            'frequency': outline.get('frequency'),
+            'is_active': outline.get('active'),
+        })
+    return records
+
+def _read_csv(text: str) -> List[Dict[str, Any]]:
+    return list(csv.DictReader(io.StringIO(text)))
+
+def _read_json(text: str) -> List[Dict[str, Any]]:
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('sources', [])
+    if not isinstance(data, list):
+        raise ValueError('JSON 应为数据源数组或 {"sources": [...]}')
+    return data
+
+READERS = {FORMAT_OPML: _read_opml, FORMAT_CSV: _read_csv, FORMAT_JSON: _read_json}
+
+def parse_sources(data: bytes, fmt: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    解析导入文件
+
+    Returns:
+        (合法记录列表, 错误信息列表)；文件本身无法解析时抛出 ValueError
+    """
+    text = data.decode('utf-8-sig')
+    try:
+        raw_records = READERS[fmt](text)
+    except (ET.ParseError, json.JSONDecodeError, csv.Error) as e:
+        raise ValueError(f'{fmt.upper()} 解析失败: {e}')
+
+    records, errors = [], []
+    for index, raw in enumerate(raw_records, start=1):
+        try:
+            records.append(normalize_source(raw))
+        except ValueError as e:
+            errors.append(f'#{index}: {e}')
+    return records, errors
+
+def schedule_sources(sources: List[Source]) -> int:
+    """为启用的数据源批量注册定时任务 (错开首次执行)"""
+    jobs = [
+        {'job_id': f"{JOB_PREFIX}{s.id}", 'func': scrape_source_async,
+         'minutes': s.frequency, 'kwargs': {'source_id': s.id}}
+        for s in sources if s.is_active
+    ]
+    return scheduler_manager.add_jobs(jobs) if jobs else 0
+
+def sync_source_jobs(sources: List[Source]) -> Tuple[int, int]:
+    """
+    使调度器中的抓取任务与数据库一致：补充新增/频率变化的源，移除已删除/停用的源
+    (独立调度进程定期调用，UI 节点上的增删改无需重启调度进程)
+
+    Returns:
+        (新增或更新的任务数, 移除的任务数)
+    """
+    wanted = {f"{JOB_PREFIX}{s.id}": s for s in sources if s.is_active}
+    jobs = {job.id: job for job in scheduler_manager.get_jobs() if job.id.startswith(JOB_PREFIX)}
+    removed = 0
+    for job_id in jobs.keys() - wanted.keys():
+        scheduler_manager.remove_job(job_id)
+        removed += 1
+    changed = [
+        s for job_id, s in wanted.items()
+        if job_id not in jobs or jobs[job_id].trigger.interval != timedelta(minutes=s.frequency)
+    ]
+    return schedule_sources(changed), removed
+
+def import_sources(data: bytes, filename: Optional[str] = None, fmt: Optional[str] = None,
+                   schedule: bool = True) -> ImportResult:
+    """导入数据源：解析 -> 单事务写入 -> 批量注册任务 (schedule=False 时交给独立调度进程同步)"""
+    fmt = fmt or detect_format(filename, data)
+    records, errors = parse_sources(data, fmt)
+    created, skipped = bulk_create_sources(records)
+    if schedule:
+        schedule_sources(created)
+    logger.info(f"导入数据源 ({fmt}): 新增 {len(created)}，跳过 {skipped}，错误 {len(errors)}")
+    return ImportResult(len(created), skipped, errors)
+
+def _write_opml(sources: List[Source]) -> str:
+    root = ET.Element('opml', version='2.0')
+    head = ET.SubElement(root, 'head')
+    ET.SubElement(head, 'title').text = settings.APP_NAME
+    ET.SubElement(head, 'dateCreated').text = datetime.now().strftime('%a, %d %b %Y %H:%M:%S')
+    body = ET.SubElement(root, 'body')
+    for s in sources:
+        ET.SubElement(body, 'outline', text=s.name, title=s.name, type='link', htmlUrl=s.url,
+                      platform=s.platform, frequency=str(s.frequency), active=str(s.is_active).lower())
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding='unicode')
+
+def _write_csv(sources: List[Source]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for s in sources:
+        writer.writerow({field: getattr(s, field) for field in CSV_FIELDS})
+    return buffer.getvalue()
+
+def _write_json(sources: List[Source]) -> str:
+    return json.dumps({'sources': [{field: getattr(s, field) for field in CSV_FIELDS} for s in sources]},
+                      ensure_ascii=False, indent=2)
+
+WRITERS = {FORMAT_OPML: _write_opml, FORMAT_CSV: _write_csv, FORMAT_JSON: _write_json}
+
+def export_sources(fmt: str) -> Tuple[str, str, str]:
+    """
+    导出全部数据源
+
+    Returns:
+        (文件内容, media type, 文件名)
+    """
+    content = WRITERS[fmt](get_sources())
+    return content, MEDIA_TYPES[fmt], f"sources-{datetime.now():%Y%m%d}.{fmt}"
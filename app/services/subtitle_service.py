@@ -0,0 +1,153 @@
+"""字幕服务 - 标签页关闭后在后台下载字幕，按稳定键缓存并压缩入库
+
+抓取策略只在页面上拿到字幕地址 (SubtitleRef)，把 key 写入 ScrapedItem.transcript_key，
+在释放标签页之后调用 subtitle_service.request(ref)；下载在线程池中用共享连接池完成，
+同一个 key 同时只下载一次，已入库的直接复用。
+
+字幕不再拼进条目正文：AI 分析通过 ai_view() 取首尾节选，等待下载的时间有上限。
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import NamedTuple, Optional
+
+from app.config import settings
+from app.core.http import pooled_session
+from app.database import crud
+
+logger = logging.getLogger(__name__)
+
+class SubtitleRef(NamedTuple):
+    key: str  # 缓存键，例如 bilibili:<cid>；签名参数会变化的字幕地址不适合作为键
+    url: str
+    lang: Optional[str] = None
+
+def parse_bilibili_subtitle(data: dict) -> str:
+    """B 站字幕 JSON ({"body": [{"content": ...}, ...]}) 转为纯文本"""
+    return "\n".join(line.get('content', '') for line in data.get('body', []))
+
+def truncate_transcript(text: str, limit: int) -> str:
+    """保留开头 2/3 与结尾 1/3，中间标注省略的字数"""
+    if len(text) <= limit:
+        return text
+    head = limit * 2 // 3
+    tail = limit - head
+    return f"{text[:head]}\n…（中间省略 {len(text) - limit} 字）…\n{text[-tail:]}"
+
+class SubtitleService:
+    """字幕下载与缓存 - 单例模式；连接池与线程池在首次使用时创建"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SubtitleService, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._session = None
+            cls._instance._executor = None
+            cls._instance._inflight = {}  # key -> Future
+        return cls._instance
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = pooled_session(settings.SUBTITLE_FETCH_WORKERS,
+                                               {'Referer': 'https://www.bilibili.com/'})
+            return self._session
+
+    def request(self, ref: SubtitleRef) -> Future:
+        """
+        排队下载字幕 (已缓存时立即完成)
+
+        Returns:
+            结果为字幕文本的 Future；下载失败时结果为 None
+        """
+        with self._lock:
+            future = self._inflight.get(ref.key)
+            if future is not None:
+                return future
+        text = crud.get_transcript(ref.key)
+        if text is not None:
+            future = Future()
+            future.set_result(text)
+            return future
+        with self._lock:
+            future = self._inflight.get(ref.key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=settings.SUBTITLE_FETCH_WORKERS,
+                                                        thread_name_prefix='Subtitle')
+                future = self._executor.submit(self._download, ref)
+                self._inflight[ref.key] = future
+                future.add_done_callback(lambda _: self._discard(ref.key))
+        return future
+
+    def _download(self, ref: SubtitleRef) -> Optional[str]:
+        try:
+            text = self.fetch(ref)
+        except Exception as e:
+            logger.warning(f'字幕下载失败 {ref.key}: {e}')
+            return None
+        crud.save_transcript(ref.key, ref.url, text, ref.lang)
+        logger.info(f'字幕已缓存 {ref.key} ({len(text)} 字)')
+        return text
+
+    def fetch(self, ref: SubtitleRef) -> str:
+        timeout = (settings.SUBTITLE_CONNECT_TIMEOUT, settings.SUBTITLE_READ_TIMEOUT)
+        response = self.session.get(ref.url, timeout=timeout)
+        response.raise_for_status()
+        return parse_bilibili_subtitle(response.json())
+
+    def _discard(self, key: str):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def get(self, key: str, timeout: Optional[float] = None) -> Optional[str]:
+        """取字幕文本；正在下载时最多等待 timeout 秒"""
+        with self._lock:
+            future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return future.result(timeout=timeout)
+            except Exception:
+                logger.info(f'等待字幕超时，跳过: {key}')
+                return None
+        return crud.get_transcript(key)
+
+    def ai_view(self, key: Optional[str], limit: Optional[int] = None) -> Optional[str]:
+        """提供给 AI 的字幕节选 (首尾保留)"""
+        if not key:
+            return None
+        text = self.get(key, timeout=settings.SUBTITLE_WAIT_TIMEOUT)
+        if not text:
+            return None
+        return truncate_transcript(text, limit or settings.SUBTITLE_AI_CHARS)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待进行中的下载完成
+
+        Returns:
+            是否全部完成
+        """
+        with self._lock:
+            futures = list(self._inflight.values())
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待进行中的下载 (最多 timeout 秒)，然后关闭线程池并取消尚未开始的下载
+
+        Returns:
+            是否全部完成
+        """
+        finished = self.join(timeout)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return finished
+
+# 全局实例
+subtitle_service = SubtitleService()
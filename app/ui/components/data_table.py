@@ -1,6 +1,98 @@
 """增强的数据表格组件 - 透明版"""
 from nicegui import ui
-from typing import List, Dict, Callable, Optional
+from typing import List, Dict, Callable, Optional, Tuple, Any
+
+# fetch_page(cursor, limit, sort_by, descending, search) -> (rows, next_cursor)
+FetchPage = Callable[[Optional[tuple], int, str, bool, Optional[str]], Tuple[List[Dict], Optional[tuple]]]
+
+class TablePager:
+    """
+    服务端分页控制器 (配合 Quasar 虚拟滚动)
+
+    表格只持有已滚动到的若干页；滚动接近末尾时用键集游标加载下一页，
+    排序/过滤变化时从第一页重新加载。refresh() 重新查询已加载的范围，
+    与当前行逐行比较，没有变化时不向客户端发送任何更新。
+    """
+
+    def __init__(self, table: ui.table, fetch_page: FetchPage, page_size: int = 50,
+                 count: Optional[Callable[[Optional[str]], int]] = None):
+        self.table = table
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.count = count
+        self.sort_by = 'id'
+        self.descending = False
+        self.search: Optional[str] = None
+        self.cursor: Optional[tuple] = None
+        self.has_more = True
+
+    def reset(self):
+        """从第一页重新加载"""
+        self.cursor = None
+        self.has_more = True
+        self.table.rows = []
+        self.load_more()
+
+    def load_more(self):
+        """加载下一页并追加到表格"""
+        if not self.has_more:
+            return
+        rows, self.cursor = self.fetch_page(self.cursor, self.page_size, self.sort_by, self.descending, self.search)
+        self.has_more = self.cursor is not None
+        self.table.rows.extend(rows)
+        self._update_pagination()
+        self.table.update()
+
+    def refresh(self) -> bool:
+        """
+        重新查询已加载范围，仅在数据变化时更新表格
+
+        Returns:
+            是否有变化
+        """
+        loaded = max(len(self.table.rows), self.page_size)
+        rows: List[Dict] = []
+        cursor = None
+        while len(rows) < loaded:
+            page, cursor = self.fetch_page(cursor, min(self.page_size, loaded - len(rows)),
+                                           self.sort_by, self.descending, self.search)
+            rows.extend(page)
+            if cursor is None:
+                break
+
+        current = {row['id']: row for row in self.table.rows}
+        if [row['id'] for row in rows] == list(current) and all(current[row['id']] == row for row in rows):
+            return False
+
+        # 保持未变化行的对象不变，只替换变化的行
+        self.table.rows[:] = [current[row['id']] if current.get(row['id']) == row else row for row in rows]
+        self.cursor = cursor
+        self.has_more = cursor is not None
+        self._update_pagination()
+        self.table.update()
+        return True
+
+    def set_search(self, search: Optional[str]):
+        self.search = search or None
+        self.reset()
+
+    def handle_request(self, args: Dict[str, Any]):
+        """处理表头排序 (Quasar request 事件)"""
+        pagination = args.get('pagination') or {}
+        self.sort_by = pagination.get('sortBy') or 'id'
+        self.descending = bool(pagination.get('descending'))
+        self.reset()
+
+    def handle_scroll(self, args: Dict[str, Any]):
+        """虚拟滚动接近已加载末尾时加载下一页"""
+        if args.get('to', 0) >= len(self.table.rows) - 10:
+            self.load_more()
+
+    def _update_pagination(self):
+        total = self.count(self.search) if self.count else len(self.table.rows)
+        self.table.pagination = {
+            'rowsPerPage': 0, 'sortBy': self.sort_by, 'descending': self.descending, 'rowsNumber': total
+        }
 
 def enhanced_table(
     columns: List[Dict],
@@ -8,10 +100,16 @@ def enhanced_table(
     on_edit: Optional[Callable] = None,
     on_delete: Optional[Callable] = None,
     on_action: Optional[Callable] = None,
-    action_label: str = 'ACTION'
+    action_label: str = 'ACTION',
+    fetch_page: Optional[FetchPage] = None,
+    count: Optional[Callable[[Optional[str]], int]] = None,
+    page_size: int = 50
 ):
     """
     透明数据表格 (需放置在 glass_card 中)
+
+    传入 fetch_page 时切换为服务端模式：排序、过滤、分页都在服务端完成，
+    客户端使用虚拟滚动，rows 参数被忽略；返回的表格带有 pager 属性 (TablePager)。
     """
     # 添加操作列
     if on_edit or on_delete or on_action:
@@ -21,14 +119,23 @@ def enhanced_table(
     else:
         columns_with_actions = columns
     
-    table = ui.table(
-        columns=columns_with_actions,
-        rows=rows,
-        row_key='id',
-        pagination=10
-    ).classes('w-full bg-transparent border-none')
-    
-    table.props('flat dark :rows-per-page-options="[10, 20]"')
+    if fetch_page:
+        table = ui.table(
+            columns=columns_with_actions,
+            rows=[],
+            row_key='id',
+            pagination={'rowsPerPage': 0, 'sortBy': 'id', 'descending': False, 'rowsNumber': 0}
+        ).classes('w-full bg-transparent border-none h-[60vh]')
+        table.props('flat dark virtual-scroll :virtual-scroll-item-size="48" :rows-per-page-options="[0]"')
+    else:
+        table = ui.table(
+            columns=columns_with_actions,
+            rows=rows,
+            row_key='id',
+            pagination=10
+        ).classes('w-full bg-transparent border-none')
+        
+        table.props('flat dark :rows-per-page-options="[10, 20]"')
     
     # 自定义表头：修改字体颜色为主题色 66ccff
     table.add_slot('header', r'''
@@ -57,5 +164,12 @@ def enhanced_table(
     if on_edit: table.on('edit', lambda e: on_edit(e.args))
     if on_delete: table.on('delete', lambda e: on_delete(e.args))
     if on_action: table.on('action', lambda e: on_action(e.args))
+
+    if fetch_page:
+        pager = TablePager(table, fetch_page, page_size=page_size, count=count)
+        table.pager = pager
+        table.on('request', lambda e: pager.handle_request(e.args), [['pagination']])
+        table.on('virtual-scroll', lambda e: pager.handle_scroll(e.args), [['to']], throttle=0.2)
+        pager.reset()
     
-    return table
\ No newline at end of file
+    return table
@@ -1,26 +1,59 @@
 """日志查看器组件 - 液态玻璃版"""
 from nicegui import ui
+from collections import deque
 from datetime import datetime
-from typing import List
+from typing import Deque, Optional
 from app.ui.components.glass_card import glass_card
+from app.core.log_buffer import log_buffer, LogRingBuffer
+
+# 霓虹配色 - 适配主题色
+COLOR_MAP = {
+    'DEBUG': 'text-gray-500',
+    'INFO': 'text-[#66ccff] shadow-[0_0_5px_rgba(102,204,255,0.3)]',
+    'WARNING': 'text-yellow-400',
+    'ERROR': 'text-red-400 font-bold shadow-[0_0_8px_rgba(248,113,113,0.4)]',
+    'CRITICAL': 'text-red-400 font-bold shadow-[0_0_8px_rgba(248,113,113,0.4)]',
+}
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+SOURCES = {'ALL': '', 'SCRAPER': 'app.scraper', 'SERVICE': 'app.services', 'CORE': 'app.core', 'AI': 'app.ai'}
 
 class LogViewer:
-    def __init__(self, max_lines: int = 100):
+    """
+    实时日志查看器
+
+    通过定时器从 LogRingBuffer 拉取新日志，只追加新行；
+    超过 max_lines 时删除最旧的行。每次最多渲染 max_batch 行，
+    积压更多时跳到最新位置并提示丢弃数量 (背压)。
+    """
+
+    def __init__(self, max_lines: int = 100, buffer: Optional[LogRingBuffer] = None,
+                 interval: float = 0.5, max_batch: int = 50):
         self.max_lines = max_lines
-        self.logs: List[tuple] = []
+        self.buffer = buffer or log_buffer
+        self.interval = interval
+        self.max_batch = max_batch
+        self.min_level = LEVELS['INFO']
+        self.source_prefix = ''
+        self.last_seq = self.buffer.last_seq
+        self.rows: Deque[ui.element] = deque()
         self.container = None
-    
+
     def create(self):
         # 使用主题色边框
         with glass_card(classes='w-full flex flex-col overflow-hidden p-0 border-t-2 border-t-[#66ccff]/50'):
-            
+
             # Terminal Header
             with ui.row().classes('w-full bg-black/40 px-4 py-2 items-center justify-between border-b border-white/5 backdrop-blur-md'):
                 with ui.row().classes('items-center gap-2'):
                     ui.icon('terminal').classes('text-[#66ccff] text-xs')
                     ui.label('SYSTEM LOGS').classes('text-[10px] font-mono font-bold text-[#66ccff] tracking-widest')
-                
-                ui.button(icon='delete', on_click=self.clear).props('flat round dense size=xs color=grey').classes('opacity-50 hover:opacity-100')
+
+                with ui.row().classes('items-center gap-2'):
+                    ui.select(list(LEVELS), value='INFO', on_change=lambda e: self.set_level(e.value)) \
+                        .props('dense borderless dark options-dense').classes('text-[10px] font-mono w-24')
+                    ui.select(list(SOURCES), value='ALL', on_change=lambda e: self.set_source(e.value)) \
+                        .props('dense borderless dark options-dense').classes('text-[10px] font-mono w-24')
+                    ui.button(icon='delete', on_click=self.clear).props('flat round dense size=xs color=grey').classes('opacity-50 hover:opacity-100')
 
             # Log Content Area
             self.container = ui.column().classes(
@@ -28,35 +61,51 @@ class LogViewer:
             )
             with self.container:
                 ui.label('> System ready.').classes('text-gray-600 italic')
-        
+
+        ui.timer(self.interval, self.poll)
         return self
-    
+
+    def set_level(self, level: str):
+        self.min_level = LEVELS.get(level, LEVELS['INFO'])
+
+    def set_source(self, source: str):
+        self.source_prefix = SOURCES.get(source, '')
+
+    def poll(self):
+        """拉取缓冲区中的新日志并追加到界面"""
+        entries, self.last_seq, dropped = self.buffer.read_since(self.last_seq, limit=self.max_batch)
+        if not self.container or (not entries and not dropped):
+            return
+
+        with self.container:
+            if dropped:
+                self._append_row(datetime.now(), 'WARNING', f'… {dropped} lines skipped (log rate exceeds display)')
+            for entry in entries:
+                if entry.levelno < self.min_level or not entry.source.startswith(self.source_prefix):
+                    continue
+                self._append_row(datetime.fromtimestamp(entry.created), entry.level, f'[{entry.thread}] {entry.message}')
+        self._scroll_to_bottom()
+
     def add_log(self, message: str, level: str = 'INFO'):
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        
-        # 霓虹配色 - 适配主题色
-        color_map = {
-            'INFO': 'text-[#66ccff] shadow-[0_0_5px_rgba(102,204,255,0.3)]',
-            'WARNING': 'text-yellow-400',
-            'ERROR': 'text-red-400 font-bold shadow-[0_0_8px_rgba(248,113,113,0.4)]'
-        }
-        color = color_map.get(level, 'text-gray-300')
-        
-        self.logs.append((timestamp, level, message))
-        if len(self.logs) > self.max_lines:
-            self.logs.pop(0)
-        
+        """直接追加一条界面日志 (不经过 logging)"""
         if self.container:
-            self.container.clear()
             with self.container:
-                for time_str, lvl, msg in self.logs:
-                    with ui.row().classes('gap-3 items-start no-wrap'):
-                        ui.label(time_str).classes('text-gray-600 select-none w-16 shrink-0')
-                        ui.label(lvl).classes(f'{color} w-12 shrink-0 font-bold')
-                        ui.label(msg).classes('text-gray-300 break-all')
-                
-                ui.run_javascript(f'var el = document.querySelector(".q-card__section--vert"); if(el) el.scrollTop = el.scrollHeight;')
-    
+                self._append_row(datetime.now(), level, message)
+            self._scroll_to_bottom()
+
+    def _append_row(self, timestamp: datetime, level: str, message: str):
+        color = COLOR_MAP.get(level, 'text-gray-300')
+        with ui.row().classes('gap-3 items-start no-wrap') as row:
+            ui.label(timestamp.strftime('%H:%M:%S')).classes('text-gray-600 select-none w-16 shrink-0')
+            ui.label(level).classes(f'{color} w-12 shrink-0 font-bold')
+            ui.label(message).classes('text-gray-300 break-all')
+        self.rows.append(row)
+        while len(self.rows) > self.max_lines:
+            self.container.remove(self.rows.popleft())
+
+    def _scroll_to_bottom(self):
+        ui.run_javascript(f'var el = document.getElementById("c{self.container.id}"); if(el) el.scrollTop = el.scrollHeight;')
+
     def clear(self):
-        self.logs.clear()
-        if self.container: self.container.clear()
\ No newline at end of file
+        self.rows.clear()
+        if self.container: self.container.clear()
@@ -266,6 +266,7 @@ def create_sidebar(current_page: str = 'dashboard'):
             menu_items = [
                 ('dashboard', '📊 Dashboard', '/dashboard'),
                 ('sources', '🔗 Sources', '/sources'),
+                ('search', '🔍 Search', '/search'),
                 ('settings', '⚙️ Settings', '/settings'),
             ]
             
@@ -2,5 +2,6 @@
 from app.ui.pages.dashboard import dashboard
 from app.ui.pages.sources import sources
 from app.ui.pages.settings import settings_page
+from app.ui.pages.search import search_page
 
-__all__ = ['dashboard', 'sources', 'settings_page']
+__all__ = ['dashboard', 'sources', 'settings_page', 'search_page']
@@ -2,8 +2,22 @@
 from nicegui import ui
 from app.ui.layout import create_main_layout
 from app.ui.components import stats_card, glass_card, enhanced_table
-from app.database.crud import get_sources, get_scraped_items
-from app.core import scheduler_manager
+from app.database.crud import get_item_summaries, get_item_stats
+from app.core import scheduler_manager, event_bus, ITEM_CREATED
+from app.core.events import drain
+
+RECENT_LIMIT = 10
+
+def activity_row(item) -> dict:
+    """Recent Activities 表格行 (item 为摘要行或 ITEM_CREATED 事件载荷)"""
+    get = item.get if isinstance(item, dict) else lambda key: getattr(item, key)
+    title = get('title')
+    return {
+        'id': get('id'),
+        'title': title[:60] + '...' if len(title) > 60 else title,
+        'sentiment': get('sentiment') or 'Neutral',
+        'created_at': get('created_at').strftime('%H:%M')
+    }
 
 @ui.page('/dashboard')
 def dashboard():
@@ -13,19 +27,14 @@ def dashboard():
         
         # 1. 统计卡片区
         with ui.row().classes('gap-6 mb-8 w-full'):
-            sources = get_sources()
-            items = get_scraped_items(limit=1000)
+            # 聚合统计走 SQL COUNT/GROUP BY + TTL 缓存，不再加载条目
+            stats = get_item_stats()
             jobs = scheduler_manager.get_jobs()
             
-            # 计算今日数据
-            from datetime import date
-            today = date.today()
-            today_items = [i for i in items if i.created_at.date() == today]
-            
             # 修改：更换了更直观的图标，并移除了旧的颜色参数（默认使用主题色）
-            stats_card('Active Sources', len(sources), 'mdi-server-network')
-            stats_card('Total Items', len(items), 'mdi-database')
-            stats_card('Today Scraped', len(today_items), 'mdi-chart-timeline-variant')
+            stats_card('Active Sources', stats['total_sources'], 'mdi-server-network')
+            stats_card('Total Items', stats['total_items'], 'mdi-database')
+            stats_card('Today Scraped', stats['today_items'], 'mdi-chart-timeline-variant')
             stats_card('Scheduled Jobs', len(jobs), 'mdi-robot')
         
         # 2. RSS 引导卡片 (大横幅玻璃)
@@ -54,29 +63,35 @@ def dashboard():
                 ui.label('Recent Activities').classes('text-xl font-bold text-white')
                 ui.button('View All', on_click=lambda: ui.navigate.to('/sources'), color='white').props('flat dense size=sm icon-right=arrow_forward')
 
-            recent_items = get_scraped_items(limit=10)
+            recent_items = get_item_summaries(limit=RECENT_LIMIT)
             
-            if recent_items:
-                columns = [
-                    {'name': 'title', 'label': 'Title', 'field': 'title', 'align': 'left', 'classes': 'font-bold text-gray-100'},
-                    {'name': 'sentiment', 'label': 'Sentiment', 'field': 'sentiment', 'align': 'center', 'classes': 'text-gray-300'},
-                    {'name': 'created_at', 'label': 'Time', 'field': 'created_at', 'align': 'right', 'classes': 'text-gray-400 font-mono'},
-                ]
-                
-                rows = [
-                    {
-                        'id': item.id,
-                        'title': item.title[:60] + '...' if len(item.title) > 60 else item.title,
-                        'sentiment': item.sentiment or 'Neutral',
-                        'created_at': item.created_at.strftime('%H:%M')
-                    }
-                    for item in recent_items
-                ]
-                
-                table = enhanced_table(columns=columns, rows=rows)
-                table.classes('bg-transparent shadow-none border-none')
-            else:
-                ui.label('No content scraped yet.').classes('text-gray-500 italic w-full text-center py-8')
+            columns = [
+                {'name': 'title', 'label': 'Title', 'field': 'title', 'align': 'left', 'classes': 'font-bold text-gray-100'},
+                {'name': 'sentiment', 'label': 'Sentiment', 'field': 'sentiment', 'align': 'center', 'classes': 'text-gray-300'},
+                {'name': 'created_at', 'label': 'Time', 'field': 'created_at', 'align': 'right', 'classes': 'text-gray-400 font-mono'},
+            ]
+            
+            table = enhanced_table(columns=columns, rows=[activity_row(item) for item in recent_items])
+            table.classes('bg-transparent shadow-none border-none')
+            table.set_visibility(bool(recent_items))
+            empty_label = ui.label('No content scraped yet.').classes('text-gray-500 italic w-full text-center py-8')
+            empty_label.set_visibility(not recent_items)
+            
+            # 新条目入库时 (ITEM_CREATED) 由事件总线推入队列，定时器在界面线程中取出并插入表头
+            events, unsubscribe = event_bus.subscribe_queue(ITEM_CREATED, maxsize=RECENT_LIMIT)
+            ui.context.client.on_delete(unsubscribe)
+            
+            def apply_new_items():
+                payloads = drain(events)
+                if not payloads:
+                    return
+                new_rows = [activity_row(p) for p in reversed(payloads)]
+                table.rows = (new_rows + table.rows)[:RECENT_LIMIT]
+                table.update()
+                table.set_visibility(True)
+                empty_label.set_visibility(False)
+            
+            ui.timer(1.0, apply_new_items)
 
         # 4. 底部快速操作栏
         with ui.row().classes('w-full gap-4 mt-8'):
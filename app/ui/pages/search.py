@@ -0,0 +1,61 @@
+"""Search 全文搜索页面 - 液态玻璃版"""
+from urllib.parse import quote
+from nicegui import ui
+from app.ui.layout import create_main_layout
+from app.ui.components import glass_card
+from app.database.crud import search_items
+from app.database.search import RANK_WINDOW
+from app.rss.render import base_url
+
+PAGE_SIZE = 20
+
+@ui.page('/search')
+def search_page(q: str = ''):
+    """搜索页面"""
+    with create_main_layout('search'):
+        ui.label('Search').classes('text-4xl font-bold mb-2 tracking-tight text-white drop-shadow-lg')
+        ui.label('Full-text search over titles, content and AI summaries').classes('text-sm text-gray-400 mb-6 font-light tracking-wider')
+
+        with glass_card(classes='w-full p-4'):
+            with ui.row().classes('w-full items-center gap-3 no-wrap'):
+                ui.icon('search').classes('text-2xl text-[#66ccff]')
+                query_input = ui.input(placeholder='关键词，空格分隔多个词', value=q).props(
+                    'borderless dense input-class="text-white text-lg"'
+                ).classes('flex-1')
+                feed_link = ui.link('', '#', new_tab=True).classes('text-xs font-mono text-[#66ccff] no-underline')
+
+        ui.label(
+            f'Relevance ranking covers the newest {RANK_WINDOW:,} matches; '
+            'older hits for very common words are left out, so add words to narrow the search.'
+        ).classes('text-xs text-gray-500 font-light')
+        summary_label = ui.label().classes('text-xs text-gray-500 tracking-wider')
+        results = ui.column().classes('w-full gap-4')
+
+        def run_search():
+            query = (query_input.value or '').strip()
+            results.clear()
+            if not query:
+                summary_label.text = ''
+                feed_link.text = ''
+                return
+
+            hits = search_items(query, limit=PAGE_SIZE)
+            summary_label.text = f'{len(hits)} RESULTS' if len(hits) < PAGE_SIZE else f'TOP {PAGE_SIZE} RESULTS'
+            feed_url = f'{base_url()}/feed.xml?q={quote(query)}'
+            feed_link.text = 'RSS for this query'
+            feed_link.props(f'href="{feed_url}"')
+
+            with results:
+                if not hits:
+                    ui.label('No matching items.').classes('text-gray-500 italic w-full text-center py-8')
+                for hit in hits:
+                    with glass_card(classes='w-full p-5'):
+                        with ui.row().classes('w-full items-center justify-between no-wrap gap-4'):
+                            with ui.link(target=hit['url'], new_tab=True).classes('no-underline'):
+                                ui.html(hit['title_html']).classes('text-lg font-bold text-white')
+                            ui.label(f"{hit['ai_score']} · {str(hit['created_at'])[:16]}").classes('text-xs font-mono text-gray-400 shrink-0')
+                        ui.html(hit['snippet']).classes('text-sm text-gray-300 font-light mt-2 break-all')
+
+        query_input.on('keydown.enter', run_search)
+        if q:
+            run_search()
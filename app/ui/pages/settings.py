@@ -2,7 +2,7 @@
 from nicegui import ui
 from app.ui.layout import create_main_layout
 from app.ui.components import LogViewer, glass_card
-from app.core import scheduler_manager, task_queue
+from app.core import scheduler_manager, task_queue, autoscaler
 from app.config import settings
 import os
 
@@ -55,6 +55,17 @@ def settings_page():
                                 ui.notify('API Key saved for session', type='positive', classes='glass-panel')
                         
                         ui.button('Save Key', icon='save_alt', on_click=save_api_key).props('unelevated no-caps').classes('w-full bg-purple-600 hover:bg-purple-500 text-white shadow-[0_0_15px_rgba(147,51,234,0.4)] rounded-lg font-medium transition-all hover:shadow-[0_0_25px_rgba(147,51,234,0.6)]')
+                        
+                        def start_backfill():
+                            from app.services.ai_backfill import ai_backfill
+                            if not os.getenv('DEEPSEEK_API_KEY'):
+                                ui.notify('Save an API key first', type='warning', classes='glass-panel')
+                            elif ai_backfill.start():
+                                ui.notify('Re-analysis started in background', type='positive', classes='glass-panel')
+                            else:
+                                ui.notify('Re-analysis is already running', type='info', classes='glass-panel')
+                        
+                        ui.button('Re-analyze Failed Items', icon='replay', on_click=start_backfill).props('flat no-caps').classes('w-full bg-white/5 hover:bg-white/10 text-purple-200 border border-purple-500/30 rounded-lg transition-colors')
 
                 # 3. 浏览器控制
                 with glass_card(classes='p-6'):
@@ -66,6 +77,19 @@ def settings_page():
                     ui.button('Launch Login Browser', on_click=open_login_browser, icon='rocket_launch').props('unelevated no-caps').classes('w-full bg-cyan-600/80 hover:bg-cyan-500 text-white border border-cyan-400/30 rounded-lg shadow-[0_0_15px_rgba(8,145,178,0.4)] transition-all hover:scale-105')
                     ui.label('Use this to manually solve captchas.').classes('text-xs text-gray-500 mt-2')
 
+                    from app.scraper.governor import browser_governor
+                    memory_label = ui.label().classes('text-xs text-gray-500 mt-1')
+
+                    def refresh_browser():
+                        status = browser_governor.status()
+                        if status['rss_mb'] is None:
+                            memory_label.set_text('Browser not sampled yet')
+                        else:
+                            memory_label.set_text(f"{status['rss_mb']:.0f} MB · {status['pages']} pages · {status['recycles']} recycles")
+
+                    refresh_browser()
+                    ui.timer(30.0, refresh_browser)
+
             # === 右侧列：状态与日志 ===
             with ui.column().classes('lg:col-span-2 gap-8'):
                 
@@ -77,8 +101,22 @@ def settings_page():
                         # 任务队列状态
                         with ui.column().classes('flex-1 bg-white/5 rounded-xl p-4 border border-white/5'):
                             ui.label('Task Queue').classes('text-xs text-gray-400 uppercase tracking-wider')
-                            ui.label(f'{task_queue.get_queue_size()} Pending').classes('text-2xl font-bold text-white')
-                            ui.label('2 Workers Active').classes('text-xs text-emerald-400 flex items-center gap-1 before:content-[""] before:w-1.5 before:h-1.5 before:bg-emerald-400 before:rounded-full before:animate-pulse')
+                            pending_label = ui.label().classes('text-2xl font-bold text-white')
+                            workers_label = ui.label().classes('text-xs text-emerald-400 flex items-center gap-1 before:content-[""] before:w-1.5 before:h-1.5 before:bg-emerald-400 before:rounded-full before:animate-pulse')
+                            scale_label = ui.label().classes('text-xs text-gray-500')
+
+                            def refresh_queue():
+                                # 工作线程数由自动扩缩容在运行中调整
+                                status = autoscaler.status()
+                                pending_label.set_text(f'{task_queue.get_queue_size()} Pending')
+                                workers_label.set_text(f"{status['workers']} Workers · {status['tabs']} Tabs")
+                                if status['enabled']:
+                                    scale_label.set_text(f"Autoscale {status['min']}-{status['max']}: {status['reason']}")
+                                else:
+                                    scale_label.set_text('Autoscale off')
+
+                            refresh_queue()
+                            ui.timer(5.0, refresh_queue)
 
                         # 调度器状态
                         jobs = scheduler_manager.get_jobs()
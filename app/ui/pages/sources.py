@@ -3,28 +3,45 @@ from nicegui import ui
 from sqlmodel import Session
 from app.ui.layout import create_main_layout
 from app.ui.components import glass_card, enhanced_table
-from app.database.crud import create_source, get_sources, delete_source, engine
-from app.database.models import Source
+from app.database.crud import create_source, get_sources_page, count_sources, delete_source, get_source_checks, engine
+from app.database.models import Source, SourceCheck
+from app.config import settings
 from app.core import scheduler_manager
 from app.services.scraper_service import scrape_source_async
+from app.services.source_io import import_sources, export_sources, FORMATS
+from app.scraper.registry import strategy_registry
 
 sources_table = None
 
+def skip_ratio(check: SourceCheck = None) -> str:
+    """变更探测跳过率，例如 '75% (3/4)'"""
+    if not check or not check.runs:
+        return '-'
+    return f"{check.skips * 100 // check.runs}% ({check.skips}/{check.runs})"
+
+def source_row(s: Source, check: SourceCheck = None) -> dict:
+    """数据源 -> 表格行"""
+    return {
+        'id': s.id, 'name': s.name, 'platform': s.platform,
+        'url': s.url, 'url_display': s.url[:40] + '...' if len(s.url) > 40 else s.url,
+        'frequency': s.frequency, 'is_active': s.is_active,
+        'status_label': 'ACTIVE' if s.is_active else 'PAUSED',
+        'last_scraped': s.last_scraped.strftime('%H:%M %m/%d') if s.last_scraped else '-',
+        'skip_ratio': skip_ratio(check)
+    }
+
+def fetch_sources_page(cursor, limit, sort_by, descending, search):
+    """表格服务端分页回调"""
+    sources, next_cursor = get_sources_page(
+        limit=limit, after=cursor, sort_by=sort_by, descending=descending, search=search
+    )
+    checks = get_source_checks([s.id for s in sources])
+    return [source_row(s, checks.get(s.id)) for s in sources], next_cursor
+
 def refresh_table():
-    """刷新表格数据"""
+    """刷新表格数据 (只在已加载范围内有变化时推送)"""
     if sources_table:
-        sources = get_sources()
-        rows = [
-            {
-                'id': s.id, 'name': s.name, 'platform': s.platform,
-                'url': s.url, 'url_display': s.url[:40] + '...' if len(s.url) > 40 else s.url,
-                'frequency': s.frequency, 'is_active': s.is_active,
-                'status_label': 'ACTIVE' if s.is_active else 'PAUSED',
-                'last_scraped': s.last_scraped.strftime('%H:%M %m/%d') if s.last_scraped else '-'
-            }
-            for s in sources
-        ]
-        sources_table.update_rows(rows)
+        sources_table.pager.refresh()
 
 # --- 样式定义 ---
 INPUT_STYLE = 'w-full bg-black/20 rounded-lg px-3 py-2 border border-white/10 focus-within:border-cyan-500/50 transition-colors text-gray-200'
@@ -41,7 +58,7 @@ def show_add_source_dialog():
         url_input = ui.input(placeholder='URL').props(INPUT_PROPS).classes(INPUT_STYLE)
         
         platform_select = ui.select(
-            ['bilibili', 'xiaohongshu', 'xiaoheihe', 'coolapk'], value='bilibili'
+            strategy_registry.labels(), value='bilibili'
         ).props(INPUT_PROPS).classes(INPUT_STYLE)
         
         frequency_input = ui.number(value=60, min=1, max=1440).props(INPUT_PROPS).classes(INPUT_STYLE)
@@ -52,10 +69,11 @@ def show_add_source_dialog():
                     name=name_input.value, url=url_input.value,
                     platform=platform_select.value, frequency=int(frequency_input.value)
                 )
-                scheduler_manager.add_job(
-                    job_id=f"scrape_source_{new_source.id}", func=scrape_source_async,
-                    minutes=new_source.frequency, source_id=new_source.id
-                )
+                if settings.UI_RUN_SCHEDULER:
+                    scheduler_manager.add_job(
+                        job_id=f"scrape_source_{new_source.id}", func=scrape_source_async,
+                        minutes=new_source.frequency, source_id=new_source.id
+                    )
                 ui.notify(f'Added: {name_input.value}', type='positive', classes='glass-panel')
                 refresh_table()
                 dialog.close()
@@ -68,6 +86,42 @@ def show_add_source_dialog():
     
     dialog.open()
 
+def show_import_dialog():
+    with ui.dialog() as dialog, glass_card(classes='w-[28rem] p-6 border border-cyan-500/30 shadow-[0_0_50px_rgba(6,182,212,0.2)]'):
+        with ui.row().classes('items-center gap-3 mb-2'):
+            ui.icon('upload_file').classes('text-2xl text-cyan-400 drop-shadow-[0_0_8px_rgba(34,211,238,0.8)]')
+            ui.label('Import Sources').classes('text-xl font-bold text-white')
+        ui.label('OPML / CSV (name,url,platform,frequency,is_active) / JSON').classes('text-xs text-gray-400 mb-4')
+
+        errors_column = ui.column().classes('w-full gap-1 max-h-40 overflow-y-auto')
+
+        async def handle_upload(e):
+            try:
+                result = import_sources(await e.file.read(), filename=e.file.name, schedule=settings.UI_RUN_SCHEDULER)
+            except Exception as ex:
+                ui.notify(str(ex), type='negative', classes='glass-panel')
+                return
+            ui.notify(f'Imported {result.created}, skipped {result.skipped} duplicates, {len(result.errors)} errors',
+                      type='positive' if not result.errors else 'warning', classes='glass-panel')
+            refresh_table()
+            errors_column.clear()
+            with errors_column:
+                for error in result.errors[:50]:
+                    ui.label(error).classes('text-xs font-mono text-red-400 break-all')
+            if not result.errors:
+                dialog.close()
+
+        ui.upload(on_upload=handle_upload, auto_upload=True, max_file_size=20 * 1024 * 1024) \
+            .props('accept=".opml,.xml,.csv,.json" flat bordered dark color=cyan').classes('w-full')
+
+        with ui.row().classes('w-full justify-end mt-4'):
+            ui.button('Close', on_click=dialog.close).props('flat dense no-caps').classes('text-gray-400 hover:text-white')
+    dialog.open()
+
+def download_sources(fmt: str):
+    content, media_type, filename = export_sources(fmt)
+    ui.download.content(content, filename, media_type)
+
 def show_edit_source_dialog(row):
     with ui.dialog() as dialog, glass_card(classes='w-96 p-6 border border-purple-500/30'):
         with ui.row().classes('items-center gap-3 mb-4'):
@@ -91,7 +145,8 @@ def handle_delete(row):
         with ui.row().classes('justify-end gap-3'):
             ui.button('Cancel', on_click=dialog.close).props('flat dense no-caps text-gray-400')
             def confirm():
-                scheduler_manager.remove_job(f"scrape_source_{row['id']}")
+                if settings.UI_RUN_SCHEDULER:
+                    scheduler_manager.remove_job(f"scrape_source_{row['id']}")
                 delete_source(row['id'])
                 refresh_table()
                 dialog.close()
@@ -110,31 +165,32 @@ def sources():
                 ui.label('Manage your content subscriptions').classes('text-sm text-gray-400 font-light tracking-wider')
             
             # 按钮增加发光图标
-            with ui.row().classes('gap-3'):
+            with ui.row().classes('gap-3 items-center'):
+                ui.input(placeholder='Filter', on_change=lambda e: sources_table.pager.set_search(e.value)) \
+                    .props('borderless dense clearable debounce=300 input-class="text-white"') \
+                    .classes('w-48 bg-black/20 rounded-lg px-3 border border-white/10')
                 ui.button('Refresh', icon='refresh', on_click=refresh_table).props('flat dense no-caps color=purple').classes('hover:bg-purple-500/10 rounded-lg px-3')
+                ui.button('Import', icon='upload', on_click=show_import_dialog).props('flat dense no-caps color=cyan').classes('hover:bg-cyan-500/10 rounded-lg px-3')
+                with ui.button('Export', icon='download').props('flat dense no-caps color=cyan').classes('hover:bg-cyan-500/10 rounded-lg px-3'):
+                    with ui.menu().props('dark'):
+                        for fmt in FORMATS:
+                            ui.menu_item(fmt.upper(), on_click=lambda fmt=fmt: download_sources(fmt))
                 ui.button('Add Source', icon='add', on_click=show_add_source_dialog).props('unelevated no-caps').classes('bg-cyan-600/90 hover:bg-cyan-500 text-white border border-cyan-400/30 backdrop-blur-md rounded-xl px-4 py-2 shadow-[0_0_20px_rgba(8,145,178,0.4)] transition-all hover:scale-105')
 
         # 表格区域
         with glass_card(classes='p-0 overflow-hidden border-t border-white/10'):
-            sources_list = get_sources()
-            
             columns = [
-                {'name': 'name', 'label': 'NAME', 'field': 'name', 'align': 'left'},
-                {'name': 'platform', 'label': 'PLATFORM', 'field': 'platform', 'align': 'center'},
-                {'name': 'status_label', 'label': 'STATUS', 'field': 'status_label', 'align': 'center'},
-                {'name': 'frequency', 'label': 'FREQ (MIN)', 'field': 'frequency', 'align': 'center'},
-                {'name': 'last_scraped', 'label': 'LAST RUN', 'field': 'last_scraped', 'align': 'right'},
-            ]
-            rows = [
-                {
-                    'id': s.id, 'name': s.name, 'platform': s.platform, 'url': s.url,
-                    'frequency': s.frequency, 'is_active': s.is_active,
-                    'status_label': 'ACTIVE' if s.is_active else 'PAUSED',
-                    'last_scraped': s.last_scraped.strftime('%H:%M %m/%d') if s.last_scraped else '-'
-                } for s in sources_list
+                {'name': 'name', 'label': 'NAME', 'field': 'name', 'align': 'left', 'sortable': True},
+                {'name': 'platform', 'label': 'PLATFORM', 'field': 'platform', 'align': 'center', 'sortable': True},
+                {'name': 'status_label', 'label': 'STATUS', 'field': 'status_label', 'align': 'center', 'sortable': True},
+                {'name': 'frequency', 'label': 'FREQ (MIN)', 'field': 'frequency', 'align': 'center', 'sortable': True},
+                {'name': 'skip_ratio', 'label': 'SKIPPED', 'field': 'skip_ratio', 'align': 'center'},
+                {'name': 'last_scraped', 'label': 'LAST RUN', 'field': 'last_scraped', 'align': 'right', 'sortable': True},
             ]
             
+            # 服务端分页 + 虚拟滚动，页面构建时只发送第一页
             sources_table = enhanced_table(
-                columns=columns, rows=rows,
-                on_edit=show_edit_source_dialog, on_delete=handle_delete
+                columns=columns, rows=[],
+                on_edit=show_edit_source_dialog, on_delete=handle_delete,
+                fetch_page=fetch_sources_page, count=count_sources
             )
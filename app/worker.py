@@ -0,0 +1,219 @@
+"""独立抓取 worker - 不加载 NiceGUI，从共享队列领取任务执行
+
+UI/调度节点设置 QUEUE_BACKEND=sqlite (或 redis) 后，定时抓取只写入共享队列，
+由一个或多个 worker 进程 (可在不同机器上，每个进程一个浏览器) 领取执行，
+结果通过 persist_item 写回同一个数据库。
+
+用法: python -m app.worker [--backend sqlite|redis] [--url URL] [--concurrency 2]
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.config import settings
+from app.core.autoscaler import autoscaler
+from app.core.lifecycle import lifecycle, DRAIN
+from app.core.log_buffer import configure_logging
+from app.core.watchdog import watchdog, WatchedTask
+from app.core.work_queue import Lease, WorkQueue, SCRAPE_TASK, create_work_queue
+
+logger = logging.getLogger(__name__)
+
+def _scrape_source(source_id: int):
+    from app.services.scraper_service import scrape_source
+    scrape_source(source_id)
+
+# 任务名 -> 处理函数，参数来自任务 payload
+TASKS: Dict[str, Callable[..., None]] = {
+    SCRAPE_TASK: _scrape_source,
+}
+
+class Worker:
+    """从共享队列领取任务的执行器：每个执行线程一个领取循环，执行期间后台续约"""
+
+    def __init__(self, queue: WorkQueue, concurrency: Optional[int] = None, name: Optional[str] = None,
+                 visibility_timeout: Optional[int] = None, heartbeat_interval: Optional[float] = None,
+                 poll_interval: Optional[float] = None):
+        self.queue = queue
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = visibility_timeout or settings.QUEUE_VISIBILITY_TIMEOUT
+        self.heartbeat_interval = heartbeat_interval or settings.QUEUE_HEARTBEAT_INTERVAL
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL
+        self.stopping = threading.Event()
+        self.threads = []        # 当前的执行线程 (不含已退役或被放弃的)
+        self._abandoned = set()  # 被看门狗放弃的执行线程
+        self._lock = threading.Lock()
+        self._started = False
+        self._spawned = 0
+        self._busy = 0
+        self._durations = deque(maxlen=20)
+
+    def run_once(self) -> bool:
+        """领取并执行一个任务，队列为空时返回 False"""
+        lease = self.queue.lease(self.name, self.visibility_timeout)
+        if lease is None:
+            return False
+        self.execute(lease)
+        return True
+
+    def execute(self, lease: Lease):
+        handler = TASKS.get(lease.name)
+        if handler is None:
+            logger.error(f"未知任务 {lease.name} (#{lease.task_id})")
+            self.queue.fail(lease, f'unknown task: {lease.name}')
+            return
+
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease, done), daemon=True,
+                                     name=f"Heartbeat-{lease.task_id}")
+        heartbeat.start()
+        task = None
+        started = time.monotonic()
+        with self._lock:
+            self._busy += 1
+        try:
+            logger.info(f"[{self.name}] 执行任务 {lease.name} #{lease.task_id} (第 {lease.attempts} 次) {lease.payload}")
+            with watchdog.guard(f"{lease.name}#{lease.task_id}",
+                                on_abandon=lambda t: self._abandon(lease, done, t)) as task:
+                handler(**lease.payload)
+        except Exception as e:
+            done.set()
+            if task is not None and task.abandoned:
+                logger.warning(f"[{self.name}] 已放弃的任务 #{lease.task_id} 终于返回: {e}")
+                return
+            retry = self.queue.fail(lease, f"{e}\n{traceback.format_exc(limit=5)}")
+            logger.error(f"[{self.name}] 任务失败 #{lease.task_id}: {e} ({'稍后重试' if retry else '已放弃'})")
+        else:
+            done.set()
+            if not self.queue.complete(lease):
+                logger.warning(f"[{self.name}] 任务 #{lease.task_id} 的租约已失效，结果可能被其它 worker 重复处理")
+        finally:
+            with self._lock:
+                self._busy -= 1
+            self._durations.append(time.monotonic() - started)
+            heartbeat.join()
+
+    def _abandon(self, lease: Lease, done: threading.Event, task: WatchedTask):
+        """看门狗放弃卡住的任务：停止续约并按失败处理 (可重试)，另起执行线程补上槽位"""
+        done.set()
+        retry = self.queue.fail(lease, task.reason)
+        logger.error(f"[{self.name}] 任务 #{lease.task_id} 卡住: {task.reason} ({'稍后重试' if retry else '已放弃'})")
+        with self._lock:
+            self._abandoned.add(task.thread)
+            if task.thread in self.threads:
+                self.threads.remove(task.thread)
+            if not self.stopping.is_set() and len(self.threads) < self.concurrency:
+                self._spawn(f"{task.thread.name}+")
+
+    def _heartbeat(self, lease: Lease, done: threading.Event):
+        while not done.wait(self.heartbeat_interval):
+            if not self.queue.heartbeat(lease, self.visibility_timeout):
+                logger.warning(f"[{self.name}] 任务 #{lease.task_id} 续约失败，租约已被收回")
+                return
+
+    def _loop(self):
+        current = threading.current_thread()
+        while not self.stopping.is_set() and current not in self._abandoned:
+            if self._retire(current):
+                return
+            try:
+                if not self.run_once():
+                    self.stopping.wait(self.poll_interval)
+            except Exception as e:
+                # 队列后端暂时不可用 (数据库锁、网络) 时稍后重试
+                logger.error(f"[{self.name}] 领取任务失败: {e}")
+                self.stopping.wait(self.poll_interval)
+
+    def start(self):
+        self._started = True
+        self.resize(self.concurrency)
+        logger.info(f"worker {self.name} 已启动，并发数 {self.concurrency}")
+
+    def resize(self, concurrency: int):
+        """调整执行线程数：不足时立即补齐，多出的线程在当前任务结束后退出 (自动扩缩容见 app/core/autoscaler.py)"""
+        concurrency = max(1, concurrency)
+        with self._lock:
+            if concurrency != self.concurrency:
+                logger.info(f"worker {self.name} 并发数调整: {self.concurrency} -> {concurrency}")
+            self.concurrency = concurrency
+            if not self._started or self.stopping.is_set():
+                return
+            while len(self.threads) < self.concurrency:
+                self._spawn()
+
+    def _retire(self, current: threading.Thread) -> bool:
+        with self._lock:
+            if len(self.threads) > self.concurrency and current in self.threads:
+                self.threads.remove(current)
+                return True
+        return False
+
+    def load(self) -> Dict[str, Any]:
+        """扩缩容依据：排队数、执行中的任务数、最近任务的平均耗时 (秒)、当前线程数"""
+        durations = list(self._durations)
+        return {
+            'depth': self.queue.size(),
+            'busy': self._busy,
+            'latency': sum(durations) / len(durations) if durations else None,
+            'workers': len(self.threads),
+        }
+
+    def reset_latency(self):
+        """清空耗时窗口：线程数调整后只按新并发下完成的任务判断，旧的平均值不会反复触发缩容"""
+        self._durations.clear()
+
+    def _spawn(self, name: Optional[str] = None):
+        # daemon：被看门狗放弃且永不返回的线程不阻止进程退出 (正常退出由 stop() 等待)
+        self._spawned += 1
+        thread = threading.Thread(target=self._loop, name=name or f"QueueWorker-{self._spawned}", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """不再领取新任务，等待执行中的任务结束 (被放弃的线程不等待)"""
+        self.stopping.set()
+        # 所有线程共享同一个期限，总等待时间不超过 timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            threads = list(self.threads)
+        for thread in threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        logger.info(f"worker {self.name} 已停止")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="从共享队列领取并执行抓取任务")
+    parser.add_argument("--backend", choices=("sqlite", "redis"),
+                        default=settings.QUEUE_BACKEND if settings.QUEUE_BACKEND != 'local' else 'sqlite')
+    parser.add_argument("--url", default=settings.QUEUE_URL)
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="初始并发数 (默认 WORKER_CONCURRENCY)；启用自动扩缩容时运行中会调整")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    from app.database import create_db_and_tables
+    create_db_and_tables()
+
+    worker = Worker(create_work_queue(args.backend, args.url), concurrency=args.concurrency or autoscaler.initial())
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    worker.start()
+    autoscaler.start(worker)
+    stop.wait()
+    logger.info("收到退出信号，等待执行中的任务完成...")
+    lifecycle.register('worker', worker.stop, DRAIN)
+    lifecycle.shutdown()
+
+if __name__ == "__main__":
+    load_dotenv()
+    main()
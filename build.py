@@ -15,6 +15,7 @@ def build():
         '--onefile',
         '--windowed',
         f'--add-data={nicegui_path};nicegui',
+        '--add-data=app/scraper/specs;app/scraper/specs',
         '--hidden-import=sqlmodel',
         '--hidden-import=DrissionPage',
         '--hidden-import=feedgen',
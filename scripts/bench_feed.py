@@ -0,0 +1,93 @@
+"""feed 生成基准 - 对比 feedgen (RSSGenerator) 与流式序列化的耗时和峰值内存
+
+用法: python scripts/bench_feed.py [--items 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.models import ScrapedItem
+from app.rss.feed_gen import RSSGenerator
+from app.rss.render import apply_entry_html
+from app.rss.stream import FeedMeta, SERIALIZERS, encode_stream
+
+META = FeedMeta(title="bench", link="http://localhost:8080", description="bench",
+                self_link="http://localhost:8081/feed.xml", hub="http://localhost:8081/websub")
+
+def build_db(path: str, items: int):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    conn = engine.raw_connection()
+    conn.execute("INSERT INTO source (name, url, platform, frequency, is_active) VALUES ('bench', 'http://bench', 'bilibili', 60, 1)")
+    now = datetime.now().isoformat(sep=' ')
+    conn.executemany(
+        "INSERT INTO scrapeditem (source_id, title, url, content, ai_summary, images, publish_date, created_at, "
+        "sentiment, ai_score, risk_level, thumbnails, related, feed_html_version) VALUES (1, ?, ?, ?, ?, '', ?, ?, 'Neutral', 80, 'Low', '', '', 0)",
+        [(f"标题 {i}", f"https://example.com/{i}", "正文内容" * 500, "AI 摘要" * 20, now, now) for i in range(items)]
+    )
+    conn.commit()
+    conn.close()
+    return engine
+
+def measure(label: str, func, repeat: int = 3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings.sort()
+    print(f"{label:<28} {timings[len(timings) // 2] * 1000:8.1f} ms   peak {peak / 1024 / 1024:7.1f} MiB   {size / 1024:8.0f} KiB")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_db(os.path.join(tmp, "feed.db"), args.items)
+
+        def feedgen():
+            with Session(engine) as session:
+                items = session.exec(select(ScrapedItem).order_by(ScrapedItem.created_at.desc()).limit(args.items)).all()
+            rss = RSSGenerator(title=META.title, link=META.link, description=META.description)
+            rss.add_items(items)
+            return len(rss.generate_rss().encode("utf-8"))
+
+        def streamed(feed_format, encoding="identity"):
+            def run():
+                rows = crud.iter_feed_rows(limit=args.items)
+                return sum(len(chunk) for chunk in encode_stream(SERIALIZERS[feed_format](rows, META), encoding))
+            return run
+
+        with patch.object(crud, "engine", engine):
+            print(f"{args.items} items")
+            measure("feedgen rss", feedgen)
+            measure("stream rss", streamed("rss"))
+            measure("stream rss gzip", streamed("rss", "gzip"))
+            measure("stream atom", streamed("atom"))
+            measure("stream json", streamed("json"))
+
+            # 预渲染 feed_html 后，输出只拼接片段且不读取正文
+            with Session(engine) as session:
+                for item in session.exec(select(ScrapedItem)):
+                    session.add(apply_entry_html(item))
+                session.commit()
+            measure("stream rss (feed_html)", streamed("rss"))
+            measure("stream rss gzip (feed_html)", streamed("rss", "gzip"))
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""条目查询基准 - 对比全量行加载与投影查询/正文分表的耗时和内存
+
+用法: python scripts/bench_items.py [--items 100000] [--content-chars 6000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from unittest.mock import patch
+
+from app.config import settings
+from app.database import crud
+from app.database.compression import compress_text
+
+PHRASES = ["今天给大家分享", "这个版本更新了", "字幕", "大家好", "我们来看一下", "性能测试结果",
+           "点赞投币收藏", "下一期再见", "这里需要注意", "其实", "the quick brown fox", "所以说"]
+
+def fake_content(chars: int) -> str:
+    parts = []
+    size = 0
+    while size < chars:
+        phrase = random.choice(PHRASES)
+        parts.append(phrase)
+        size += len(phrase)
+    return "".join(parts)[:chars]
+
+def build_db(path: str, items: int, content_chars: int, split: bool):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+
+    limit = settings.CONTENT_INLINE_LIMIT
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO source (name, url, platform, frequency, is_active) VALUES ('bench', 'http://bench', 'bilibili', 60, 1)")
+    now = datetime.now()
+    batch = []
+    for i in range(items):
+        content = fake_content(content_chars)
+        created = (now - timedelta(seconds=i)).isoformat(sep=' ')
+        inline = content[:limit] if split else content
+        batch.append((i + 1, f"标题 {i}", f"https://example.com/{i}", inline, "", created, created, "摘要", "Neutral", 70, "Low", content))
+        if len(batch) == 2000 or i == items - 1:
+            conn.executemany(
+                "INSERT INTO scrapeditem (id, source_id, title, url, content, images, publish_date, created_at, "
+                "ai_summary, sentiment, ai_score, risk_level, thumbnails, related, feed_html_version) VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, '', '', 0)",
+                [row[:-1] for row in batch]
+            )
+            if split:
+                rows = []
+                for row in batch:
+                    codec, data = compress_text(row[-1], settings.CONTENT_COMPRESSION)
+                    rows.append((row[0], codec, len(row[-1]), data))
+                conn.executemany("INSERT INTO itemcontent (item_id, codec, size, data) VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+            batch = []
+    conn.execute("VACUUM")
+    conn.close()
+
+def measure(label: str, func, repeat: int = 5):
+    func()  # 预热页缓存
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<56} {min(timings) * 1000:8.1f} ms   peak {peak / 1024 / 1024:7.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--content-chars", type=int, default=6000)
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        after_path = os.path.join(tmp, "after.db")
+        print(f"Building {args.items} items x {args.content_chars} chars ...")
+        build_db(before_path, args.items, args.content_chars, split=False)
+        build_db(after_path, args.items, args.content_chars, split=True)
+        print(f"DB size  before: {os.path.getsize(before_path) / 1024 / 1024:.1f} MiB   "
+              f"after: {os.path.getsize(after_path) / 1024 / 1024:.1f} MiB")
+
+        before = create_engine(f"sqlite:///{before_path}")
+        after = create_engine(f"sqlite:///{after_path}")
+        with patch.object(crud, "engine", before):
+            measure(f"before: get_scraped_items({args.limit})", lambda: crud.get_scraped_items(limit=args.limit))
+        with patch.object(crud, "engine", after):
+            measure(f"after:  get_scraped_items({args.limit})", lambda: crud.get_scraped_items(limit=args.limit))
+            measure(f"after:  get_scraped_items({args.limit}, with_content=False)",
+                    lambda: crud.get_scraped_items(limit=args.limit, with_content=False))
+            measure(f"after:  get_item_summaries({args.limit})", lambda: crud.get_item_summaries(limit=args.limit))
+            measure("after:  get_item_content(1)", lambda: crud.get_item_content(1))
+        before.dispose()
+        after.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""全文检索基准 - 在大表上测量 FTS5 查询延迟
+
+用法: python scripts/bench_search.py [--items 1000000] [--content-chars 300]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.search import create_search_index
+
+WORDS = ["原神", "崩坏", "星穹铁道", "手机", "续航", "评测", "显卡", "性能", "更新", "版本", "攻略", "新手",
+         "教程", "开箱", "体验", "价格", "发布会", "游戏", "主机", "键盘", "耳机", "相机", "拍照", "系统",
+         "bug", "steam", "switch", "iphone", "android", "linux", "独立游戏", "剧情", "角色", "抽卡", "深渊"]
+
+def fake_text(chars: int) -> str:
+    parts = []
+    size = 0
+    while size < chars:
+        word = random.choice(WORDS) if random.random() < 0.05 else chr(random.randint(0x4e00, 0x4e00 + 3000))
+        parts.append(word)
+        size += len(word)
+    return "".join(parts)[:chars]
+
+def build_db(path: str, items: int, content_chars: int):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    create_search_index(engine)
+    conn = engine.raw_connection()
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("INSERT INTO source (name, url, platform, frequency, is_active) VALUES ('bench', 'http://bench', 'bilibili', 60, 1)")
+    now = datetime.now().isoformat(sep=' ')
+    batch = []
+    for i in range(items):
+        batch.append((f"{fake_text(12)} {i}", f"https://example.com/{i}", fake_text(content_chars), fake_text(30), now, now))
+        if len(batch) == 10000 or i == items - 1:
+            conn.executemany(
+                "INSERT INTO scrapeditem (source_id, title, url, content, ai_summary, images, publish_date, created_at, "
+                "sentiment, ai_score, risk_level, thumbnails, related, feed_html_version) VALUES (1, ?, ?, ?, ?, '', ?, ?, 'Neutral', 70, 'Low', '', '', 0)",
+                batch
+            )
+            conn.commit()
+            batch = []
+            print(f"  {i + 1} rows", end="\r")
+    conn.execute("INSERT INTO scrapeditem_fts (scrapeditem_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+    return engine
+
+def measure(label: str, func, repeat: int = 5):
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{label:<40} median {timings[len(timings) // 2] * 1000:8.1f} ms   hits {len(result)}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--content-chars", type=int, default=300)
+    parser.add_argument("--db", help="保留/复用基准数据库文件 (默认使用临时目录)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "search.db")
+        if os.path.exists(path):
+            engine = create_engine(f"sqlite:///{path}")
+        else:
+            print(f"Building {args.items} items ...")
+            start = time.perf_counter()
+            engine = build_db(path, args.items, args.content_chars)
+            print(f"\nBuilt in {time.perf_counter() - start:.0f}s")
+        print(f"DB size {os.path.getsize(path) / 1024 / 1024:.0f} MiB")
+
+        with patch.object(crud, "engine", engine):
+            for query in ["星穹铁道", "原神 深渊", "linux", "独立游戏 剧情 抽卡", "不存在的词组合"]:
+                measure(f"search_items({query!r})", lambda: crud.search_items(query))
+            measure("search_items('神') single char", lambda: crud.search_items("神"))
+            measure("search_scraped_items('发布会')", lambda: crud.search_scraped_items("发布会"))
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""任务日志基准 - 测量每个任务 (入队 + 开始 + 完成三条事件) 的日志开销与组提交效果
+
+用法: python scripts/bench_task_journal.py [--tasks 20000] [--threads 4] [--no-fsync]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.task_journal import TaskJournal
+
+def run(journal: TaskJournal, tasks: int, threads: int) -> float:
+    per_thread = tasks // threads
+
+    def produce(offset: int):
+        for i in range(per_thread):
+            task_id = f'{offset}-{i}'
+            journal.enqueued(task_id, 'app.services.scraper_service:scrape_source', (i,), {})
+            journal.started(task_id)
+            journal.done(task_id)
+
+    workers = [threading.Thread(target=produce, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    journal.flush()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--no-fsync", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "journal.jsonl")
+        journal = TaskJournal(path, fsync=not args.no_fsync)
+        journal.open()
+
+        # 单次 fsync 的耗时 (不做组提交时每个事件都要付出的代价)
+        start = time.perf_counter()
+        for i in range(50):
+            journal.enqueued(f"probe-{i}", "m:f", (), {})
+            journal.flush()
+        fsync_ms = (time.perf_counter() - start) / 50 * 1000
+
+        elapsed = run(journal, args.tasks, args.threads)
+        journal.close()
+        print(f"single event + flush:   {fsync_ms:.3f} ms")
+        print(f"{args.tasks} tasks x 3 events from {args.threads} threads in {elapsed:.2f}s")
+        print(f"per task (incl. fsync): {elapsed / args.tasks * 1000:.3f} ms")
+        print(f"batches (fsync calls):  {journal.batches} ({args.tasks * 3 / max(journal.batches, 1):.1f} events/batch)")
+        print(f"journal size after run: {os.path.getsize(path) / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,73 @@
 import sqlite3
 import os
+import sys
+from collections import namedtuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database.compression import compress_text
+from app.database.search import register_functions
+from app.rss.render import ENTRY_TEMPLATE_VERSION, render_entry_html
 
 DB_PATH = "data/database.db"
+BATCH_SIZE = 500
+
+def move_long_content(conn):
+    """把超长正文分批压缩移入 itemcontent 表，主表只保留预览"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS itemcontent (
+            item_id INTEGER NOT NULL PRIMARY KEY REFERENCES scrapeditem (id),
+            codec VARCHAR NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    """)
+    limit = settings.CONTENT_INLINE_LIMIT
+    last_id = 0
+    moved = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, content FROM scrapeditem WHERE id > ? AND length(content) > ? ORDER BY id LIMIT ?",
+            (last_id, limit, BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for item_id, content in rows:
+            codec, data = compress_text(content, settings.CONTENT_COMPRESSION)
+            conn.execute(
+                "INSERT OR REPLACE INTO itemcontent (item_id, codec, size, data) VALUES (?, ?, ?, ?)",
+                (item_id, codec, len(content), data)
+            )
+            conn.execute("UPDATE scrapeditem SET content = ? WHERE id = ?", (content[:limit], item_id))
+        conn.commit()
+        last_id = rows[-1][0]
+        moved += len(rows)
+    if moved:
+        print(f"Moved {moved} long contents into 'itemcontent'.")
+
+FeedRow = namedtuple("FeedRow", "id content ai_summary ai_score risk_level sentiment thumbnails related")
+
+def backfill_feed_html(conn):
+    """分批为缺失或模板版本过期的条目渲染 feed_html"""
+    last_id = 0
+    rendered = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, content, ai_summary, ai_score, risk_level, sentiment, thumbnails, related FROM scrapeditem "
+            "WHERE id > ? AND (feed_html IS NULL OR feed_html_version != ?) ORDER BY id LIMIT ?",
+            (last_id, ENTRY_TEMPLATE_VERSION, BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany(
+            "UPDATE scrapeditem SET feed_html = ?, feed_html_version = ? WHERE id = ?",
+            [(render_entry_html(FeedRow(*row)), ENTRY_TEMPLATE_VERSION, row[0]) for row in rows]
+        )
+        conn.commit()
+        last_id = rows[-1][0]
+        rendered += len(rows)
+    if rendered:
+        print(f"Rendered feed_html for {rendered} items (template v{ENTRY_TEMPLATE_VERSION}).")
 
 def migrate_db():
     if not os.path.exists(DB_PATH):
@@ -9,6 +75,8 @@ def migrate_db():
         return
 
     conn = sqlite3.connect(DB_PATH)
+    # 应用启动后建立的全文索引触发器依赖 fts_segment()/fts_decompress()，裸连接也要注册
+    register_functions(conn)
     cursor = conn.cursor()
     
     try:
@@ -23,8 +91,38 @@ def migrate_db():
         if "risk_level" not in columns:
             print("Adding 'risk_level' column...")
             cursor.execute("ALTER TABLE scrapeditem ADD COLUMN risk_level VARCHAR DEFAULT 'Unknown'")
+        
+        if "feed_html" not in columns:
+            print("Adding 'feed_html' columns...")
+            cursor.execute("ALTER TABLE scrapeditem ADD COLUMN feed_html VARCHAR")
+            cursor.execute("ALTER TABLE scrapeditem ADD COLUMN feed_html_version INTEGER NOT NULL DEFAULT 0")
+        
+        if "thumbnails" not in columns:
+            print("Adding 'thumbnails' column...")
+            cursor.execute("ALTER TABLE scrapeditem ADD COLUMN thumbnails VARCHAR NOT NULL DEFAULT ''")
+        
+        if "transcript_key" not in columns:
+            print("Adding 'transcript_key' column...")
+            cursor.execute("ALTER TABLE scrapeditem ADD COLUMN transcript_key VARCHAR")
+        
+        if "ai_source" not in columns:
+            print("Adding 'ai_source' column...")
+            cursor.execute("ALTER TABLE scrapeditem ADD COLUMN ai_source VARCHAR")
+        
+        if "cluster_id" not in columns:
+            print("Adding 'cluster_id' and 'related' columns...")
+            cursor.execute("ALTER TABLE scrapeditem ADD COLUMN cluster_id INTEGER")
+            cursor.execute("ALTER TABLE scrapeditem ADD COLUMN related VARCHAR NOT NULL DEFAULT ''")
+        
+        # 统计查询使用的索引
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_scrapeditem_created_at ON scrapeditem (created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_scrapeditem_source_id ON scrapeditem (source_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_scrapeditem_cluster_id ON scrapeditem (cluster_id)")
             
         conn.commit()
+        
+        move_long_content(conn)
+        backfill_feed_html(conn)
         print("[SUCCESS] Database migration completed.")
         
     except Exception as e:
@@ -0,0 +1,177 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from unittest.mock import patch
+
+from app.config import settings
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.services import ai_backfill as backfill_module
+from app.services.ai_backfill import AIBackfill, Checkpoint, RateLimiter
+
+GOOD = {'summary': '摘要', 'sentiment': 'Positive', 'score': 80, 'risk_level': 'Low'}
+
+class BackfillTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.checkpoint_path = os.path.join(self.tmp, 'backfill.json')
+        # 并发写入需要独立连接，不能用共享单连接的内存库
+        self.engine = create_engine(f"sqlite:///{self.tmp}/test.db", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        patch.object(settings, 'AI_BACKFILL_CHECKPOINT', self.checkpoint_path).start()
+        patch.object(settings, 'PREFILTER_ENABLED', False).start()
+        patch.object(backfill_module, 'live_backlog', return_value=0).start()
+        patch.dict(os.environ, {'DEEPSEEK_API_KEY': 'test'}).start()
+        self.processor = patch('app.ai.client.AIProcessor').start()
+        self.analyze = self.processor.return_value.analyze
+        self.analyze.return_value = GOOD
+        self.backfill = AIBackfill()
+        self.backfill.checkpoint = None
+
+        with Session(self.engine) as session:
+            source = Source(name='酷安', url='https://www.coolapk.com', platform='coolapk')
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+        self.pending = [self.add_item(summary) for summary in
+                        ('未配置 AI Key', '分析失败', None, '未配置 AI Key', 'AI 服务暂时不可用', '未配置 AI Key', '分析失败')]
+        self.done = self.add_item('已有摘要', score=70)
+
+    def tearDown(self):
+        self.backfill.stop(5)
+        patch.stopall()
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def add_item(self, summary, score=0):
+        count = crud.get_max_item_id()
+        item = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title=f'标题{count}', url=f'https://x/{count}', content=f'正文{count}',
+            ai_summary=summary, ai_score=score, risk_level='Low' if score else 'Unknown'))
+        return item.id
+
+    def scores(self):
+        with Session(self.engine) as session:
+            return {item.id: item.ai_score for item in session.exec(select(ScrapedItem)).all()}
+
+class TestBackfill(BackfillTestCase):
+    def test_backfills_missing_and_failed(self):
+        checkpoint = self.backfill.run(batch_size=3, workers=2, rate=0)
+        self.assertEqual((checkpoint.processed, checkpoint.succeeded, checkpoint.failed), (7, 7, 0))
+        self.assertIsNotNone(checkpoint.finished_at)
+        scores = self.scores()
+        self.assertTrue(all(scores[i] == 80 for i in self.pending))
+        self.assertEqual(scores[self.done], 70)
+        self.assertEqual(self.analyze.call_count, 7)
+        self.assertEqual(self.analyze.call_args[0][1], 'coolapk')
+        self.assertEqual(json.load(open(self.checkpoint_path))['last_id'], self.pending[-1])
+        self.assertEqual(len(list(crud.iter_feed_rows(limit=50))), 8)
+
+        # 完成后再次运行开始新的一轮，已无需要处理的条目
+        self.assertEqual(self.backfill.run(rate=0).processed, 0)
+
+    def test_resume_after_interrupt(self):
+        calls = []
+
+        def analyze(text, platform):
+            calls.append(text)
+            if len(calls) == 4:
+                self.backfill._stop.set()  # 模拟第二批处理中途退出
+            return GOOD
+
+        self.analyze.side_effect = analyze
+        checkpoint = self.backfill.run(batch_size=3, workers=1, rate=0)
+        self.assertIsNone(checkpoint.finished_at)
+        self.assertEqual((checkpoint.last_id, checkpoint.processed), (self.pending[2], 3))
+        self.assertEqual(Checkpoint.load(self.checkpoint_path).last_id, self.pending[2])
+
+        checkpoint = self.backfill.run(batch_size=3, workers=1, rate=0)
+        self.assertIsNotNone(checkpoint.finished_at)
+        # 已成功的第 4 条不再满足筛选条件，不会重复调用
+        self.assertEqual(len(calls), 7)
+        self.assertEqual(checkpoint.processed, 6)
+        self.assertTrue(all(self.scores()[i] == 80 for i in self.pending))
+
+    def test_repeated_failure_does_not_block(self):
+        self.analyze.side_effect = lambda text, platform: {'summary': '分析失败'} if text == '正文0' else GOOD
+        checkpoint = self.backfill.run(batch_size=2, rate=0)
+        self.assertEqual((checkpoint.succeeded, checkpoint.failed), (6, 1))
+        self.assertEqual(self.scores()[self.pending[0]], 0)
+        self.assertIsNotNone(checkpoint.finished_at)
+
+    def test_yields_to_live_scraping(self):
+        backlog = iter([2, 1] + [0] * 100)
+        with patch.object(backfill_module, 'live_backlog', side_effect=lambda: next(backlog)), \
+                patch.object(settings, 'AI_BACKFILL_YIELD_INTERVAL', 0.01):
+            with self.assertLogs('app.services.ai_backfill', 'INFO') as logs:
+                self.backfill.run(rate=0)
+        self.assertTrue(any('让路' in line for line in logs.output))
+        self.assertEqual(self.analyze.call_count, 7)
+
+    def test_background_start(self):
+        self.assertTrue(self.backfill.start(rate=0))
+        self.backfill._thread.join(10)
+        self.assertFalse(self.backfill.running)
+        self.assertEqual(self.backfill.status()['succeeded'], 7)
+
+    def test_requires_api_key(self):
+        with patch.dict(os.environ, {'DEEPSEEK_API_KEY': ''}):
+            with self.assertRaises(ValueError):
+                self.backfill.run()
+
+class TestLiveBacklog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'journal.jsonl')
+        patch.object(settings, 'QUEUE_BACKEND', 'local').start()
+        patch.object(settings, 'TASK_JOURNAL_ENABLED', True).start()
+        patch.object(settings, 'TASK_JOURNAL_PATH', self.path).start()
+        from app.core import task_queue
+        patch.object(task_queue, 'workers', []).start()  # 独立进程：本进程未启动任务队列
+
+    def tearDown(self):
+        patch.stopall()
+        shutil.rmtree(self.tmp)
+
+    def test_reads_other_process_journal(self):
+        from app.core.task_journal import TaskJournal
+        self.assertEqual(backfill_module.live_backlog(), 0)
+        journal = TaskJournal(self.path, fsync=False)  # 界面进程的任务日志
+        journal.open()
+        journal.enqueued('a', 'm:f', (1,), {})
+        journal.enqueued('b', 'm:f', (2,), {})
+        journal.started('a')
+        journal.flush()
+        self.assertEqual(backfill_module.live_backlog(), 2)
+        journal.done('a')
+        journal.flush()
+        self.assertEqual(backfill_module.live_backlog(), 1)
+        journal.close()
+
+        # 写入日志的进程已不在运行：遗留的任务不算积压
+        old = time.time() - settings.TASK_TIMEOUT - 3 * settings.WATCHDOG_GRACE
+        os.utime(self.path, (old, old))
+        self.assertEqual(backfill_module.live_backlog(), 0)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_interval(self):
+        limiter = RateLimiter(per_minute=600)
+        stop = threading.Event()
+        started = time.monotonic()
+        for _ in range(4):
+            self.assertTrue(limiter.acquire(stop))
+        self.assertGreaterEqual(time.monotonic() - started, 0.29)
+        stop.set()
+        self.assertFalse(limiter.acquire(stop))
+
+if __name__ == '__main__':
+    unittest.main()
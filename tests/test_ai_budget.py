@@ -0,0 +1,102 @@
+import sys
+import os
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from app.config import settings
+from app.ai.budget import (BudgetPolicy, policy_for, estimate_tokens, smart_truncate,
+                           chunk_text, map_reduce, fit_budget)
+
+FILLER = '今天天气不错我们随便聊聊。'
+KEY = '显卡价格下跌，显卡库存增加，显卡厂商降价。'
+
+def transcript(lines=300, key_at=150):
+    return ''.join(KEY if i == key_at else FILLER for i in range(lines))
+
+class TestEstimate(unittest.TestCase):
+    def test_ratios(self):
+        self.assertEqual(estimate_tokens(''), 0)
+        self.assertEqual(estimate_tokens('中文' * 50), 60)
+        self.assertEqual(estimate_tokens('a' * 100), 30)
+
+class TestSmartTruncate(unittest.TestCase):
+    def test_within_budget_unchanged(self):
+        self.assertEqual(smart_truncate('短文本。', 100), '短文本。')
+
+    def test_head_tail_and_keywords(self):
+        text = '开头介绍。' + transcript() + '最后总结。'
+        result = smart_truncate(text, 200)
+        self.assertLessEqual(estimate_tokens(result), 200)
+        self.assertTrue(result.startswith('开头介绍。'))
+        self.assertTrue(result.endswith('最后总结。'))
+        self.assertIn(KEY, result)  # 中间关键词密集的句子被保留
+        self.assertIn('……', result)
+
+    def test_unpunctuated(self):
+        result = smart_truncate('字' * 1000, 60)
+        self.assertLessEqual(estimate_tokens(result), 62)
+        self.assertIn('……', result)
+
+class TestChunks(unittest.TestCase):
+    def test_sentence_boundaries(self):
+        chunks = chunk_text(transcript(100), 100)
+        self.assertEqual(''.join(chunks), transcript(100))
+        self.assertTrue(all(c.endswith('。') for c in chunks))
+        self.assertTrue(all(estimate_tokens(c) <= 100 for c in chunks))
+
+class TestMapReduce(unittest.TestCase):
+    def test_concurrent_and_bounded(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def summarize(chunk, max_length):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return f'摘要{len(chunk)}'
+
+        policy = BudgetPolicy(mode='map_reduce', max_tokens=500, chunk_tokens=400, max_chunks=4)
+        result = map_reduce(transcript(400), summarize, policy, timeout=5, workers=4)
+        self.assertEqual(result.count('【第'), 4)  # 块数受 max_chunks 限制
+        self.assertGreater(peak[0], 1)
+
+    def test_slow_chunks_fall_back(self):
+        def summarize(chunk, max_length):
+            if KEY in chunk:
+                time.sleep(1)
+            return '摘要'
+
+        policy = BudgetPolicy(mode='map_reduce', max_tokens=300, chunk_tokens=200, max_chunks=4)
+        started = time.monotonic()
+        result = map_reduce(transcript(200, key_at=10), summarize, policy, timeout=0.2, workers=4)
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertIn('【第1段】今天', result)  # 超时的块以截断节选代替
+        self.assertIn('【第2段】摘要', result)
+        self.assertLessEqual(estimate_tokens(result), 300)
+
+class TestPolicy(unittest.TestCase):
+    def test_platform_override(self):
+        overrides = {'bilibili': {'mode': 'map_reduce', 'max_tokens': 50}}
+        with patch.object(settings, 'AI_BUDGET_PLATFORMS', overrides):
+            self.assertEqual(policy_for('bilibili').mode, 'map_reduce')
+            self.assertEqual(policy_for('bilibili').chunk_tokens, settings.AI_CHUNK_TOKENS)
+            self.assertEqual(policy_for('coolapk').mode, settings.AI_BUDGET_MODE)
+            summaries = fit_budget(transcript(), 'bilibili', lambda chunk, n: '摘要')
+            self.assertTrue(summaries.startswith('【第1段】摘要'))
+            self.assertLessEqual(estimate_tokens(fit_budget(transcript(), 'coolapk')), settings.AI_BUDGET_MAX_TOKENS)
+        with self.assertRaises(ValueError):
+            BudgetPolicy(mode='summary')
+
+    def test_none_mode(self):
+        with patch.object(settings, 'AI_BUDGET_MODE', 'none'):
+            self.assertEqual(fit_budget(transcript(1000)), transcript(1000))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import sys
+import os
+import subprocess
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from app.config import settings
+from app.core import sysmetrics
+from app.core.autoscaler import Autoscaler, ResizableSemaphore, Sample, plan, plan_tabs, tab_slots, MB
+from app.core.task_queue import TaskQueue
+
+GB = 1024 * MB
+
+def healthy(**kwargs):
+    values = dict(depth=0, busy=0, workers=2, cpu=20.0, mem_total=16 * GB, mem_available=12 * GB)
+    values.update(kwargs)
+    return Sample(**values)
+
+class TestPlan(unittest.TestCase):
+    def test_scale_up_on_backlog(self):
+        self.assertEqual(plan(2, healthy(depth=5, busy=2), 1, 8)[0], 3)
+        self.assertEqual(plan(8, healthy(depth=5, busy=8), 1, 8)[0], 8)  # 上限
+        target, reason = plan(2, healthy(depth=5, busy=2, cpu=75), 1, 8)
+        self.assertEqual(target, 2)
+        self.assertIn('CPU', reason)
+
+    def test_scale_down_on_pressure(self):
+        self.assertEqual(plan(4, healthy(depth=5, busy=4, mem_available=GB), 1, 8), (3, '可用内存仅 6%'))
+        self.assertEqual(plan(4, healthy(depth=5, busy=4, cpu=95), 1, 8)[0], 3)
+        self.assertEqual(plan(4, healthy(depth=5, busy=4, browser_rss=3 * GB), 1, 8)[0], 3)
+        self.assertEqual(plan(4, healthy(depth=5, busy=4, latency=600), 1, 8)[0], 3)
+        self.assertEqual(plan(1, healthy(cpu=99), 1, 8)[0], 1)  # 下限
+
+    def test_idle_and_steady(self):
+        self.assertEqual(plan(4, healthy(busy=1), 1, 8), (3, '空闲'))
+        self.assertEqual(plan(4, healthy(busy=3), 1, 8), (4, '稳定'))
+        self.assertEqual(plan(2, healthy(depth=3, busy=2, cpu=None), 1, 8)[0], 3)  # 无 CPU 读数时不阻止扩容
+
+    def test_tab_limit(self):
+        self.assertEqual(plan_tabs(4, healthy()), 4)
+        # 每个标签页约 500 MB，可用 3 GB 中需为 16 GB 的 15% 留出余量 -> 只能再开 1 个
+        sample = healthy(mem_available=3 * GB, browser_rss=GB, tabs=2)
+        self.assertEqual(plan_tabs(6, sample), 3)
+        # 浏览器内存上限 2 GB
+        self.assertEqual(plan_tabs(6, healthy(browser_rss=GB, tabs=2)), 4)
+        self.assertEqual(plan_tabs(6, healthy(mem_available=GB)), 1)
+
+class TestResizableSemaphore(unittest.TestCase):
+    def test_resize(self):
+        slots = ResizableSemaphore(2)
+        self.assertTrue(slots.acquire(0))
+        self.assertTrue(slots.acquire(0))
+        self.assertFalse(slots.acquire(0.01))
+        slots.resize(1)
+        slots.release()
+        self.assertFalse(slots.acquire(0.01))  # 占用 1 个，已达新容量
+        waiter = threading.Thread(target=slots.acquire)
+        waiter.start()
+        slots.resize(3)
+        waiter.join(2)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(slots.in_use, 2)
+
+class TestSysMetrics(unittest.TestCase):
+    @unittest.skipUnless(os.path.isdir('/proc/self'), '需要 /proc')
+    def test_proc_readings(self):
+        total, available = sysmetrics.memory()
+        self.assertGreater(total, available)
+        self.assertGreater(sysmetrics.process_rss(os.getpid()), 1 * MB)
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+        try:
+            time.sleep(0.2)
+            self.assertIn(child.pid, sysmetrics.descendants(os.getpid()))
+            self.assertGreater(sysmetrics.tree_rss(os.getpid()), sysmetrics.process_rss(os.getpid()))
+        finally:
+            child.kill()
+            child.wait()
+        self.assertIsNone(sysmetrics.process_rss(child.pid))
+        sampler = sysmetrics.CpuSampler()
+        end = time.monotonic() + 0.2
+        while time.monotonic() < end:
+            pass
+        self.assertTrue(0 <= sampler.sample() <= 100)
+
+class FakePool:
+    def __init__(self, workers):
+        self.workers = workers
+        self.state = {'depth': 0, 'busy': 0, 'latency': None}
+
+    def resize(self, workers):
+        self.workers = workers
+
+    def load(self):
+        return {**self.state, 'workers': self.workers}
+
+    def reset_latency(self):
+        self.state['latency'] = None
+
+class TestAutoscaler(unittest.TestCase):
+    def setUp(self):
+        self.original = Autoscaler._instance
+        Autoscaler._instance = None
+        self.autoscaler = Autoscaler()
+        patch.object(settings, 'AUTOSCALE_MAX_WORKERS', 4).start()
+        patch.object(settings, 'AUTOSCALE_INTERVAL', 3600).start()
+        self.limit = tab_slots.limit
+
+    def tearDown(self):
+        self.autoscaler.stop(1)
+        tab_slots.resize(self.limit)
+        Autoscaler._instance = self.original
+        patch.stopall()
+
+    def test_tick_adjusts_pool_and_tabs(self):
+        pool = FakePool(2)
+        self.autoscaler.start(pool)
+        for _ in range(5):
+            self.autoscaler.tick(healthy(depth=10, busy=pool.workers))
+        self.assertEqual(pool.workers, 4)
+        self.assertEqual(tab_slots.limit, 4)
+        self.assertEqual(self.autoscaler.status()['reason'], '积压 10')
+        self.autoscaler.tick(healthy(depth=10, busy=4, mem_available=GB))
+        self.assertEqual((pool.workers, tab_slots.limit), (3, 1))
+        self.assertEqual(len(self.autoscaler.history), 3)
+
+    def test_latency_scale_down_waits_for_fresh_samples(self):
+        pool = FakePool(4)
+        pool.state['latency'] = 600
+        self.autoscaler.start(pool)
+        for _ in range(3):
+            self.autoscaler.tick(healthy(busy=pool.workers, latency=pool.load()['latency']))
+        # 缩容后旧的平均耗时作废，不会每次采样都再减一个线程
+        self.assertEqual(pool.workers, 3)
+        self.assertIsNone(pool.state['latency'])
+
+    def test_disabled_keeps_fixed_size(self):
+        with patch.object(settings, 'AUTOSCALE_ENABLED', False):
+            self.assertEqual(self.autoscaler.initial(), settings.WORKER_CONCURRENCY)
+            self.autoscaler.start(FakePool(2))
+            self.assertIsNone(self.autoscaler._thread)
+            self.assertEqual(self.autoscaler.status()['reason'], '固定')
+
+class TestTaskQueueResize(unittest.TestCase):
+    def setUp(self):
+        patch.object(settings, 'TASK_JOURNAL_ENABLED', False).start()
+        self.original = TaskQueue._instance
+        TaskQueue._instance = None
+        self.queue = TaskQueue()
+
+    def tearDown(self):
+        self.queue.stop(5)
+        TaskQueue._instance = self.original
+        patch.stopall()
+
+    def test_grow_and_shrink(self):
+        self.queue.start(num_workers=1)
+        self.queue.resize(3)
+        self.assertEqual(len(self.queue.workers), 3)
+        gate = threading.Event()
+        for _ in range(3):
+            self.queue.add_task(gate.wait, 5)
+        time.sleep(0.2)
+        self.assertEqual(self.queue.load()['busy'], 3)
+        self.queue.resize(1)
+        self.assertEqual(len(self.queue.workers), 3)  # 执行中的任务不受影响
+        gate.set()
+        deadline = time.monotonic() + 5
+        while len(self.queue.workers) > 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        load = self.queue.load()
+        self.assertEqual((load['workers'], load['busy'], load['depth']), (1, 0, 0))
+        self.assertIsNotNone(load['latency'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import MagicMock, patch
+
+from app.config import settings
+from app.scraper.browser import BrowserManager
+from app.scraper.governor import BrowserGovernor
+
+class TestBrowserGovernor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp, 'rss.csv')
+        patch.object(settings, 'BROWSER_RSS_LOG', self.log).start()
+        patch.object(settings, 'BROWSER_RECYCLE_DRAIN_TIMEOUT', 5).start()
+        self.pages = []
+
+        def fake_init(manager):
+            page = MagicMock()
+            page.browser.process_id = os.getpid()  # 以测试进程充当浏览器主进程，采样真实内存
+            manager.page = page
+            manager.pages_opened = 0
+            self.pages.append(page)
+
+        patch.object(BrowserManager, '_init_page', fake_init).start()
+        self.original_browser = BrowserManager._instance
+        BrowserManager._instance = None
+        self.manager = BrowserManager()
+        self.original = BrowserGovernor._instance
+        BrowserGovernor._instance = None
+        self.governor = BrowserGovernor()
+
+    def tearDown(self):
+        BrowserManager._instance = self.original_browser
+        BrowserGovernor._instance = self.original
+        patch.stopall()
+        shutil.rmtree(self.tmp)
+
+    def rows(self):
+        with open(self.log, encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    @unittest.skipUnless(os.path.isdir('/proc/self'), '需要 /proc')
+    def test_sample_logs_rss(self):
+        self.assertIsNone(self.governor.check())
+        self.assertIsNone(self.governor.check())
+        rows = self.rows()
+        self.assertEqual([row['event'] for row in rows], ['sample', 'sample'])
+        self.assertGreater(float(rows[0]['rss_mb']), 1)
+        self.assertEqual(self.governor.status()['recycles'], 0)
+
+    @unittest.skipUnless(os.path.isdir('/proc/self'), '需要 /proc')
+    def test_recycle_on_rss(self):
+        with patch.object(settings, 'BROWSER_RECYCLE_RSS_MB', 1):
+            with self.assertLogs('app.scraper.governor', 'INFO'):
+                self.assertEqual(self.governor.check(), 'recycle')
+        self.pages[0].quit.assert_called_once()
+        self.assertIs(self.manager.page, self.pages[1])  # 同一实例重新连接新浏览器
+        self.assertEqual([row['event'] for row in self.rows()], ['sample', 'recycle'])
+
+    def test_recycle_after_pages_waits_for_leases(self):
+        for _ in range(3):
+            self.manager.get_new_tab()
+        self.assertEqual(self.manager.pages_opened, 3)
+        entered, release = threading.Event(), threading.Event()
+
+        def scrape():
+            with self.governor.lease():
+                entered.set()
+                release.wait(5)
+
+        scraping = threading.Thread(target=scrape)
+        scraping.start()
+        entered.wait(5)
+        with patch.object(settings, 'BROWSER_RECYCLE_PAGES', 3):
+            recycler = threading.Thread(target=self.governor.check)
+            recycler.start()
+            time.sleep(0.2)
+            self.assertTrue(self.governor.paused)
+            self.pages[0].quit.assert_not_called()  # 等待进行中的抓取
+
+            # 回收期间新的抓取等待
+            started = threading.Event()
+            def next_scrape():
+                with self.governor.lease():
+                    started.set()
+
+            waiting = threading.Thread(target=next_scrape)
+            waiting.start()
+            time.sleep(0.1)
+            self.assertFalse(started.is_set())
+
+            release.set()
+            recycler.join(5)
+            waiting.join(5)
+        self.assertTrue(started.is_set())
+        self.pages[0].quit.assert_called_once()
+        self.assertEqual(self.manager.pages_opened, 0)
+        self.assertEqual(self.governor.recycles, 1)
+        self.assertFalse(self.governor.paused)
+
+    def test_watchdog_recycle_skips_stuck_lease(self):
+        entered = [threading.Event(), threading.Event()]
+        release = [threading.Event(), threading.Event()]
+
+        def scrape(i):
+            with self.governor.lease():
+                entered[i].set()
+                release[i].wait(5)
+
+        stuck, other = [threading.Thread(target=scrape, args=(i,)) for i in range(2)]
+        stuck.start()
+        other.start()
+        for event in entered:
+            event.wait(5)
+        recycler = threading.Thread(target=self.governor.recycle, args=('任务超时',),
+                                    kwargs={'exclude': stuck, 'drain_timeout': 5})
+        recycler.start()
+        time.sleep(0.2)
+        self.pages[0].quit.assert_not_called()  # 等待另一个抓取
+
+        # 另一个抓取归还租约后立即回收，不等待卡住的任务
+        release[1].set()
+        recycler.join(2)
+        self.assertFalse(recycler.is_alive())
+        self.pages[0].quit.assert_called_once()
+        release[0].set()
+        stuck.join(5)
+        other.join(5)
+        self.assertEqual((self.governor.leases, self.governor._holders), (0, {}))
+
+    def test_concurrent_relaunch_starts_one_browser(self):
+        self.manager.page = None
+        launched = []
+
+        def slow_init(manager):
+            time.sleep(0.1)
+            launched.append(1)
+            manager.page = MagicMock()
+
+        with patch.object(BrowserManager, '_init_page', slow_init):
+            threads = [threading.Thread(target=self.manager.get_new_tab) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(len(launched), 1)
+        self.assertEqual(self.manager.pages_opened, 4)
+
+    def test_clear_caches(self):
+        with patch.object(settings, 'BROWSER_CLEAR_INTERVAL', 0.01):
+            time.sleep(0.02)
+            self.assertEqual(self.governor.check(), 'clear')
+        calls = [c.args[0] for c in self.pages[0].run_cdp.call_args_list]
+        self.assertEqual(calls[0], 'Network.clearBrowserCache')
+        self.assertIn('Storage.clearDataForOrigin', calls)
+        self.assertTrue(any(c.kwargs.get('origin') == 'https://www.bilibili.com'
+                            for c in self.pages[0].run_cdp.call_args_list))
+
+    def test_no_browser_no_sampling(self):
+        BrowserManager._instance = None
+        self.assertIsNone(self.governor.check())
+        self.assertFalse(os.path.exists(self.log))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import sys
+import os
+import re
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.scraper.change_detection import http_probe, UNCHANGED, CHANGED, UNKNOWN, FAILED
+from app.scraper.registry import strategy_registry, StrategyInfo
+from app.scraper.strategies import BaseScraper
+from app.services import scraper_service
+
+LINK_PATTERN = re.compile(r'/video/BV\w+')
+
+def list_page(*ids):
+    cards = ''.join(f'<div class="card"><a href="/video/BV{i}">{i}</a></div>' for i in ids)
+    return f'<html><body>{cards}</body></html>'
+
+class ListPageStub(BaseHTTPRequestHandler):
+    """本地列表页：可选 ETag，支持 If-None-Match 返回 304"""
+    body = list_page('1', '2')
+    etag = '"v1"'
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        if self.etag and self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = self.body.encode()
+        self.send_response(200)
+        if self.etag:
+            self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakePage:
+    def __init__(self, first_card):
+        self.first_card = first_card
+
+    def run_js(self, script):
+        return self.first_card
+
+class FakeScraper(BaseScraper):
+    """模拟策略：记录调用次数，列表第一条为 first_card"""
+    ITEM_LINK_PATTERN = LINK_PATTERN
+    FIRST_CARD_JS = 'return first;'
+    calls = 0
+    first_card = 'https://example.com/video/BV1'
+
+    def scrape(self, url, check=None):
+        type(self).calls += 1
+        link = self.check_first_card(FakePage(self.first_card), check)
+        return ScrapedItem(url=link or url, title='标题', content='正文')
+
+class ChangeDetectionTestCase(unittest.TestCase):
+    def setUp(self):
+        ListPageStub.body = list_page('1', '2')
+        ListPageStub.etag = '"v1"'
+        ListPageStub.requests = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ListPageStub)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/list'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestHttpProbe(ChangeDetectionTestCase):
+    def test_conditional_get(self):
+        first = http_probe(self.url)
+        self.assertEqual((first.status, first.etag), (CHANGED, '"v1"'))
+
+        self.assertEqual(http_probe(self.url, etag=first.etag).status, UNCHANGED)
+
+        ListPageStub.etag = '"v2"'
+        self.assertEqual(http_probe(self.url, etag=first.etag).status, CHANGED)
+
+    def test_list_fingerprint_without_validators(self):
+        ListPageStub.etag = None
+        first = http_probe(self.url, link_pattern=LINK_PATTERN)
+        self.assertEqual(first.status, CHANGED)
+        self.assertIsNotNone(first.fingerprint)
+
+        # 页面其余部分变化不影响指纹
+        ListPageStub.body = list_page('1', '2').replace('<body>', '<body><p>广告</p>')
+        self.assertEqual(http_probe(self.url, fingerprint=first.fingerprint, link_pattern=LINK_PATTERN).status, UNCHANGED)
+
+        ListPageStub.body = list_page('3', '1', '2')
+        self.assertEqual(http_probe(self.url, fingerprint=first.fingerprint, link_pattern=LINK_PATTERN).status, CHANGED)
+
+    def test_rendered_shell_is_unknown(self):
+        # 列表由前端渲染：即使有 ETag 也不可信
+        ListPageStub.body = '<html><body><div id="app"></div></body></html>'
+        self.assertEqual(http_probe(self.url, link_pattern=LINK_PATTERN).status, UNKNOWN)
+
+    def test_request_failure(self):
+        self.assertEqual(http_probe('http://127.0.0.1:1/', etag='"v1"', timeout=1).status, FAILED)
+
+class TestScrapeSkip(ChangeDetectionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        patch.object(scraper_service, 'engine', self.engine).start()
+        strategy_registry.register(StrategyInfo('fake', FakeScraper, domain='127.0.0.1', http_fast_path=True))
+        patch.dict(os.environ, {'DEEPSEEK_API_KEY': ''}).start()
+        FakeScraper.calls = 0
+        FakeScraper.first_card = 'https://example.com/video/BV1'
+
+        with Session(self.engine) as session:
+            source = Source(name='B站', url=self.url, platform='fake')
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+    def tearDown(self):
+        patch.stopall()
+        strategy_registry.unregister('fake')
+        super().tearDown()
+
+    def items(self):
+        with Session(self.engine) as session:
+            return session.exec(select(ScrapedItem.url)).all()
+
+    def test_unchanged_page_skips_scrape(self):
+        scraper_service.scrape_source(self.source_id)
+        scraper_service.scrape_source(self.source_id)  # 304
+
+        self.assertEqual(FakeScraper.calls, 1)
+        self.assertEqual(self.items(), ['https://example.com/video/BV1'])
+        check = crud.get_source_check(self.source_id)
+        self.assertEqual((check.runs, check.skips), (2, 1))
+        self.assertEqual(check.last_seen_url, 'https://example.com/video/BV1')
+
+    def test_first_card_probe_stops_before_extraction(self):
+        ListPageStub.body = '<html><body><div id="app"></div></body></html>'
+        scraper_service.scrape_source(self.source_id)
+        self.assertFalse(crud.get_source_check(self.source_id).http_probe)
+
+        scraper_service.scrape_source(self.source_id)
+        self.assertEqual(FakeScraper.calls, 2)
+        self.assertEqual(ListPageStub.requests, 1)  # HTTP 探测已关闭
+        self.assertEqual(crud.get_source_check(self.source_id).skips, 1)
+
+        FakeScraper.first_card = 'https://example.com/video/BV2'
+        scraper_service.scrape_source(self.source_id)
+        self.assertEqual(len(self.items()), 2)
+
+    def test_failed_scrape_keeps_previous_state(self):
+        with patch.object(FakeScraper, 'scrape', side_effect=RuntimeError('boom')):
+            scraper_service.scrape_source(self.source_id)
+        check = crud.get_source_check(self.source_id)
+        self.assertEqual((check.runs, check.skips, check.etag), (1, 0, None))
+
+        scraper_service.scrape_source(self.source_id)  # 未保存 ETag，不会被误判为未变化
+        self.assertEqual(self.items(), ['https://example.com/video/BV1'])
+
+    def test_failed_persist_keeps_previous_state(self):
+        # 详情页类数据源：条目 URL 就是源 URL
+        FakeScraper.first_card = None
+        with patch.object(scraper_service, 'create_scraped_item', side_effect=RuntimeError('database is locked')):
+            scraper_service.scrape_source(self.source_id)
+        check = crud.get_source_check(self.source_id)
+        self.assertEqual((check.runs, check.last_seen_url, check.etag), (1, None, None))
+
+        scraper_service.scrape_source(self.source_id)
+        self.assertEqual(self.items(), [self.url])
+        self.assertEqual(crud.get_source_check(self.source_id).last_seen_url, self.url)
+
+    def test_detail_source_skips_only_when_stored(self):
+        FakeScraper.first_card = None
+        crud.record_source_check(self.source_id, skipped=False, last_seen_url=self.url)
+        scraper_service.scrape_source(self.source_id)  # 状态记录了该 URL 但条目未入库
+        self.assertEqual(FakeScraper.calls, 1)
+        self.assertEqual(self.items(), [self.url])
+
+        ListPageStub.etag = '"v2"'
+        scraper_service.scrape_source(self.source_id)
+        self.assertEqual(FakeScraper.calls, 1)
+        self.assertEqual(crud.get_source_check(self.source_id).skips, 1)
+
+if __name__ == '__main__':
+    unittest.main()
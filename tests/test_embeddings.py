@@ -0,0 +1,205 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlmodel import SQLModel, Session, create_engine
+from unittest.mock import patch
+
+from app.config import settings
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.ai.embeddings import HashingEmbedder, create_embedder, normalize
+from app.ai.vector_store import VectorStore, IVFIndex
+from app.services.embedding_service import EmbeddingService, embedding_text
+
+PHONE = ('苹果发布会定档9月10日', '苹果官方宣布秋季发布会将于9月10日举行，iPhone 17 系列将亮相，新增超薄机型，售价有望维持不变。')
+PHONE_REPOST = ('iPhone 17 发布会定档 9 月 10 日', '苹果宣布秋季发布会将于 9 月 10 日举行，iPhone 17 系列将亮相，新增超薄机型，售价有望维持不变。')
+CAMERA = ('小米 15 Ultra 影像评测', '一英寸大底配合可变光圈，夜景表现出色，长焦人像的虚化过渡也很自然，续航中规中矩。')
+PARK = ('周末公园赏花', '今天去公园散步看到了很多漂亮的花，天气非常好，湖边有人钓鱼，孩子们在草地上放风筝。')
+
+def random_vectors(count, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    return normalize(rng.standard_normal((count, dim)).astype(np.float32))
+
+class TestHashingEmbedder(unittest.TestCase):
+    def test_similarity(self):
+        vectors = HashingEmbedder(256).embed([' '.join(t) for t in (PHONE, PHONE_REPOST, CAMERA, PARK)])
+        self.assertEqual(vectors.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1, rtol=1e-5)
+        sims = vectors @ vectors.T
+        self.assertGreater(sims[0, 1], settings.EMBEDDING_CLUSTER_THRESHOLD)
+        self.assertLess(sims[0, 2], settings.EMBEDDING_RELATED_MIN)
+        self.assertLess(sims[2, 3], settings.EMBEDDING_RELATED_MIN)
+
+    def test_empty_text(self):
+        self.assertFalse(HashingEmbedder(64).embed(['', '!!!']).any())
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_embedder('word2vec')
+
+class TestVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_put_get_and_reopen(self):
+        store = VectorStore(self.tmp, 16, 'test')
+        vectors = random_vectors(3, 16)
+        store.put([1, 5, 3000], vectors)  # 超出初始容量时翻倍扩容
+        self.assertGreaterEqual(store.capacity, 3001)
+        self.assertEqual(store.rows, 3001)
+        np.testing.assert_allclose(store.get([5]), vectors[1:2], atol=1e-3)
+        self.assertFalse(store.get([2, 99999]).any())
+        store.close()
+
+        reopened = VectorStore(self.tmp, 16, 'test')
+        self.assertEqual(reopened.rows, 3001)
+        self.assertEqual(reopened.valid_ids().tolist(), [1, 5, 3000])
+        self.assertTrue(reopened.has(3000))
+
+        # 后端或维度变化时旧向量作废
+        changed = VectorStore(self.tmp, 16, 'other')
+        self.assertEqual((changed.rows, changed.count()), (0, 0))
+
+    def test_search(self):
+        store = VectorStore(self.tmp, 32, 'test')
+        vectors = random_vectors(100, 32)
+        store.put(range(1, 101), vectors)
+        hits = store.search(vectors[41], 3)
+        self.assertEqual(hits[0][0], 42)
+        self.assertAlmostEqual(hits[0][1], 1.0, places=2)
+        self.assertNotIn(0, [i for i, _ in store.search(-vectors[41], 100)])  # 空行不参与排序
+        self.assertNotEqual(store.search(vectors[41], 1, exclude=[42])[0][0], 42)
+        self.assertTrue(all(i >= 50 for i, _ in store.search(vectors[41], 5, start=50)))
+        self.assertEqual(store.search(vectors[41], 5, min_score=0.99), [(42, hits[0][1])])
+
+class TestIVFIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = VectorStore(self.tmp, 32, 'test')
+        rng = np.random.default_rng(1)
+        centers = random_vectors(20, 32, seed=2)
+        self.vectors = normalize(centers[rng.integers(0, 20, 2000)] + 0.05 * rng.standard_normal((2000, 32)))
+        self.store.put(range(1, 2001), self.vectors)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_matches_brute_force(self):
+        index = IVFIndex(self.store, nprobe=4)
+        index.build(nlist=20)
+        self.assertEqual(sum(len(ids) for ids in index.lists), 2000)
+        recall = []
+        for query in self.vectors[:50]:
+            exact = {i for i, _ in self.store.search(query, 10)}
+            found = {i for i, _ in index.search(query, 10)}
+            recall.append(len(exact & found) / 10)
+        self.assertGreaterEqual(np.mean(recall), 0.95)
+        # 探测全部簇时与暴力检索一致
+        self.assertEqual(index.search(self.vectors[7], 10, nprobe=20), self.store.search(self.vectors[7], 10))
+
+    def test_new_vectors_after_build(self):
+        index = IVFIndex(self.store)
+        index.build(nlist=20)
+        extra = random_vectors(1, 32, seed=9)
+        self.store.put([2500], extra)
+        self.assertEqual(index.search(extra[0], 1)[0][0], 2500)
+        self.assertGreater(index.stale_ratio(), 0.2)
+
+class TestEmbeddingService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # 向量在后台线程中处理，使用文件库以便多线程各自连接
+        self.engine = create_engine(f"sqlite:///{self.tmp}/test.db", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        patch.object(settings, 'EMBEDDING_DIR', os.path.join(self.tmp, 'embeddings')).start()
+        self.service = EmbeddingService()
+        self.service.reset()
+        with Session(self.engine) as session:
+            source = Source(name='测试', url='https://example.com', platform='coolapk')
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+    def tearDown(self):
+        self.service.reset()
+        patch.stopall()
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def add(self, title, content, score=80):
+        item = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title=title, url=f'https://example.com/{crud.get_max_item_id() + 1}',
+            content=content, ai_summary='摘要', ai_score=score, risk_level='Low'))
+        self.service.submit(item)
+        self.assertTrue(self.service.join(10))
+        return item.id
+
+    def item(self, item_id):
+        with Session(self.engine) as session:
+            return session.get(ScrapedItem, item_id)
+
+    def test_cluster_related_and_collapse(self):
+        phone = self.add(*PHONE)
+        camera = self.add(*CAMERA)
+        repost = self.add(*PHONE_REPOST)
+        self.add(*PARK)
+
+        self.assertEqual(self.item(phone).cluster_id, phone)
+        self.assertEqual(self.item(repost).cluster_id, phone)
+        self.assertIsNone(self.item(camera).cluster_id)
+
+        item = self.item(repost)
+        self.assertIn('相关内容', item.feed_html)
+        self.assertIn(f'href="https://example.com/{phone}"', item.feed_html)
+        self.assertNotIn('相关内容', self.item(camera).feed_html)
+
+        titles = [row.title for row in crud.iter_feed_rows(collapse=True)]
+        self.assertEqual(titles, [PARK[0], PHONE_REPOST[0], CAMERA[0]])
+        self.assertEqual(len(list(crud.iter_feed_rows())), 4)
+
+    def test_related_skips_filtered_items(self):
+        hidden = self.add(*PHONE, score=10)
+        repost = self.add(*PHONE_REPOST)
+        self.assertEqual(self.item(repost).cluster_id, hidden)
+        self.assertEqual(self.item(repost).related, '')
+
+    def test_cluster_window(self):
+        phone = self.add(*PHONE)
+        with patch.object(settings, 'EMBEDDING_CLUSTER_HOURS', 0):
+            repost = self.add(*PHONE_REPOST)
+        self.assertIsNone(self.item(repost).cluster_id)
+        self.assertIn(f'https://example.com/{phone}', self.item(repost).related)
+
+    def test_rebuild(self):
+        with patch.object(settings, 'EMBEDDING_ENABLED', False):
+            phone = self.add(*PHONE)
+            repost = self.add(*PHONE_REPOST)
+            crud.create_scraped_item(ScrapedItem(source_id=self.source_id, title='', url='https://example.com/empty',
+                                                 content='', ai_summary='分析失败'))
+        self.assertEqual(self.service.stats()['vectors'], 0)
+        stats = self.service.rebuild(batch_size=2)
+        self.assertEqual(stats, {'embedded': 2, 'clustered': 1, 'related': 2})
+        self.assertEqual(self.item(repost).cluster_id, phone)
+        self.assertEqual(self.service.search_text(' '.join(PHONE), 1)[0][0], phone)
+
+    def test_ivf_threshold(self):
+        with patch.object(settings, 'EMBEDDING_IVF_MIN_VECTORS', 2):
+            self.add(*PHONE)
+            repost = self.add(*PHONE_REPOST)
+            self.assertIsNotNone(self.service._ivf)
+            self.assertIn('相关内容', self.item(repost).feed_html)
+
+    def test_failed_summary_not_embedded(self):
+        self.assertEqual(embedding_text('标题', '分析失败', '正文'), '标题\n正文')
+
+if __name__ == '__main__':
+    unittest.main()
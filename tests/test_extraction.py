@@ -0,0 +1,157 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from app.config import settings
+from app.scraper.extraction import SpecStore, SpecError, compile_spec
+from app.scraper.registry import strategy_registry
+from app.scraper.strategies import CoolAPKScraper
+from app.scraper.utils.dates import parse_date
+
+NOW = datetime(2024, 3, 10, 12, 0)
+
+class TestParseDate(unittest.TestCase):
+    def test_relative(self):
+        self.assertEqual(parse_date('1小时前', now=NOW), datetime(2024, 3, 10, 11, 0))
+        self.assertEqual(parse_date('发布于 30分钟前', now=NOW), datetime(2024, 3, 10, 11, 30))
+        self.assertEqual(parse_date('2 days ago', now=NOW), datetime(2024, 3, 8, 12, 0))
+        self.assertEqual(parse_date('刚刚', now=NOW), NOW)
+        self.assertEqual(parse_date('昨天 08:15', now=NOW), datetime(2024, 3, 9, 8, 15))
+
+    def test_absolute(self):
+        self.assertEqual(parse_date('2023-11-20', now=NOW), datetime(2023, 11, 20))
+        self.assertEqual(parse_date('2023年1月2日 10:05', now=NOW), datetime(2023, 1, 2, 10, 5))
+        self.assertEqual(parse_date('编辑于 2023-11-20 08:00 IP属地: 上海', now=NOW), datetime(2023, 11, 20, 8, 0))
+        self.assertEqual(parse_date('03-01', now=NOW), datetime(2024, 3, 1))
+        self.assertEqual(parse_date('11-20', now=NOW), datetime(2023, 11, 20))  # 未来日期视为去年
+        self.assertEqual(parse_date('20/11 2023', formats=['%d/%m %Y']), datetime(2023, 11, 20))
+        self.assertIsNone(parse_date('未知'))
+        self.assertIsNone(parse_date(''))
+
+class TestCompileSpec(unittest.TestCase):
+    SPEC = {
+        'platform': 'demo',
+        'fields': {
+            'title': {'selectors': ['h1', '.title'], 'fallback': {'field': 'content', 'limit': 5}, 'default': '无标题'},
+            'content': {'selectors': '.content'},
+            'images': {'selectors': ['img'], 'attr': ['data-src', 'src'], 'type': 'list', 'limit': 2},
+            'views': {'selectors': ['.views'], 'regex': r'(\d+)\s*播放'},
+            'publish_date': {'selectors': ['.time'], 'type': 'date'},
+        },
+    }
+
+    def test_single_script(self):
+        plan = compile_spec(self.SPEC)
+        self.assertIn('"selectors": ["h1", ".title"]', plan.script)
+        self.assertEqual(plan.script.count('return out;'), 1)
+
+    def test_parse(self):
+        plan = compile_spec(self.SPEC)
+        data = plan.parse({
+            'title': None, 'content': '一段很长的正文内容',
+            'images': ['a.jpg', 'a.jpg', 'b.jpg', 'c.jpg'],
+            'views': '1234 播放', 'publish_date': '3小时前',
+        }, now=NOW)
+        self.assertEqual(data['title'], '一段很长的...')
+        self.assertEqual(data['images'], ['a.jpg', 'b.jpg'])
+        self.assertEqual(data['views'], '1234')
+        self.assertEqual(data['publish_date'], datetime(2024, 3, 10, 9, 0))
+        self.assertEqual(plan.parse({})['title'], '无标题')
+
+    def test_invalid_specs(self):
+        for spec in ({'fields': {}}, {'platform': 'x'},
+                     {'platform': 'x', 'fields': {'a': {'selectors': []}}},
+                     {'platform': 'x', 'fields': {'a': {'selectors': 'a', 'type': 'number'}}},
+                     {'platform': 'x', 'fields': {'a': {'selectors': 'a', 'regex': '('}}},
+                     {'platform': 'x', 'fields': {'a': {'selectors': 'a', 'fallback': 'b'}}},
+                     {'platform': 'x', 'fields': {'a': {'selector': 'a'}}}):
+            with self.assertRaises(SpecError):
+                compile_spec(spec)
+
+    def test_builtin_specs_compile(self):
+        store = SpecStore()
+        for platform in ('bilibili', 'xiaohongshu', 'xiaoheihe', 'coolapk'):
+            self.assertEqual(store.get(platform).platform, platform)
+
+class FakeWait:
+    def ele_displayed(self, selector, timeout):
+        self.selector = selector
+
+class FakePage:
+    def __init__(self, raw):
+        self.raw = raw
+        self.wait = FakeWait()
+        self.scripts = []
+
+    def run_js(self, script):
+        self.scripts.append(script)
+        return self.raw
+
+class TestSpecStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        patch.object(settings, 'EXTRACTION_SPEC_DIR', self.tmp).start()
+        self.writes = 0
+
+    def tearDown(self):
+        patch.stopall()
+        strategy_registry.unregister('demo')
+        shutil.rmtree(self.tmp)
+
+    def write(self, spec):
+        path = os.path.join(self.tmp, f"{spec['platform']}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(spec, f)
+        # 保证 mtime 变化 (部分文件系统精度较低)
+        self.writes += 1
+        os.utime(path, (time.time() + self.writes, time.time() + self.writes))
+
+    def test_hot_reload_keeps_last_good_plan(self):
+        store = SpecStore()
+        self.write({'platform': 'demo', 'fields': {'title': {'selectors': 'h1'}}})
+        first = store.get('demo')
+        self.assertIs(store.get('demo'), first)  # 未修改时复用编译结果
+
+        self.write({'platform': 'demo', 'fields': {'title': {'selectors': 'h2'}}})
+        second = store.get('demo')
+        self.assertEqual(second.fields[0].selectors, ('h2',))
+
+        with open(os.path.join(self.tmp, 'demo.json'), 'w') as f:
+            f.write('{"platform": "demo", ')  # 编辑中的半个文件
+        os.utime(os.path.join(self.tmp, 'demo.json'), (time.time() + 100, time.time() + 100))
+        with self.assertLogs('app.scraper.extraction', 'ERROR'):
+            self.assertIs(store.get('demo'), second)
+
+    def test_user_dir_overrides_builtin(self):
+        self.write({'platform': 'coolapk', 'wait': '.x', 'fields': {'title': {'selectors': '.custom'}}})
+        page = FakePage({'title': '自定义'})
+        scraper = CoolAPKScraper()
+        self.assertEqual(scraper.extract(page), {'title': '自定义'})
+        self.assertEqual(page.wait.selector, 'css:.x')
+        self.assertEqual(len(page.scripts), 1)
+        self.assertIn('.custom', page.scripts[0])
+
+    def test_spec_only_platform(self):
+        self.write({'platform': 'demo', 'strategy': {'domain': 'demo.test', 'label': '演示'},
+                    'fields': {'title': {'selectors': 'h1'}}})
+        with patch.object(strategy_registry, '_loaded', False):
+            self.assertEqual(strategy_registry.detect_platform('https://www.demo.test/1'), 'demo')
+        scraper = strategy_registry.get('demo')
+        self.assertEqual(scraper.platform, 'demo')
+        item = scraper.build_item('https://www.demo.test/1', scraper.extract(FakePage({'title': '标题'})))
+        self.assertEqual((item.title, item.content), ('标题', ''))
+
+    def test_missing_spec(self):
+        with self.assertRaises(SpecError):
+            SpecStore().get('nope')
+
+if __name__ == '__main__':
+    unittest.main()
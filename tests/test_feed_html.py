@@ -0,0 +1,135 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.rss import render
+from app.rss.render import ENTRY_TEMPLATE_VERSION, entry_html
+
+class TestFeedHtml(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+
+        with Session(self.engine) as session:
+            source = Source(name="B站", url="https://www.bilibili.com/v/popular", platform="bilibili")
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+        self.item = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title="标题", url="https://example.com/1", content="正文",
+            ai_summary="旧摘要", ai_score=80, risk_level="Low", sentiment="Positive"
+        ))
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def set_feed_html(self, html, version):
+        with Session(self.engine) as session:
+            item = session.get(ScrapedItem, self.item.id)
+            item.feed_html, item.feed_html_version = html, version
+            session.add(item)
+            session.commit()
+
+    def test_rendered_at_ingest(self):
+        self.assertEqual(self.item.feed_html_version, ENTRY_TEMPLATE_VERSION)
+        self.assertIn("旧摘要", self.item.feed_html)
+
+    def test_feed_uses_stored_fragment(self):
+        self.set_feed_html("<p>stored</p>", ENTRY_TEMPLATE_VERSION)
+        row = next(crud.iter_feed_rows())
+        self.assertIsNone(row.content)  # 当前版本不读取正文
+        self.assertEqual(entry_html(row), "<p>stored</p>")
+
+    def test_stale_version_renders_on_the_fly(self):
+        self.set_feed_html("<p>stale</p>", ENTRY_TEMPLATE_VERSION - 1)
+        row = next(crud.iter_feed_rows())
+        self.assertEqual(row.content, "正文")
+        self.assertIn("旧摘要", entry_html(row))
+
+    def test_analysis_update_rerenders_only_on_change(self):
+        with patch.object(render, 'render_entry_html', wraps=render.render_entry_html) as rendered:
+            crud.update_item_analysis(self.item.id, ai_summary="旧摘要", ai_score=80)
+            self.assertEqual(rendered.call_count, 0)
+
+            item = crud.update_item_analysis(self.item.id, ai_summary="新摘要")
+            self.assertEqual(rendered.call_count, 1)
+        self.assertIn("新摘要", item.feed_html)
+        self.assertIn("新摘要", entry_html(next(crud.iter_feed_rows())))
+
+    def test_thumbnail_urls_absolutized_at_serve_time(self):
+        digest = 'a' * 64
+        item = crud.set_item_thumbnails(self.item.id, [digest])
+        self.assertIn(f'<img src="/img/{digest}"', item.feed_html)  # 存储相对地址
+        for base in ('https://feed.example.com', 'https://new.example.com/'):
+            with patch.object(render.settings, 'PUBLIC_BASE_URL', base):
+                html = entry_html(next(crud.iter_feed_rows()))
+            self.assertIn(f'<img src="{base.rstrip("/")}/img/{digest}"', html)
+
+    def test_analysis_update_rejects_other_fields(self):
+        with self.assertRaises(ValueError):
+            crud.update_item_analysis(self.item.id, title="x")
+
+class TestConcurrentRerender(unittest.TestCase):
+    """不同线程分别更新缩略图、相关内容与 AI 字段时，feed_html 包含全部改动"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp, 'database.db')}",
+                                    connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        with Session(self.engine) as session:
+            source = Source(name="B站", url="https://www.bilibili.com", platform="bilibili")
+            session.add(source)
+            session.commit()
+            source_id = source.id
+        self.item = crud.create_scraped_item(ScrapedItem(
+            source_id=source_id, title="标题", url="https://example.com/1", content="正文",
+            ai_summary="旧摘要", ai_score=80, risk_level="Low", sentiment="Positive"
+        ))
+
+    def tearDown(self):
+        patch.stopall()
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def test_interleaved_updates_keep_all_changes(self):
+        def slow_render(item):
+            time.sleep(0.2)  # 放大读取与提交之间的窗口
+            render.apply_entry_html(item)
+
+        updates = [
+            lambda: crud.set_item_thumbnails(self.item.id, ['a' * 64]),
+            lambda: crud.set_item_related(self.item.id, [{'id': 99, 'title': '相关报道', 'url': 'https://example.com/99'}]),
+            lambda: crud.update_item_analysis(self.item.id, ai_summary="新摘要"),
+        ]
+        with patch.object(crud, 'apply_entry_html', slow_render):
+            threads = [threading.Thread(target=update) for update in updates]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+
+        with Session(self.engine) as session:
+            html = session.get(ScrapedItem, self.item.id).feed_html
+        self.assertIn('a' * 64, html)
+        self.assertIn('相关报道', html)
+        self.assertIn('新摘要', html)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import os
+import gzip
+import json
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.database.search import create_search_index
+from app.rss import stream
+from app.rss.stream import FeedMeta, SERIALIZERS, encode_stream, negotiate_encoding
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+META = FeedMeta(title='Feed & <Test>', link='http://localhost:8080', description='d',
+                self_link='http://localhost:8081/feed.xml', hub='http://localhost:8081/websub')
+
+class TestFeedStream(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        create_search_index(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+
+        now = datetime.now()
+        with Session(self.engine) as session:
+            source = Source(name="B站", url="https://www.bilibili.com/v/popular", platform="bilibili")
+            session.add(source)
+            session.commit()
+            rows = [
+                ("原神新版本 <前瞻>", 90, "Low", 3),
+                ("显卡评测", 70, "Low", 2),
+                ("低分条目", 30, "Low", 1),
+                ("高风险条目", 95, "High", 0),
+            ]
+            for title, score, risk, age in rows:
+                session.add(ScrapedItem(
+                    source_id=source.id, title=title, url=f"https://example.com/{score}", content=f"{title} 正文",
+                    ai_summary="摘要", ai_score=score, risk_level=risk, created_at=now - timedelta(hours=age)
+                ))
+            session.commit()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def render(self, feed_format, query=None):
+        rows = crud.iter_feed_rows(limit=50, query=query)
+        return b''.join(encode_stream(SERIALIZERS[feed_format](rows, META)))
+
+    def test_rss_filters_and_orders(self):
+        channel = ET.fromstring(self.render('rss')).find('channel')
+        titles = [item.findtext('title') for item in channel.findall('item')]
+        self.assertEqual(titles, ["显卡评测", "原神新版本 <前瞻>"])
+        self.assertEqual(channel.findtext('title'), 'Feed & <Test>')
+        rels = {link.get('rel'): link.get('href') for link in channel.findall(f'{ATOM}link')}
+        self.assertEqual(rels['hub'], META.hub)
+        self.assertIn('AI 摘要', channel.find('item').findtext('description'))
+
+    def test_atom(self):
+        feed = ET.fromstring(self.render('atom'))
+        entries = feed.findall(f'{ATOM}entry')
+        self.assertEqual([e.findtext(f'{ATOM}title') for e in entries], ["显卡评测", "原神新版本 <前瞻>"])
+        self.assertEqual(feed.findtext(f'{ATOM}updated'), entries[0].findtext(f'{ATOM}updated'))
+        self.assertEqual(entries[0].find(f'{ATOM}content').get('type'), 'html')
+
+    def test_json_feed(self):
+        feed = json.loads(self.render('json'))
+        self.assertEqual(feed['version'], 'https://jsonfeed.org/version/1.1')
+        self.assertEqual(feed['hubs'], [{'type': 'WebSub', 'url': META.hub}])
+        self.assertEqual([i['id'] for i in feed['items']], ["https://example.com/70", "https://example.com/90"])
+        self.assertEqual(feed['items'][0]['_smart_scraper']['ai_score'], 70)
+
+    def test_empty_feeds_are_valid(self):
+        for feed_format in ('rss', 'atom'):
+            ET.fromstring(self.render(feed_format, query='不存在'))
+        self.assertEqual(json.loads(self.render('json', query='不存在'))['items'], [])
+
+    def test_keyword_feed(self):
+        feed = json.loads(self.render('json', query='原神'))
+        self.assertEqual([i['title'] for i in feed['items']], ["原神新版本 <前瞻>"])
+
+    def test_keyword_filters_apply_before_limit(self):
+        with Session(self.engine) as session:
+            source_id = session.exec(select(Source.id)).first()
+            # 更新的命中条目评分不足或属于同一事件，不应挤掉较早的合格条目
+            for i in range(3):
+                session.add(ScrapedItem(source_id=source_id, title=f"原神事件{i}", url=f"https://example.com/c{i}",
+                                        content="", ai_score=80, risk_level="Low", cluster_id=1000))
+            for i in range(3):
+                session.add(ScrapedItem(source_id=source_id, title=f"原神低分{i}", url=f"https://example.com/low{i}",
+                                        content="", ai_score=10, risk_level="Low"))
+            session.commit()
+        titles = [row.title for row in crud.iter_feed_rows(limit=1, query='原神')]
+        self.assertEqual(titles, ["原神事件2"])
+        titles = [row.title for row in crud.iter_feed_rows(limit=2, query='原神', collapse=True)]
+        self.assertEqual(titles, ["原神事件2", "原神新版本 <前瞻>"])
+
+    def test_gzip_stream_matches_identity(self):
+        fragments = list(SERIALIZERS['rss'](crud.iter_feed_rows(limit=50), META))
+        plain = b''.join(encode_stream(fragments))
+        # chunk_size 很小时分多块压缩输出
+        chunks = list(encode_stream(fragments, 'gzip', chunk_size=64))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), plain)
+
+    def test_negotiate_encoding(self):
+        with patch.object(stream, 'brotli', None):
+            self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'gzip')
+            self.assertEqual(negotiate_encoding('br'), 'identity')
+        with patch.object(stream, 'brotli', object()):
+            self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+            self.assertEqual(negotiate_encoding('br;q=0.5, gzip'), 'gzip')
+            self.assertEqual(negotiate_encoding('*'), 'br')
+            self.assertEqual(negotiate_encoding('*, br;q=0'), 'gzip')
+        self.assertEqual(negotiate_encoding(None), 'identity')
+        self.assertEqual(negotiate_encoding('gzip;q=0'), 'identity')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.config import settings
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.rss.routes import router
+from app.services.image_pipeline import ImageCache, DhashIndex, ImagePipeline, image_urls, image_pipeline
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+DIGEST = 'a' * 40
+
+class TestImageUrls(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(image_urls('//i0.hdslb.com/a.jpg, https://x/b.png,data:xx,https://x/b.png', 3),
+                         ['https://i0.hdslb.com/a.jpg', 'https://x/b.png'])
+        self.assertEqual(image_urls('["https://x/1", "https://x/2", "https://x/3"]', 2), ['https://x/1', 'https://x/2'])
+        self.assertEqual(image_urls('', 3), [])
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_lru_eviction_by_disk_budget(self):
+        cache = ImageCache(self.tmp, max_bytes=3000)
+        digests = [f'{i:040x}' for i in range(3)]
+        for i, digest in enumerate(digests):
+            cache.put(digest, b'x' * 1000)
+            os.utime(cache.path(digest), (1000 + i, 1000 + i))
+        self.assertEqual(cache.total_size(), 3000)
+
+        cache.get(digests[0])  # 最近访问过，不应被淘汰
+        cache.put('f' * 40, b'x' * 1000)
+        self.assertIsNotNone(cache.get(digests[0]))
+        self.assertIsNone(cache.get(digests[1]))
+        self.assertIsNotNone(cache.get('f' * 40))
+        self.assertLessEqual(cache.total_size(), 2700)
+
+    def test_total_size_survives_restart(self):
+        ImageCache(self.tmp, max_bytes=10 ** 6).put(DIGEST, b'x' * 10)
+        self.assertEqual(ImageCache(self.tmp, max_bytes=10 ** 6).total_size(), 10)
+
+class TestDhashIndex(unittest.TestCase):
+    def test_nearest_within_distance(self):
+        index = DhashIndex([('a', 0b1111), ('b', 0xFFFF_0000_0000_0000)])
+        self.assertEqual(index.find(0b0111, 1), 'a')
+        self.assertIsNone(index.find(0b0000, 2))
+        index.add('c', 0)
+        self.assertEqual(index.find(0b0001, 2), 'c')
+
+class TestImageRoute(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        patch.object(image_pipeline, '_cache', ImageCache(self.tmp, 10 ** 6)).start()
+        app = FastAPI()
+        app.include_router(router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        patch.stopall()
+        shutil.rmtree(self.tmp)
+
+    def test_serves_cached_thumbnail(self):
+        image_pipeline.cache.put(DIGEST, b'RIFF....WEBP')
+        response = self.client.get(f'/img/{DIGEST}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-type'], 'image/webp')
+        self.assertIn('immutable', response.headers['cache-control'])
+        self.assertEqual(response.content, b'RIFF....WEBP')
+
+    def test_unknown_digest(self):
+        self.assertEqual(self.client.get('/img/' + 'b' * 40).status_code, 404)
+        self.assertEqual(self.client.get('/img/..%2Fdatabase.db').status_code, 404)
+
+class ImageHost(BaseHTTPRequestHandler):
+    """本地图床：要求 Referer，否则 403 (模拟防盗链)"""
+    images = {}
+    referers = []
+
+    def do_GET(self):
+        type(self).referers.append(self.headers.get('Referer'))
+        body = self.images.get(self.path)
+        if body is None or not self.headers.get('Referer'):
+            self.send_response(404 if body is None else 403)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@unittest.skipUnless(cv2, '需要 opencv-python')
+class TestImagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        patch.object(settings, 'IMAGE_CACHE_DIR', self.tmp).start()
+        patch.object(settings, 'IMAGE_THUMB_SIZE', 200).start()
+        self.pipeline = ImagePipeline()
+        for name in ('_cache', '_index', '_executor'):
+            patch.object(self.pipeline, name, None).start()
+
+        gradient = np.tile(np.linspace(0, 255, 800, dtype=np.uint8), (600, 1))
+        cover = cv2.merge([gradient, gradient.T[:600, :600].repeat(2, axis=1)[:, :800], gradient[::-1]])
+        other = np.zeros((300, 300, 3), np.uint8)
+        other[::40] = 255
+        other[:, ::25] = 128
+        ImageHost.images = {
+            '/cover.png': cv2.imencode('.png', cover)[1].tobytes(),
+            '/cover-small.png': cv2.imencode('.png', cv2.resize(cover, (400, 300)))[1].tobytes(),
+            '/other.png': cv2.imencode('.png', other)[1].tobytes(),
+        }
+        ImageHost.referers = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHost)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+
+        with Session(self.engine) as session:
+            source = Source(name='B站', url='https://www.bilibili.com', platform='bilibili')
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+    def tearDown(self):
+        self.pipeline.join(5)
+        patch.stopall()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def create_item(self, url, *paths):
+        return crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title='标题', url=url, content='正文',
+            images=','.join(self.base + p for p in paths)))
+
+    def test_thumbnails_are_deduplicated_and_rendered(self):
+        item = self.create_item('https://www.bilibili.com/video/BV1', '/cover.png', '/cover-small.png', '/other.png', '/missing.png')
+        self.pipeline.submit(item).result(10)
+
+        item = crud.get_scraped_items()[0]
+        digests = item.thumbnails.split(',')
+        self.assertEqual(len(digests), 2)  # 不同尺寸的封面只保留一张，缺失的图片跳过
+        self.assertIn(f'/img/{digests[0]}', item.feed_html)
+        self.assertEqual(set(ImageHost.referers), {'https://www.bilibili.com/video/BV1'})
+        thumbnail = cv2.imdecode(np.frombuffer(self.pipeline.cache.get(digests[0]).read_bytes(), np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(max(thumbnail.shape[:2]), 200)
+
+        # 其它条目中的同一张图复用已有缩略图
+        again = self.create_item('https://www.bilibili.com/video/BV2', '/cover-small.png')
+        self.pipeline.submit(again).result(10)
+        self.assertEqual(crud.get_scraped_items()[0].thumbnails, digests[0])
+
+    def test_evicted_thumbnail_is_regenerated(self):
+        digest = self.pipeline.cache_image(self.base + '/other.png', 'https://www.bilibili.com/')
+        self.pipeline.cache.path(digest).unlink()
+        path = self.pipeline.lookup(digest)
+        self.assertTrue(path.exists())
+        self.assertEqual(path.name, f'{digest}.webp')
+
+if __name__ == '__main__':
+    unittest.main()
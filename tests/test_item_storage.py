@@ -0,0 +1,105 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.config import settings
+from app.database import crud
+from app.database.models import Source, ScrapedItem, ItemContent
+
+class TestItemStorage(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+        with Session(self.engine) as session:
+            source = Source(name="B站", url="https://www.bilibili.com", platform="bilibili")
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+    def tearDown(self):
+        crud.invalidate_stats_cache()
+        self.patcher.stop()
+
+    def test_long_content_moved_to_compressed_table(self):
+        transcript = "字幕内容" * 2000
+        item = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title="长视频", url="https://b23.tv/long", content=transcript
+        ))
+
+        self.assertEqual(len(item.content), settings.CONTENT_INLINE_LIMIT)
+        with Session(self.engine) as session:
+            stored = session.get(ItemContent, item.id)
+            self.assertIsNotNone(stored)
+            self.assertLess(len(stored.data), len(transcript.encode('utf-8')))
+        self.assertEqual(crud.get_item_content(item.id), transcript)
+
+    def test_short_content_stays_inline(self):
+        item = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title="短笔记", url="https://xhs/short", content="短内容"
+        ))
+        with Session(self.engine) as session:
+            self.assertIsNone(session.get(ItemContent, item.id))
+        self.assertEqual(crud.get_item_content(item.id), "短内容")
+
+    def test_projection_and_deferred_loading(self):
+        crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title="标题", url="https://b23.tv/1", content="正文", ai_score=80
+        ))
+
+        rows = crud.get_item_summaries(limit=10, source_id=self.source_id)
+        self.assertEqual(rows[0].title, "标题")
+        self.assertEqual(rows[0].ai_score, 80)
+        self.assertNotIn('content', rows[0]._fields)
+
+        items = crud.get_scraped_items(limit=10, with_content=False)
+        self.assertEqual(items[0].title, "标题")
+        with self.assertRaises(Exception):
+            items[0].content
+
+class TestMigrateDb(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'database.db')
+        self.engine = create_engine(f"sqlite:///{self.path}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def test_migrates_database_with_search_index(self):
+        from app.database import create_db_and_tables, search
+        from scripts import migrate_db
+        with patch('app.database.engine.engine', self.engine):
+            create_db_and_tables()  # 包含全文索引与触发器
+        with Session(self.engine) as session:
+            source = Source(name="B站", url="https://www.bilibili.com", platform="bilibili")
+            session.add(source)
+            session.commit()
+            # 迁移前入库的超长正文仍在主表中
+            session.add(ScrapedItem(source_id=source.id, title="长视频", url="https://b23.tv/long",
+                                    content="原神启动" * 1250))
+            session.commit()
+
+        with patch.object(migrate_db, 'DB_PATH', self.path):
+            migrate_db.migrate_db()
+
+        with Session(self.engine) as session:
+            item = session.exec(select(ScrapedItem)).one()
+            self.assertEqual(len(item.content), settings.CONTENT_INLINE_LIMIT)
+            self.assertIsNotNone(session.get(ItemContent, item.id))
+            self.assertIsNotNone(item.feed_html)
+        self.assertEqual(search.match_item_ids(self.engine, '原神'), [item.id])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import MagicMock, patch
+
+from app.config import settings
+from app.core.lifecycle import Lifecycle, INTAKE, DRAIN, RESOURCES
+from app.core.task_journal import TaskJournal
+from app.core.task_queue import TaskQueue
+from app.scraper.browser import BrowserManager
+
+CALLS = []
+
+def slow_call(value, delay=0.05):
+    time.sleep(delay)
+    CALLS.append(value)
+
+class TestTaskQueueStop(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'journal.jsonl')
+        patch.object(settings, 'TASK_JOURNAL_PATH', self.path).start()
+        patch.object(settings, 'TASK_JOURNAL_ENABLED', True).start()
+        self.original = TaskQueue._instance
+        TaskQueue._instance = None
+        self.queue = TaskQueue()
+        CALLS.clear()
+
+    def tearDown(self):
+        self.queue.stop(5)
+        TaskQueue._instance = self.original
+        patch.stopall()
+        shutil.rmtree(self.tmp)
+
+    def test_drain_runs_queued_tasks(self):
+        self.queue.start(num_workers=2)
+        for i in range(6):
+            self.queue.add_task(slow_call, i, delay=0.01)
+        self.assertEqual(self.queue.stop(10), 0)
+        self.assertEqual(sorted(CALLS), list(range(6)))
+        self.assertFalse(self.queue.running)
+        self.assertEqual(self.queue.pending(), 0)
+        self.assertEqual(TaskJournal(self.path).open(), [])
+
+    def test_deadline_leaves_tasks_in_journal(self):
+        self.queue.start(num_workers=1)
+        for i in range(10):
+            self.queue.add_task(slow_call, i, delay=0.2)
+        start = time.monotonic()
+        with self.assertLogs('app.core.task_queue', 'WARNING'):
+            left = self.queue.stop(0.3)
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertGreater(left, 0)
+        self.assertEqual(self.queue.pending(), 0)
+        time.sleep(0.3)  # 执行中的任务在后台结束
+        done = set(CALLS)
+
+        self.queue.start(num_workers=2)
+        deadline = time.monotonic() + 10
+        while len(set(CALLS)) < 10 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(set(CALLS), set(range(10)))
+        self.assertTrue(done < set(range(10)))
+
+    def test_tasks_added_while_draining_are_journaled(self):
+        self.queue.start(num_workers=1)
+        gate = threading.Event()
+        self.queue.add_task(gate.wait, 5)
+        stopper = threading.Thread(target=self.queue.stop, args=(5,))
+        stopper.start()
+        deadline = time.monotonic() + 5
+        while not self.queue._draining.is_set() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(self.queue.add_task(slow_call, 'next', delay=0))
+        with self.assertLogs('app.core.task_queue', 'WARNING'):
+            self.assertIsNone(self.queue.add_task(lambda: None))
+        gate.set()
+        stopper.join(5)
+        self.assertEqual(CALLS, [])
+        pending = TaskJournal(self.path).open()
+        self.assertEqual([r['args'] for r in pending], [['next']])
+
+    def test_stuck_task_does_not_block_stop(self):
+        self.queue.start(num_workers=1)
+        gate = threading.Event()
+        self.queue.add_task(gate.wait, 10)
+        time.sleep(0.1)
+        start = time.monotonic()
+        with self.assertLogs('app.core.task_queue', 'WARNING'):
+            self.assertEqual(self.queue.stop(0.2), 1)
+        self.assertLess(time.monotonic() - start, 3)
+        gate.set()
+
+class TestLifecycle(unittest.TestCase):
+    def setUp(self):
+        self.original = Lifecycle._instance
+        Lifecycle._instance = None
+        self.lifecycle = Lifecycle()
+        self.lifecycle.steps = []
+
+    def tearDown(self):
+        Lifecycle._instance = self.original
+
+    def test_phase_order_and_errors(self):
+        order = []
+
+        def failing(timeout):
+            order.append('browser')
+            raise RuntimeError('gone')
+
+        self.lifecycle.register('browser', failing, RESOURCES)
+        self.lifecycle.register('drain', lambda t: order.append('drain') or 3, DRAIN)
+        self.lifecycle.register('intake', lambda t: order.append('intake'), INTAKE)
+        self.lifecycle.register('drain2', lambda t: order.append('drain2'), DRAIN)
+        with self.assertLogs('app.core.lifecycle', 'ERROR'):
+            results = self.lifecycle.shutdown(5)
+        self.assertEqual(order, ['intake', 'drain', 'drain2', 'browser'])
+        self.assertEqual(results['drain'], 3)
+        self.assertIsInstance(results['browser'], RuntimeError)
+        # 重复调用 (如信号处理与退出钩子都触发) 只执行一次
+        self.assertEqual(self.lifecycle.shutdown(5), {})
+        self.assertEqual(len(order), 4)
+
+    def test_budget_shared_between_steps(self):
+        budgets = []
+
+        def step(timeout):
+            budgets.append(timeout)
+            time.sleep(0.2)
+
+        self.lifecycle.register('a', step, INTAKE)
+        self.lifecycle.register('b', step, DRAIN)
+        self.lifecycle.shutdown(10)
+        self.assertLess(budgets[1], budgets[0])
+
+    def test_default_steps_skip_unloaded_modules(self):
+        self.lifecycle.steps = []
+        self.lifecycle._register_defaults()
+        with patch.dict(sys.modules, {'app.core.scheduler': None, 'app.core.task_queue': None,
+                                      'app.scraper.browser': None, 'app.rss.websub': None,
+                                      'app.services.item_watcher': None, 'app.services.ai_backfill': None,
+                                      'app.services.image_pipeline': None, 'app.services.subtitle_service': None,
+                                      'app.services.embedding_service': None, 'app.core.autoscaler': None}):
+            results = self.lifecycle.shutdown(5)
+        self.assertFalse(any(isinstance(value, Exception) for value in results.values()))
+
+class TestBrowserShutdown(unittest.TestCase):
+    def setUp(self):
+        self.original = BrowserManager._instance
+
+    def tearDown(self):
+        BrowserManager._instance = self.original
+
+    def test_closes_tabs_and_quits(self):
+        BrowserManager._instance = None
+        self.assertFalse(BrowserManager.shutdown())  # 未启动过浏览器时不启动
+
+        page = MagicMock()
+        page.new_tab.side_effect = lambda: MagicMock()
+        with patch.object(BrowserManager, '_init_page', lambda self: setattr(self, 'page', page)):
+            manager = BrowserManager()
+        tabs = [manager.get_new_tab(), manager.get_new_tab()]
+        tabs[0].close.side_effect = RuntimeError('already closed')
+        self.assertTrue(BrowserManager.shutdown(2))
+        page.quit.assert_called_once_with(timeout=2, force=True)
+        tabs[1].close.assert_called_once()
+        self.assertIsNone(BrowserManager._instance)
+
+if __name__ == '__main__':
+    unittest.main()
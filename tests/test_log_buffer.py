@@ -0,0 +1,76 @@
+import sys
+import os
+import logging
+import threading
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.log_buffer import LogRingBuffer, RingBufferHandler
+
+class TestLogRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = LogRingBuffer(capacity=8)
+        self.logger = logging.getLogger('tests.log_buffer')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.handler = RingBufferHandler(self.buffer, logging.INFO)
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_handler_writes_entries(self):
+        self.logger.debug("hidden")
+        self.logger.info("抓取开始 %s", 1)
+        self.logger.error("抓取失败")
+
+        entries, position, dropped = self.buffer.read_since(0)
+        self.assertEqual([e.message for e in entries], ["抓取开始 1", "抓取失败"])
+        self.assertEqual([e.level for e in entries], ["INFO", "ERROR"])
+        self.assertEqual(entries[0].source, 'tests.log_buffer')
+        self.assertEqual((position, dropped), (2, 0))
+
+        # 只返回新增部分
+        self.logger.warning("next")
+        entries, position, _ = self.buffer.read_since(position)
+        self.assertEqual([e.message for e in entries], ["next"])
+        self.assertEqual(self.buffer.read_since(position), ([], position, 0))
+
+    def test_overwritten_entries_are_reported_as_dropped(self):
+        for i in range(20):
+            self.logger.info("line %d", i)
+
+        entries, position, dropped = self.buffer.read_since(0)
+        self.assertEqual(len(entries), 8)
+        self.assertEqual(entries[0].message, "line 12")
+        self.assertEqual((position, dropped), (20, 12))
+
+    def test_limit_skips_to_newest(self):
+        for i in range(6):
+            self.logger.info("line %d", i)
+
+        entries, position, dropped = self.buffer.read_since(0, limit=2)
+        self.assertEqual([e.message for e in entries], ["line 4", "line 5"])
+        self.assertEqual((position, dropped), (6, 4))
+
+    def test_concurrent_writers(self):
+        buffer = LogRingBuffer(capacity=10000)
+        handler = RingBufferHandler(buffer)
+        logger = logging.getLogger('tests.log_buffer.concurrent')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            threads = [threading.Thread(target=lambda: [logger.warning("x") for _ in range(500)]) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            logger.removeHandler(handler)
+
+        entries, position, dropped = buffer.read_since(0)
+        self.assertEqual(len(entries), 2000)
+        self.assertEqual([e.seq for e in entries], list(range(1, 2001)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import unittest
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch, MagicMock
+
+from app.database import crud
+from app.database.models import Source
+from app.ui.components.data_table import TablePager
+
+class TestSourcePagination(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+        with Session(self.engine) as session:
+            for i in range(23):
+                session.add(Source(
+                    name=f"源{i % 5}", url=f"https://example.com/{i}", platform="bilibili" if i % 2 else "coolapk",
+                    last_scraped=datetime(2025, 1, 1 + i) if i % 3 else None
+                ))
+            session.commit()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def collect(self, **kwargs):
+        ids, cursor = [], None
+        while True:
+            page, cursor = crud.get_sources_page(limit=5, after=cursor, **kwargs)
+            ids.extend(s.id for s in page)
+            if cursor is None:
+                return ids
+
+    def test_keyset_pages_match_full_ordering(self):
+        with Session(self.engine) as session:
+            sources = session.exec(select(Source)).all()
+
+        for sort_by in ['id', 'name', 'platform', 'last_scraped']:
+            for descending in (False, True):
+                def key(s):
+                    value = getattr(s, sort_by)
+                    if sort_by == 'last_scraped':
+                        value = str(value) if value is not None else ''
+                    return (value, s.id)
+                expected = [s.id for s in sorted(sources, key=key, reverse=descending)]
+                self.assertEqual(self.collect(sort_by=sort_by, descending=descending), expected, (sort_by, descending))
+
+    def test_search_filter(self):
+        ids = self.collect(search="源1")
+        self.assertEqual(len(ids), crud.count_sources("源1"))
+        self.assertEqual(len(ids), 5)
+
+class TestTablePager(unittest.TestCase):
+    def setUp(self):
+        self.data = [{'id': i, 'name': f'row{i}'} for i in range(1, 121)]
+        self.table = MagicMock()
+        self.table.rows = []
+
+    def fetch(self, cursor, limit, sort_by, descending, search):
+        start = 0 if cursor is None else cursor[1]
+        page = self.data[start:start + limit]
+        next_cursor = (None, start + limit) if start + limit < len(self.data) else None
+        return [dict(row) for row in page], next_cursor
+
+    def test_load_and_delta_refresh(self):
+        pager = TablePager(self.table, self.fetch, page_size=50)
+        pager.reset()
+        self.assertEqual(len(self.table.rows), 50)
+        pager.handle_scroll({'to': 45})
+        self.assertEqual(len(self.table.rows), 100)
+
+        self.table.update.reset_mock()
+        self.assertFalse(pager.refresh())
+        self.table.update.assert_not_called()
+
+        unchanged = self.table.rows[0]
+        self.data[3]['name'] = 'renamed'
+        self.assertTrue(pager.refresh())
+        self.table.update.assert_called_once()
+        self.assertIs(self.table.rows[0], unchanged)
+        self.assertEqual(self.table.rows[3]['name'], 'renamed')
+        self.assertEqual(len(self.table.rows), 100)
+
+if __name__ == '__main__':
+    unittest.main()
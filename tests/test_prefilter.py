@@ -0,0 +1,170 @@
+import sys
+import os
+import io
+import random
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.config import settings
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.ai import prefilter as prefilter_module
+from app.ai.prefilter import Prefilter, LinearModel, vectorize, simhash, train_from_db, savings_report, API, SKIP, REUSE
+from app.services import scraper_service
+
+TOPICS = ['显卡', '处理器', '主板', '散热', '内存', '固态硬盘', '显示器', '键盘', '游戏本', '路由器']
+ASPECTS = ['性能测试', '功耗表现', '温度控制', '做工细节', '价格走势', '驱动更新', '兼容性问题', '长期使用体验']
+SPAM = ['加微信领取优惠券', '限时秒杀点击链接', '私信我免费领福利', '扫码进群抽奖', '转发关注抽奖送礼品', '代购团购低价']
+
+def good_text(rng):
+    topic = rng.choice(TOPICS)
+    parts = [f'这次我们详细测试了{topic}的{rng.choice(ASPECTS)}。' for _ in range(rng.randint(4, 8))]
+    return f'{topic}{rng.choice(ASPECTS)}深度评测', ''.join(parts) + f'总体来看这款{topic}值得推荐。'
+
+def junk_text(rng):
+    return '福利来了！！', '！'.join(rng.choice(SPAM) for _ in range(rng.randint(2, 4))) + f' https://t.cn/{rng.randint(1, 999)}'
+
+class PrefilterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        patch.object(settings, 'PREFILTER_MODEL_PATH', os.path.join(self.tmp, 'prefilter.npz')).start()
+        patch.object(settings, 'PREFILTER_MIN_SAMPLES', 50).start()
+        self.prefilter = Prefilter()
+        self.prefilter.reset()
+        with Session(self.engine) as session:
+            source = Source(name='测试', url='https://www.coolapk.com', platform='coolapk')
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+    def tearDown(self):
+        self.prefilter.reset()
+        patch.stopall()
+        shutil.rmtree(self.tmp)
+
+    def add_item(self, title, content, score, risk='Low', ai_source=API):
+        return crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title=title, url=f'https://x/{random.random()}', content=content,
+            ai_summary='摘要', sentiment='Neutral', ai_score=score, risk_level=risk, ai_source=ai_source))
+
+    def seed_labels(self, count=120):
+        rng = random.Random(1)
+        for i in range(count):
+            if i % 3:
+                self.add_item(*good_text(rng), score=rng.randint(60, 95))
+            else:
+                self.add_item(*junk_text(rng), score=rng.randint(0, 30))
+
+class TestFeatures(unittest.TestCase):
+    def test_vectorize(self):
+        indices, values = vectorize('显卡评测', '显卡性能很好')
+        self.assertEqual(len(indices), len(values))
+        self.assertTrue((indices < prefilter_module.HASH_DIM + prefilter_module.HEURISTIC_COUNT).all())
+
+    def test_simhash_near_duplicates(self):
+        text = '这次我们详细测试了显卡的性能表现，整体来看在同价位中非常有竞争力，推荐购买。'
+        a, b = simhash(text), simhash(text.replace('推荐购买', '值得购买'))
+        other = simhash('今天去公园散步看到了很多漂亮的花，天气也非常好，心情愉快。')
+        self.assertLessEqual(bin(a ^ b).count('1'), 12)
+        self.assertGreater(bin(a ^ other).count('1'), 20)
+        self.assertIsNone(simhash('太短了'))
+
+    def test_linear_model_separates(self):
+        rng = random.Random(0)
+        rows, labels = [], []
+        for i in range(200):
+            title, content = junk_text(rng) if i % 2 else good_text(rng)
+            rows.append(vectorize(title, content))
+            labels.append(i % 2)
+        model = LinearModel.fit(rows, labels)
+        rng = random.Random(99)
+        self.assertGreater(model.predict([vectorize(*junk_text(rng))])[0], 0.9)
+        self.assertLess(model.predict([vectorize(*good_text(rng))])[0], 0.1)
+
+class TestDecide(PrefilterTestCase):
+    def test_rules(self):
+        self.assertEqual(self.prefilter.decide('标题', '无内容').action, SKIP)
+        self.assertEqual(self.prefilter.decide('标题', '好').action, SKIP)
+        self.assertEqual(self.prefilter.decide('视频', '', has_transcript=True).action, API)
+        decision = self.prefilter.decide('显卡评测', '这次我们详细测试了显卡的性能表现。')
+        self.assertEqual((decision.action, decision.reason), (API, '无可用模型'))
+
+    def test_reuse_neighbor(self):
+        rng = random.Random(5)
+        title, content = good_text(rng)
+        self.add_item(title, content, score=88, risk='Low')
+        decision = self.prefilter.decide(title, content + '（转载）')
+        self.assertEqual(decision.action, REUSE)
+        self.assertEqual(decision.analysis['score'], 88)
+
+        # 运行期间经 API 分析的条目也能被复用，失败的结果不记录
+        text = '今天去公园散步看到了很多漂亮的花，天气也非常好，心情愉快。'
+        self.prefilter.remember('散步', text, {'summary': '分析失败', 'risk_level': 'Unknown'})
+        self.assertEqual(self.prefilter.decide('散步', text).action, API)
+        self.prefilter.remember('散步', text, {'summary': '散步', 'score': 70, 'risk_level': 'Low'})
+        self.assertEqual(self.prefilter.decide('散步', text).analysis['score'], 70)
+
+    def test_train_and_reload(self):
+        self.assertIn('error', train_from_db())
+        self.seed_labels()
+        stats = train_from_db()
+        self.assertEqual(stats['samples'], 120)
+        self.assertEqual(stats['junk'], 40)
+        self.assertGreaterEqual(stats['precision'], 0.9)
+
+        rng = random.Random(42)
+        junk = self.prefilter.decide(*junk_text(rng))
+        self.assertEqual(junk.action, SKIP)
+        self.assertGreater(junk.probability, settings.PREFILTER_SKIP_PROB)
+        self.assertEqual(self.prefilter.decide('路由器信号测试', '我们在三居室里测试了这台路由器的穿墙表现和延迟。').action, API)
+
+        # 跳过/复用的条目不作为训练样本
+        self.add_item('x', 'y', score=0, ai_source=SKIP)
+        self.assertEqual(train_from_db()['samples'], 120)
+
+class TestReport(PrefilterTestCase):
+    def test_savings(self):
+        for ai_source in (API, API, SKIP, REUSE, None):
+            self.add_item('标题', '正文', score=70, ai_source=ai_source)
+        report = savings_report()
+        self.assertEqual((report['decided'], report['saved']), (4, 2))
+        self.assertEqual(report['saved_ratio'], 0.5)
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(prefilter_module.main(['report']), 0)
+        self.assertIn('2/4 (50.0%)', out.getvalue())
+
+class TestAnalyzeItem(PrefilterTestCase):
+    def test_skip_does_not_call_api(self):
+        item = ScrapedItem(source_id=self.source_id, title='标题', url='https://x/1', content='无内容')
+        with patch('app.ai.client.AIProcessor') as processor:
+            scraper_service.analyze_item(item, 'coolapk')
+        processor.assert_not_called()
+        self.assertEqual((item.ai_source, item.ai_score), (SKIP, 0))
+
+    def test_api_result_is_remembered(self):
+        rng = random.Random(7)
+        title, content = good_text(rng)
+        item = ScrapedItem(source_id=self.source_id, title=title, url='https://x/1', content=content)
+        with patch('app.ai.client.AIProcessor') as processor:
+            processor.return_value.analyze.return_value = {'summary': '评测', 'score': 80, 'risk_level': 'Low'}
+            scraper_service.analyze_item(item, 'coolapk')
+            self.assertEqual((item.ai_source, item.ai_score), (API, 80))
+            again = ScrapedItem(source_id=self.source_id, title=title, url='https://x/2', content=content)
+            scraper_service.analyze_item(again, 'coolapk')
+        self.assertEqual(processor.return_value.analyze.call_count, 1)
+        self.assertEqual((again.ai_source, again.ai_summary), (REUSE, '评测'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.config import settings
+from app.database import crud, search
+from app.database.search import create_search_index, build_match_query, segment_text, FTS_TABLE
+from app.database.models import Source, ScrapedItem
+
+class TestFullTextSearch(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        create_search_index(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+
+        with Session(self.engine) as session:
+            source = Source(name="B站", url="https://www.bilibili.com", platform="bilibili")
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+        self.genshin = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title="原神启动！新版本前瞻", url="u1",
+            content="本期视频聊聊新角色和深渊配队", ai_summary="版本前瞻汇总"
+        ))
+        self.phone = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title="手机续航测试", url="u2",
+            content="顺便提一句原神在这台手机上的发热表现", ai_summary="Battery test of a new Phone"
+        ))
+
+    def tearDown(self):
+        crud.invalidate_stats_cache()
+        self.patcher.stop()
+
+    def test_segmentation(self):
+        self.assertEqual(segment_text("原神启动").split(), ["原神", "神启", "启动", "动"])
+        self.assertEqual(segment_text("GTA5中文版").split(), ["GTA5", "中文", "文版", "版"])
+        self.assertEqual(build_match_query("原神 启动"), '"原神" AND "启动"')
+        self.assertEqual(build_match_query("神"), '"神"*')
+
+    def test_chinese_substring_and_bm25_ranking(self):
+        hits = crud.search_items("原神")
+        # 标题命中的权重高于正文命中
+        self.assertEqual([h['id'] for h in hits], [self.genshin.id, self.phone.id])
+        self.assertIn("<mark>原神</mark>", hits[0]['title_html'])
+        self.assertIn("<mark>原神</mark>", hits[1]['snippet'])
+
+        self.assertEqual([h['id'] for h in crud.search_items("配队")], [self.genshin.id])
+        self.assertEqual(crud.search_items("神深"), [])
+        self.assertEqual([h['id'] for h in crud.search_items("phone")], [self.phone.id])
+
+    def test_triggers_keep_index_in_sync(self):
+        with Session(self.engine) as session:
+            item = session.get(ScrapedItem, self.phone.id)
+            item.ai_summary = "能效比分析"
+            session.add(item)
+            session.commit()
+
+        self.assertEqual(crud.search_items("phone"), [])
+        self.assertEqual([h['id'] for h in crud.search_items("能效")], [self.phone.id])
+
+        with Session(self.engine) as session:
+            session.delete(session.get(ScrapedItem, self.genshin.id))
+            session.commit()
+        self.assertEqual([h['id'] for h in crud.search_items("原神")], [self.phone.id])
+
+    def create_long_item(self):
+        # 关键词只出现在移入 itemcontent 的完整正文末尾，主表预览中没有
+        content = "前情提要" * settings.CONTENT_INLINE_LIMIT + "终章彩蛋"
+        return crud.create_scraped_item(ScrapedItem(source_id=self.source_id, title="长视频", url="u3", content=content))
+
+    def test_full_text_beyond_preview_is_indexed(self):
+        item = self.create_long_item()
+        self.assertEqual([h['id'] for h in crud.search_items("终章彩蛋")], [item.id])
+
+        with Session(self.engine) as session:
+            row = session.get(ScrapedItem, item.id)
+            row.ai_summary = "彩蛋解析"
+            session.add(row)
+            session.commit()
+        self.assertEqual(search.match_item_ids(self.engine, "终章彩蛋"), [item.id])
+
+        with Session(self.engine) as session:
+            session.delete(session.get(ScrapedItem, item.id))
+            session.commit()
+        # 删除时按索引时的完整正文移除，倒排索引中不残留
+        self.assertEqual(search.match_item_ids(self.engine, "终章彩蛋"), [])
+        self.assertEqual(search.match_item_ids(self.engine, "前情提要"), [])
+
+    def test_preview_only_index_is_rebuilt(self):
+        item = self.create_long_item()
+        with self.engine.begin() as conn:
+            # 模拟旧版本：没有 itemcontent 触发器，索引中只有预览
+            for suffix in ('ci', 'cd', 'cu'):
+                conn.execute(text(f"DROP TRIGGER {FTS_TABLE}_{suffix}"))
+            conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')"))
+            conn.execute(text(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, ai_summary) "
+                "SELECT id, fts_segment(title), fts_segment(content), fts_segment(ai_summary) FROM scrapeditem"
+            ))
+        self.assertEqual(search.match_item_ids(self.engine, "终章彩蛋"), [])
+
+        create_search_index(self.engine)
+        self.assertEqual(search.match_item_ids(self.engine, "终章彩蛋"), [item.id])
+        self.assertEqual([h['id'] for h in crud.search_items("原神")], [self.genshin.id, self.phone.id])
+
+    def test_keyword_feed_items(self):
+        items = crud.search_scraped_items("前瞻")
+        self.assertEqual([i.id for i in items], [self.genshin.id])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import sys
+import os
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.models import Source
+from app.services import source_io
+
+CSV_DATA = """name,url,platform,frequency,is_active
+B站热门,https://www.bilibili.com/v/popular,,30,true
+小红书,https://www.xiaohongshu.com/explore,xiaohongshu,,false
+重复,https://www.bilibili.com/v/popular,bilibili,60,
+坏链接,ftp://example.com,bilibili,60,
+未知平台,https://example.com/a,,60,
+"""
+
+OPML_DATA = """<?xml version="1.0"?>
+<opml version="2.0"><head><title>x</title></head><body>
+  <outline text="游戏">
+    <outline text="小黑盒" htmlUrl="https://www.xiaoheihe.cn/community" frequency="120"/>
+    <outline text="酷安" xmlUrl="https://www.coolapk.com/feed" platform="coolapk" active="false"/>
+  </outline>
+</body></opml>
+"""
+
+class TestSourceImportExport(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+        self.add_jobs = patch.object(source_io.scheduler_manager, 'add_jobs', return_value=0).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_csv_import(self):
+        result = source_io.import_sources(CSV_DATA.encode(), filename='sources.csv')
+
+        self.assertEqual((result.created, result.skipped, len(result.errors)), (2, 1, 2))
+        with Session(self.engine) as session:
+            sources = {s.name: s for s in session.exec(select(Source))}
+        self.assertEqual(sources['B站热门'].platform, 'bilibili')  # 按域名推断
+        self.assertEqual(sources['B站热门'].frequency, 30)
+        self.assertFalse(sources['小红书'].is_active)
+
+        # 只为启用的源注册任务，一次批量注册
+        jobs = self.add_jobs.call_args[0][0]
+        self.assertEqual([job['kwargs']['source_id'] for job in jobs], [sources['B站热门'].id])
+
+    def test_reimport_skips_existing(self):
+        source_io.import_sources(CSV_DATA.encode(), fmt='csv')
+        result = source_io.import_sources(CSV_DATA.encode(), fmt='csv')
+        self.assertEqual((result.created, result.skipped), (0, 3))
+
+    def test_opml_nested_outlines(self):
+        result = source_io.import_sources(OPML_DATA.encode())
+        self.assertEqual(result.created, 2)
+        with Session(self.engine) as session:
+            platforms = sorted(s.platform for s in session.exec(select(Source)))
+        self.assertEqual(platforms, ['coolapk', 'xiaoheihe'])
+
+    def test_bulk_create_single_commit(self):
+        records = [{'name': f's{i}', 'url': f'https://www.bilibili.com/{i}', 'platform': 'bilibili'} for i in range(1200)]
+        with patch.object(crud.Session, 'commit', autospec=True, side_effect=Session.commit) as commit:
+            created, skipped = crud.bulk_create_sources(records)
+        self.assertEqual(commit.call_count, 1)
+        self.assertEqual((len(created), skipped), (1200, 0))
+        self.assertTrue(all(s.id for s in created))
+
+    def test_export_roundtrip(self):
+        source_io.import_sources(CSV_DATA.encode(), fmt='csv')
+        for fmt in source_io.FORMATS:
+            content, _, filename = source_io.export_sources(fmt)
+            self.assertTrue(filename.endswith('.' + fmt))
+            records, errors = source_io.parse_sources(content.encode(), fmt)
+            self.assertEqual(errors, [])
+            self.assertEqual(sorted((r['url'], r['is_active']) for r in records), [
+                ('https://www.bilibili.com/v/popular', True),
+                ('https://www.xiaohongshu.com/explore', False),
+            ])
+
+    def test_invalid_file(self):
+        with self.assertRaises(ValueError):
+            source_io.import_sources(b'<opml><body>', filename='broken.opml')
+
+class TestStaggeredJobs(unittest.TestCase):
+    def test_first_runs_spread_over_interval(self):
+        manager = source_io.scheduler_manager
+        jobs = [{'job_id': f'test_stagger_{i}', 'func': print, 'minutes': 60} for i in range(4)]
+        try:
+            self.assertEqual(manager.add_jobs(jobs), 4)
+            runs = sorted(manager.scheduler.get_job(job['job_id']).next_run_time for job in jobs)
+            gaps = [(b - a).total_seconds() for a, b in zip(runs, runs[1:])]
+            for gap in gaps:
+                self.assertAlmostEqual(gap, 15 * 60, delta=5)
+        finally:
+            for job in jobs:
+                manager.scheduler.remove_job(job['job_id'])
+
+class TestSyncSourceJobs(unittest.TestCase):
+    def test_sync_adds_updates_and_removes(self):
+        manager = source_io.scheduler_manager
+        sources = [Source(id=9001, name='a', url='u1', platform='bilibili', frequency=30),
+                   Source(id=9002, name='b', url='u2', platform='bilibili', frequency=60)]
+        try:
+            self.assertEqual(source_io.sync_source_jobs(sources), (2, 0))
+            self.assertEqual(source_io.sync_source_jobs(sources), (0, 0))
+
+            sources[0].frequency = 10
+            sources[1].is_active = False
+            self.assertEqual(source_io.sync_source_jobs(sources), (1, 1))
+            job = manager.scheduler.get_job('scrape_source_9001')
+            self.assertEqual(job.trigger.interval.total_seconds(), 600)
+            self.assertIsNone(manager.scheduler.get_job('scrape_source_9002'))
+        finally:
+            for job_id in ('scrape_source_9001', 'scrape_source_9002'):
+                if manager.scheduler.get_job(job_id):
+                    manager.scheduler.remove_job(job_id)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import subprocess
+import unittest
+from typing import Dict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在界面/真正抓取/遇到验证码时才需要的重量级依赖
+HEAVY = ('nicegui', 'DrissionPage', 'openai', 'numpy', 'cv2', 'apscheduler')
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr[-2000:])
+    return result
+
+def import_profile(code: str) -> Dict[str, int]:
+    """
+    在子进程中用 -X importtime 执行 code
+
+    Returns:
+        {模块名: 累计导入耗时(us)}，'' 键为顶层导入的总耗时
+    """
+    profile = {'': 0}
+    for line in run_python('-X', 'importtime', '-c', code).stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+        if not name[1:].startswith(' '):
+            profile[''] += int(cumulative)
+    return profile
+
+class TestStartupImports(unittest.TestCase):
+    def assertNotLoaded(self, profile, modules=HEAVY):
+        loaded = [m for m in modules if m in profile]
+        self.assertEqual(loaded, [], f"不应在启动时导入: {loaded}")
+
+    def test_feed_server_is_lightweight(self):
+        feed = import_profile('import app.headless; app.headless.create_feed_app()')
+        self.assertNotLoaded(feed)
+
+        ui = import_profile('import app.main')
+        self.assertIn('nicegui', ui)
+        self.assertLess(feed[''], ui[''])
+        print(f"\nimport time: serve-feed {feed[''] / 1000:.0f} ms, ui {ui[''] / 1000:.0f} ms")
+
+    def test_worker_defers_browser_and_ai(self):
+        self.assertNotLoaded(import_profile('import app.worker'))
+
+    def test_scraper_service_defers_strategies(self):
+        profile = import_profile('import app.services.scraper_service')
+        self.assertNotLoaded(profile)
+        self.assertNotIn('app.scraper.strategies.bilibili', profile)
+
+    def test_core_package_is_lazy(self):
+        profile = import_profile('from app.core import event_bus')
+        self.assertNotIn('app.core.scheduler', profile)
+        self.assertNotLoaded(profile)
+
+    def test_scheduler_thread_starts_on_first_job(self):
+        result = run_python('-c', (
+            "from app.core import scheduler_manager as m\n"
+            "print(m.running, len(m.get_jobs()))\n"
+            "m.add_job('probe', print, minutes=60)\n"
+            "print(m.running)\n"
+            "m.shutdown()"
+        ))
+        self.assertEqual(result.stdout.split(), ['False', '0', 'True'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import sys
+import os
+import unittest
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+
+class TestItemStats(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+        crud.invalidate_stats_cache()
+
+        with Session(self.engine) as session:
+            bili = Source(name="B站", url="https://www.bilibili.com/v/popular", platform="bilibili")
+            xhs = Source(name="小红书", url="https://www.xiaohongshu.com/explore", platform="xiaohongshu", is_active=False)
+            session.add(bili)
+            session.add(xhs)
+            session.commit()
+            self.bili_id, self.xhs_id = bili.id, xhs.id
+
+            yesterday = datetime.now() - timedelta(days=1)
+            session.add(ScrapedItem(source_id=bili.id, title="a", url="u1", content="x", sentiment="Positive", risk_level="Low"))
+            session.add(ScrapedItem(source_id=bili.id, title="b", url="u2", content="x", sentiment="Negative", risk_level="High", created_at=yesterday))
+            session.add(ScrapedItem(source_id=xhs.id, title="c", url="u3", content="x", sentiment="Positive", risk_level="Low"))
+            session.commit()
+
+    def tearDown(self):
+        crud.invalidate_stats_cache()
+        self.patcher.stop()
+
+    def test_aggregates(self):
+        stats = crud.get_item_stats()
+
+        self.assertEqual(stats['total_items'], 3)
+        self.assertEqual(stats['today_items'], 2)
+        self.assertEqual(stats['total_sources'], 2)
+        self.assertEqual(stats['active_sources'], 1)
+        self.assertEqual(stats['by_platform'], {'bilibili': 2, 'xiaohongshu': 1})
+        self.assertEqual(stats['by_source'][self.bili_id]['count'], 2)
+        self.assertEqual(stats['by_sentiment'], {'Positive': 2, 'Negative': 1})
+        self.assertEqual(stats['by_risk'], {'Low': 2, 'High': 1})
+        self.assertEqual(sum(stats['by_day'].values()), 3)
+
+    def test_insert_updates_cached_counters(self):
+        crud.get_item_stats()
+
+        with patch.object(crud, '_compute_item_stats') as recompute:
+            crud.create_scraped_item(ScrapedItem(
+                source_id=self.xhs_id, title="d", url="u4", content="x", sentiment="Neutral"
+            ))
+            stats = crud.get_item_stats()
+            recompute.assert_not_called()
+
+        self.assertEqual(stats['total_items'], 4)
+        self.assertEqual(stats['today_items'], 3)
+        self.assertEqual(stats['by_platform']['xiaohongshu'], 2)
+        self.assertEqual(stats['by_sentiment']['Neutral'], 1)
+        self.assertEqual(stats['by_risk']['Unknown'], 1)
+
+        # 增量结果应与重新聚合一致
+        self.assertEqual(stats, crud.get_item_stats(use_cache=False))
+
+if __name__ == '__main__':
+    unittest.main()
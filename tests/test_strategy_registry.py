@@ -0,0 +1,89 @@
+import sys
+import os
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from app.scraper import registry
+from app.scraper.registry import strategy_registry, register_strategy, StrategyInfo
+from app.scraper.strategies import BaseScraper, BilibiliScraper
+from app.database.models import ScrapedItem
+
+class EchoScraper(BaseScraper):
+    def scrape(self, url, check=None):
+        return ScrapedItem(url=url, title='标题', content='')
+
+class FakeEntryPoint:
+    def __init__(self, name, target):
+        self.name, self.value, self.target = name, f'plugin:{name}', target
+
+    def load(self):
+        if isinstance(self.target, Exception):
+            raise self.target
+        return self.target
+
+class TestStrategyRegistry(unittest.TestCase):
+    def tearDown(self):
+        for platform in ('echo', 'plugin', 'broken'):
+            strategy_registry.unregister(platform)
+
+    def test_builtin_strategies(self):
+        self.assertLessEqual({'bilibili', 'xiaohongshu', 'xiaoheihe', 'coolapk'}, set(strategy_registry.platforms()))
+        info = strategy_registry.info('bilibili')
+        self.assertIs(info.cls, BilibiliScraper)
+        self.assertTrue(info.http_fast_path and info.list_pages)
+        self.assertTrue(strategy_registry.info('xiaohongshu').needs_login)
+        self.assertEqual(BilibiliScraper.platform, 'bilibili')
+
+    def test_instances_are_cached(self):
+        self.assertIs(strategy_registry.get('bilibili'), strategy_registry.get('bilibili'))
+        with self.assertRaises(ValueError):
+            strategy_registry.get('unknown')
+
+    def test_detect_platform(self):
+        self.assertEqual(strategy_registry.detect_platform('https://space.bilibili.com/1'), 'bilibili')
+        self.assertEqual(strategy_registry.detect_platform('https://api.xiaoheihe.cn/x'), 'xiaoheihe')
+        self.assertIsNone(strategy_registry.detect_platform('https://notbilibili.com/'))
+
+    def test_decorator_registration(self):
+        register_strategy('echo', 'echo.test', label='回声', max_concurrency=3)(EchoScraper)
+        self.assertEqual(strategy_registry.labels()['echo'], '回声')
+        self.assertEqual(strategy_registry.detect_platform('https://m.echo.test/a'), 'echo')
+        self.assertEqual(strategy_registry.get('echo').scrape('https://echo.test').url, 'https://echo.test')
+
+    def test_entry_point_plugins(self):
+        plugins = [FakeEntryPoint('plugin', EchoScraper), FakeEntryPoint('broken', ImportError('missing'))]
+        with patch.object(strategy_registry, '_loaded', False), \
+                patch.object(registry, 'entry_points', return_value=plugins):
+            with self.assertLogs(registry.logger, 'ERROR'):
+                platforms = strategy_registry.platforms()
+        self.assertIn('plugin', platforms)
+        self.assertNotIn('broken', platforms)
+        self.assertIsInstance(strategy_registry.get('plugin'), EchoScraper)
+
+    def test_semaphore_limits_concurrency(self):
+        strategy_registry.register(StrategyInfo('echo', EchoScraper, domain='echo.test', max_concurrency=2))
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def run():
+            with strategy_registry.semaphore('echo'):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.05)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=run) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak[0], 2)
+
+if __name__ == '__main__':
+    unittest.main()
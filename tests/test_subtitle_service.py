@@ -0,0 +1,152 @@
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch, MagicMock
+
+from app.config import settings
+from app.database import crud
+from app.database.models import Source, ScrapedItem, Transcript
+from app.scraper.registry import register_strategy, strategy_registry
+from app.scraper.strategies.base import BaseScraper
+from app.services import scraper_service
+from app.services.subtitle_service import SubtitleService, SubtitleRef, truncate_transcript
+
+LINES = [f'第{i}句字幕内容' for i in range(400)]
+
+class SubtitleHost(BaseHTTPRequestHandler):
+    """本地字幕服务器：/slow 延迟响应，记录请求次数"""
+    hits = 0
+    delay = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.path == '/slow':
+            time.sleep(self.delay)
+        body = json.dumps({'body': [{'content': line} for line in LINES]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class SubtitleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        self.service = SubtitleService()
+        for name in ('_session', '_executor'):
+            patch.object(self.service, name, None).start()
+        patch.object(self.service, '_inflight', {}).start()
+
+        SubtitleHost.hits = 0
+        SubtitleHost.delay = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), SubtitleHost)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+
+    def tearDown(self):
+        self.service.join(5)
+        patch.stopall()
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestSubtitleService(SubtitleTestCase):
+    def test_fetch_once_and_cache(self):
+        ref = SubtitleRef('bilibili:1', self.base + '/a.json', 'zh-CN')
+        futures = [self.service.request(ref) for _ in range(3)]
+        self.assertEqual({f.result(5) for f in futures}, {'\n'.join(LINES)})
+        self.assertEqual(SubtitleHost.hits, 1)
+
+        # 入库后以 key 命中，不再请求 (即使签名地址变化)
+        again = self.service.request(SubtitleRef('bilibili:1', self.base + '/b.json'))
+        self.assertEqual(again.result(5), '\n'.join(LINES))
+        self.assertEqual(SubtitleHost.hits, 1)
+
+        with Session(self.engine) as session:
+            row = session.exec(select(Transcript)).one()
+        self.assertEqual((row.codec, row.lang), (settings.CONTENT_COMPRESSION, 'zh-CN'))
+        self.assertLess(len(row.data), row.size)
+
+    def test_wait_is_bounded(self):
+        SubtitleHost.delay = 1
+        self.service.request(SubtitleRef('bilibili:2', self.base + '/slow'))
+        started = time.monotonic()
+        self.assertIsNone(self.service.get('bilibili:2', timeout=0.1))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(self.service.join(5))
+        self.assertEqual(self.service.get('bilibili:2'), '\n'.join(LINES))
+
+    def test_failed_download(self):
+        self.server.shutdown()  # 端口仍在监听但不再应答，只能靠读超时结束
+        patch.object(settings, 'SUBTITLE_READ_TIMEOUT', 0.5).start()
+        ref = SubtitleRef('bilibili:3', self.base + '/a.json')
+        with self.assertLogs('app.services.subtitle_service', 'WARNING'):
+            self.assertIsNone(self.service.request(ref).result(5))
+        self.assertIsNone(self.service.get('bilibili:3'))
+
+    def test_truncate(self):
+        self.assertEqual(truncate_transcript('短文本', 10), '短文本')
+        text = ''.join(str(i % 10) for i in range(1000))
+        view = truncate_transcript(text, 300)
+        self.assertTrue(view.startswith(text[:200]))
+        self.assertTrue(view.endswith(text[-100:]))
+        self.assertIn('省略 700 字', view)
+
+class FakeVideoScraper(BaseScraper):
+    """只返回简介、把字幕交给字幕服务的策略"""
+    subtitle = None
+
+    def scrape(self, url, check=None):
+        item = ScrapedItem(title='视频', url=url, content='简介')
+        item.transcript_key = self.subtitle.key
+        SubtitleService().request(self.subtitle)
+        return item
+
+class TestScrapeWithSubtitle(SubtitleTestCase):
+    def setUp(self):
+        super().setUp()
+        patch.object(scraper_service, 'engine', self.engine).start()
+        patch.object(settings, 'CHANGE_DETECTION_ENABLED', False).start()
+        register_strategy('fakevideo', 'video.test')(FakeVideoScraper)
+        FakeVideoScraper.subtitle = SubtitleRef('fakevideo:1', self.base + '/a.json')
+        with Session(self.engine) as session:
+            source = Source(name='视频', url='https://video.test/1', platform='fakevideo')
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+        patch.object(settings, 'SUBTITLE_AI_CHARS', 300).start()
+        patch.object(scraper_service, 'image_pipeline', MagicMock()).start()
+        patch.dict(os.environ, {'DEEPSEEK_API_KEY': 'test'}).start()
+
+    def tearDown(self):
+        super().tearDown()
+        strategy_registry.unregister('fakevideo')
+
+    def test_ai_receives_excerpt(self):
+        with patch('app.ai.client.AIProcessor') as processor:
+            processor.return_value.analyze.return_value = {'summary': '摘要', 'score': 5}
+            scraper_service.scrape_source(self.source_id)
+        text = processor.return_value.analyze.call_args[0][0]
+        self.assertTrue(text.startswith('简介\n\n=== 视频字幕 (节选) ===\n第0句'))
+        self.assertIn('中间省略', text)
+        self.assertLess(len(text), 400)
+
+        item = crud.get_scraped_items()[0]
+        self.assertEqual(item.content, '简介')  # 字幕不再写入正文
+        self.assertEqual(item.transcript_key, 'fakevideo:1')
+        self.assertEqual(crud.get_transcript('fakevideo:1'), '\n'.join(LINES))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from app.config import settings
+from app.core.task_journal import TaskJournal, task_name, resolve_task
+from app.core.task_queue import TaskQueue
+
+CALLS = []
+
+def record_call(value, suffix=''):
+    CALLS.append(f'{value}{suffix}')
+
+def failing_task(value):
+    raise ValueError(f'bad {value}')
+
+class TestTaskJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'journal.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def lines(self):
+        with open(self.path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_recover_unfinished(self):
+        journal = TaskJournal(self.path)
+        self.assertEqual(journal.open(), [])
+        journal.enqueued('a', 'm:f', (1,), {})
+        journal.enqueued('b', 'm:f', (2,), {})
+        journal.enqueued('c', 'm:f', (3,), {'x': 1})
+        journal.enqueued('d', 'm:f', (4,), {})
+        journal.started('a')
+        journal.done('a')
+        journal.started('b')        # 执行中崩溃
+        journal.failed('d', 'boom')  # 失败的任务不重放
+        journal.close()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"e": "done", "id": "c"')  # 崩溃时写了一半
+
+        pending = TaskJournal(self.path).open()
+        self.assertEqual([(r['id'], r['attempt']) for r in pending], [('b', 2), ('c', 1)])
+        self.assertEqual(pending[1]['kwargs'], {'x': 1})
+        # 打开时压缩为只包含待重放的任务
+        self.assertEqual([line['id'] for line in self.lines()], ['b', 'c'])
+
+    def test_dedupe_and_max_attempts(self):
+        journal = TaskJournal(self.path, max_attempts=2)
+        journal.open()
+        journal.enqueued('a', 'm:f', (1,), {})
+        journal.enqueued('b', 'm:f', (1,), {})
+        journal.enqueued('c', 'm:g', (1,), {}, attempt=2)
+        journal.started('c')
+        journal.close()
+        with self.assertLogs('app.core.task_journal', 'WARNING'):
+            pending = TaskJournal(self.path, max_attempts=2).open()
+        self.assertEqual([r['id'] for r in pending], ['a'])
+
+    def test_group_commit(self):
+        journal = TaskJournal(self.path)
+        journal.open()
+
+        def produce(offset):
+            for i in range(250):
+                task_id = f'{offset}-{i}'
+                journal.enqueued(task_id, 'm:f', (i,), {})
+                journal.started(task_id)
+                journal.done(task_id)
+
+        threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(journal.flush(5))
+        self.assertEqual(len(self.lines()), 3000)
+        self.assertLess(journal.batches, 3000)  # 多个事件共用一次 fsync
+        self.assertEqual(journal.pending_count(), 0)
+        journal.close()
+
+    def test_compaction_while_running(self):
+        journal = TaskJournal(self.path, max_bytes=2000)
+        journal.open()
+        journal.enqueued('keep', 'm:f', ('x',), {})
+        journal.started('keep')
+        for i in range(100):
+            journal.enqueued(str(i), 'm:f', (i,), {})
+            journal.done(str(i))
+            journal.flush(5)
+        journal.close()
+        self.assertLess(os.path.getsize(self.path), 4000)
+        pending = TaskJournal(self.path).open()
+        self.assertEqual([(r['id'], r['attempt']) for r in pending], [('keep', 2)])
+
+    def test_task_names(self):
+        name = task_name(record_call)
+        self.assertTrue(name.endswith(':record_call'))
+        self.assertIs(resolve_task(name), record_call)
+        self.assertIsNone(task_name(lambda: None))
+
+class TestTaskQueueJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'journal.jsonl')
+        patch.object(settings, 'TASK_JOURNAL_PATH', self.path).start()
+        patch.object(settings, 'TASK_JOURNAL_ENABLED', True).start()
+        self.original = TaskQueue._instance
+        TaskQueue._instance = None
+        self.queue = TaskQueue()
+        CALLS.clear()
+
+    def tearDown(self):
+        if self.queue.running:
+            self.queue.stop()
+        TaskQueue._instance = self.original
+        patch.stopall()
+        shutil.rmtree(self.tmp)
+
+    def wait_idle(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.queue.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_replay_after_crash(self):
+        name = task_name(record_call)
+        journal = TaskJournal(self.path)
+        journal.open()
+        journal.enqueued('a', name, ('a',), {'suffix': '!'})
+        journal.enqueued('b', name, ('b',), {})
+        journal.started('b')
+        journal.enqueued('dup', name, ('b',), {})
+        journal.enqueued('gone', 'app.nothing:here', (), {})
+        journal.close()
+
+        with self.assertLogs('app.core.task_queue', 'INFO') as logs:
+            self.queue.start(num_workers=1)
+            self.wait_idle()
+        self.assertEqual(sorted(CALLS), ['a!', 'b'])
+        self.assertTrue(any('恢复 2 个' in line for line in logs.output))
+        self.queue.stop()
+        self.assertEqual(TaskJournal(self.path).open(), [])
+
+    def test_dedupe_queued_tasks(self):
+        self.queue.start(num_workers=1)
+        gate = threading.Event()
+        self.queue.add_task(gate.wait, 5)  # 不可记录的任务照常执行，只是不去重
+        first = self.queue.add_task(record_call, 'x')
+        self.assertTrue(first)
+        self.assertIsNone(self.queue.add_task(record_call, 'x'))
+        self.assertTrue(self.queue.add_task(record_call, 'y'))
+        self.assertTrue(self.queue.add_task(failing_task, 1))
+        gate.set()
+        self.wait_idle()
+        self.assertEqual(CALLS, ['x', 'y'])
+        self.assertTrue(self.queue.add_task(record_call, 'x'))  # 已执行完，可再次入队
+        self.wait_idle()
+
+        self.queue.journal.flush(5)
+        events = [json.loads(line) for line in open(self.path, encoding='utf-8')]
+        failed = [e for e in events if e['e'] == 'failed']
+        self.assertEqual(len(failed), 1)
+        self.assertIn('bad 1', failed[0]['error'])
+
+if __name__ == '__main__':
+    unittest.main()
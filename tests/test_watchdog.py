@@ -0,0 +1,240 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from unittest.mock import MagicMock, patch
+
+from app import worker as worker_module
+from app.config import settings
+from app.core.task_queue import TaskQueue
+from app.core.watchdog import Watchdog, TaskTimeout, TABS_CLOSED, BROWSER_RESTARTED, ABANDONED
+from app.core.work_queue import SQLiteWorkQueue
+from app.database.models import QueueTask
+from app.worker import Worker
+
+CALLS = []
+GATE = threading.Event()
+
+def hung_task(value):
+    GATE.wait(10)
+    CALLS.append(value)
+
+def quick_task(value):
+    CALLS.append(value)
+
+def sleep_task(seconds):
+    time.sleep(seconds)
+
+def slow_once_task(value):
+    CALLS.append(value)
+    if len(CALLS) == 1:
+        time.sleep(0.4)  # 第一次超时
+
+class WatchdogCase(unittest.TestCase):
+    def setUp(self):
+        self.original = Watchdog._instance
+        Watchdog._instance = None
+        self.watchdog = Watchdog()
+        patch('app.core.watchdog.watchdog', self.watchdog).start()
+        patch('app.core.task_queue.watchdog', self.watchdog).start()
+        patch('app.scraper.browser.watchdog', self.watchdog).start()
+        patch.object(worker_module, 'watchdog', self.watchdog).start()
+        patch.object(settings, 'WATCHDOG_GRACE', 0.1).start()
+        patch.object(settings, 'WATCHDOG_INTERVAL', 0.05).start()
+
+    def tearDown(self):
+        patch.stopall()
+        Watchdog._instance = self.original
+
+class TestWatchdog(WatchdogCase):
+    def test_escalation(self):
+        patch.object(settings, 'WATCHDOG_INTERVAL', 3600).start()  # 手动调用 check
+        restart = patch.object(Watchdog, '_restart_browser', return_value=True).start()
+        abandoned = []
+        entered = threading.Event()
+        release = threading.Event()
+        tabs = [MagicMock(), MagicMock()]
+        tabs[1].close.side_effect = RuntimeError('already closed')
+        errors = []
+
+        def run():
+            try:
+                with self.watchdog.guard('scrape', timeout=10, on_abandon=abandoned.append):
+                    for tab in tabs:
+                        self.watchdog.attach_tab(tab)
+                    entered.set()
+                    release.wait(5)
+            except TaskTimeout as e:
+                errors.append(str(e))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        entered.wait(5)
+        task = self.watchdog.stats()
+        self.assertEqual(len(task['running']), 1)
+        watched = next(iter(self.watchdog._tasks.values()))
+
+        self.watchdog.check(now=watched.started + 5)
+        self.assertEqual(watched.stage, 0)
+        self.watchdog.check(now=watched.started + 11)
+        self.assertEqual(watched.stage, TABS_CLOSED)
+        tabs[0].close.assert_called_once()
+        self.assertEqual(self.watchdog.counters['tabs_closed'], 1)
+
+        self.watchdog.check(now=watched.deadline)
+        self.assertEqual(watched.stage, BROWSER_RESTARTED)
+        restart.assert_called_once()
+
+        self.watchdog.check(now=watched.deadline)
+        self.assertEqual(watched.stage, ABANDONED)
+        self.assertEqual(abandoned, [watched])
+        self.watchdog.check(now=watched.deadline + 100)  # 已放弃的任务不再处理
+        self.assertEqual(self.watchdog.counters['abandoned'], 1)
+
+        release.set()
+        thread.join(5)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('超过 10 秒', errors[0])
+        self.assertIn('重启浏览器', errors[0])
+        self.assertEqual(self.watchdog.stats()['running'], [])
+
+    def test_closing_tab_unblocks_task(self):
+        unblocked = threading.Event()
+        tab = MagicMock()
+        tab.close.side_effect = unblocked.set
+
+        def scrape():
+            self.watchdog.attach_tab(tab)
+            if not unblocked.wait(5):
+                return
+            raise ConnectionError('page disconnected')
+
+        start = time.monotonic()
+        with self.assertRaises(TaskTimeout) as ctx:
+            with self.watchdog.guard('scrape', timeout=0.1):
+                scrape()
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertIsInstance(ctx.exception.__cause__, ConnectionError)
+        deadline = time.monotonic() + 2
+        while not self.watchdog.events and time.monotonic() < deadline:
+            time.sleep(0.01)  # 记录在关闭标签页之后写入
+        self.assertEqual(self.watchdog.events[-1]['action'], '关闭 1 个标签页')
+
+    def test_disabled_and_nested(self):
+        with patch.object(settings, 'WATCHDOG_ENABLED', False):
+            with self.watchdog.guard('x', timeout=0.01) as task:
+                self.assertIsNone(task)
+        with self.watchdog.guard('outer', timeout=30) as outer:
+            with self.watchdog.guard('inner', timeout=1) as inner:
+                self.assertIs(inner, outer)
+
+class TestTaskQueueWatchdog(WatchdogCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'journal.jsonl')
+        patch.object(settings, 'TASK_JOURNAL_PATH', self.path).start()
+        patch.object(settings, 'TASK_JOURNAL_ENABLED', True).start()
+        patch.object(settings, 'TASK_TIMEOUT', 0.2).start()
+        self.original_queue = TaskQueue._instance
+        TaskQueue._instance = None
+        self.queue = TaskQueue()
+        CALLS.clear()
+        GATE.clear()
+
+    def tearDown(self):
+        GATE.set()
+        self.queue.stop(5)
+        TaskQueue._instance = self.original_queue
+        shutil.rmtree(self.tmp)
+        super().tearDown()
+
+    def test_hung_task_frees_worker_slot(self):
+        patch.object(settings, 'TASK_JOURNAL_MAX_ATTEMPTS', 1).start()  # 不重试
+        self.queue.start(num_workers=1)
+        stuck = self.queue.workers[0]
+        with self.assertLogs('app.core.task_queue', 'WARNING'):
+            self.queue.add_task(hung_task, 'hung')
+            self.queue.add_task(quick_task, 'next')
+            deadline = time.monotonic() + 5
+            while 'next' not in CALLS and time.monotonic() < deadline:
+                time.sleep(0.02)
+        self.assertEqual(CALLS, ['next'])  # 替补线程执行了后面的任务
+        self.assertNotIn(stuck, self.queue.workers)
+        self.assertEqual(len(self.queue.workers), 1)
+
+        self.queue.journal.flush(5)
+        events = [json.loads(line) for line in open(self.path, encoding='utf-8')]
+        failed = [e for e in events if e['e'] == 'failed']
+        self.assertEqual(len(failed), 1)
+        self.assertIn('已放弃', failed[0]['error'])
+
+        GATE.set()  # 卡住的任务返回后旧线程退出
+        stuck.join(5)
+        self.assertFalse(stuck.is_alive())
+        self.assertEqual(len(self.queue.workers), 1)
+
+    def test_timed_out_task_is_retried(self):
+        patch.object(settings, 'TASK_JOURNAL_MAX_ATTEMPTS', 2).start()
+        self.queue.start(num_workers=1)
+        with self.assertLogs('app.core.task_queue', 'INFO') as logs:
+            self.queue.add_task(slow_once_task, 'a')
+            deadline = time.monotonic() + 5
+            while len(CALLS) < 2 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.queue.queue.join()
+        self.assertEqual(CALLS, ['a', 'a'])
+        self.assertTrue(any('重新入队' in line for line in logs.output))
+
+        self.queue.journal.flush(5)
+        events = [json.loads(line) for line in open(self.path, encoding='utf-8')]
+        self.assertEqual([e['e'] for e in events], ['enqueued', 'started', 'enqueued', 'failed', 'started', 'done'])
+        self.assertEqual(events[2]['attempt'], 2)
+
+    def test_retries_stop_at_max_attempts(self):
+        patch.object(settings, 'TASK_JOURNAL_MAX_ATTEMPTS', 2).start()
+        self.queue.start(num_workers=1)
+        with self.assertLogs('app.core.task_queue', 'WARNING') as logs:
+            self.queue.add_task(sleep_task, 0.3)
+            deadline = time.monotonic() + 5
+            while not any('不再重试' in line for line in logs.output) and time.monotonic() < deadline:
+                time.sleep(0.02)
+        self.queue.journal.flush(5)
+        events = [json.loads(line) for line in open(self.path, encoding='utf-8')]
+        self.assertEqual([e['e'] for e in events].count('failed'), 2)
+        self.assertEqual(self.queue.pending(), 0)
+
+class TestWorkerWatchdog(WatchdogCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{self.tmp}/app.db", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(self.engine)
+        self.queue = SQLiteWorkQueue(self.engine, retry_delay=0)
+        patch.dict(worker_module.TASKS, {'sleep': sleep_task}).start()
+        patch.object(settings, 'TASK_TIMEOUT', 0.1).start()
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+        super().tearDown()
+
+    def test_timeout_recorded_and_retried(self):
+        self.queue.enqueue('sleep', {'seconds': 0.3})
+        worker = Worker(self.queue, name='w1')
+        worker.run_once()
+        with Session(self.engine) as session:
+            task = session.exec(select(QueueTask)).one()
+        self.assertEqual(task.status, 'pending')
+        self.assertIn('超过 0.1 秒', task.last_error)
+        self.assertEqual(self.queue.size(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import sys
+import os
+import hmac
+import hashlib
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+
+from app.database import crud
+from app.database.models import Source, ScrapedItem
+from app.core.events import event_bus, ITEM_CREATED, item_payload
+from app.rss.websub import websub_hub, topic_url
+
+class SubscriberStub(BaseHTTPRequestHandler):
+    """本地 WebSub 订阅者：GET 回显 challenge，POST 记录推送内容"""
+    echo_challenge = True
+    verifications = []
+    deliveries = []
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        self.verifications.append(query)
+        body = (query['hub.challenge'] if self.echo_challenge else 'nope').encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.deliveries.append((dict(self.headers), body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+class TestWebSub(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(self.engine)
+        self.patcher = patch.object(crud, 'engine', self.engine)
+        self.patcher.start()
+
+        with Session(self.engine) as session:
+            source = Source(name="B站", url="https://www.bilibili.com/v/popular", platform="bilibili")
+            session.add(source)
+            session.commit()
+            self.source_id = source.id
+
+        SubscriberStub.echo_challenge = True
+        SubscriberStub.verifications = []
+        SubscriberStub.deliveries = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), SubscriberStub)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.callback = f'http://127.0.0.1:{self.server.server_port}/hook'
+        websub_hub.start()
+
+    def tearDown(self):
+        websub_hub.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.patcher.stop()
+
+    def subscribe(self, secret='s3cret'):
+        status, _ = websub_hub.handle_request({
+            'hub.mode': 'subscribe', 'hub.topic': topic_url(), 'hub.callback': self.callback,
+            'hub.lease_seconds': '3600', 'hub.secret': secret,
+        })
+        self.assertEqual(status, 202)
+        self.assertTrue(websub_hub.join(timeout=5))
+
+    def publish_item(self, url, score=80):
+        item = crud.create_scraped_item(ScrapedItem(
+            source_id=self.source_id, title=f"标题 {url}", url=url, content="正文", ai_score=score, risk_level="Low"
+        ))
+        event_bus.publish(ITEM_CREATED, item_payload(item))
+        return item
+
+    def test_subscribe_verifies_intent(self):
+        self.subscribe()
+
+        self.assertEqual(SubscriberStub.verifications[0]['hub.mode'], 'subscribe')
+        self.assertEqual(SubscriberStub.verifications[0]['hub.lease_seconds'], '3600')
+        subscriptions = crud.get_websub_subscriptions(topic_url())
+        self.assertEqual([s.callback for s in subscriptions], [self.callback])
+
+    def test_failed_verification_is_not_stored(self):
+        SubscriberStub.echo_challenge = False
+        self.subscribe()
+        self.assertEqual(crud.get_websub_subscriptions(), [])
+
+    def test_rejects_unknown_topic(self):
+        status, _ = websub_hub.handle_request({
+            'hub.mode': 'subscribe', 'hub.topic': 'http://elsewhere/feed.xml', 'hub.callback': self.callback,
+        })
+        self.assertEqual(status, 400)
+
+    def test_pushes_signed_delta(self):
+        self.subscribe()
+        self.publish_item("https://example.com/a")
+        self.publish_item("https://example.com/b", score=10)  # 低于 feed 评分阈值，不推送
+
+        self.assertEqual(websub_hub.flush(), 1)
+        self.assertTrue(websub_hub.join(timeout=5))
+
+        self.assertEqual(len(SubscriberStub.deliveries), 1)
+        headers, body = SubscriberStub.deliveries[0]
+        self.assertIn(b"https://example.com/a", body)
+        self.assertNotIn(b"https://example.com/b", body)
+        self.assertIn(b'rel="hub"', body)
+        expected = 'sha256=' + hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+        self.assertEqual(headers['X-Hub-Signature'], expected)
+        self.assertIn('rel="self"', headers['Link'])
+
+    def test_unsubscribe_stops_delivery(self):
+        self.subscribe()
+        status, _ = websub_hub.handle_request({
+            'hub.mode': 'unsubscribe', 'hub.topic': topic_url(), 'hub.callback': self.callback,
+        })
+        self.assertEqual(status, 202)
+        self.assertTrue(websub_hub.join(timeout=5))
+        self.assertEqual(crud.get_websub_subscriptions(), [])
+
+        self.publish_item("https://example.com/c")
+        self.assertEqual(websub_hub.flush(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from unittest.mock import patch
+
+from app import worker as worker_module
+from app.core import event_bus, ITEM_CREATED
+from app.core.work_queue import SQLiteWorkQueue, RedisWorkQueue, redis
+from app.database import crud
+from app.database.models import QueueTask, Source, ScrapedItem
+from app.services import scraper_service
+from app.services.item_watcher import ItemWatcher
+from app.worker import Worker
+
+class WorkQueueContract:
+    """两种后端共用的租约语义测试"""
+
+    def test_lease_complete(self):
+        self.queue.enqueue('scrape_source', {'source_id': 1})
+        lease = self.queue.lease('w1', 60)
+        self.assertEqual((lease.name, lease.payload, lease.attempts), ('scrape_source', {'source_id': 1}, 1))
+        self.assertIsNone(self.queue.lease('w2', 60))  # 租约期间不可见
+        self.assertTrue(self.queue.complete(lease))
+        self.assertEqual(self.queue.size(), 0)
+
+    def test_expired_lease_is_reclaimed(self):
+        self.queue.enqueue('scrape_source', {'source_id': 1})
+        stale = self.queue.lease('w1', 0.5)
+        time.sleep(0.6)
+        lease = self.queue.lease('w2', 60)
+        self.assertEqual((lease.task_id, lease.attempts), (stale.task_id, 2))
+        # 旧 worker 的续约/提交被忽略
+        self.assertFalse(self.queue.heartbeat(stale, 60))
+        self.assertFalse(self.queue.complete(stale))
+        self.assertTrue(self.queue.complete(lease))
+
+    def test_heartbeat_extends_lease(self):
+        self.queue.enqueue('scrape_source', {'source_id': 1})
+        lease = self.queue.lease('w1', 0.5)
+        self.assertTrue(self.queue.heartbeat(lease, 60))
+        time.sleep(0.6)
+        self.assertIsNone(self.queue.lease('w2', 60))
+
+    def test_dedupe_until_done(self):
+        self.assertIsNotNone(self.queue.enqueue('scrape_source', {'source_id': 1}, dedupe_key='s:1'))
+        self.assertIsNone(self.queue.enqueue('scrape_source', {'source_id': 1}, dedupe_key='s:1'))
+        self.queue.complete(self.queue.lease('w1', 60))
+        self.assertIsNotNone(self.queue.enqueue('scrape_source', {'source_id': 1}, dedupe_key='s:1'))
+
+    def test_fail_retries_then_gives_up(self):
+        self.queue.enqueue('scrape_source', {'source_id': 1})
+        self.assertTrue(self.queue.fail(self.queue.lease('w1', 60), 'boom'))
+        self.assertTrue(self.queue.fail(self.queue.lease('w1', 60), 'boom'))
+        self.assertFalse(self.queue.fail(self.queue.lease('w1', 60), 'boom'))
+        self.assertIsNone(self.queue.lease('w1', 60))
+        self.assertEqual(self.queue.size(), 0)
+
+class TestSQLiteWorkQueue(WorkQueueContract, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{self.tmp}/queue.db", connect_args={"check_same_thread": False})
+        self.queue = SQLiteWorkQueue(self.engine, max_attempts=3, retry_delay=0)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def test_dead_task_kept_with_error(self):
+        self.queue.max_attempts = 1
+        self.queue.enqueue('scrape_source', {'source_id': 1})
+        self.queue.fail(self.queue.lease('w1', 60), 'boom')
+        with Session(self.engine) as session:
+            task = session.exec(select(QueueTask)).one()
+        self.assertEqual((task.status, task.last_error), ('dead', 'boom'))
+
+    def test_concurrent_workers_never_share_a_task(self):
+        for i in range(60):
+            self.queue.enqueue('scrape_source', {'source_id': i})
+        # 每个线程用独立的引擎，模拟多个 worker 进程
+        queues = [SQLiteWorkQueue(create_engine(f"sqlite:///{self.tmp}/queue.db")) for _ in range(4)]
+        leased = []
+
+        def drain(queue, name):
+            while (lease := queue.lease(name, 60)) is not None:
+                leased.append(lease.payload['source_id'])
+
+        threads = [threading.Thread(target=drain, args=(q, f'w{i}')) for i, q in enumerate(queues)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(leased), list(range(60)))
+        for queue in queues:
+            queue.engine.dispose()
+
+@unittest.skipUnless(redis and os.getenv('TEST_REDIS_URL'), '需要 redis 包和 TEST_REDIS_URL 指向的 Redis 兼容服务')
+class TestRedisWorkQueue(WorkQueueContract, unittest.TestCase):
+    def setUp(self):
+        self.queue = RedisWorkQueue(os.getenv('TEST_REDIS_URL'), prefix=f'test:{os.getpid()}:{id(self)}',
+                                    max_attempts=3, retry_delay=0)
+
+    def tearDown(self):
+        keys = self.queue.client.keys(self.queue.prefix + ':*')
+        if keys:
+            self.queue.client.delete(*keys)
+
+    def test_requeued_lease_rejects_old_holder(self):
+        for i in range(2):
+            self.queue.enqueue('scrape_source', {'source_id': i})
+        stale = [self.queue.lease('w1', 0.5), self.queue.lease('w2', 0.5)]
+        time.sleep(0.6)
+        # 两个租约都已过期并放回 pending 列表，这次只领取其中一个，另一个留在待领取队列中
+        lease = self.queue.lease('w3', 60)
+        waiting = next(s for s in stale if s.task_id != lease.task_id)
+        self.assertFalse(self.queue.heartbeat(waiting, 60))
+        self.assertFalse(self.queue.complete(waiting))
+        self.assertEqual(self.queue.size(), 2)
+        again = self.queue.lease('w4', 60)
+        self.assertEqual((again.task_id, again.name, again.payload), (waiting.task_id, 'scrape_source', waiting.payload))
+        self.assertTrue(self.queue.complete(again))
+        self.assertTrue(self.queue.complete(lease))
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{self.tmp}/app.db", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(self.engine)
+        patch.object(crud, 'engine', self.engine).start()
+        self.queue = SQLiteWorkQueue(self.engine, retry_delay=0)
+        self.calls = []
+        patch.dict(worker_module.TASKS, {'record': self.record}).start()
+
+    def tearDown(self):
+        patch.stopall()
+        self.engine.dispose()
+        shutil.rmtree(self.tmp)
+
+    def record(self, value, fail=False, sleep=0):
+        time.sleep(sleep)
+        self.calls.append(value)
+        if fail:
+            raise RuntimeError('boom')
+
+    def test_run_once(self):
+        self.queue.enqueue('record', {'value': 1})
+        worker = Worker(self.queue, name='w1')
+        self.assertTrue(worker.run_once())
+        self.assertFalse(worker.run_once())
+        self.assertEqual((self.calls, self.queue.size()), ([1], 0))
+
+    def test_failure_is_retried(self):
+        self.queue.enqueue('record', {'value': 1, 'fail': True})
+        worker = Worker(self.queue, name='w1')
+        worker.run_once()
+        worker.run_once()
+        self.assertEqual(self.calls, [1, 1])
+        self.assertEqual(self.queue.size(), 1)  # 第三次可见
+
+    def test_heartbeat_keeps_long_task_leased(self):
+        self.queue.enqueue('record', {'value': 1, 'sleep': 1.2})
+        worker = Worker(self.queue, name='w1', visibility_timeout=1, heartbeat_interval=0.2)
+        thread = threading.Thread(target=worker.run_once)
+        thread.start()
+        time.sleep(1.1)
+        self.assertIsNone(self.queue.lease('w2', 60))  # 续约中，其它 worker 领不到
+        thread.join()
+        self.assertEqual(self.calls, [1])
+
+    def test_stop_shares_one_deadline(self):
+        for i in range(3):
+            self.queue.enqueue('record', {'value': i, 'sleep': 2})
+        worker = Worker(self.queue, concurrency=3, name='w1', poll_interval=0.05)
+        worker.start()
+        deadline = time.monotonic() + 5
+        while worker.load()['busy'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)  # 等三个线程都领到任务
+        started = time.monotonic()
+        worker.stop(0.5)
+        self.assertLess(time.monotonic() - started, 1.0)  # 不是 3 × 0.5 秒
+        for thread in worker.threads:
+            thread.join(5)
+
+    def test_scheduler_enqueues_to_shared_queue(self):
+        with patch.object(scraper_service.settings, 'QUEUE_BACKEND', 'sqlite'), \
+                patch.object(scraper_service, 'shared_queue', return_value=self.queue):
+            scraper_service.scrape_source_async(7)
+            scraper_service.scrape_source_async(7)
+        lease = self.queue.lease('w1', 60)
+        self.assertEqual((lease.name, lease.payload), ('scrape_source', {'source_id': 7}))
+        self.assertEqual(self.queue.size(), 1)
+
+    def test_item_watcher_publishes_items_from_other_processes(self):
+        with Session(self.engine) as session:
+            source = Source(name='B站', url='https://www.bilibili.com', platform='bilibili')
+            session.add(source)
+            session.commit()
+            source_id = source.id
+        watcher = ItemWatcher()
+        watcher.last_id = crud.get_max_item_id()
+        events, unsubscribe = event_bus.subscribe_queue(ITEM_CREATED)
+        try:
+            for i in range(3):
+                crud.create_scraped_item(ScrapedItem(source_id=source_id, title=f'标题{i}', url=f'https://e.com/{i}', content=''))
+            self.assertEqual(watcher.poll(), 3)
+            self.assertEqual(watcher.poll(), 0)
+            self.assertEqual([events.get_nowait()['title'] for _ in range(3)], ['标题0', '标题1', '标题2'])
+        finally:
+            unsubscribe()
+
+    def test_only_item_watcher_embeds(self):
+        with Session(self.engine) as session:
+            source = Source(name='B站', url='https://www.bilibili.com', platform='bilibili')
+            session.add(source)
+            session.commit()
+            source_id = source.id
+        watcher = ItemWatcher()
+        watcher.last_id = crud.get_max_item_id()
+        with patch('app.services.item_watcher.embedding_service') as ui_embedding, \
+                patch.object(scraper_service, 'image_pipeline'), \
+                patch.object(watcher, 'embed', True):
+            # 调度进程/worker 入库时不生成向量
+            scraper_service.persist_item(ScrapedItem(source_id=source_id, title='标题', url='https://e.com/x', content='正文'))
+            ui_embedding.submit.assert_not_called()
+            self.assertEqual(watcher.poll(), 1)
+        row = ui_embedding.submit.call_args.args[0]
+        self.assertEqual((row.title, row.content), ('标题', '正文'))
+
+    def test_local_items_published_once_by_watcher(self):
+        with Session(self.engine) as session:
+            source = Source(name='B站', url='https://www.bilibili.com', platform='bilibili')
+            session.add(source)
+            session.commit()
+            source_id = source.id
+        watcher = ItemWatcher()
+        events, unsubscribe = event_bus.subscribe_queue(ITEM_CREATED)
+        try:
+            with patch('app.services.item_watcher.embedding_service'), \
+                    patch.object(scraper_service, 'image_pipeline'):
+                watcher.start(interval=60, embed=True)
+                try:
+                    # 本进程入库时唤醒轮询器立即发布，而不是等待下一个间隔或自己再发一次
+                    scraper_service.persist_item(ScrapedItem(source_id=source_id, title='标题', url='https://e.com/x', content=''))
+                    self.assertEqual(events.get(timeout=5)['title'], '标题')
+                finally:
+                    watcher.stop(5)
+            self.assertTrue(events.empty())
+        finally:
+            unsubscribe()
+
+if __name__ == '__main__':
+    unittest.main()